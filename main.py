@@ -1,5 +1,368 @@
+############################################
+#
+# Runner de samples em um único processo.
+#
+# Executa qualquer subconjunto dos samples
+# reaproveitando imports, .env e clientes HTTP
+# já aquecidos, em sequência, em paralelo
+# (threads) ou em um pool de processos, e
+# imprime um relatório de tempo e tokens por
+# sample.
+#
+# Exemplos:
+#   python main.py                    # todos os samples, em sequência
+#   python main.py 1 2 19-21          # subconjunto
+#   python main.py --paralelo 4       # 4 samples ao mesmo tempo (threads)
+#   python main.py --processos 4      # pool de 4 processos (fork dos imports aquecidos)
+#   python main.py --stub 1-3         # contra o servidor stub (sample033.py), sem API key
+#
+# Em sequência e no pool de processos, cada sample
+# roda com ambiente, diretório e sys.argv
+# restaurados ao final. Em threads o estado do
+# processo é compartilhado e não é tocado: para
+# samples que o alteram, prefira --processos.
+#
+############################################
+
+import argparse
+import contextlib
+import io
+import os
+import runpy
+import sys
+import threading
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent
+
+# Módulos importados uma única vez e compartilhados por todos os samples
+MODULOS_AQUECIDOS = (
+    "dotenv",
+    "langchain_core.messages",
+    "langchain_core.runnables",
+    "langchain.tools",
+    "langchain.agents",
+    "langchain.chat_models",
+    "langchain_openai",
+    "langgraph.checkpoint.memory",
+)
+
+
+@dataclass
+class ResultadoSample:
+    nome: str
+    ok: bool = True
+    tempo: float = 0.0
+    tokens_entrada: int = 0
+    tokens_saida: int = 0
+    saida: str = ""
+    erro: str = ""
+    tokens_por_modelo: dict = field(default_factory=dict)
+    tokens_exatos: bool = True
+
+
+############################################
+# Seleção de samples
+############################################
+
+
+def listar_samples() -> list[Path]:
+    return sorted(RAIZ.glob("sample[0-9][0-9][0-9].py"))
+
+
+def selecionar(argumentos: list[str]) -> list[Path]:
+    """Aceita números ("1", "018"), faixas ("10-15") ou nomes de arquivo."""
+    disponiveis = {int(p.stem.removeprefix("sample")): p for p in listar_samples()}
+    if not argumentos:
+        return list(disponiveis.values())
+    escolhidos = []
+    for argumento in argumentos:
+        argumento = Path(argumento).stem.removeprefix("sample")
+        inicio, _, fim = argumento.partition("-")
+        for numero in range(int(inicio), int(fim or inicio) + 1):
+            if numero not in disponiveis:
+                raise SystemExit(f"sample{numero:03d}.py não existe")
+            if disponiveis[numero] not in escolhidos:
+                escolhidos.append(disponiveis[numero])
+    return escolhidos
+
+
+############################################
+# Aquecimento e isolamento
+############################################
+
+
+def aquecer():
+    """Importa as dependências pesadas e carrega o .env uma única vez."""
+    import importlib
+
+    for modulo in MODULOS_AQUECIDOS:
+        with contextlib.suppress(ImportError):
+            importlib.import_module(modulo)
+    from dotenv import load_dotenv
+
+    load_dotenv(RAIZ / ".env")
+    if str(RAIZ) not in sys.path:
+        sys.path.insert(0, str(RAIZ))
+
+
+class SaidaPorThread(io.TextIOBase):
+    """Substitui sys.stdout: cada thread escreve no seu próprio buffer.
+
+    contextlib.redirect_stdout troca o stdout do processo inteiro, o que
+    misturaria a saída de samples rodando em paralelo.
+    """
+
+    def __init__(self, original):
+        self.original = original
+        self._local = threading.local()
+
+    def capturar(self, buffer: io.StringIO | None):
+        self._local.buffer = buffer
+
+    def write(self, texto: str) -> int:
+        buffer = getattr(self._local, "buffer", None)
+        return (buffer or self.original).write(texto)
+
+    def flush(self):
+        if getattr(self._local, "buffer", None) is None:
+            self.original.flush()
+
+
+@contextlib.contextmanager
+def estado_isolado(caminho: Path):
+    """Restaura o estado global que um sample pode alterar.
+
+    Cada sample roda com globals novos (runpy); aqui protegemos o resto:
+    variáveis de ambiente, sys.argv, sys.path e diretório atual. Só vale
+    com UM sample por processo de cada vez (em sequência ou no pool de
+    processos): em threads, trocar o ambiente ou o diretório no meio da
+    execução de outro sample o quebraria.
+    """
+    ambiente = dict(os.environ)
+    argv, caminho_import, diretorio = list(sys.argv), list(sys.path), os.getcwd()
+    sys.argv[:] = [str(caminho)]
+    try:
+        yield
+    finally:
+        os.environ.clear()
+        os.environ.update(ambiente)
+        sys.argv[:], sys.path[:] = argv, caminho_import
+        os.chdir(diretorio)
+
+
+############################################
+# Contagem de tokens
+############################################
+
+from langchain_core.callbacks import UsageMetadataCallbackHandler
+from langchain_core.tracers.context import register_configure_hook
+from contextvars import ContextVar
+
+VARIAVEL_CONTADOR = "MAIN_CONTAR_TOKENS"
+
+
+class UsoDoProcesso(UsageMetadataCallbackHandler):
+    """Soma o uso de TODAS as chamadas de modelo do processo.
+
+    Registrado como hook de configuração: toda execução ganha uma instância,
+    inclusive em threads criadas pelos próprios samples (que não herdam o
+    contextvar de get_usage_metadata_callback). Todas as instâncias
+    escrevem no mesmo dicionário.
+    """
+
+    _lock_processo = threading.Lock()
+    _uso_processo: dict = {}
+
+    def __init__(self):
+        super().__init__()
+        self._lock = UsoDoProcesso._lock_processo
+        self.usage_metadata = UsoDoProcesso._uso_processo
+
+    @classmethod
+    def retrato(cls) -> dict:
+        with cls._lock_processo:
+            return {modelo: dict(uso) for modelo, uso in cls._uso_processo.items()}
+
+
+register_configure_hook(ContextVar("uso_do_processo", default=None), True, UsoDoProcesso, VARIAVEL_CONTADOR)
+
+
+def diferenca_de_uso(antes: dict, depois: dict) -> dict:
+    return {
+        modelo: {chave: uso.get(chave, 0) - antes.get(modelo, {}).get(chave, 0)
+                 for chave in ("input_tokens", "output_tokens", "total_tokens")}
+        for modelo, uso in depois.items()
+        if uso != antes.get(modelo)
+    }
+
+
+############################################
+# Execução de um sample
+############################################
+
+
+def executar_sample(caminho: Path, mostrar_saida: bool = False, isolar: bool = True) -> ResultadoSample:
+    """Executa um sample capturando saída, tempo e tokens.
+
+    isolar=True (sequencial e pool de processos): estado global restaurado
+    e tokens exatos, pela diferença do contador do processo. isolar=False
+    (threads): nada global é tocado e os tokens vêm do contextvar, que não
+    vê threads criadas pelo próprio sample.
+    """
+    from langchain_core.callbacks import get_usage_metadata_callback
+
+    resultado = ResultadoSample(caminho.name, tokens_exatos=isolar)
+    buffer = io.StringIO()
+    stdout = sys.stdout
+    if isinstance(stdout, SaidaPorThread) and not mostrar_saida:
+        stdout.capturar(buffer)
+
+    inicio = time.perf_counter()
+    antes = UsoDoProcesso.retrato()
+    try:
+        with contextlib.ExitStack() as pilha:
+            if isolar:
+                pilha.enter_context(estado_isolado(caminho))
+            callback = pilha.enter_context(get_usage_metadata_callback())
+            try:
+                runpy.run_path(str(caminho), run_name="__main__")
+            finally:
+                if isolar:
+                    resultado.tokens_por_modelo = diferenca_de_uso(antes, UsoDoProcesso.retrato())
+                else:
+                    resultado.tokens_por_modelo = dict(callback.usage_metadata)
+    except BaseException as erro:  # SystemExit/KeyboardInterrupt de um sample não derrubam o runner
+        if isinstance(erro, KeyboardInterrupt):
+            raise
+        resultado.ok = False
+        resultado.erro = "".join(traceback.format_exception_only(type(erro), erro)).strip()
+    finally:
+        resultado.tempo = time.perf_counter() - inicio
+        if isinstance(stdout, SaidaPorThread):
+            stdout.capturar(None)
+
+    resultado.saida = buffer.getvalue()
+    for uso in resultado.tokens_por_modelo.values():
+        resultado.tokens_entrada += uso.get("input_tokens", 0)
+        resultado.tokens_saida += uso.get("output_tokens", 0)
+    return resultado
+
+
+def _executar_em_processo(caminho: Path, mostrar_saida: bool) -> ResultadoSample:
+    # No worker do pool: stdout próprio capturado por thread, como no modo em processo
+    if not isinstance(sys.stdout, SaidaPorThread):
+        sys.stdout = SaidaPorThread(sys.stdout)
+    return executar_sample(caminho, mostrar_saida)
+
+
+############################################
+# Relatório
+############################################
+
+
+def imprimir_relatorio(resultados: list[ResultadoSample], tempo_total: float, uso_total: dict | None = None):
+    print("=" * 70)
+    print("RELATÓRIO")
+    print("=" * 70)
+    print(f"{'sample':<14} {'status':<6} {'tempo':>8} {'tokens in':>10} {'tokens out':>11}")
+    for r in resultados:
+        status = "ok" if r.ok else "ERRO"
+        marca = "" if r.tokens_exatos else "~"
+        print(f"{r.nome:<14} {status:<6} {r.tempo:>7.2f}s {marca + str(r.tokens_entrada):>10} "
+              f"{marca + str(r.tokens_saida):>11}")
+    soma = sum(r.tempo for r in resultados)
+    print("-" * 70)
+    print(
+        f"{'TOTAL':<14} {sum(r.ok for r in resultados):>2}/{len(resultados):<3} {soma:>7.2f}s "
+        f"{sum(r.tokens_entrada for r in resultados):>10} {sum(r.tokens_saida for r in resultados):>11}"
+    )
+    print(f"Tempo de parede: {tempo_total:.2f}s (soma dos samples: {soma:.2f}s)")
+    if uso_total is not None and not all(r.tokens_exatos for r in resultados):
+        entrada = sum(uso.get("input_tokens", 0) for uso in uso_total.values())
+        saida = sum(uso.get("output_tokens", 0) for uso in uso_total.values())
+        print(f"~ em threads, só o contextvar separa os samples e ele não vê threads criadas por eles;\n"
+              f"  total exato do processo: {entrada} tokens in, {saida} tokens out")
+    falhas = [r for r in resultados if not r.ok]
+    if falhas:
+        print("\nFalhas:")
+        for r in falhas:
+            print(f"  {r.nome}: {r.erro.splitlines()[-1]}")
+
+
+############################################
+# Ponto de entrada
+############################################
+
+
 def main():
-    print("Hello from langchainofficialdocs!")
+    parser = argparse.ArgumentParser(description="Executa samples em um único processo.")
+    parser.add_argument("samples", nargs="*", help='números, faixas ou arquivos (ex.: 1 5-8 sample020.py)')
+    modo = parser.add_mutually_exclusive_group()
+    modo.add_argument("--paralelo", type=int, default=1, metavar="N", help="samples simultâneos em threads")
+    modo.add_argument("--processos", type=int, default=0, metavar="N", help="usar um pool de N processos")
+    parser.add_argument("--stub", action="store_true", help="usar o servidor stub do sample033.py")
+    parser.add_argument("--mostrar-saida", action="store_true", help="imprimir a saída de cada sample")
+    args = parser.parse_args()
+
+    caminhos = selecionar(args.samples)
+    inicio = time.perf_counter()
+    aquecer()
+    print(f"Imports aquecidos em {time.perf_counter() - inicio:.2f}s")
+
+    servidor = None
+    if args.stub:
+        from sample033 import ServidorStub, StubConfig
+
+        servidor = ServidorStub(StubConfig(latencia_ms=20, jitter_ms=5)).iniciar()
+        os.environ["OPENAI_API_BASE"] = servidor.base_url
+        os.environ.setdefault("OPENAI_API_KEY", "stub")
+        print(f"Servidor stub em {servidor.base_url}")
+
+    mostrar = args.mostrar_saida and args.paralelo == 1 and not args.processos
+    os.environ[VARIAVEL_CONTADOR] = "true"
+    sys.stdout = SaidaPorThread(sys.stdout)
+    uso_inicial = UsoDoProcesso.retrato()
+    inicio = time.perf_counter()
+    try:
+        if args.processos:
+            # fork: os workers herdam os módulos já importados (copy-on-write)
+            import multiprocessing
+
+            contexto = multiprocessing.get_context("fork" if sys.platform != "win32" else "spawn")
+            with ProcessPoolExecutor(max_workers=args.processos, mp_context=contexto) as executor:
+                resultados = list(executor.map(_executar_em_processo, caminhos, [False] * len(caminhos)))
+        elif args.paralelo > 1:
+            # Threads compartilham ambiente, diretório e sys.argv: nada disso é
+            # trocado por sample. Ajustado UMA vez, antes de qualquer sample rodar,
+            # para que nenhum deles leia os argumentos do runner.
+            sys.argv[:] = [sys.argv[0]]
+            with ThreadPoolExecutor(max_workers=args.paralelo) as executor:
+                resultados = list(executor.map(
+                    lambda caminho: executar_sample(caminho, isolar=False), caminhos
+                ))
+        else:
+            resultados = []
+            for caminho in caminhos:
+                if mostrar:
+                    print(f"\n{'#' * 70}\n# {caminho.name}\n{'#' * 70}")
+                resultados.append(executar_sample(caminho, mostrar))
+    finally:
+        sys.stdout = sys.stdout.original
+        if servidor:
+            servidor.encerrar()
+
+    if args.mostrar_saida and not mostrar:
+        for r in resultados:
+            print(f"\n{'#' * 70}\n# {r.nome}\n{'#' * 70}\n{r.saida}")
+    print()
+    imprimir_relatorio(resultados, time.perf_counter() - inicio,
+                       diferenca_de_uso(uso_inicial, UsoDoProcesso.retrato()))
+    sys.exit(0 if all(r.ok for r in resultados) else 1)
 
 
 if __name__ == "__main__":
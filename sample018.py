@@ -33,7 +33,7 @@ Use as ferramentas quando necessário e forneça respostas completas.
 # PASSO 2 - Definir ferramentas
 ############################################
 
-from langchain.tools import tool
+from langchain.tools import tool, ToolRuntime
 import time
 
 
@@ -75,17 +75,26 @@ def calcular_estatisticas(numeros: list[float]) -> str:
 
 
 @tool
-def gerar_relatorio(topico: str) -> str:
+def gerar_relatorio(topico: str, runtime: ToolRuntime = None) -> str:
     """Gerar um relatório detalhado sobre um tema."""
-    # Simular processamento longo
-    time.sleep(1.5)
-
+    secoes = [
+        ("Resumo", f"Este é um relatório abrangente sobre {topico}."),
+        ("Análise", "Dados indicam crescimento significativo na área."),
+        ("Conclusão", "Recomenda-se investimento contínuo."),
+    ]
+    # Simular processamento longo (1.5s), publicando cada seção pronta no
+    # stream "custom": quem consome o stream vê as seções antes de a
+    # ferramenta terminar. Fora de um agente (sem runtime) só não publica
+    for i, (titulo, texto) in enumerate(secoes, 1):
+        time.sleep(0.5)
+        if runtime is not None:
+            runtime.stream_writer({"pct": i / len(secoes), "parcial": f"{titulo}: {texto}"})
+
+    linhas = "\n".join(f"{titulo}: {texto}" for titulo, texto in secoes)
     return f"""
 RELATÓRIO: {topico.upper()}
 
-Resumo: Este é um relatório abrangente sobre {topico}.
-Análise: Dados indicam crescimento significativo na área.
-Conclusão: Recomenda-se investimento contínuo.
+{linhas}
 """
 
 
@@ -305,9 +314,15 @@ import sys
 steps = ["Iniciando", "Processando", "Gerando resposta"]
 step_index = 0
 
-for chunk in agent.stream({
+# Com "custom" junto de "values", o progresso publicado por gerar_relatorio
+# chega ENQUANTO a ferramenta roda; cada item vem como (modo, chunk)
+for mode, chunk in agent.stream({
     "messages": [{"role": "user", "content": "Busque sobre LangChain e gere um relatório"}]
-}, stream_mode="values"):
+}, stream_mode=["values", "custom"]):
+    if mode == "custom":
+        print(f"   {chunk['pct']:.0%} {chunk['parcial']}")
+        continue
+
     latest_message = chunk["messages"][-1]
 
     if hasattr(latest_message, 'tool_calls') and latest_message.tool_calls:
@@ -375,6 +390,8 @@ print("""
    - Streaming melhora percepção de velocidade
    - Usuário vê progresso imediato a cada passo
    - Especialmente útil com ferramentas lentas (API calls, DB queries)
+   - Dentro de uma ferramenta lenta, publique progresso pelo ToolRuntime
+     (gerar_relatorio) e consuma com stream_mode=["values", "custom"]
    - Use flush=True para output imediato no terminal
 
 8. TRATAMENTO EM PRODUÇÃO:
@@ -399,5 +416,6 @@ print("""
 11. PRÓXIMOS PASSOS:
    - Para combinar streaming com memória, veja sample008.py
    - Para tratamento de erros, veja sample011.py
+   - Para progresso limitado e coalescido de ferramentas, veja sample042.py
    - Para estado customizado, veja sample016.py e sample017.py
 """)
@@ -0,0 +1,853 @@
+############################################
+#
+# Exemplo de Servidor Stub compatível com a
+# API de Chat Completions da OpenAI, para
+# testes de carga e latência SEM custo e SEM
+# acesso à internet.
+#
+# O ChatOpenAI aceita base_url, então basta
+# apontá-lo para o servidor local. O stub
+# suporta streaming (SSE), tool calls,
+# logprobs, usage, structured output, latência
+# configurável, taxa de tokens e injeção de
+# erros (500 e 429).
+#
+# Uso como servidor avulso:
+#   python sample033.py --servidor 8000
+#   OPENAI_API_BASE=http://127.0.0.1:8000/v1 python sample001.py
+#
+############################################
+
+
+############################################
+# PASSO 1 - Configuração do comportamento do stub
+############################################
+
+from dataclasses import dataclass, field
+import math
+import random
+
+
+@dataclass
+class StubConfig:
+    # Distribuição do tempo até o primeiro token: "fixa", "uniforme", "normal" ou "lognormal"
+    latencia: str = "fixa"
+    latencia_ms: float = 50.0  # valor base (média) do tempo até o primeiro token
+    jitter_ms: float = 20.0  # dispersão usada pelas distribuições não fixas
+    tokens_por_segundo: float = 0.0  # 0 = sem limite (todos os tokens de uma vez)
+    tokens_resposta: int = 30  # tamanho aproximado das respostas de texto
+    taxa_erro: float = 0.0  # probabilidade de responder HTTP 500
+    taxa_429: float = 0.0  # probabilidade de responder HTTP 429 (rate limit)
+    retry_after: float = 1.0  # valor do header Retry-After nas respostas 429
+    latencia_conexao_ms: float = 0.0  # custo de abrir cada conexão (simula handshake TCP + TLS)
+    seed: int | None = None  # semente para resultados reproduzíveis
+    rng: random.Random = field(init=False, repr=False)
+
+    def __post_init__(self):
+        self.rng = random.Random(self.seed)
+
+    def sortear_latencia(self) -> float:
+        """Sorteia o tempo até o primeiro token, em segundos."""
+        media, jitter = self.latencia_ms, self.jitter_ms
+        match self.latencia:
+            case "fixa":
+                valor = media
+            case "uniforme":
+                valor = self.rng.uniform(media - jitter, media + jitter)
+            case "normal":
+                valor = self.rng.gauss(media, jitter)
+            case "lognormal":
+                # Parâmetros escolhidos para que a média seja latencia_ms (cauda longa à direita)
+                sigma = math.sqrt(math.log(1 + (jitter / media) ** 2)) if media > 0 else 0.0
+                mu = math.log(media) - sigma**2 / 2 if media > 0 else 0.0
+                valor = self.rng.lognormvariate(mu, sigma)
+            case _:
+                raise ValueError(f"Distribuição de latência desconhecida: {self.latencia}")
+        return max(valor, 0.0) / 1000
+
+    def atraso_por_token(self) -> float:
+        return 1 / self.tokens_por_segundo if self.tokens_por_segundo > 0 else 0.0
+
+
+############################################
+# PASSO 2 - Gerar respostas a partir do request
+############################################
+
+import json
+import re
+import time
+import uuid
+
+TOKEN_RE = re.compile(r"\S+\s*|\s+")
+
+
+def tokenizar(texto: str) -> list[str]:
+    """Divide o texto em 'tokens' aproximados (palavra + espaço)."""
+    return TOKEN_RE.findall(texto)
+
+
+def contar_tokens_prompt(messages: list[dict]) -> int:
+    """Estimativa simples: ~4 caracteres por token."""
+    total = 0
+    for msg in messages:
+        content = msg.get("content") or ""
+        if isinstance(content, list):
+            content = " ".join(str(part.get("text", "")) for part in content if isinstance(part, dict))
+        total += len(str(content)) // 4 + 4
+    return max(total, 1)
+
+
+def exemplo_do_schema(schema: dict, defs: dict | None = None) -> object:
+    """Gera um valor válido (e determinístico) para um JSON Schema."""
+    defs = defs if defs is not None else schema.get("$defs", {})
+    if "$ref" in schema:
+        return exemplo_do_schema(defs[schema["$ref"].split("/")[-1]], defs)
+    for chave in ("anyOf", "oneOf"):
+        if chave in schema:
+            opcoes = [s for s in schema[chave] if s.get("type") != "null"] or schema[chave]
+            return exemplo_do_schema(opcoes[0], defs)
+    if "allOf" in schema:
+        return exemplo_do_schema(schema["allOf"][0], defs)
+    if "enum" in schema:
+        return schema["enum"][0]
+    if "const" in schema:
+        return schema["const"]
+
+    tipo = schema.get("type", "object")
+    if isinstance(tipo, list):
+        tipo = next((t for t in tipo if t != "null"), "null")
+    match tipo:
+        case "object":
+            props = schema.get("properties", {})
+            return {nome: exemplo_do_schema(sub, defs) for nome, sub in props.items()}
+        case "array":
+            quantidade = max(schema.get("minItems", 1), 1)
+            return [exemplo_do_schema(schema.get("items", {}), defs) for _ in range(quantidade)]
+        case "string":
+            if schema.get("format") == "email":
+                return "contato@exemplo.com"
+            if schema.get("format") == "date":
+                return "2025-01-01"
+            return "exemplo"
+        case "integer":
+            return int(schema.get("minimum", 1))
+        case "number":
+            return float(schema.get("minimum", 1.0))
+        case "boolean":
+            return True
+        case _:
+            return None
+
+
+def ultima_mensagem(messages: list[dict], role: str | None = None) -> dict:
+    for msg in reversed(messages):
+        if role is None or msg.get("role") == role:
+            return msg
+    return {}
+
+
+def texto_da_mensagem(msg: dict) -> str:
+    content = msg.get("content") or ""
+    if isinstance(content, list):
+        return " ".join(str(part.get("text", "")) for part in content if isinstance(part, dict))
+    return str(content)
+
+
+def palavras_da_tool(ferramenta: dict) -> set[str]:
+    """Palavras-chave de uma tool: partes do nome e palavras longas da descrição."""
+    palavras = {parte for parte in ferramenta["name"].lower().split("_") if len(parte) >= 4}
+    palavras |= {p for p in re.findall(r"\w+", (ferramenta.get("description") or "").lower()) if len(p) >= 5}
+    return palavras
+
+
+def escolher_tools(payload: dict) -> list[dict]:
+    """Decide quais tools o 'modelo' chama, imitando o comportamento de um LLM.
+
+    Regras:
+    - tool_choice="none" ou sem tools: responde com texto
+    - tool_choice com nome específico: chama essa tool
+    - tool_choice="required": chama as tools citadas na pergunta (ou a primeira)
+    - tool_choice="auto": chama as tools cujo nome (ou descrição) aparece na pergunta;
+      tools de saída estruturada (ToolStrategy, nome em CamelCase) são
+      chamadas quando nenhuma outra tool se aplica
+    """
+    tools = [t["function"] for t in payload.get("tools") or [] if t.get("type") == "function"]
+    escolha = payload.get("tool_choice", "auto")
+    if not tools or escolha == "none":
+        return []
+    if isinstance(escolha, dict):
+        nome = escolha.get("function", {}).get("name")
+        return [t for t in tools if t["name"] == nome][:1]
+
+    messages = payload.get("messages", [])
+    estruturadas = [t for t in tools if t["name"][:1].isupper()]
+    comuns = [t for t in tools if not t["name"][:1].isupper()]
+
+    if ultima_mensagem(messages).get("role") == "tool":
+        if estruturadas:
+            return estruturadas[:1]
+        return comuns[:1] if escolha == "required" else []
+
+    pergunta = texto_da_mensagem(ultima_mensagem(messages, "user")).lower()
+    citadas = [t for t in comuns if palavras_da_tool(t) & set(re.findall(r"\w+", pergunta))]
+    if citadas and payload.get("parallel_tool_calls") is False:
+        citadas = citadas[:1]
+    if citadas:
+        return citadas
+    if estruturadas:
+        return estruturadas[:1]
+    return tools[:1] if escolha == "required" else []
+
+
+def gerar_texto(payload: dict, config: StubConfig) -> str:
+    messages = payload.get("messages", [])
+    ultima = ultima_mensagem(messages)
+    if ultima.get("role") == "tool":
+        base = f"Com base no resultado da ferramenta: {texto_da_mensagem(ultima)[:120]}"
+    else:
+        base = f"Resposta simulada para: {texto_da_mensagem(ultima_mensagem(messages, 'user'))[:120]}"
+    palavras = tokenizar(base)
+    enchimento = "lorem ipsum dolor sit amet consectetur adipiscing elit".split()
+    i = 0
+    while len(palavras) < config.tokens_resposta:
+        palavras.append(" " + enchimento[i % len(enchimento)])
+        i += 1
+    return "".join(palavras).strip()
+
+
+def gerar_resposta(payload: dict, config: StubConfig) -> dict:
+    """Monta a 'mensagem do assistente' (texto, tool calls ou JSON estruturado)."""
+    tool_calls = []
+    for ferramenta in escolher_tools(payload):
+        args = exemplo_do_schema(ferramenta.get("parameters") or {"type": "object"})
+        tool_calls.append({
+            "id": f"call_{uuid.uuid4().hex[:24]}",
+            "type": "function",
+            "function": {"name": ferramenta["name"], "arguments": json.dumps(args, ensure_ascii=False)},
+        })
+    if tool_calls:
+        return {"content": None, "tool_calls": tool_calls, "finish_reason": "tool_calls"}
+
+    formato = payload.get("response_format") or {}
+    if formato.get("type") == "json_schema":
+        objeto = exemplo_do_schema(formato["json_schema"].get("schema", {}))
+        return {"content": json.dumps(objeto, ensure_ascii=False), "tool_calls": [], "finish_reason": "stop"}
+    if formato.get("type") == "json_object":
+        return {"content": json.dumps({"resposta": "exemplo"}), "tool_calls": [], "finish_reason": "stop"}
+
+    return {"content": gerar_texto(payload, config), "tool_calls": [], "finish_reason": "stop"}
+
+
+def gerar_logprobs(tokens: list[str], top: int, rng: random.Random) -> list[dict]:
+    conteudo = []
+    for token in tokens:
+        logprob = -rng.random() * 0.5
+        alternativas = [
+            {"token": token, "logprob": logprob, "bytes": list(token.encode())}
+        ] + [
+            {"token": f"{token.strip()}_{i}", "logprob": logprob - i - 1, "bytes": None}
+            for i in range(max(top - 1, 0))
+        ]
+        conteudo.append({
+            "token": token,
+            "logprob": logprob,
+            "bytes": list(token.encode()),
+            "top_logprobs": alternativas[:top],
+        })
+    return conteudo
+
+
+def calcular_usage(payload: dict, resposta: dict) -> dict:
+    prompt_tokens = contar_tokens_prompt(payload.get("messages", []))
+    texto = resposta["content"] or "".join(tc["function"]["arguments"] for tc in resposta["tool_calls"])
+    completion_tokens = max(len(tokenizar(texto)), 1)
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens,
+    }
+
+
+############################################
+# PASSO 3 - O servidor HTTP (somente biblioteca padrão)
+############################################
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import sys
+import threading
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 mantém a conexão aberta (keep-alive), como a API real
+    protocol_version = "HTTP/1.1"
+    # Sem Nagle: headers e corpo saem em writes separados e o ACK atrasado somaria ~40ms
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        # Uma instância do handler por conexão TCP: contamos conexões aqui
+        super().setup()
+        self.server.registrar("conexoes")
+        time.sleep(self.server.config.latencia_conexao_ms / 1000)
+
+    def log_message(self, format, *args):
+        pass  # silenciar o log padrão de cada request
+
+    def _enviar_json(self, status: int, corpo: dict, headers: dict | None = None):
+        dados = json.dumps(corpo, ensure_ascii=False).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(dados)))
+        for chave, valor in (headers or {}).items():
+            self.send_header(chave, valor)
+        self.end_headers()
+        self.wfile.write(dados)
+
+    def _enviar_chunk(self, dados: bytes):
+        self.wfile.write(f"{len(dados):X}\r\n".encode() + dados + b"\r\n")
+        self.wfile.flush()
+
+    def do_GET(self):
+        if self.path.rstrip("/").endswith("/models"):
+            self._enviar_json(200, {"object": "list", "data": [{"id": "gpt-4o-mini", "object": "model"}]})
+        elif self.path.startswith("/stub/stats"):
+            self._enviar_json(200, self.server.estatisticas())
+        else:
+            self._enviar_json(404, {"error": {"message": "Not found", "type": "invalid_request_error"}})
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._enviar_json(404, {"error": {"message": "Not found", "type": "invalid_request_error"}})
+            return
+        # Corpo inválido: 400 no formato de erro da OpenAI, como a API real
+        try:
+            tamanho = int(self.headers.get("Content-Length") or 0)
+            payload = json.loads(self.rfile.read(tamanho) or b"{}")
+        except ValueError as erro:  # Content-Length, JSON e UTF-8 inválidos
+            self._enviar_json(400, {"error": {"message": f"Corpo inválido: {erro}", "type": "invalid_request_error"}})
+            return
+        mensagens = payload.get("messages", []) if isinstance(payload, dict) else None
+        if not isinstance(mensagens, list) or not all(isinstance(m, dict) for m in mensagens):
+            self._enviar_json(400, {"error": {
+                "message": "O corpo precisa ser um objeto com 'messages' (lista de objetos)",
+                "type": "invalid_request_error",
+            }})
+            return
+
+        config: StubConfig = self.server.config
+        self.server.registrar("requisicoes")
+
+        # Injeção de erros (antes de qualquer latência, como um gateway real)
+        sorteio = config.rng.random()
+        if sorteio < config.taxa_429:
+            self.server.registrar("respostas_429")
+            self._enviar_json(
+                429,
+                {"error": {"message": "Rate limit simulado", "type": "rate_limit_exceeded", "code": "rate_limit_exceeded"}},
+                {"Retry-After": str(config.retry_after)},
+            )
+            return
+        if sorteio < config.taxa_429 + config.taxa_erro:
+            self.server.registrar("respostas_500")
+            self._enviar_json(500, {"error": {"message": "Erro interno simulado", "type": "server_error"}})
+            return
+
+        resposta = gerar_resposta(payload, config)
+        usage = calcular_usage(payload, resposta)
+        time.sleep(config.sortear_latencia())
+
+        if payload.get("stream"):
+            self._responder_stream(payload, resposta, usage, config)
+        else:
+            self._responder_completo(payload, resposta, usage, config)
+
+    def _base(self, payload: dict, objeto: str) -> dict:
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex[:24]}",
+            "object": objeto,
+            "created": int(time.time()),
+            "model": payload.get("model", "gpt-4o-mini"),
+            "system_fingerprint": "fp_stub",
+        }
+
+    def _responder_completo(self, payload, resposta, usage, config):
+        # Sem streaming, a taxa de tokens vira tempo total de geração
+        time.sleep(usage["completion_tokens"] * config.atraso_por_token())
+        mensagem = {"role": "assistant", "content": resposta["content"], "refusal": None}
+        if resposta["tool_calls"]:
+            mensagem["tool_calls"] = resposta["tool_calls"]
+        logprobs = None
+        if payload.get("logprobs") and resposta["content"]:
+            tokens = tokenizar(resposta["content"])
+            logprobs = {"content": gerar_logprobs(tokens, payload.get("top_logprobs") or 0, config.rng)}
+        corpo = self._base(payload, "chat.completion") | {
+            "choices": [{
+                "index": 0,
+                "message": mensagem,
+                "logprobs": logprobs,
+                "finish_reason": resposta["finish_reason"],
+            }],
+            "usage": usage,
+        }
+        self._enviar_json(200, corpo)
+
+    def _responder_stream(self, payload, resposta, usage, config):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        base = self._base(payload, "chat.completion.chunk")
+        atraso = config.atraso_por_token()
+
+        def evento(delta: dict, finish_reason=None, logprobs=None):
+            corpo = base | {"choices": [{"index": 0, "delta": delta, "logprobs": logprobs, "finish_reason": finish_reason}]}
+            self._enviar_chunk(f"data: {json.dumps(corpo, ensure_ascii=False)}\n\n".encode())
+
+        evento({"role": "assistant", "content": "", "refusal": None})
+        if resposta["tool_calls"]:
+            for indice, tc in enumerate(resposta["tool_calls"]):
+                evento({"tool_calls": [{
+                    "index": indice,
+                    "id": tc["id"],
+                    "type": "function",
+                    "function": {"name": tc["function"]["name"], "arguments": ""},
+                }]})
+                for fragmento in tokenizar(tc["function"]["arguments"]):
+                    time.sleep(atraso)
+                    evento({"tool_calls": [{"index": indice, "function": {"arguments": fragmento}}]})
+        else:
+            top = payload.get("top_logprobs") or 0
+            for token in tokenizar(resposta["content"]):
+                time.sleep(atraso)
+                logprobs = None
+                if payload.get("logprobs"):
+                    logprobs = {"content": gerar_logprobs([token], top, config.rng)}
+                evento({"content": token}, logprobs=logprobs)
+
+        evento({}, finish_reason=resposta["finish_reason"])
+        if (payload.get("stream_options") or {}).get("include_usage"):
+            corpo = base | {"choices": [], "usage": usage}
+            self._enviar_chunk(f"data: {json.dumps(corpo)}\n\n".encode())
+        self._enviar_chunk(b"data: [DONE]\n\n")
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+
+class StubHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # Backlog maior para suportar rajadas do gerador de carga
+    request_queue_size = 256
+
+    def __init__(self, endereco, config: StubConfig):
+        super().__init__(endereco, StubHandler)
+        self.config = config
+        self._lock = threading.Lock()
+        self._contadores = {"conexoes": 0, "requisicoes": 0, "respostas_429": 0, "respostas_500": 0}
+
+    def handle_error(self, request, client_address):
+        # Clientes que fecham a conexão no meio do stream não são erro do stub
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+    def registrar(self, contador: str):
+        with self._lock:
+            self._contadores[contador] += 1
+
+    def estatisticas(self) -> dict:
+        with self._lock:
+            return dict(self._contadores)
+
+
+class ServidorStub:
+    """Servidor stub rodando em uma thread de fundo.
+
+    Use como context manager ou chame iniciar()/encerrar() manualmente.
+    """
+
+    def __init__(self, config: StubConfig | None = None, host: str = "127.0.0.1", porta: int = 0):
+        self.config = config or StubConfig()
+        self._servidor = StubHTTPServer((host, porta), self.config)
+        self._thread = threading.Thread(target=self._servidor.serve_forever, daemon=True)
+
+    @property
+    def porta(self) -> int:
+        return self._servidor.server_address[1]
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self._servidor.server_address[0]}:{self.porta}/v1"
+
+    def estatisticas(self) -> dict:
+        return self._servidor.estatisticas()
+
+    def iniciar(self) -> "ServidorStub":
+        self._thread.start()
+        return self
+
+    def encerrar(self):
+        self._servidor.shutdown()
+        self._servidor.server_close()
+
+    def __enter__(self) -> "ServidorStub":
+        return self.iniciar()
+
+    def __exit__(self, *exc):
+        self.encerrar()
+
+
+def iniciar_servidor_stub(config: StubConfig | None = None, porta: int = 0) -> ServidorStub:
+    """Inicia o stub em uma porta livre (porta=0) e retorna o servidor já rodando."""
+    return ServidorStub(config, porta=porta).iniciar()
+
+
+############################################
+# PASSO 4 - Apontar o ChatOpenAI para o stub
+############################################
+
+from langchain_openai import ChatOpenAI
+
+
+def criar_modelo_stub(base_url: str, **kwargs) -> ChatOpenAI:
+    """Cria um ChatOpenAI que conversa com o servidor stub."""
+    kwargs.setdefault("model", "gpt-4o-mini")
+    kwargs.setdefault("api_key", "stub")  # o stub não valida a chave
+    return ChatOpenAI(base_url=base_url, **kwargs)
+
+
+############################################
+# PASSO 5 - Modelo stub em processo (sem HTTP)
+############################################
+
+from typing import Any, Iterator
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, convert_to_openai_messages
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from pydantic import Field
+
+
+class ModeloStubLocal(BaseChatModel):
+    """Mesmo comportamento do servidor stub, mas dentro do processo.
+
+    Útil quando o que se quer medir é o NOSSO código (servidores, streaming,
+    agentes) sem o custo de HTTP. Suporta bind_tools e with_structured_output.
+    """
+
+    config: StubConfig = Field(default_factory=StubConfig)
+
+    model_config = {"arbitrary_types_allowed": True}
+
+    @property
+    def _llm_type(self) -> str:
+        return "stub-local"
+
+    def bind_tools(self, tools, *, tool_choice=None, **kwargs):
+        if tool_choice in ("any", True):
+            tool_choice = "required"
+        elif isinstance(tool_choice, str) and tool_choice not in ("auto", "none", "required"):
+            tool_choice = {"type": "function", "function": {"name": tool_choice}}
+        return self.bind(tools=[convert_to_openai_tool(t) for t in tools], tool_choice=tool_choice, **kwargs)
+
+    def _payload(self, messages, kwargs) -> dict:
+        return {
+            "messages": convert_to_openai_messages(messages),
+            "tools": kwargs.get("tools"),
+            "tool_choice": kwargs.get("tool_choice") or "auto",
+            "response_format": kwargs.get("response_format"),
+        }
+
+    def _responder(self, messages, kwargs) -> tuple[dict, dict]:
+        payload = self._payload(messages, kwargs)
+        resposta = gerar_resposta(payload, self.config)
+        usage = calcular_usage(payload, resposta)
+        return resposta, {
+            "input_tokens": usage["prompt_tokens"],
+            "output_tokens": usage["completion_tokens"],
+            "total_tokens": usage["total_tokens"],
+        }
+
+    @staticmethod
+    def _tool_calls(resposta: dict) -> list[dict]:
+        return [
+            {"name": tc["function"]["name"], "args": json.loads(tc["function"]["arguments"]), "id": tc["id"]}
+            for tc in resposta["tool_calls"]
+        ]
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        resposta, usage = self._responder(messages, kwargs)
+        tokens = usage["output_tokens"]
+        time.sleep(self.config.sortear_latencia() + tokens * self.config.atraso_por_token())
+        mensagem = AIMessage(
+            content=resposta["content"] or "",
+            tool_calls=self._tool_calls(resposta),
+            usage_metadata=usage,
+            response_metadata={"finish_reason": resposta["finish_reason"], "model_name": "stub-local"},
+        )
+        return ChatResult(generations=[ChatGeneration(message=mensagem)])
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        resposta, usage = self._responder(messages, kwargs)
+        time.sleep(self.config.sortear_latencia())
+        atraso = self.config.atraso_por_token()
+        if resposta["tool_calls"]:
+            for indice, tc in enumerate(resposta["tool_calls"]):
+                partes = tokenizar(tc["function"]["arguments"])
+                for posicao, parte in enumerate(partes):
+                    time.sleep(atraso)
+                    yield ChatGenerationChunk(message=AIMessageChunk(content="", tool_call_chunks=[{
+                        "name": tc["function"]["name"] if posicao == 0 else None,
+                        "args": parte,
+                        "id": tc["id"] if posicao == 0 else None,
+                        "index": indice,
+                    }]))
+        else:
+            for token in tokenizar(resposta["content"]):
+                time.sleep(atraso)
+                chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+                if run_manager:
+                    run_manager.on_llm_new_token(token, chunk=chunk)
+                yield chunk
+        yield ChatGenerationChunk(message=AIMessageChunk(
+            content="",
+            usage_metadata=usage,
+            response_metadata={"finish_reason": resposta["finish_reason"], "model_name": "stub-local"},
+            chunk_position="last",
+        ))
+
+
+############################################
+# PASSO 6 - Gerador de carga com percentis
+############################################
+
+from concurrent.futures import ThreadPoolExecutor
+from langchain.tools import tool
+
+
+@tool
+def consultar_clima(cidade: str) -> str:
+    """Consultar o clima atual de uma cidade."""
+    return f"Ensolarado, 25°C em {cidade}"
+
+
+def percentil(valores: list[float], p: float) -> float:
+    """Percentil com interpolação linear (p entre 0 e 100)."""
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    posicao = (len(ordenados) - 1) * p / 100
+    inferior = math.floor(posicao)
+    superior = min(inferior + 1, len(ordenados) - 1)
+    return ordenados[inferior] + (ordenados[superior] - ordenados[inferior]) * (posicao - inferior)
+
+
+@dataclass
+class RelatorioCarga:
+    padrao: str
+    concorrencia: int
+    requisicoes: int = 0
+    falhas: int = 0
+    duracao: float = 0.0
+    latencias: list[float] = field(default_factory=list)
+    ttfts: list[float] = field(default_factory=list)
+
+    @property
+    def throughput(self) -> float:
+        return (self.requisicoes - self.falhas) / self.duracao if self.duracao else 0.0
+
+    def linha(self) -> str:
+        ms = lambda valores, p: percentil(valores, p) * 1000
+        ttft = f"{ms(self.ttfts, 50):7.1f}" if self.ttfts else "      -"
+        return (
+            f"{self.padrao:<8} {self.concorrencia:>4} {self.requisicoes:>6} {self.falhas:>6} "
+            f"{self.throughput:>8.1f} {ms(self.latencias, 50):>7.1f} {ms(self.latencias, 90):>7.1f} "
+            f"{ms(self.latencias, 99):>7.1f} {ttft}"
+        )
+
+    @staticmethod
+    def cabecalho() -> str:
+        return (
+            f"{'padrão':<8} {'conc':>4} {'reqs':>6} {'falhas':>6} {'req/s':>8} "
+            f"{'p50 ms':>7} {'p90 ms':>7} {'p99 ms':>7} {'ttft50':>7}"
+        )
+
+
+def gerar_carga(
+    model,
+    padrao: str = "invoke",
+    total: int = 100,
+    concorrencia: int = 10,
+    prompt: str = "Qual o clima em Curitiba?",
+    tamanho_lote: int = 5,
+) -> RelatorioCarga:
+    """Dispara `total` chamadas ao modelo seguindo um dos padrões dos samples.
+
+    Padrões: "invoke" (sample019), "stream" (sample025), "batch" (sample025)
+    e "agent" (create_agent com uma ferramenta, como sample002).
+    """
+    relatorio = RelatorioCarga(padrao, concorrencia)
+    lock = threading.Lock()
+
+    if padrao == "agent":
+        from langchain.agents import create_agent
+
+        agent = create_agent(model=model, tools=[consultar_clima])
+
+    def executar(_):
+        inicio = time.perf_counter()
+        ttft = None
+        try:
+            match padrao:
+                case "invoke":
+                    model.invoke(prompt)
+                case "stream":
+                    for chunk in model.stream(prompt):
+                        if ttft is None and chunk.content:
+                            ttft = time.perf_counter() - inicio
+                case "batch":
+                    model.batch([prompt] * tamanho_lote)
+                case "agent":
+                    agent.invoke({"messages": [{"role": "user", "content": prompt}]})
+                case _:
+                    raise ValueError(f"Padrão desconhecido: {padrao}")
+            falhou = False
+        except Exception:
+            falhou = True
+        elapsed = time.perf_counter() - inicio
+        with lock:
+            relatorio.requisicoes += tamanho_lote if padrao == "batch" else 1
+            relatorio.falhas += (tamanho_lote if padrao == "batch" else 1) if falhou else 0
+            if not falhou:
+                relatorio.latencias.append(elapsed)
+                if ttft is not None:
+                    relatorio.ttfts.append(ttft)
+
+    unidades = math.ceil(total / tamanho_lote) if padrao == "batch" else total
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concorrencia) as executor:
+        list(executor.map(executar, range(unidades)))
+    relatorio.duracao = time.perf_counter() - inicio
+    return relatorio
+
+
+############################################
+# PASSO 7 - Demonstrações práticas
+############################################
+
+from pydantic import BaseModel, Field
+
+
+class Pessoa(BaseModel):
+    nome: str = Field(description="Nome da pessoa")
+    idade: int = Field(description="Idade em anos")
+
+
+def main():
+    config = StubConfig(latencia="normal", latencia_ms=30, jitter_ms=10, tokens_por_segundo=400, seed=42)
+
+    with ServidorStub(config) as servidor:
+        model = criar_modelo_stub(servidor.base_url, temperature=0)
+
+        print("=" * 70)
+        print(f"SERVIDOR STUB RODANDO EM {servidor.base_url}")
+        print("=" * 70)
+
+        print("\n1. invoke():")
+        response = model.invoke("Explique o que é LangChain.")
+        print(f"   Conteúdo: {response.content[:70]}...")
+        print(f"   Usage: {response.usage_metadata}")
+
+        print("\n2. stream() (SSE token a token):")
+        print("   ", end="")
+        for chunk in model.stream("Escreva um poema curto."):
+            print(chunk.content, end="", flush=True)
+        print()
+
+        print("\n3. bind_tools() (tool calls):")
+        response = model.bind_tools([consultar_clima]).invoke("Qual o clima em Curitiba?")
+        print(f"   Tool calls: {response.tool_calls}")
+
+        print("\n4. with_structured_output() (response_format json_schema):")
+        pessoa = model.with_structured_output(Pessoa).invoke("Extraia: João tem 30 anos.")
+        print(f"   {pessoa!r}")
+
+        print("\n5. logprobs:")
+        response = model.bind(logprobs=True, top_logprobs=2).invoke("Diga olá.")
+        primeiros = response.response_metadata["logprobs"]["content"][:3]
+        print(f"   {[(lp['token'], round(lp['logprob'], 3)) for lp in primeiros]}")
+
+        print("\n" + "=" * 70)
+        print("GERADOR DE CARGA (latência normal 30±10ms, 400 tokens/s)")
+        print("=" * 70)
+        print(RelatorioCarga.cabecalho())
+        for padrao in ("invoke", "stream", "batch", "agent"):
+            print(gerar_carga(model, padrao, total=100, concorrencia=10).linha())
+
+        print(f"\nEstatísticas do servidor: {servidor.estatisticas()}")
+
+    print("\n" + "=" * 70)
+    print("INJEÇÃO DE ERROS (20% de 429, 5% de 500, sem retries)")
+    print("=" * 70)
+    config_erros = StubConfig(latencia="lognormal", latencia_ms=20, jitter_ms=15, taxa_429=0.2, taxa_erro=0.05, seed=7)
+    with ServidorStub(config_erros) as servidor:
+        model = criar_modelo_stub(servidor.base_url, max_retries=0)
+        print(RelatorioCarga.cabecalho())
+        print(gerar_carga(model, "invoke", total=100, concorrencia=10).linha())
+        print(f"\nEstatísticas do servidor: {servidor.estatisticas()}")
+
+    ############################################
+    # OBSERVAÇÕES IMPORTANTES
+    ############################################
+
+    print()
+    print("=" * 70)
+    print("OBSERVAÇÕES IMPORTANTES")
+    print("=" * 70)
+    print("""
+1. POR QUE UM STUB LOCAL:
+   - Testes de carga contra a API real custam dinheiro e sofrem rate limit
+   - O stub fala o mesmo protocolo de /v1/chat/completions
+   - Basta trocar base_url (ou OPENAI_API_BASE) - nenhum sample muda
+
+2. O QUE O STUB SIMULA:
+   - Respostas completas e streaming SSE (chunked, com [DONE])
+   - tool_calls (incluindo paralelas e tool_choice forçado)
+   - response_format json_schema (with_structured_output, ProviderStrategy)
+   - logprobs / top_logprobs e usage (inclusive stream_options.include_usage)
+   - Latência: fixa, uniforme, normal ou lognormal (cauda longa)
+   - Taxa de geração (tokens_por_segundo) e erros 500/429 com Retry-After
+   - Custo de abrir conexões (latencia_conexao_ms), como um handshake TLS
+
+3. MODELO STUB LOCAL:
+   - ModeloStubLocal reproduz o stub dentro do processo (sem HTTP)
+   - Mede apenas o custo do seu código: agentes, streaming, servidores
+
+4. GERADOR DE CARGA:
+   - Padrões invoke, stream, batch e agent (os mesmos dos samples)
+   - Concorrência via ThreadPoolExecutor
+   - Relata throughput (req/s), p50/p90/p99 e TTFT no streaming
+
+5. LIMITAÇÕES:
+   - O conteúdo das respostas é sintético (não há "inteligência")
+   - A escolha de tools é por palavras-chave do nome e da descrição da tool
+   - Mede a sobrecarga do CLIENTE (LangChain, HTTP), não do provedor
+
+6. PRÓXIMOS PASSOS:
+   - Para rate limiting no cliente, veja sample027.py
+   - Para métodos de invocação, veja sample025.py
+""")
+
+
+if __name__ == "__main__":
+    if "--servidor" in sys.argv:
+        argumentos = sys.argv[sys.argv.index("--servidor") + 1:]
+        porta = int(argumentos[0]) if argumentos else 8000
+        servidor = ServidorStub(porta=porta)
+        print(f"Servidor stub em {servidor.base_url} (Ctrl+C para encerrar)")
+        try:
+            servidor._servidor.serve_forever()
+        except KeyboardInterrupt:
+            servidor.encerrar()
+    else:
+        main()
@@ -0,0 +1,422 @@
+############################################
+#
+# Exemplo de Gravação e Replay (Cassetes) de
+# chamadas a modelos de chat.
+#
+# Um GRAVADOR envolve qualquer chat model e
+# registra pares requisição/resposta (inclusive
+# os chunks de streaming e seus tempos) em um
+# arquivo compacto (JSON Lines + gzip).
+#
+# Um modelo de REPLAY serve essas respostas
+# novamente, com a latência original ou
+# escalada, sem nenhuma chamada à API. A busca
+# é feita por hash da requisição: O(1) por
+# chamada, mesmo em cassetes enormes.
+#
+############################################
+
+
+############################################
+# PASSO 1 - Chave da requisição (hash normalizado)
+############################################
+
+import hashlib
+import json
+
+from langchain_core.messages import BaseMessage
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+
+def normalizar_mensagem(msg: BaseMessage) -> dict:
+    """Mantém apenas o que influencia a resposta (ids de run são aleatórios)."""
+    normalizada = {"type": msg.type, "content": msg.content}
+    tool_calls = getattr(msg, "tool_calls", None)
+    if tool_calls:
+        normalizada["tool_calls"] = [{"name": tc["name"], "args": tc["args"]} for tc in tool_calls]
+    if msg.type == "tool":
+        normalizada["name"] = msg.name
+    return normalizada
+
+
+def normalizar_tool_choice(escolha) -> str | None:
+    # ChatOpenAI converte "any" em "required" e nomes em dicts: unificamos aqui
+    if isinstance(escolha, dict):
+        return escolha.get("function", {}).get("name") or escolha.get("name")
+    if escolha in ("any", "required", True):
+        return "required"
+    return escolha
+
+
+def normalizar_kwargs(kwargs: dict) -> dict:
+    normalizados = {}
+    if kwargs.get("tools"):
+        ferramentas = [convert_to_openai_tool(t)["function"] for t in kwargs["tools"]]
+        normalizados["tools"] = [{"name": f["name"], "parameters": f.get("parameters")} for f in ferramentas]
+    if kwargs.get("tool_choice") is not None:
+        normalizados["tool_choice"] = normalizar_tool_choice(kwargs["tool_choice"])
+    formato = kwargs.get("response_format")
+    if formato is not None:
+        normalizados["response_format"] = formato.model_json_schema() if hasattr(formato, "model_json_schema") else formato
+    if kwargs.get("stop"):
+        normalizados["stop"] = list(kwargs["stop"])
+    return normalizados
+
+
+def chave_da_requisicao(messages: list[BaseMessage], kwargs: dict) -> str:
+    """Hash estável da requisição: mensagens + tools + tool_choice + formato."""
+    corpo = {
+        "messages": [normalizar_mensagem(m) for m in messages],
+        **normalizar_kwargs(kwargs),
+    }
+    serializado = json.dumps(corpo, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(serializado.encode()).hexdigest()[:32]
+
+
+############################################
+# PASSO 2 - O cassete (índice em memória + arquivo compacto)
+############################################
+
+from collections import defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+import gzip
+import threading
+
+from langchain_core.messages import message_to_dict, messages_from_dict
+
+
+@dataclass
+class Interacao:
+    chave: str
+    latencia: float  # tempo total da chamada original, em segundos
+    resposta: dict | None = None  # mensagem completa (invoke)
+    chunks: list[tuple[float, dict]] = field(default_factory=list)  # (atraso, chunk) no streaming
+
+    def para_json(self) -> dict:
+        dados = {"k": self.chave, "t": round(self.latencia, 4)}
+        if self.resposta is not None:
+            dados["r"] = self.resposta
+        if self.chunks:
+            dados["c"] = [[round(atraso, 4), chunk] for atraso, chunk in self.chunks]
+        return dados
+
+    @classmethod
+    def de_json(cls, dados: dict) -> "Interacao":
+        return cls(
+            chave=dados["k"],
+            latencia=dados["t"],
+            resposta=dados.get("r"),
+            chunks=[(atraso, chunk) for atraso, chunk in dados.get("c", [])],
+        )
+
+
+class Cassete:
+    """Índice chave -> lista de interações, serializado como JSON Lines + gzip.
+
+    Requisições idênticas repetidas são servidas na ordem em que foram
+    gravadas (um cursor por chave), então o replay reproduz o run original.
+    """
+
+    def __init__(self):
+        self._indice: dict[str, list[Interacao]] = defaultdict(list)
+        self._cursores: dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return sum(len(interacoes) for interacoes in self._indice.values())
+
+    def adicionar(self, interacao: Interacao):
+        with self._lock:
+            self._indice[interacao.chave].append(interacao)
+
+    def buscar(self, chave: str) -> Interacao | None:
+        with self._lock:
+            interacoes = self._indice.get(chave)
+            if not interacoes:
+                return None
+            posicao = self._cursores[chave]
+            self._cursores[chave] = posicao + 1
+            return interacoes[posicao % len(interacoes)]
+
+    def rebobinar(self):
+        with self._lock:
+            self._cursores.clear()
+
+    def salvar(self, caminho: str | Path):
+        with self._lock, gzip.open(caminho, "wt", encoding="utf-8") as arquivo:
+            for interacoes in self._indice.values():
+                for interacao in interacoes:
+                    arquivo.write(json.dumps(interacao.para_json(), ensure_ascii=False, separators=(",", ":")))
+                    arquivo.write("\n")
+
+    @classmethod
+    def carregar(cls, caminho: str | Path) -> "Cassete":
+        cassete = cls()
+        with gzip.open(caminho, "rt", encoding="utf-8") as arquivo:
+            for linha in arquivo:
+                if linha.strip():
+                    cassete.adicionar(Interacao.de_json(json.loads(linha)))
+        return cassete
+
+
+############################################
+# PASSO 3 - Gravador: envolve um chat model real
+############################################
+
+import time
+from typing import Any, Iterator
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+
+class GravadorChatModel(BaseChatModel):
+    """Delega ao modelo real e grava cada requisição/resposta no cassete."""
+
+    modelo: BaseChatModel
+    cassete: Cassete
+
+    model_config = {"arbitrary_types_allowed": True}
+
+    @property
+    def _llm_type(self) -> str:
+        return f"gravador-{self.modelo._llm_type}"
+
+    def bind_tools(self, tools, *, tool_choice=None, **kwargs):
+        # Reaproveita a conversão do provedor e repassa os kwargs resultantes
+        vinculado = self.modelo.bind_tools(tools, tool_choice=tool_choice, **kwargs)
+        return self.bind(**vinculado.kwargs)
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        inicio = time.perf_counter()
+        resultado = self.modelo._generate(messages, stop=stop, run_manager=run_manager, **kwargs)
+        self.cassete.adicionar(Interacao(
+            chave=chave_da_requisicao(messages, {"stop": stop, **kwargs}),
+            latencia=time.perf_counter() - inicio,
+            resposta=message_to_dict(resultado.generations[0].message),
+        ))
+        return resultado
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        inicio = anterior = time.perf_counter()
+        chunks = []
+        for chunk in self.modelo._stream(messages, stop=stop, run_manager=run_manager, **kwargs):
+            agora = time.perf_counter()
+            chunks.append((agora - anterior, message_to_dict(chunk.message)))
+            anterior = agora
+            yield chunk
+        self.cassete.adicionar(Interacao(
+            chave=chave_da_requisicao(messages, {"stop": stop, **kwargs}),
+            latencia=time.perf_counter() - inicio,
+            chunks=chunks,
+        ))
+
+
+############################################
+# PASSO 4 - Replay: serve as respostas gravadas
+############################################
+
+import asyncio
+
+from langchain_core.messages import AIMessage, AIMessageChunk
+
+
+class ReplayChatModel(BaseChatModel):
+    """Serve respostas de um cassete, sem rede.
+
+    escala_latencia: 1.0 reproduz os tempos originais, 0.5 roda 2x mais
+    rápido, 0.0 responde imediatamente (útil para medir só o overhead local).
+    """
+
+    cassete: Cassete
+    escala_latencia: float = 1.0
+
+    model_config = {"arbitrary_types_allowed": True}
+
+    @property
+    def _llm_type(self) -> str:
+        return "replay"
+
+    def bind_tools(self, tools, *, tool_choice=None, **kwargs):
+        return self.bind(tools=[convert_to_openai_tool(t) for t in tools], tool_choice=tool_choice, **kwargs)
+
+    def _buscar(self, messages, stop, kwargs) -> Interacao:
+        chave = chave_da_requisicao(messages, {"stop": stop, **kwargs})
+        interacao = self.cassete.buscar(chave)
+        if interacao is None:
+            raise KeyError(f"Requisição não encontrada no cassete (chave {chave}). Grave novamente.")
+        return interacao
+
+    @staticmethod
+    def _mensagem_completa(interacao: Interacao) -> AIMessage:
+        if interacao.resposta is not None:
+            return messages_from_dict([interacao.resposta])[0]
+        # Gravado com stream(), reproduzido com invoke(): soma os chunks
+        chunks = messages_from_dict([chunk for _, chunk in interacao.chunks])
+        total = chunks[0]
+        for chunk in chunks[1:]:
+            total += chunk
+        return AIMessage(**{k: v for k, v in total.model_dump().items() if k not in ("type", "tool_call_chunks", "chunk_position")})
+
+    @staticmethod
+    def _chunks(interacao: Interacao) -> list[tuple[float, AIMessageChunk]]:
+        if interacao.chunks:
+            mensagens = messages_from_dict([chunk for _, chunk in interacao.chunks])
+            return [(atraso, msg) for (atraso, _), msg in zip(interacao.chunks, mensagens)]
+        # Gravado com invoke(), reproduzido com stream(): um único chunk
+        mensagem = messages_from_dict([interacao.resposta])[0]
+        dados = {k: v for k, v in mensagem.model_dump().items() if k != "type"}
+        return [(interacao.latencia, AIMessageChunk(**dados))]
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        interacao = self._buscar(messages, stop, kwargs)
+        time.sleep(interacao.latencia * self.escala_latencia)
+        return ChatResult(generations=[ChatGeneration(message=self._mensagem_completa(interacao))])
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        interacao = self._buscar(messages, stop, kwargs)
+        for atraso, chunk in self._chunks(interacao):
+            time.sleep(atraso * self.escala_latencia)
+            if run_manager and isinstance(chunk.content, str):
+                run_manager.on_llm_new_token(chunk.content, chunk=ChatGenerationChunk(message=chunk))
+            yield ChatGenerationChunk(message=chunk)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        interacao = self._buscar(messages, stop, kwargs)
+        await asyncio.sleep(interacao.latencia * self.escala_latencia)
+        return ChatResult(generations=[ChatGeneration(message=self._mensagem_completa(interacao))])
+
+
+############################################
+# PASSO 5 - Demonstrações práticas
+############################################
+
+import tempfile
+
+from langchain.agents import create_agent
+
+from sample033 import ServidorStub, StubConfig, consultar_clima, criar_modelo_stub
+
+PERGUNTAS = [
+    "Qual o clima em Curitiba?",
+    "Qual o clima em Recife?",
+    "Explique o que é um agente.",
+]
+
+
+def executar_agente(model) -> list[str]:
+    agent = create_agent(model=model, tools=[consultar_clima])
+    respostas = []
+    for pergunta in PERGUNTAS:
+        result = agent.invoke({"messages": [{"role": "user", "content": pergunta}]})
+        respostas.append(result["messages"][-1].content)
+    # Uma execução com streaming de tokens, para gravar os chunks
+    tokens = [
+        chunk.content
+        for chunk, _ in agent.stream(
+            {"messages": [{"role": "user", "content": "Escreva um haicai."}]},
+            stream_mode="messages",
+        )
+    ]
+    respostas.append("".join(tokens))
+    return respostas
+
+
+def main():
+    with tempfile.TemporaryDirectory() as nome:
+        pasta = Path(nome)
+        arquivo = pasta / "agente.jsonl.gz"
+
+        print("=" * 70)
+        print("1. GRAVANDO (stub com 80ms de latência e 200 tokens/s)")
+        print("=" * 70)
+
+        config = StubConfig(latencia_ms=80, tokens_por_segundo=200)
+        with ServidorStub(config) as servidor:
+            cassete = Cassete()
+            gravador = GravadorChatModel(modelo=criar_modelo_stub(servidor.base_url), cassete=cassete)
+            inicio = time.perf_counter()
+            respostas_originais = executar_agente(gravador)
+            tempo_original = time.perf_counter() - inicio
+            chamadas_api = servidor.estatisticas()["requisicoes"]
+
+        cassete.salvar(arquivo)
+        print(f"Chamadas à API gravadas: {chamadas_api}")
+        print(f"Interações no cassete: {len(cassete)}")
+        print(f"Arquivo: {arquivo} ({arquivo.stat().st_size} bytes)")
+        print(f"Tempo original: {tempo_original:.2f}s")
+
+        print("\n" + "=" * 70)
+        print("2. REPLAY (sem servidor, sem API)")
+        print("=" * 70)
+
+        for escala in (1.0, 0.25, 0.0):
+            replay = ReplayChatModel(cassete=Cassete.carregar(arquivo), escala_latencia=escala)
+            inicio = time.perf_counter()
+            respostas = executar_agente(replay)
+            elapsed = time.perf_counter() - inicio
+            identico = "idênticas" if respostas == respostas_originais else "DIFERENTES"
+            print(f"escala={escala:<5} tempo={elapsed:.2f}s  respostas {identico} às originais")
+
+    print("\n" + "=" * 70)
+    print("3. BUSCA O(1) EM CASSETES GRANDES")
+    print("=" * 70)
+
+    from langchain_core.messages import HumanMessage
+
+    for tamanho in (1_000, 100_000):
+        grande = Cassete()
+        for i in range(tamanho):
+            chave = chave_da_requisicao([HumanMessage(content=f"pergunta {i}")], {})
+            grande.adicionar(Interacao(chave=chave, latencia=0.0, resposta=message_to_dict(AIMessage(content=str(i)))))
+        replay = ReplayChatModel(cassete=grande, escala_latencia=0.0)
+        n = 500
+        inicio = time.perf_counter()
+        for i in range(n):
+            replay.invoke(f"pergunta {i * (tamanho // n)}")
+        elapsed = time.perf_counter() - inicio
+        print(f"{tamanho:>7} interações: {elapsed / n * 1e6:8.1f} µs por chamada (inclui overhead do invoke)")
+
+    ############################################
+    # OBSERVAÇÕES IMPORTANTES
+    ############################################
+
+    print()
+    print("=" * 70)
+    print("OBSERVAÇÕES IMPORTANTES")
+    print("=" * 70)
+    print("""
+1. GRAVAÇÃO:
+   - GravadorChatModel envolve QUALQUER chat model (ChatOpenAI, Anthropic...)
+   - Grava invoke() e stream() (cada chunk com seu atraso)
+   - bind_tools() é delegado ao modelo real: funciona com create_agent
+
+2. FORMATO DO CASSETE:
+   - JSON Lines comprimido com gzip: uma interação por linha
+   - Chaves curtas (k, t, r, c) para reduzir o tamanho
+   - Fácil de versionar, inspecionar (zcat) e concatenar
+
+3. CHAVE DA REQUISIÇÃO:
+   - SHA-256 das mensagens + tools + tool_choice + response_format
+   - Ids aleatórios (run ids) ficam de fora, então o replay é determinístico
+   - Requisições repetidas são servidas na ordem original (cursor por chave)
+
+4. REPLAY:
+   - escala_latencia=1.0 reproduz os tempos reais (benchmarks realistas)
+   - escala_latencia=0.0 mede apenas o overhead do seu código
+   - Requisição desconhecida gera KeyError: regrave quando o prompt mudar
+
+5. CASOS DE USO:
+   - Benchmarks de middleware, prompts e agentes sem custo de API
+   - Testes de regressão determinísticos em CI
+   - Reproduzir bugs com o tráfego real que os causou
+
+6. PRÓXIMOS PASSOS:
+   - Para o servidor stub usado na gravação, veja sample033.py
+   - Para streaming de agentes, veja sample018.py
+""")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,461 @@
+############################################
+#
+# Exemplo de Pool de Conexões HTTP
+# compartilhado entre instâncias de modelos.
+#
+# Samples como sample010.py, sample027.py e
+# sample030.py criam vários ChatOpenAI. Cada
+# instância pode carregar o seu próprio cliente
+# HTTP, repetindo handshakes TCP/TLS. Aqui um
+# gerenciador global entrega o MESMO cliente
+# httpx para todos os modelos da mesma origem,
+# com keep-alive ajustável, HTTP/2 quando
+# disponível e métricas de uso do pool.
+#
+############################################
+
+
+############################################
+# PASSO 1 - Configuração do pool
+############################################
+
+from dataclasses import dataclass
+import importlib.util
+
+
+@dataclass(frozen=True)
+class ConfigPool:
+    max_conexoes: int = 100  # conexões simultâneas por origem
+    max_keepalive: int = 20  # conexões ociosas mantidas abertas para reuso
+    keepalive_expiry: float = 30.0  # segundos até fechar uma conexão ociosa
+    http2: bool = True  # usado apenas se o pacote h2 estiver instalado
+    timeout: float = 60.0
+
+
+def http2_disponivel() -> bool:
+    # httpx só fala HTTP/2 com o extra opcional: uv pip install "httpx[http2]"
+    return importlib.util.find_spec("h2") is not None
+
+
+############################################
+# PASSO 2 - Métricas via extensão "trace" do httpcore
+############################################
+
+import threading
+
+
+class MetricasPool:
+    """Conta requisições, conexões novas e handshakes TLS de uma origem."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requisicoes = 0
+        self.conexoes_novas = 0
+        self.handshakes_tls = 0
+        self.em_andamento = 0
+        self.pico_em_andamento = 0
+
+    def _evento(self, nome: str):
+        with self._lock:
+            if nome == "connection.connect_tcp.complete":
+                self.conexoes_novas += 1
+            elif nome == "connection.start_tls.complete":
+                self.handshakes_tls += 1
+
+    def trace(self, nome: str, info: dict):
+        self._evento(nome)
+
+    async def atrace(self, nome: str, info: dict):
+        self._evento(nome)
+
+    def inicio(self):
+        with self._lock:
+            self.requisicoes += 1
+            self.em_andamento += 1
+            self.pico_em_andamento = max(self.pico_em_andamento, self.em_andamento)
+
+    def fim(self):
+        with self._lock:
+            self.em_andamento -= 1
+
+    def resumo(self) -> dict:
+        with self._lock:
+            reuso = 1 - self.conexoes_novas / self.requisicoes if self.requisicoes else 0.0
+            return {
+                "requisicoes": self.requisicoes,
+                "conexoes_novas": self.conexoes_novas,
+                "handshakes_tls": self.handshakes_tls,
+                "taxa_reuso": round(reuso, 3),
+                "pico_em_andamento": self.pico_em_andamento,
+            }
+
+
+############################################
+# PASSO 3 - Transportes instrumentados (sync e async)
+############################################
+
+import httpx
+
+
+def estado_do_pool(pool) -> dict:
+    conexoes = list(getattr(pool, "connections", []))
+    ociosas = sum(1 for c in conexoes if c.is_idle())
+    return {"conexoes_abertas": len(conexoes), "ociosas": ociosas, "ativas": len(conexoes) - ociosas}
+
+
+class TransporteInstrumentado(httpx.HTTPTransport):
+    def __init__(self, metricas: MetricasPool, **kwargs):
+        super().__init__(**kwargs)
+        self.metricas = metricas
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        request.extensions["trace"] = self.metricas.trace
+        self.metricas.inicio()
+        try:
+            return super().handle_request(request)
+        finally:
+            self.metricas.fim()
+
+    def estado(self) -> dict:
+        return estado_do_pool(self._pool)
+
+
+class TransporteAsyncInstrumentado(httpx.AsyncHTTPTransport):
+    def __init__(self, metricas: MetricasPool, **kwargs):
+        super().__init__(**kwargs)
+        self.metricas = metricas
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        request.extensions["trace"] = self.metricas.atrace
+        self.metricas.inicio()
+        try:
+            return await super().handle_async_request(request)
+        finally:
+            self.metricas.fim()
+
+    def estado(self) -> dict:
+        return estado_do_pool(self._pool)
+
+
+############################################
+# PASSO 4 - O gerenciador global de conexões
+############################################
+
+import asyncio
+import os
+import weakref
+
+
+def origem(base_url: str) -> str:
+    """Conexões são por origem (esquema + host + porta), não por caminho."""
+    url = httpx.URL(base_url)
+    porta = url.port or (443 if url.scheme == "https" else 80)
+    return f"{url.scheme}://{url.host}:{porta}"
+
+
+class ClienteAsyncPorLoop(httpx.AsyncClient):
+    """AsyncClient de fachada: cada event loop recebe o seu próprio cliente real.
+
+    O ChatOpenAI exige um httpx.AsyncClient na construção, muitas vezes fora
+    de qualquer loop; um pool async, porém, pertence ao loop que abriu as
+    conexões. A fachada monta a requisição e a repassa ao cliente do loop em
+    execução.
+    """
+
+    def __init__(self, gerenciador: "GerenciadorConexoes", chave: str, **kwargs):
+        super().__init__(**kwargs)
+        self._gerenciador = gerenciador
+        self._chave = chave
+
+    async def send(self, request: httpx.Request, **kwargs) -> httpx.Response:
+        cliente = await self._gerenciador._cliente_do_loop(self._chave)
+        return await cliente.send(request, **kwargs)
+
+
+class GerenciadorConexoes:
+    """Um cliente httpx por origem (e, no async, por event loop) compartilhado pelo processo."""
+
+    def __init__(self, config: ConfigPool = ConfigPool()):
+        self.config = config
+        self._lock = threading.Lock()
+        self._clientes: dict[str, httpx.Client] = {}
+        self._fachadas: dict[str, ClienteAsyncPorLoop] = {}
+        # loop -> {origem: AsyncClient}; some junto com o loop
+        self._clientes_async: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+        self._sentinelas: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+        self._metricas: dict[str, MetricasPool] = {}
+
+    def _opcoes(self, chave: str) -> dict:
+        metricas = self._metricas.setdefault(chave, MetricasPool())
+        limites = httpx.Limits(
+            max_connections=self.config.max_conexoes,
+            max_keepalive_connections=self.config.max_keepalive,
+            keepalive_expiry=self.config.keepalive_expiry,
+        )
+        return {"metricas": metricas, "limits": limites, "http2": self.config.http2 and http2_disponivel()}
+
+    def cliente(self, base_url: str) -> httpx.Client:
+        chave = origem(base_url)
+        with self._lock:
+            if chave not in self._clientes:
+                transporte = TransporteInstrumentado(**self._opcoes(chave))
+                self._clientes[chave] = httpx.Client(transport=transporte, timeout=self.config.timeout)
+            return self._clientes[chave]
+
+    def cliente_async(self, base_url: str) -> httpx.AsyncClient:
+        chave = origem(base_url)
+        with self._lock:
+            if chave not in self._fachadas:
+                self._fachadas[chave] = ClienteAsyncPorLoop(self, chave, timeout=self.config.timeout)
+            return self._fachadas[chave]
+
+    async def _cliente_do_loop(self, chave: str) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            clientes = self._clientes_async.get(loop)
+            loop_novo = clientes is None
+            if loop_novo:
+                clientes = self._clientes_async[loop] = {}
+            if chave not in clientes:
+                transporte = TransporteAsyncInstrumentado(**self._opcoes(chave))
+                clientes[chave] = httpx.AsyncClient(transport=transporte, timeout=self.config.timeout)
+            cliente = clientes[chave]
+        if loop_novo:
+            # asyncio.run() finaliza os geradores assíncronos pendentes antes de
+            # fechar o loop: o finally do sentinela fecha os clientes deste loop
+            sentinela = self._sentinela()
+            self._sentinelas[loop] = sentinela
+            await sentinela.__anext__()
+        return cliente
+
+    async def _sentinela(self):
+        try:
+            yield
+        finally:
+            await self._fechar_clientes_do_loop()
+
+    async def _fechar_clientes_do_loop(self):
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            clientes = self._clientes_async.pop(loop, {})
+            self._sentinelas.pop(loop, None)
+        for cliente in clientes.values():
+            await cliente.aclose()
+
+    def clientes_async_abertos(self) -> int:
+        with self._lock:
+            return sum(len(clientes) for clientes in self._clientes_async.values())
+
+    def metricas(self) -> dict[str, dict]:
+        with self._lock:
+            relatorio = {}
+            for chave, metricas in self._metricas.items():
+                relatorio[chave] = metricas.resumo()
+                if chave in self._clientes:
+                    relatorio[chave] |= self._clientes[chave]._transport.estado()
+            return relatorio
+
+    async def afechar(self):
+        """Fecha os clientes async do loop em execução (ex.: no shutdown do servidor)."""
+        with self._lock:
+            sentinela = self._sentinelas.get(asyncio.get_running_loop())
+        if sentinela is not None:
+            await sentinela.aclose()  # o finally do sentinela faz o aclose()
+        else:
+            await self._fechar_clientes_do_loop()
+
+    def fechar(self):
+        """Fecha os clientes sync e os async de loops que não estão rodando aqui."""
+        with self._lock:
+            for cliente in self._clientes.values():
+                cliente.close()
+            self._clientes.clear()
+            loops = list(self._clientes_async.keys())
+        for loop in loops:
+            if loop.is_closed():
+                # Loop fechado sem finalizar os geradores: suas conexões já morreram com ele
+                with self._lock:
+                    self._clientes_async.pop(loop, None)
+            elif not loop.is_running():
+                loop.run_until_complete(self._fechar_clientes_do_loop())
+            elif asyncio._get_running_loop() is loop:
+                raise RuntimeError("Dentro do event loop, use 'await gerenciador.afechar()'")
+            else:
+                asyncio.run_coroutine_threadsafe(self.afechar(), loop).result()
+
+
+_gerenciadores: dict[ConfigPool, GerenciadorConexoes] = {}
+_lock_global = threading.Lock()
+
+
+def obter_gerenciador(config: ConfigPool | None = None) -> GerenciadorConexoes:
+    """Retorna o gerenciador do processo para esta configuração (criado na primeira chamada)."""
+    config = config or ConfigPool()
+    with _lock_global:
+        if config not in _gerenciadores:
+            _gerenciadores[config] = GerenciadorConexoes(config)
+        return _gerenciadores[config]
+
+
+############################################
+# PASSO 5 - Criar modelos que usam o pool compartilhado
+############################################
+
+from langchain_openai import ChatOpenAI
+
+
+def clientes_compartilhados(base_url: str | None = None, config: ConfigPool | None = None) -> dict:
+    """kwargs para ChatOpenAI/init_chat_model com os clientes do pool global."""
+    base_url = base_url or os.environ.get("OPENAI_API_BASE") or os.environ.get("OPENAI_BASE_URL") or "https://api.openai.com/v1"
+    gerenciador = obter_gerenciador(config)
+    return {
+        "base_url": base_url,
+        "http_client": gerenciador.cliente(base_url),
+        "http_async_client": gerenciador.cliente_async(base_url),
+    }
+
+
+def criar_chat_openai(base_url: str | None = None, config: ConfigPool | None = None, **kwargs) -> ChatOpenAI:
+    """ChatOpenAI que compartilha conexões com todos os outros da mesma origem."""
+    return ChatOpenAI(**clientes_compartilhados(base_url, config), **kwargs)
+
+
+############################################
+# PASSO 6 - Benchmark contra o servidor stub
+############################################
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from sample033 import ServidorStub, StubConfig
+
+
+def executar_cenario(servidor, fabrica, requisicoes: int, concorrencia: int) -> dict:
+    """Simula o padrão de sample010/sample030: um modelo novo por requisição."""
+    conexoes_antes = servidor.estatisticas()["conexoes"]
+
+    def chamar(i):
+        model = fabrica(temperature=0, model="gpt-4o-mini" if i % 2 else "gpt-4o")
+        model.invoke("Olá!")
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concorrencia) as executor:
+        list(executor.map(chamar, range(requisicoes)))
+    elapsed = time.perf_counter() - inicio
+    return {
+        "tempo": elapsed,
+        "conexoes": servidor.estatisticas()["conexoes"] - conexoes_antes,
+    }
+
+
+def main():
+    # 30ms por conexão nova simula o custo de TCP + TLS contra a API real
+    config = StubConfig(latencia_ms=20, jitter_ms=0, latencia_conexao_ms=30)
+
+    with ServidorStub(config) as servidor:
+        # Sem compartilhamento: cada instância recebe o seu próprio cliente
+        # (é o que acontece, por exemplo, com timeouts do tipo httpx.Timeout,
+        # que o cache interno do langchain-openai não consegue reutilizar)
+        clientes_isolados = []
+
+        def fabrica_isolada(**kwargs):
+            clientes_isolados.append(httpx.Client(timeout=httpx.Timeout(30.0)))
+            return ChatOpenAI(
+                base_url=servidor.base_url,
+                api_key="stub",
+                http_client=clientes_isolados[-1],
+                **kwargs,
+            )
+
+        def fabrica_compartilhada(**kwargs):
+            return criar_chat_openai(servidor.base_url, api_key="stub", **kwargs)
+
+        print("=" * 70)
+        print("BENCHMARK: UM MODELO NOVO POR REQUISIÇÃO (200 requisições)")
+        print("=" * 70)
+        print(f"HTTP/2 disponível: {http2_disponivel()} (o stub fala HTTP/1.1 com keep-alive)")
+        print(f"\n{'cenário':<28} {'conc':>4} {'conexões':>9} {'tempo':>8}")
+        for concorrencia in (1, 10):
+            for nome, fabrica in (("cliente por instância", fabrica_isolada), ("pool compartilhado", fabrica_compartilhada)):
+                r = executar_cenario(servidor, fabrica, 200, concorrencia)
+                print(f"{nome:<28} {concorrencia:>4} {r['conexoes']:>9} {r['tempo']:>7.2f}s")
+                for cliente in clientes_isolados:
+                    cliente.close()
+                clientes_isolados.clear()
+
+        print("\nMétricas do pool compartilhado:")
+        for chave, metricas in obter_gerenciador().metricas().items():
+            print(f"  {chave}: {metricas}")
+
+        print("\n" + "=" * 70)
+        print("MODELOS DIFERENTES, MESMA ORIGEM, MESMO CLIENTE")
+        print("=" * 70)
+        model_a = criar_chat_openai(servidor.base_url, api_key="stub", model="gpt-4o-mini", temperature=0)
+        model_b = criar_chat_openai(servidor.base_url, api_key="stub", model="gpt-4o", temperature=1)
+        print(f"model_a.http_client is model_b.http_client: {model_a.http_client is model_b.http_client}")
+
+        print("\n" + "=" * 70)
+        print("CLIENTES ASYNC: UM POR EVENT LOOP, FECHADOS COM O LOOP")
+        print("=" * 70)
+        gerenciador = obter_gerenciador()
+
+        async def rodada():
+            await asyncio.gather(*(model_a.ainvoke("Olá!") for _ in range(5)))
+            return gerenciador._clientes_async[asyncio.get_running_loop()][origem(servidor.base_url)]
+
+        # Cada asyncio.run() cria um loop novo: o mesmo modelo continua funcionando
+        primeiro, segundo = asyncio.run(rodada()), asyncio.run(rodada())
+        print(f"Clientes reais distintos por loop: {primeiro is not segundo}")
+        print(f"Fechados com aclose() ao fim de cada asyncio.run(): {primeiro.is_closed and segundo.is_closed}")
+        print(f"Clientes async ainda abertos: {gerenciador.clientes_async_abertos()}")
+        compacto = obter_gerenciador(ConfigPool(max_keepalive=2))
+        print(f"Outra ConfigPool, outro gerenciador: {compacto is not gerenciador} "
+              f"(max_keepalive={compacto.config.max_keepalive})")
+
+    obter_gerenciador().fechar()
+
+    ############################################
+    # OBSERVAÇÕES IMPORTANTES
+    ############################################
+
+    print()
+    print("=" * 70)
+    print("OBSERVAÇÕES IMPORTANTES")
+    print("=" * 70)
+    print("""
+1. POR QUE COMPARTILHAR:
+   - Abrir conexão HTTPS custa 1-3 round-trips (TCP + TLS) antes do request
+   - Clientes por instância desperdiçam conexões já aquecidas
+   - Um pool por ORIGEM atende todos os modelos (gpt-4o, gpt-4o-mini...)
+
+2. COMO USAR:
+   - criar_chat_openai(model="gpt-4o-mini", ...) no lugar de ChatOpenAI(...)
+   - Ou passe **clientes_compartilhados() para init_chat_model(...)
+   - O timeout de cada modelo continua valendo (é enviado por requisição)
+
+3. AJUSTES DE KEEP-ALIVE (ConfigPool):
+   - max_conexoes: limite de conexões simultâneas por origem
+   - max_keepalive: conexões ociosas mantidas para reuso
+   - keepalive_expiry: quanto tempo uma conexão ociosa sobrevive
+   - http2: multiplexa requisições em uma conexão (requer httpx[http2])
+
+4. MÉTRICAS:
+   - conexoes_novas e handshakes_tls vêm da extensão "trace" do httpcore
+   - taxa_reuso = 1 - conexões novas / requisições
+   - conexoes_abertas/ociosas/ativas mostram a ocupação atual do pool
+
+5. CUIDADOS:
+   - Clientes async pertencem a um event loop: a fachada ClienteAsyncPorLoop
+     entrega um cliente real por loop, fechado quando asyncio.run() termina
+   - Em loops de vida longa, chame "await gerenciador.afechar()" no shutdown
+   - obter_gerenciador(ConfigPool(...)) mantém um gerenciador por configuração
+   - Em processos com fork (gunicorn), crie o pool DEPOIS do fork
+
+6. PRÓXIMOS PASSOS:
+   - Para o servidor stub usado no benchmark, veja sample033.py
+   - Para seleção dinâmica de modelo, veja sample010.py
+""")
+
+
+if __name__ == "__main__":
+    main()
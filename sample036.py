@@ -0,0 +1,465 @@
+############################################
+#
+# Exemplo de Fábrica Memoizada de Modelos
+# para init_chat_model e modelos configuráveis.
+#
+# Com init_chat_model(configurable_fields=...)
+# (sample004.py) ou .configurable_fields()
+# (sample030.py), CADA invoke com configuração
+# em runtime constrói um objeto de modelo novo.
+# Aqui um registro guarda os modelos já
+# construídos (chave = provedor + parâmetros
+# normalizados), com despejo LRU, clientes HTTP
+# compartilhados e construção segura sob
+# concorrência: o caminho quente nunca paga o
+# custo de construir o modelo.
+#
+############################################
+
+
+############################################
+# PASSO 1 - Chave normalizada: provedor + parâmetros
+############################################
+
+import json
+
+# _parse_model é interno ao LangChain, mas é exatamente a regra que o
+# init_chat_model usa para resolver "openai:gpt-4o" e inferir o provedor
+from langchain.chat_models.base import _parse_model
+
+# Nomes alternativos para o mesmo parâmetro (ChatOpenAI aceita ambos)
+ALIASES = {"max_completion_tokens": "max_tokens"}
+
+
+def normalizar_valor(valor):
+    if isinstance(valor, bool) or valor is None or isinstance(valor, str):
+        return valor
+    if isinstance(valor, (int, float)):
+        return float(valor)  # temperature=0 e temperature=0.0 são o mesmo modelo
+    try:
+        hash(valor)
+        return valor
+    except TypeError:
+        return json.dumps(valor, sort_keys=True, default=repr)
+
+
+def chave_do_modelo(model: str, model_provider: str | None = None, **params) -> tuple:
+    model, model_provider = _parse_model(model, model_provider)
+    normalizados = {}
+    for nome, valor in params.items():
+        if valor is None:
+            continue  # None = usar o padrão do provedor
+        normalizados[ALIASES.get(nome, nome)] = normalizar_valor(valor)
+    return (model_provider, model, tuple(sorted(normalizados.items(), key=lambda item: item[0])))
+
+
+############################################
+# PASSO 2 - O registro (LRU + construção única por chave)
+############################################
+
+from collections import OrderedDict
+from concurrent.futures import Future
+import threading
+import time
+
+from langchain.chat_models import init_chat_model
+
+from sample035 import clientes_compartilhados
+
+
+class RegistroModelos:
+    """Cache LRU de modelos instanciados, seguro para várias threads.
+
+    Se várias threads pedem a mesma chave ao mesmo tempo, apenas a
+    primeira constrói o modelo; as outras esperam pelo mesmo resultado.
+    """
+
+    def __init__(self, tamanho_maximo: int = 32, compartilhar_clientes: bool = True):
+        self.tamanho_maximo = tamanho_maximo
+        self.compartilhar_clientes = compartilhar_clientes
+        self._modelos: OrderedDict[tuple, object] = OrderedDict()
+        self._em_construcao: dict[tuple, Future] = {}
+        self._lock = threading.Lock()
+        self.acertos = 0
+        self.construcoes = 0
+        self.despejos = 0
+        self.tempo_construcao = 0.0
+
+    def obter(self, model: str, model_provider: str | None = None, **params):
+        chave = chave_do_modelo(model, model_provider, **params)
+        with self._lock:
+            if chave in self._modelos:
+                self._modelos.move_to_end(chave)
+                self.acertos += 1
+                return self._modelos[chave]
+            futuro = self._em_construcao.get(chave)
+            construir = futuro is None
+            if construir:
+                futuro = self._em_construcao[chave] = Future()
+            else:
+                self.acertos += 1
+
+        if not construir:
+            return futuro.result()
+
+        try:
+            inicio = time.perf_counter()
+            modelo = self._construir(chave[0], model, params)
+            elapsed = time.perf_counter() - inicio
+        except BaseException as erro:
+            with self._lock:
+                del self._em_construcao[chave]
+            futuro.set_exception(erro)
+            raise
+
+        with self._lock:
+            self._modelos[chave] = modelo
+            del self._em_construcao[chave]
+            self.construcoes += 1
+            self.tempo_construcao += elapsed
+            while len(self._modelos) > self.tamanho_maximo:
+                self._modelos.popitem(last=False)
+                self.despejos += 1
+        futuro.set_result(modelo)
+        return modelo
+
+    def _construir(self, provedor: str, model: str, params: dict):
+        params = {nome: valor for nome, valor in params.items() if valor is not None}
+        if self.compartilhar_clientes and provedor == "openai" and "http_client" not in params:
+            # Todos os modelos OpenAI da mesma origem usam o mesmo pool (sample035.py)
+            params = clientes_compartilhados(params.get("base_url")) | params
+        return init_chat_model(model, model_provider=provedor, **params)
+
+    def limpar(self):
+        with self._lock:
+            self._modelos.clear()
+
+    def estatisticas(self) -> dict:
+        with self._lock:
+            return {
+                "modelos": len(self._modelos),
+                "acertos": self.acertos,
+                "construcoes": self.construcoes,
+                "despejos": self.despejos,
+                "tempo_construcao_ms": round(self.tempo_construcao * 1000, 2),
+            }
+
+
+############################################
+# PASSO 3 - Modelo configurável apoiado no registro
+############################################
+
+from langchain_core.runnables import ConfigurableField, Runnable, RunnableConfig, ensure_config
+
+
+class ModeloMemoizado(Runnable):
+    """Equivalente a init_chat_model(configurable_fields=...), sem reconstruir.
+
+    A configuração de runtime (config["configurable"]) escolhe o modelo no
+    registro. Operações declarativas (bind_tools, with_structured_output)
+    são aplicadas uma vez por modelo e também ficam em cache.
+    """
+
+    def __init__(
+        self,
+        registro: RegistroModelos,
+        padrao: dict,
+        configurable_fields: str | tuple[str, ...] = "any",
+        config_prefix: str = "",
+        operacoes: tuple = (),
+        alternativas: tuple[str, str, dict] | None = None,
+    ):
+        self.registro = registro
+        self.padrao = padrao
+        self.configurable_fields = configurable_fields
+        self.config_prefix = config_prefix + "_" if config_prefix and not config_prefix.endswith("_") else config_prefix
+        self.operacoes = operacoes
+        # (id do campo seletor, chave padrão, {chave: parâmetros ou Runnable})
+        self.alternativas = alternativas
+        self._vinculados: OrderedDict[int, tuple[Runnable, Runnable]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _base(self, configuravel: dict) -> dict | Runnable:
+        """Parâmetros de partida: os padrões ou os da alternativa escolhida."""
+        if self.alternativas is None:
+            return self.padrao
+        seletor, chave_padrao, opcoes = self.alternativas
+        escolha = configuravel.get(seletor, chave_padrao)
+        if escolha == chave_padrao:
+            return self.padrao
+        if escolha not in opcoes:
+            raise ValueError(f"Alternativa desconhecida para '{seletor}': {escolha!r}")
+        return opcoes[escolha]
+
+    def _parametros(self, config: RunnableConfig | None) -> dict | Runnable:
+        configuravel = ensure_config(config).get("configurable", {})
+        base = self._base(configuravel)
+        if isinstance(base, Runnable):
+            return base  # alternativa já construída: não há parâmetros a sobrepor
+        params = {
+            nome.removeprefix(self.config_prefix): valor
+            for nome, valor in configuravel.items()
+            if nome.startswith(self.config_prefix)
+        }
+        if self.configurable_fields != "any":
+            params = {nome: valor for nome, valor in params.items() if nome in self.configurable_fields}
+        return {**base, **params}
+
+    def _modelo(self, config: RunnableConfig | None = None) -> Runnable:
+        # A alternativa escolhida muda os parâmetros e, portanto, a chave no registro
+        params = self._parametros(config)
+        if not isinstance(params, Runnable) and "model" not in params:
+            raise ValueError(
+                f"Nenhum modelo definido: passe model=... ou "
+                f"config={{'configurable': {{'{self.config_prefix}model': ...}}}}"
+            )
+        modelo = params if isinstance(params, Runnable) else self.registro.obter(**params)
+        if not self.operacoes:
+            return modelo
+        # O registro devolve sempre o mesmo objeto por chave: id() identifica o
+        # modelo, e guardamos o próprio modelo para detectar ids reaproveitados
+        with self._lock:
+            entrada = self._vinculados.get(id(modelo))
+            if entrada is not None and entrada[0] is modelo:
+                self._vinculados.move_to_end(id(modelo))
+                return entrada[1]
+        vinculado = modelo
+        for nome, args, kwargs in self.operacoes:
+            vinculado = getattr(vinculado, nome)(*args, **kwargs)
+        with self._lock:
+            self._vinculados[id(modelo)] = (modelo, vinculado)
+            while len(self._vinculados) > self.registro.tamanho_maximo:
+                self._vinculados.popitem(last=False)
+        return vinculado
+
+    def _com_operacao(self, nome: str, args: tuple, kwargs: dict) -> "ModeloMemoizado":
+        return ModeloMemoizado(
+            self.registro,
+            self.padrao,
+            self.configurable_fields,
+            self.config_prefix,
+            self.operacoes + ((nome, args, kwargs),),
+            self.alternativas,
+        )
+
+    def configurable_alternatives(
+        self, which: "ConfigurableField | str", *, default_key: str = "default", **alternativas
+    ) -> "ModeloMemoizado":
+        """Equivalente a .configurable_alternatives() (sample030.py), sem reconstruir.
+
+        Cada alternativa é um dict de parâmetros de init_chat_model (construída
+        e memoizada pelo registro) ou um Runnable já pronto. A chave padrão
+        usa os parâmetros deste ModeloMemoizado.
+        """
+        seletor = which if isinstance(which, str) else which.id
+        for chave, alternativa in alternativas.items():
+            if not isinstance(alternativa, (dict, Runnable)):
+                raise TypeError(f"Alternativa '{chave}' deve ser dict de parâmetros ou Runnable")
+        return ModeloMemoizado(
+            self.registro,
+            self.padrao,
+            self.configurable_fields,
+            self.config_prefix,
+            self.operacoes,
+            (seletor, default_key, alternativas),
+        )
+
+    def bind_tools(self, *args, **kwargs) -> "ModeloMemoizado":
+        return self._com_operacao("bind_tools", args, kwargs)
+
+    def with_structured_output(self, *args, **kwargs) -> "ModeloMemoizado":
+        return self._com_operacao("with_structured_output", args, kwargs)
+
+    def invoke(self, input, config: RunnableConfig | None = None, **kwargs):
+        return self._modelo(config).invoke(input, config, **kwargs)
+
+    async def ainvoke(self, input, config: RunnableConfig | None = None, **kwargs):
+        return await self._modelo(config).ainvoke(input, config, **kwargs)
+
+    def stream(self, input, config: RunnableConfig | None = None, **kwargs):
+        yield from self._modelo(config).stream(input, config, **kwargs)
+
+    async def astream(self, input, config: RunnableConfig | None = None, **kwargs):
+        async for chunk in self._modelo(config).astream(input, config, **kwargs):
+            yield chunk
+
+
+_registro_global = RegistroModelos()
+
+
+def init_modelo_memoizado(
+    model: str | None = None,
+    *,
+    model_provider: str | None = None,
+    configurable_fields: str | tuple[str, ...] | None = None,
+    config_prefix: str = "",
+    registro: RegistroModelos | None = None,
+    **kwargs,
+):
+    """Mesma assinatura de init_chat_model, mas apoiada no registro global.
+
+    Sem configurable_fields devolve o modelo em cache; com configurable_fields
+    devolve um ModeloMemoizado que resolve o modelo a cada chamada em O(1).
+    """
+    registro = registro or _registro_global
+    padrao = {"model": model, "model_provider": model_provider, **kwargs}
+    padrao = {nome: valor for nome, valor in padrao.items() if valor is not None}
+    if configurable_fields is None and model:
+        return registro.obter(**padrao)
+    if not model and configurable_fields not in (None, "any") and "model" not in configurable_fields:
+        raise ValueError(f"Sem model=..., 'model' precisa estar em configurable_fields: {configurable_fields!r}")
+    return ModeloMemoizado(registro, padrao, configurable_fields or ("model", "model_provider"), config_prefix)
+
+
+############################################
+# PASSO 4 - Benchmark: init_chat_model vs registro
+############################################
+
+from concurrent.futures import ThreadPoolExecutor
+
+from sample033 import ServidorStub, StubConfig
+
+CONFIGS = [
+    {"configurable": {"llm_model": "gpt-4o-mini", "llm_temperature": 0}},
+    {"configurable": {"llm_model": "gpt-4o", "llm_temperature": 0.7}},
+    {"configurable": {"llm_model": "gpt-4o-mini", "llm_temperature": 1.5, "llm_max_tokens": 200}},
+]
+
+
+def medir(funcao, n: int) -> float:
+    """Tempo médio (ms) de funcao(config), alternando as configurações."""
+    inicio = time.perf_counter()
+    for i in range(n):
+        funcao(CONFIGS[i % len(CONFIGS)])
+    return (time.perf_counter() - inicio) / n * 1000
+
+
+def main():
+    with ServidorStub(StubConfig(latencia_ms=0, jitter_ms=0)) as servidor:
+        padrao = {"api_key": "stub", "base_url": servidor.base_url}
+        campos = ("model", "temperature", "max_tokens")
+
+        original = init_chat_model(configurable_fields=campos, config_prefix="llm", **padrao)
+        registro = RegistroModelos(tamanho_maximo=8)
+        memoizado = init_modelo_memoizado(
+            configurable_fields=campos, config_prefix="llm", registro=registro, **padrao
+        )
+
+        print("=" * 70)
+        print("1. CUSTO POR CHAMADA (3 configurações alternadas, stub sem latência)")
+        print("=" * 70)
+        memoizado.invoke("aquecer", config=CONFIGS[0])
+        original.invoke("aquecer", config=CONFIGS[0])
+        print(f"{'':<32} {'resolver modelo':>16} {'invoke completo':>16}")
+        cenarios = (
+            ("init_chat_model configurável", original, original._model),
+            ("registro memoizado", memoizado, memoizado._modelo),
+        )
+        for nome, model, resolver_modelo in cenarios:
+            resolver = medir(resolver_modelo, 300)
+            completo = medir(lambda config: model.invoke("Olá!", config=config), 300)
+            print(f"{nome:<32} {resolver:>13.3f} ms {completo:>13.3f} ms")
+        print(f"\nEstatísticas do registro: {registro.estatisticas()}")
+
+        print("\n" + "=" * 70)
+        print("2. bind_tools() É APLICADO UMA VEZ POR MODELO")
+        print("=" * 70)
+        from sample033 import consultar_clima
+
+        com_tools = memoizado.bind_tools([consultar_clima])
+        for config in CONFIGS * 2:
+            response = com_tools.invoke("Qual o clima em Curitiba?", config=config)
+        print(f"Tool calls: {[tc['name'] for tc in response.tool_calls]}")
+        print(f"Modelos vinculados em cache: {len(com_tools._vinculados)}")
+
+        print("\n" + "=" * 70)
+        print("3. CONSTRUÇÃO CONCORRENTE (32 threads, mesma configuração nova)")
+        print("=" * 70)
+        concorrente = RegistroModelos()
+        with ThreadPoolExecutor(max_workers=32) as executor:
+            modelos = list(executor.map(lambda _: concorrente.obter("gpt-4o", temperature=0.3, **padrao), range(32)))
+        print(f"Objetos distintos: {len({id(m) for m in modelos})}")
+        print(f"Estatísticas: {concorrente.estatisticas()}")
+
+        print("\n" + "=" * 70)
+        print("4. DESPEJO LRU E NORMALIZAÇÃO DE PARÂMETROS")
+        print("=" * 70)
+        pequeno = RegistroModelos(tamanho_maximo=2)
+        a = pequeno.obter("openai:gpt-4o-mini", temperature=0, **padrao)
+        b = pequeno.obter("gpt-4o-mini", model_provider="openai", temperature=0.0, **padrao)
+        print(f"'openai:gpt-4o-mini' temp=0 é o mesmo objeto que gpt-4o-mini temp=0.0? {a is b}")
+        pequeno.obter("gpt-4o", **padrao)
+        pequeno.obter("gpt-4.1", **padrao)
+        print(f"Estatísticas: {pequeno.estatisticas()}")
+
+        print("\n" + "=" * 70)
+        print("5. configurable_alternatives() TAMBÉM ENTRA NA CHAVE")
+        print("=" * 70)
+        alternativo = RegistroModelos()
+        roteado = init_modelo_memoizado(
+            "gpt-4o-mini", configurable_fields=("temperature",), config_prefix="llm",
+            registro=alternativo, **padrao,
+        ).configurable_alternatives(
+            ConfigurableField(id="llm"),
+            default_key="rapido",
+            criativo={"model": "gpt-4o", "temperature": 0.9, **padrao},
+        )
+        escolhas = [
+            {"configurable": {"llm": "rapido"}},
+            {"configurable": {"llm": "criativo"}},
+            {"configurable": {"llm": "criativo", "llm_temperature": 0.2}},
+            {},
+        ]
+        for config in escolhas * 3:
+            roteado.invoke("Olá!", config=config)
+        print(f"Estatísticas (12 invokes, 3 modelos distintos): {alternativo.estatisticas()}")
+        for config in escolhas:
+            modelo = roteado._modelo(config)
+            print(f"{str(config.get('configurable', {})):<48} -> {modelo.model_name} temp={modelo.temperature}")
+        try:
+            roteado.invoke("Olá!", config={"configurable": {"llm": "inexistente"}})
+        except ValueError as erro:
+            print(f"Alternativa desconhecida: {erro}")
+
+    ############################################
+    # OBSERVAÇÕES IMPORTANTES
+    ############################################
+
+    print()
+    print("=" * 70)
+    print("OBSERVAÇÕES IMPORTANTES")
+    print("=" * 70)
+    print("""
+1. O PROBLEMA:
+   - init_chat_model(configurable_fields=...) constrói um modelo NOVO a cada invoke
+   - .configurable_fields() e .configurable_alternatives() fazem o mesmo (sample030.py)
+   - Construir = validar parâmetros, criar clientes, resolver provedor
+
+2. A CHAVE DO REGISTRO:
+   - Provedor + nome do modelo + parâmetros normalizados
+   - "openai:gpt-4o" == ("gpt-4o", model_provider="openai")
+   - temperature=0 == temperature=0.0; max_completion_tokens == max_tokens
+
+3. LRU E CONCORRÊNCIA:
+   - tamanho_maximo limita quantos modelos ficam em memória
+   - Construção "single flight": uma thread constrói, as outras aguardam
+   - Modelos OpenAI compartilham o pool HTTP do sample035.py
+
+4. QUANDO USAR:
+   - A/B testing e roteamento por requisição (sample010.py, sample030.py)
+   - Servidores multi-tenant em que cada cliente escolhe modelo/temperatura
+
+5. CUIDADOS:
+   - Modelos em cache são compartilhados: não altere atributos depois de obter
+   - Parâmetros não "hasheáveis" entram na chave serializados em JSON
+   - configurable_alternatives: a alternativa escolhida troca os parâmetros
+     de partida; os configurable_fields ainda se aplicam por cima
+
+6. PRÓXIMOS PASSOS:
+   - Para init_chat_model, veja sample004.py
+   - Para configurable_fields/alternatives sem memoização, veja sample030.py
+""")
+
+
+if __name__ == "__main__":
+    main()
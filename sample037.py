@@ -0,0 +1,339 @@
+############################################
+#
+# Exemplo de Construção Preguiçosa de Agentes
+# e cache de grafos compilados.
+#
+# Todos os samples chamam create_agent(...) no
+# import, e sample014.py/sample015.py criam TRÊS
+# agentes mesmo quando só um é usado. Aqui uma
+# fábrica compila o grafo apenas no primeiro uso
+# e guarda os agentes compilados, com chave em
+# modelo, tools, middleware, schemas e
+# checkpointer. A fábrica é thread-safe.
+#
+############################################
+
+
+############################################
+# PASSO 1 - Chave do agente (identidade dos componentes)
+############################################
+
+import json
+
+from langchain.agents.structured_output import ProviderStrategy, ToolStrategy
+from langchain_core.messages import SystemMessage
+
+
+def identidade(valor, referencias: list) -> object:
+    """Converte um argumento de create_agent em algo "hasheável".
+
+    Objetos (modelos, tools, middleware, classes, checkpointers) entram pela
+    identidade (id). Eles são guardados em `referencias` para que o id não
+    seja reaproveitado enquanto o agente estiver em cache.
+    """
+    if valor is None or isinstance(valor, (str, int, float, bool)):
+        return valor
+    if isinstance(valor, SystemMessage):
+        return ("system", json.dumps(valor.content, sort_keys=True, default=repr))
+    if isinstance(valor, (list, tuple)):
+        return tuple(identidade(item, referencias) for item in valor)
+    if isinstance(valor, dict):
+        return ("dict", json.dumps(valor, sort_keys=True, default=repr))
+    # ToolStrategy(X) e ProviderStrategy(X) costumam ser criados a cada chamada:
+    # comparamos pelo schema e pelas opções, não pela instância
+    if isinstance(valor, ToolStrategy):
+        return (
+            "ToolStrategy",
+            identidade(valor.schema, referencias),
+            valor.tool_message_content,
+            identidade(valor.handle_errors, referencias),
+        )
+    if isinstance(valor, ProviderStrategy):
+        return ("ProviderStrategy", identidade(valor.schema, referencias), getattr(valor, "strict", None))
+    referencias.append(valor)
+    return ("id", id(valor))
+
+
+def chave_do_agente(kwargs: dict) -> tuple[tuple, list]:
+    referencias = []
+    chave = tuple(sorted((nome, identidade(valor, referencias)) for nome, valor in kwargs.items()))
+    return chave, referencias
+
+
+############################################
+# PASSO 2 - A fábrica com cache de agentes compilados
+############################################
+
+from collections import OrderedDict
+from concurrent.futures import Future
+import threading
+import time
+
+from langchain.agents import create_agent
+
+
+class FabricaAgentes:
+    """Compila cada combinação de argumentos uma única vez (single flight).
+
+    Limitada a `maximo` grafos (LRU): cada entrada mantém vivos o modelo e
+    as tools da chave, então combinações criadas por requisição não podem
+    se acumular pela vida inteira do processo.
+    """
+
+    def __init__(self, maximo: int = 128):
+        self.maximo = maximo
+        self._agentes: OrderedDict[tuple, tuple[object, list]] = OrderedDict()
+        self._em_construcao: dict[tuple, Future] = {}
+        self._lock = threading.Lock()
+        self.acertos = 0
+        self.compilacoes = 0
+        self.descartes = 0
+        self.tempo_compilacao = 0.0
+
+    def obter(self, **kwargs):
+        """Mesmos argumentos de create_agent(); devolve o grafo compilado."""
+        chave, referencias = chave_do_agente(kwargs)
+        with self._lock:
+            if chave in self._agentes:
+                self._agentes.move_to_end(chave)
+                self.acertos += 1
+                return self._agentes[chave][0]
+            futuro = self._em_construcao.get(chave)
+            compilar = futuro is None
+            if compilar:
+                futuro = self._em_construcao[chave] = Future()
+            else:
+                self.acertos += 1
+
+        if not compilar:
+            return futuro.result()
+
+        try:
+            inicio = time.perf_counter()
+            agente = create_agent(**kwargs)
+            elapsed = time.perf_counter() - inicio
+        except BaseException as erro:
+            with self._lock:
+                del self._em_construcao[chave]
+            futuro.set_exception(erro)
+            raise
+
+        with self._lock:
+            self._agentes[chave] = (agente, referencias)
+            while len(self._agentes) > self.maximo:
+                self._agentes.popitem(last=False)
+                self.descartes += 1
+            del self._em_construcao[chave]
+            self.compilacoes += 1
+            self.tempo_compilacao += elapsed
+        futuro.set_result(agente)
+        return agente
+
+    def limpar(self):
+        with self._lock:
+            self._agentes.clear()
+
+    def estatisticas(self) -> dict:
+        with self._lock:
+            return {
+                "agentes": len(self._agentes),
+                "acertos": self.acertos,
+                "compilacoes": self.compilacoes,
+                "descartes": self.descartes,
+                "tempo_compilacao_ms": round(self.tempo_compilacao * 1000, 2),
+            }
+
+
+_fabrica_global = FabricaAgentes()
+
+
+############################################
+# PASSO 3 - Agente preguiçoso (compila no primeiro uso)
+############################################
+
+
+class AgentePreguicoso:
+    """Proxy para o grafo compilado: invoke, stream, batch etc. funcionam igual.
+
+    Definir o agente no import custa quase nada; create_agent() só roda
+    quando algum método do agente é usado pela primeira vez.
+    """
+
+    def __init__(self, fabrica: FabricaAgentes, kwargs: dict):
+        self._fabrica = fabrica
+        self._kwargs = kwargs
+        self._agente = None
+        self._lock = threading.Lock()
+
+    @property
+    def compilado(self) -> bool:
+        return self._agente is not None
+
+    def obter(self):
+        if self._agente is None:
+            with self._lock:
+                if self._agente is None:
+                    self._agente = self._fabrica.obter(**self._kwargs)
+        return self._agente
+
+    def __getattr__(self, nome: str):
+        # Só é chamado para atributos que não existem no proxy
+        return getattr(self.obter(), nome)
+
+
+def agente_preguicoso(fabrica: FabricaAgentes | None = None, **kwargs) -> AgentePreguicoso:
+    """Substituto direto de create_agent(...) para definições em nível de módulo."""
+    return AgentePreguicoso(fabrica or _fabrica_global, kwargs)
+
+
+############################################
+# PASSO 4 - Os três agentes do sample014.py, agora preguiçosos
+############################################
+
+from pydantic import BaseModel, Field
+
+from sample033 import ServidorStub, StubConfig, criar_modelo_stub
+
+
+class ContactInfo(BaseModel):
+    """Informações de contato de uma pessoa."""
+    name: str = Field(description="Nome completo da pessoa")
+    email: str = Field(description="Endereço de email")
+    phone: str = Field(description="Número de telefone")
+
+
+class ProductReview(BaseModel):
+    """Análise de um produto."""
+    product_name: str = Field(description="Nome do produto")
+    rating: int = Field(description="Nota de 1 a 5", ge=1, le=5)
+    sentiment: str = Field(description="Sentimento: positivo, negativo ou neutro")
+
+
+class EventDetails(BaseModel):
+    """Detalhes de um evento."""
+    event_name: str = Field(description="Nome do evento")
+    date: str = Field(description="Data do evento")
+    location: str = Field(description="Local do evento")
+
+
+def definir_agentes(model, fabrica: FabricaAgentes, preguicoso: bool) -> dict:
+    construir = (lambda **kw: agente_preguicoso(fabrica, **kw)) if preguicoso else create_agent
+    return {
+        "contact": construir(model=model, tools=[], response_format=ToolStrategy(ContactInfo)),
+        "review": construir(model=model, tools=[], response_format=ToolStrategy(ProductReview)),
+        "event": construir(model=model, tools=[], response_format=ToolStrategy(EventDetails)),
+    }
+
+
+############################################
+# PASSO 5 - Benchmark: frio vs quente
+############################################
+
+from concurrent.futures import ThreadPoolExecutor
+
+
+def cronometrar(funcao, repeticoes: int = 1) -> float:
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        funcao()
+    return (time.perf_counter() - inicio) / repeticoes * 1000
+
+
+def main():
+    with ServidorStub(StubConfig(latencia_ms=10, jitter_ms=0)) as servidor:
+        model = criar_modelo_stub(servidor.base_url)
+
+        print("=" * 70)
+        print("1. DEFINIR OS 3 AGENTES DO sample014.py (startup)")
+        print("=" * 70)
+        tempo_eager = cronometrar(lambda: definir_agentes(model, FabricaAgentes(), preguicoso=False), 10)
+        tempo_lazy = cronometrar(lambda: definir_agentes(model, FabricaAgentes(), preguicoso=True), 10)
+        print(f"Eager (create_agent x3 no import): {tempo_eager:8.2f} ms")
+        print(f"Lazy  (agente_preguicoso x3):      {tempo_lazy:8.3f} ms")
+
+        print("\n" + "=" * 70)
+        print("2. USAR SÓ UM AGENTE (os outros nunca são compilados)")
+        print("=" * 70)
+        fabrica = FabricaAgentes()
+        agentes = definir_agentes(model, fabrica, preguicoso=True)
+        result = agentes["contact"].invoke({
+            "messages": [{"role": "user", "content": "João Silva, joao@email.com, (11) 98765-4321"}]
+        })
+        print(f"Resposta estruturada: {result['structured_response']!r}")
+        print(f"Compilados: {[nome for nome, agente in agentes.items() if agente.compilado]}")
+        print(f"Estatísticas: {fabrica.estatisticas()}")
+
+        print("\n" + "=" * 70)
+        print("3. CRIAÇÃO FRIA vs QUENTE (mesmos argumentos)")
+        print("=" * 70)
+        fabrica = FabricaAgentes()
+        kwargs = {"model": model, "tools": [], "response_format": ToolStrategy(ProductReview)}
+        fria = cronometrar(lambda: fabrica.obter(**kwargs))
+        quente = cronometrar(lambda: fabrica.obter(**kwargs), 1000)
+        print(f"Fria  (compila o grafo): {fria:9.3f} ms")
+        print(f"Quente (cache):          {quente:9.3f} ms  ({fria / quente:,.0f}x mais rápido)")
+
+        print("\n" + "=" * 70)
+        print("4. 16 THREADS PEDINDO O MESMO AGENTE AO MESMO TEMPO")
+        print("=" * 70)
+        fabrica = FabricaAgentes()
+        preguicoso = agente_preguicoso(fabrica, model=model, tools=[], response_format=ToolStrategy(EventDetails))
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            grafos = list(executor.map(lambda _: preguicoso.obter(), range(16)))
+        print(f"Grafos distintos: {len({id(g) for g in grafos})}")
+        print(f"Estatísticas: {fabrica.estatisticas()}")
+
+        print("\n" + "=" * 70)
+        print("5. LIMITE DE GRAFOS (LRU): UM MODELO NOVO POR REQUISIÇÃO")
+        print("=" * 70)
+        fabrica = FabricaAgentes(maximo=4)
+        for _ in range(10):
+            # Um modelo por requisição é uma chave nova (a identidade do modelo entra na chave)
+            fabrica.obter(model=criar_modelo_stub(servidor.base_url), tools=[])
+        fabrica.obter(**kwargs)
+        fabrica.obter(**kwargs)
+        print(f"Estatísticas (maximo=4): {fabrica.estatisticas()}")
+
+    ############################################
+    # OBSERVAÇÕES IMPORTANTES
+    ############################################
+
+    print()
+    print("=" * 70)
+    print("OBSERVAÇÕES IMPORTANTES")
+    print("=" * 70)
+    print("""
+1. O CUSTO DE create_agent():
+   - Monta o StateGraph, gera schemas das tools e do response_format
+   - Compila o grafo (validação de nós, canais e arestas)
+   - Feito no import, atrasa o startup mesmo para agentes nunca usados
+
+2. AGENTE PREGUIÇOSO:
+   - agente_preguicoso(...) aceita os mesmos argumentos de create_agent(...)
+   - O proxy repassa invoke/stream/batch/get_graph para o grafo compilado
+   - A compilação acontece no primeiro uso, com double-checked locking
+
+3. CHAVE DO CACHE:
+   - Modelo, tools, middleware, checkpointer e schemas entram por identidade
+   - ToolStrategy(X)/ProviderStrategy(X) entram pelo schema X e pelas opções
+   - Os objetos da chave ficam referenciados para que o id não seja reusado
+   - Por isso a fábrica guarda no máximo `maximo` grafos (LRU, padrão 128):
+     o menos usado sai e libera o modelo e as tools que mantinha vivos
+
+4. QUANDO USAR:
+   - Módulos com vários agentes em que cada requisição usa apenas um
+   - Servidores multi-tenant que recriam agentes com os mesmos componentes
+   - CLIs e funções serverless sensíveis ao tempo de inicialização
+
+5. CUIDADOS:
+   - Grafos compilados são compartilhados: o estado fica no checkpointer
+   - Um agente com checkpointer diferente é um agente diferente no cache
+
+6. PRÓXIMOS PASSOS:
+   - Para os agentes originais, veja sample014.py e sample015.py
+   - Para o cache de modelos, veja sample036.py
+""")
+
+
+if __name__ == "__main__":
+    main()
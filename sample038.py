@@ -0,0 +1,377 @@
+############################################
+#
+# Exemplo de Imports Preguiçosos de Provedores
+# para reduzir o tempo de cold start.
+#
+# Os samples importam langchain_openai,
+# langchain_anthropic (sample030.py) e
+# langchain.agents no topo do módulo, mesmo em
+# caminhos que nunca usam aquele provedor. Em
+# workers serverless isso domina o cold start.
+#
+# Aqui um registro de provedores fica atrás de
+# um init_chat_model próprio: o pacote do
+# provedor só é importado quando o primeiro
+# modelo daquele provedor é construído. Este
+# módulo importa APENAS a biblioteca padrão.
+#
+# O benchmark mede o ganho nos samples que
+# usam init_chat_model: cada um roda como está
+# e numa cópia temporária que troca só o import
+# por este registro, com "python -X importtime"
+# contra o servidor stub. Os próprios samples
+# não são alterados.
+#
+# Uso: python sample038.py [números] [--execucoes N] [--antes REVISÃO]
+#
+############################################
+
+
+############################################
+# PASSO 1 - Registro de provedores (sem importar nada)
+############################################
+
+import importlib
+import threading
+import time
+
+
+class RegistroProvedores:
+    """Mapeia provedor -> (módulo, classe) e importa sob demanda."""
+
+    def __init__(self):
+        self._provedores: dict[str, tuple[str, str]] = {}
+        self._parametros: dict[str, str] = {}
+        self._classes: dict[str, type] = {}
+        self._tempos_import: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def registrar(self, provedor: str, modulo: str, classe: str, parametro_modelo: str = "model"):
+        self._provedores[provedor] = (modulo, classe)
+        self._parametros[provedor] = parametro_modelo
+
+    def __contains__(self, provedor: str) -> bool:
+        return provedor in self._provedores
+
+    def classe(self, provedor: str) -> type:
+        # Caminho rápido sem lock: depois do primeiro uso é só um dict lookup
+        cls = self._classes.get(provedor)
+        if cls is not None:
+            return cls
+        with self._lock:
+            if provedor not in self._classes:
+                modulo, nome = self._provedores[provedor]
+                inicio = time.perf_counter()
+                try:
+                    pacote = importlib.import_module(modulo)
+                except ImportError as erro:
+                    raise ImportError(
+                        f"O provedor '{provedor}' requer o pacote {modulo.replace('_', '-')}: "
+                        f"uv pip install {modulo.replace('_', '-')}"
+                    ) from erro
+                self._classes[provedor] = getattr(pacote, nome)
+                self._tempos_import[provedor] = time.perf_counter() - inicio
+            return self._classes[provedor]
+
+    def construir(self, provedor: str, model: str, **kwargs):
+        """Instancia o modelo passando o nome no parâmetro que a classe espera."""
+        return self.classe(provedor)(**{self._parametros[provedor]: model}, **kwargs)
+
+    def carregados(self) -> dict[str, float]:
+        """Provedores já importados e quanto tempo (s) cada import levou."""
+        return dict(self._tempos_import)
+
+
+registro = RegistroProvedores()
+registro.registrar("openai", "langchain_openai", "ChatOpenAI")
+# Como no init_chat_model: no Azure o "modelo" é o nome do deployment
+registro.registrar("azure_openai", "langchain_openai", "AzureChatOpenAI", "azure_deployment")
+registro.registrar("anthropic", "langchain_anthropic", "ChatAnthropic")
+registro.registrar("google_genai", "langchain_google_genai", "ChatGoogleGenerativeAI")
+registro.registrar("ollama", "langchain_ollama", "ChatOllama")
+registro.registrar("groq", "langchain_groq", "ChatGroq")
+registro.registrar("mistralai", "langchain_mistralai", "ChatMistralAI")
+
+
+############################################
+# PASSO 2 - Resolver o provedor a partir do nome do modelo
+############################################
+
+# Mesmas regras de inferência do init_chat_model, sem importar o LangChain
+PREFIXOS = (
+    (("gpt-", "o1", "o3", "o4", "chatgpt", "text-davinci"), "openai"),
+    (("claude",), "anthropic"),
+    (("gemini",), "google_genai"),
+    (("mistral", "mixtral"), "mistralai"),
+)
+
+
+def resolver_provedor(model: str, model_provider: str | None = None) -> tuple[str, str]:
+    if not model_provider and ":" in model:
+        prefixo, _, resto = model.partition(":")
+        if prefixo.replace("-", "_").lower() in registro:
+            model_provider, model = prefixo, resto
+    if not model_provider:
+        nome = model.lower()
+        model_provider = next(
+            (provedor for prefixos, provedor in PREFIXOS if nome.startswith(prefixos)),
+            None,
+        )
+    if not model_provider:
+        raise ValueError(f"Não foi possível inferir o provedor de {model!r}; informe model_provider.")
+    return model, model_provider.replace("-", "_").lower()
+
+
+############################################
+# PASSO 3 - init_chat_model preguiçoso
+############################################
+
+
+def init_chat_model(model: str, *, model_provider: str | None = None, **kwargs):
+    """Mesma chamada do langchain.chat_models.init_chat_model.
+
+    Importa somente o pacote do provedor escolhido, na primeira vez que um
+    modelo dele é construído. Provedores fora do registro (ou modelos
+    configuráveis) são delegados ao init_chat_model original.
+    """
+    if "configurable_fields" not in kwargs and "config_prefix" not in kwargs:
+        try:
+            model, provedor = resolver_provedor(model, model_provider)
+        except ValueError:
+            provedor = None
+        if provedor in registro:
+            return registro.construir(provedor, model, **kwargs)
+
+    from langchain.chat_models import init_chat_model as init_original
+
+    return init_original(model, model_provider=model_provider, **kwargs)
+
+
+def create_agent(*args, **kwargs):
+    """create_agent com import adiado de langchain.agents (e do LangGraph)."""
+    from langchain.agents import create_agent as create_agent_original
+
+    return create_agent_original(*args, **kwargs)
+
+
+############################################
+# PASSO 4 - Benchmark com -X importtime
+############################################
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent
+PROVEDORES = ("langchain_openai", "langchain_anthropic", "langchain_google_genai")
+
+
+IMPORT_ORIGINAL = "from langchain.chat_models import init_chat_model\n"
+IMPORT_REGISTRO = "from sample038 import init_chat_model\n"
+
+
+def codigo_original(caminho: Path, revisao: str | None) -> str | None:
+    """O sample como está no disco ou, com revisão, como era naquele commit."""
+    if revisao is None:
+        return caminho.read_text(encoding="utf-8") if caminho.exists() else None
+    saida = subprocess.run(["git", "show", f"{revisao}:{caminho.name}"],
+                           capture_output=True, text=True, cwd=RAIZ)
+    return saida.stdout if saida.returncode == 0 else None
+
+
+def converter(codigo: str) -> str | None:
+    """Troca o import do init_chat_model pelo registro; None se não houver o que trocar.
+
+    Samples que importam a classe do provedor (ChatOpenAI, ChatAnthropic...)
+    ficam de fora: a conversão deles não é mecânica.
+    """
+    linhas = codigo.splitlines(keepends=True)
+    if IMPORT_ORIGINAL not in linhas:
+        return None
+    return "".join(IMPORT_REGISTRO if linha == IMPORT_ORIGINAL else linha for linha in linhas)
+
+
+def preparar_pares(caminhos: list[Path], revisao: str | None,
+                   pasta: Path) -> tuple[list[tuple[str, Path, Path]], dict[str, str]]:
+    """Grava original e convertido de cada sample na pasta temporária.
+
+    Devolve os pares (nome, original, convertido) e os samples ignorados
+    com o motivo, para que nenhum suma do relatório sem explicação.
+    """
+    pares, ignorados = [], {}
+    for caminho in caminhos:
+        codigo = codigo_original(caminho, revisao)
+        if codigo is None:
+            ignorados[caminho.name] = f"não existe na revisão {revisao}" if revisao else "não existe"
+            continue
+        convertido = converter(codigo)
+        if convertido is None:
+            ignorados[caminho.name] = "não usa init_chat_model"
+            continue
+        arquivos = (pasta / "original" / caminho.name, pasta / "registro" / caminho.name)
+        for arquivo, texto in zip(arquivos, (codigo, convertido)):
+            arquivo.parent.mkdir(exist_ok=True)
+            arquivo.write_text(texto, encoding="utf-8")
+        pares.append((caminho.name, *arquivos))
+    return pares, ignorados
+
+
+def medir_execucao(arquivo: Path, ambiente: dict) -> tuple[float, set[str], bool]:
+    """Executa o arquivo inteiro com -X importtime.
+
+    Devolve (ms gastos em imports durante toda a execução, provedores
+    carregados, terminou sem erro). Imports feitos depois, dentro de
+    funções, também contam: é o custo real, não só o do topo do arquivo.
+    """
+    processo = subprocess.run(
+        [sys.executable, "-X", "importtime", str(arquivo)],
+        capture_output=True, text=True, cwd=RAIZ, env=ambiente,
+    )
+    total, provedores = 0, set()
+    for linha in processo.stderr.splitlines():
+        if not linha.startswith("import time:") or "cumulative" in linha:
+            continue
+        _, cumulativo, nome = linha.removeprefix("import time:").split("|")
+        if not nome[1:].startswith(" "):  # sem indentação = import de topo
+            total += int(cumulativo)
+        if nome.strip().split(".")[0] in PROVEDORES:
+            provedores.add(nome.strip().split(".")[0])
+    return total / 1000, provedores, processo.returncode == 0
+
+
+def _abreviar(provedores: set[str]) -> str:
+    return ",".join(sorted(p.removeprefix("langchain_") for p in provedores)) or "-"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Custo de import dos samples com e sem o registro.")
+    parser.add_argument("samples", nargs="*", type=int, help="números (padrão: 4 a 32)")
+    parser.add_argument("--execucoes", type=int, default=3, help="execuções de cada versão (mediana)")
+    parser.add_argument("--antes", metavar="REVISÃO",
+                        help="revisão git de onde ler os samples (padrão: os arquivos no disco)")
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("1. O PROVEDOR SÓ CARREGA NO PRIMEIRO MODELO")
+    print("=" * 70)
+    print(f"langchain_openai importado? {'langchain_openai' in sys.modules}")
+    inicio = time.perf_counter()
+    model = init_chat_model("gpt-4o-mini", api_key="stub", temperature=0)
+    print(f"Primeiro modelo OpenAI: {(time.perf_counter() - inicio) * 1000:.0f}ms ({type(model).__name__})")
+    inicio = time.perf_counter()
+    init_chat_model("openai:gpt-4o", api_key="stub")
+    print(f"Segundo modelo OpenAI:  {(time.perf_counter() - inicio) * 1000:.1f}ms")
+    print(f"langchain_anthropic importado? {'langchain_anthropic' in sys.modules}")
+    print(f"Provedores carregados: { {p: f'{t * 1000:.0f}ms' for p, t in registro.carregados().items()} }")
+
+    print("\n" + "=" * 70)
+    print(f"2. SAMPLES: ORIGINAL x IMPORT TROCADO (-X importtime, mediana de {args.execucoes})")
+    print("=" * 70)
+    # Os samples rodam inteiros contra o servidor stub: sem API key e sem rede
+    from sample033 import ServidorStub, StubConfig
+
+    numeros = args.samples or range(4, 33)
+    caminhos = [RAIZ / f"sample{numero:03d}.py" for numero in numeros]
+
+    with ServidorStub(StubConfig(latencia_ms=0, jitter_ms=0)) as servidor, \
+            tempfile.TemporaryDirectory() as pasta:
+        ambiente = dict(os.environ, OPENAI_API_BASE=servidor.base_url, OPENAI_API_KEY="stub",
+                        PYTHONPATH=str(RAIZ))
+        pares, ignorados = preparar_pares(caminhos, args.antes, Path(pasta))
+
+        print(f"Origem: {f'revisão {args.antes}' if args.antes else 'arquivos no disco'}")
+        print(f"{'sample':<14} {'original':>10} {'registro':>10} {'diferença':>10}  provedores (orig -> reg)")
+        if pares:
+            # Uma execução descartável para aquecer o cache de disco e os .pyc
+            medir_execucao(pares[0][1], ambiente)
+        totais = [0.0, 0.0]
+        for nome, original, convertido in pares:
+            tempos, carregados, sucesso = {original: [], convertido: []}, {}, True
+            for _ in range(args.execucoes):
+                # Alternadas, para que variações da máquina afetem as duas versões
+                for arquivo in (original, convertido):
+                    ms, carregados[arquivo], ok = medir_execucao(arquivo, ambiente)
+                    tempos[arquivo].append(ms)
+                    sucesso = sucesso and ok
+            antes, depois = statistics.median(tempos[original]), statistics.median(tempos[convertido])
+            totais[0] += antes
+            totais[1] += depois
+            print(f"{nome:<14} {antes:>8.0f}ms {depois:>8.0f}ms {depois - antes:>+8.0f}ms  "
+                  f"{_abreviar(carregados[original])} -> {_abreviar(carregados[convertido])}"
+                  f"{'' if sucesso else '  (termina com erro)'}", flush=True)
+        print("-" * 70)
+        print(f"{'total':<14} {totais[0]:>8.0f}ms {totais[1]:>8.0f}ms {totais[1] - totais[0]:>+8.0f}ms")
+        if ignorados:
+            print(f"\nIgnorados ({len(ignorados)}):")
+            for nome, motivo in ignorados.items():
+                print(f"  {nome:<14} {motivo}")
+
+        print("\n" + "=" * 70)
+        print(f"3. SÓ IMPORTAR, SEM CONSTRUIR MODELO (mediana de {args.execucoes})")
+        print("=" * 70)
+        # O caso de servidores, handlers e do runner: módulos importados
+        # em caminhos que nunca constroem um modelo daquele provedor
+        medidos = {}
+        for nome, codigo in (("original", "from langchain_openai import ChatOpenAI\n"),
+                             ("registro", IMPORT_REGISTRO)):
+            arquivo = Path(pasta) / f"so_importar_{nome}.py"
+            arquivo.write_text(codigo, encoding="utf-8")
+            execucoes = [medir_execucao(arquivo, ambiente) for _ in range(args.execucoes)]
+            medidos[nome] = statistics.median(ms for ms, _, _ in execucoes)
+            print(f"{nome:<10} {medidos[nome]:>8.0f}ms  provedores: {_abreviar(execucoes[-1][1])}")
+        print(f"diferença  {medidos['registro'] - medidos['original']:>+8.0f}ms")
+
+    ############################################
+    # OBSERVAÇÕES IMPORTANTES
+    ############################################
+
+    print()
+    print("=" * 70)
+    print("OBSERVAÇÕES IMPORTANTES")
+    print("=" * 70)
+    print("""
+1. DE ONDE VEM O CUSTO:
+   - Cada pacote de provedor puxa SDK, httpx, pydantic, tiktoken etc.
+   - langchain.agents puxa o LangGraph inteiro
+   - Em serverless, esse custo é pago em TODO cold start
+
+2. COMO O REGISTRO FUNCIONA:
+   - provedor -> (módulo, classe), registrado sem importar nada
+   - O import acontece na primeira construção, protegido por lock
+   - Depois disso, resolver a classe é apenas um acesso a dict
+
+3. O QUE O BENCHMARK MOSTRA:
+   - Cada sample roda como está e numa cópia que só troca o import do
+     init_chat_model; os que importam ChatOpenAI direto são listados como
+     ignorados, com o motivo
+   - Todos constroem e invocam um modelo ao rodar: o provedor é importado
+     de qualquer jeito, e original x registro fica dentro do ruído
+     (diferenças de algumas centenas de ms para os dois lados)
+   - O ganho aparece na seção 3: quem só importa e não constrói um modelo
+     daquele provedor deixa de pagar o pacote inteiro
+   - Rode com --execucoes maior numa máquina ociosa: com poucos núcleos, outros
+     processos mudam os tempos mais do que a conversão
+
+4. MEDINDO VOCÊ MESMO:
+   - python -X importtime sample001.py 2> imports.log
+   - A coluna "cumulative" mostra o custo de cada import com dependências
+   - Ferramentas como tuna visualizam o log em árvore
+
+5. CUIDADOS:
+   - O primeiro modelo de cada provedor paga o import (mova para o warmup)
+   - Samples que importam langchain.tools continuam pagando langchain_core.tools:
+     o ganho aparece onde o provedor domina o tempo de import
+   - Erros de pacote ausente aparecem na construção, não no import
+
+6. PRÓXIMOS PASSOS:
+   - Para agentes preguiçosos, veja sample037.py
+   - Para o runner com imports aquecidos, veja main.py
+""")
+
+
+if __name__ == "__main__":
+    main()
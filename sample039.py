@@ -0,0 +1,584 @@
+############################################
+#
+# Exemplo de Servidor de Agentes Pré-forkado
+# com backpressure.
+#
+# Um processo mestre carrega e compila os
+# agentes UMA vez e faz fork de N workers que
+# compartilham o mesmo socket de escuta (os
+# workers herdam os grafos compilados por
+# copy-on-write). Cada worker tem uma fila
+# limitada de conexões: se ela enche, o worker
+# responde 503 + Retry-After na hora, em vez de
+# acumular latência.
+#
+# Endpoints:
+#   GET  /health
+#   GET  /agents
+#   POST /agents/<nome>/invoke   (JSON)
+#   POST /agents/<nome>/stream   (SSE)
+#
+# O teste de carga usa o modelo stub em
+# processo do sample033.py e mede req/s e p99
+# para 1, 2 e 4 workers. Requer fork (Linux ou
+# macOS).
+#
+# Uso como servidor avulso:
+#   python sample039.py --servidor 8000 --workers 4
+#
+############################################
+
+
+############################################
+# PASSO 1 - Agentes carregados no mestre
+############################################
+
+from langchain.agents import create_agent
+from langchain.agents.structured_output import ToolStrategy
+
+from sample033 import ModeloStubLocal, StubConfig, consultar_clima
+from sample037 import ContactInfo
+
+
+def carregar_agentes(model) -> dict:
+    """Compila todos os agentes antes do fork: os workers só os herdam."""
+    return {
+        "clima": create_agent(
+            model=model,
+            tools=[consultar_clima],
+            system_prompt="Você é um assistente do tempo. Use a ferramenta de clima.",
+        ),
+        "contato": create_agent(model=model, tools=[], response_format=ToolStrategy(ContactInfo)),
+    }
+
+
+############################################
+# PASSO 2 - Serialização das respostas
+############################################
+
+import json
+
+from langchain_core.messages import BaseMessage
+from pydantic import BaseModel
+
+
+def para_json(valor):
+    """Converte mensagens, modelos Pydantic e estados do agente em JSON."""
+    if isinstance(valor, BaseMessage):
+        mensagem = {"type": valor.type, "content": valor.content}
+        if valor.id:
+            mensagem["id"] = valor.id
+        if getattr(valor, "tool_calls", None):
+            mensagem["tool_calls"] = valor.tool_calls
+        if getattr(valor, "tool_call_id", None):
+            mensagem["tool_call_id"] = valor.tool_call_id
+        if getattr(valor, "usage_metadata", None):
+            mensagem["usage"] = valor.usage_metadata
+        return mensagem
+    if isinstance(valor, BaseModel):
+        return valor.model_dump()
+    if isinstance(valor, dict):
+        return {chave: para_json(item) for chave, item in valor.items()}
+    if isinstance(valor, (list, tuple)):
+        return [para_json(item) for item in valor]
+    return valor
+
+
+def entrada_do_agente(corpo: dict) -> dict:
+    """Aceita {"input": "texto"} ou o formato nativo {"messages": [...]}."""
+    if "messages" in corpo:
+        return {"messages": corpo["messages"]}
+    if "input" in corpo:
+        return {"messages": [{"role": "user", "content": corpo["input"]}]}
+    raise ValueError('Corpo deve conter "input" ou "messages"')
+
+
+############################################
+# PASSO 3 - Handler HTTP (executa dentro de cada worker)
+############################################
+
+from http.server import BaseHTTPRequestHandler
+import contextlib
+import logging
+import os
+
+logger = logging.getLogger("sample039")
+
+
+class AgenteHandler(BaseHTTPRequestHandler):
+    # HTTP/1.0: uma requisição por conexão, então cada item da fila é uma requisição
+    protocol_version = "HTTP/1.0"
+    server_version = "AgentServer/1.0"
+    respondido = False  # a linha de status já saiu?
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_response(self, code, message=None):
+        self.respondido = True
+        super().send_response(code, message)
+
+    def handle(self):
+        # Uma falha inesperada no handler vira 500 para o cliente (se nada
+        # foi enviado ainda) e um traceback no log do worker, em vez de uma
+        # conexão fechada sem explicação
+        try:
+            super().handle()
+        except Exception:
+            logger.exception("Erro ao atender %s %s", getattr(self, "command", "?"), getattr(self, "path", "?"))
+            if not self.respondido:
+                with contextlib.suppress(OSError):
+                    self._json(500, {"error": "erro interno do servidor"})
+
+    def _json(self, status: int, corpo: dict):
+        dados = json.dumps(corpo, ensure_ascii=False).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(dados)))
+        self.send_header("X-Worker-Pid", str(os.getpid()))
+        self.end_headers()
+        self.wfile.write(dados)
+
+    def do_GET(self):
+        worker = self.server
+        if self.path == "/health":
+            self._json(200, {"status": "ok", **worker.estatisticas()})
+        elif self.path == "/agents":
+            self._json(200, {"agents": sorted(worker.agentes)})
+        else:
+            self._json(404, {"error": f"Rota desconhecida: {self.path}"})
+
+    def do_POST(self):
+        partes = self.path.strip("/").split("/")
+        if len(partes) != 3 or partes[0] != "agents" or partes[2] not in ("invoke", "stream"):
+            return self._json(404, {"error": f"Rota desconhecida: {self.path}"})
+        _, nome, acao = partes
+        agente = self.server.agentes.get(nome)
+        if agente is None:
+            return self._json(404, {"error": f"Agente desconhecido: {nome}"})
+
+        try:
+            tamanho = int(self.headers.get("Content-Length", 0))
+            entrada = entrada_do_agente(json.loads(self.rfile.read(tamanho) or b"{}"))
+        except (ValueError, json.JSONDecodeError) as erro:
+            return self._json(400, {"error": str(erro)})
+
+        if acao == "invoke":
+            try:
+                estado = agente.invoke(entrada)
+            except Exception as erro:
+                return self._json(500, {"error": f"{type(erro).__name__}: {erro}"})
+            resposta = {"messages": para_json(estado["messages"])}
+            if "structured_response" in estado:
+                resposta["structured_response"] = para_json(estado["structured_response"])
+            return self._json(200, resposta)
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("X-Worker-Pid", str(os.getpid()))
+        self.end_headers()
+        try:
+            for atualizacao in agente.stream(entrada, stream_mode="updates"):
+                self._evento("update", para_json(atualizacao))
+            self._evento("end", {})
+        except (BrokenPipeError, ConnectionResetError):
+            return  # o cliente desistiu no meio do stream
+        except Exception as erro:
+            self._evento("error", {"error": f"{type(erro).__name__}: {erro}"})
+
+    def _evento(self, nome: str, dados: dict):
+        self.wfile.write(f"event: {nome}\ndata: {json.dumps(dados, ensure_ascii=False)}\n\n".encode())
+        self.wfile.flush()
+
+
+############################################
+# PASSO 4 - Worker: accept + fila limitada + threads
+############################################
+
+import queue
+import signal
+import socket
+import threading
+
+_CORPO_503 = b'{"error": "servidor sobrecarregado, tente novamente"}'
+RESPOSTA_503 = (
+    b"HTTP/1.0 503 Service Unavailable\r\n"
+    b"Content-Type: application/json\r\n"
+    b"Retry-After: 1\r\n"
+    + f"Content-Length: {len(_CORPO_503)}\r\n\r\n".encode()
+    + _CORPO_503
+)
+
+
+class Worker:
+    """Um processo worker: aceita conexões e as entrega a K threads.
+
+    A fila entre o accept e as threads é limitada. Quando está cheia, a
+    conexão é rejeitada com 503 sem tocar no agente: o cliente recebe uma
+    resposta rápida e pode tentar outro worker/instância.
+    """
+
+    def __init__(self, sock: socket.socket, agentes: dict, threads: int = 4, tamanho_fila: int = 16):
+        self.socket = sock
+        self.agentes = agentes
+        self.threads = threads
+        self.fila: queue.Queue = queue.Queue(maxsize=tamanho_fila)
+        self.atendidas = 0
+        self.rejeitadas = 0
+        self._lock = threading.Lock()
+        self._parar = threading.Event()
+
+    def estatisticas(self) -> dict:
+        with self._lock:
+            return {
+                "pid": os.getpid(),
+                "fila": self.fila.qsize(),
+                "atendidas": self.atendidas,
+                "rejeitadas": self.rejeitadas,
+            }
+
+    def _atender(self):
+        while True:
+            item = self.fila.get()
+            if item is None:
+                return
+            conexao, endereco = item
+            try:
+                AgenteHandler(conexao, endereco, self)
+            except Exception:
+                # Erros fora do handle() (setup/finish): o worker continua
+                logger.exception("Falha na conexão de %s", endereco)
+            finally:
+                conexao.close()
+                with self._lock:
+                    self.atendidas += 1
+                self.fila.task_done()
+
+    def executar(self):
+        # SIGTERM: para de aceitar, termina o que já está na fila e sai
+        signal.signal(signal.SIGTERM, lambda *_: self._parar.set())
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        atendentes = [threading.Thread(target=self._atender, daemon=True) for _ in range(self.threads)]
+        for thread in atendentes:
+            thread.start()
+
+        self.socket.settimeout(0.2)
+        while not self._parar.is_set():
+            try:
+                conexao, endereco = self.socket.accept()
+            except (TimeoutError, socket.timeout, InterruptedError):
+                continue
+            conexao.settimeout(30)
+            try:
+                self.fila.put_nowait((conexao, endereco))
+            except queue.Full:
+                with self._lock:
+                    self.rejeitadas += 1
+                with contextlib.suppress(OSError):
+                    conexao.sendall(RESPOSTA_503)
+                conexao.close()
+
+        for _ in atendentes:
+            self.fila.put(None)
+        for thread in atendentes:
+            thread.join(timeout=30)
+
+
+############################################
+# PASSO 5 - Mestre: carrega uma vez e faz fork dos workers
+############################################
+
+import gc
+import sys
+import time
+
+
+class ServidorPreFork:
+    """Processo mestre. Use como context manager ou chame iniciar()/encerrar()."""
+
+    def __init__(
+        self,
+        agentes: dict,
+        workers: int = 2,
+        threads_por_worker: int = 4,
+        tamanho_fila: int = 16,
+        host: str = "127.0.0.1",
+        porta: int = 0,
+    ):
+        if not hasattr(os, "fork"):
+            raise RuntimeError("ServidorPreFork requer os.fork() (Linux/macOS)")
+        self.agentes = agentes
+        self.workers = workers
+        self.threads_por_worker = threads_por_worker
+        self.tamanho_fila = tamanho_fila
+        self.host = host
+        self.porta = porta
+        self.pids: list[int] = []
+        self.socket: socket.socket | None = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.porta}"
+
+    def iniciar(self) -> "ServidorPreFork":
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.socket.bind((self.host, self.porta))
+        self.socket.listen(1024)
+        self.porta = self.socket.getsockname()[1]
+
+        # Move os objetos já criados (grafos, schemas, módulos) para a geração
+        # permanente: o GC dos workers não os percorre e as páginas continuam
+        # compartilhadas em vez de serem copiadas ao tocar nos contadores do GC
+        gc.collect()
+        gc.freeze()
+        sys.stdout.flush()
+        for _ in range(self.workers):
+            pid = os.fork()
+            if pid == 0:
+                codigo = 0
+                try:
+                    Worker(self.socket, self.agentes, self.threads_por_worker, self.tamanho_fila).executar()
+                except BaseException:
+                    codigo = 1
+                finally:
+                    os._exit(codigo)
+            self.pids.append(pid)
+        gc.unfreeze()
+        return self
+
+    def aguardar_pronto(self, timeout: float = 10.0):
+        import http.client
+
+        limite = time.monotonic() + timeout
+        while time.monotonic() < limite:
+            conexao = http.client.HTTPConnection(self.host, self.porta, timeout=1)
+            try:
+                conexao.request("GET", "/health")
+                if conexao.getresponse().status == 200:
+                    return
+            except OSError:
+                pass
+            finally:
+                conexao.close()
+            time.sleep(0.05)
+        raise TimeoutError("Workers não ficaram prontos")
+
+    def encerrar(self, timeout: float = 30.0):
+        for pid in self.pids:
+            with contextlib.suppress(ProcessLookupError):
+                os.kill(pid, signal.SIGTERM)
+        limite = time.monotonic() + timeout
+        for pid in self.pids:
+            while time.monotonic() < limite:
+                if os.waitpid(pid, os.WNOHANG)[0]:
+                    break
+                time.sleep(0.02)
+            else:
+                with contextlib.suppress(ProcessLookupError):
+                    os.kill(pid, signal.SIGKILL)
+                os.waitpid(pid, 0)
+        self.pids.clear()
+        if self.socket:
+            self.socket.close()
+
+    def __enter__(self):
+        self.iniciar()
+        self.aguardar_pronto()
+        return self
+
+    def __exit__(self, *exc):
+        self.encerrar()
+
+
+############################################
+# PASSO 6 - Teste de carga (req/s e p99 por número de workers)
+############################################
+
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+import http.client
+
+from sample033 import RelatorioCarga, percentil
+
+
+def requisitar(host: str, porta: int, caminho: str, corpo: dict | None = None) -> tuple[int, str, bytes]:
+    conexao = http.client.HTTPConnection(host, porta, timeout=60)
+    try:
+        if corpo is None:
+            conexao.request("GET", caminho)
+        else:
+            conexao.request("POST", caminho, json.dumps(corpo), {"Content-Type": "application/json"})
+        resposta = conexao.getresponse()
+        return resposta.status, resposta.getheader("X-Worker-Pid", ""), resposta.read()
+    finally:
+        conexao.close()
+
+
+def testar_carga(
+    servidor: ServidorPreFork,
+    total: int = 400,
+    concorrencia: int = 32,
+    caminho: str = "/agents/clima/invoke",
+    corpo: dict | None = None,
+) -> tuple[RelatorioCarga, Counter, Counter]:
+    """Dispara `total` requisições; devolve relatório, status HTTP e pids."""
+    corpo = corpo or {"input": "Qual o clima em Curitiba?"}
+    relatorio = RelatorioCarga(f"{servidor.workers}w", concorrencia)
+    status, pids = Counter(), Counter()
+    lock = threading.Lock()
+
+    def executar(_):
+        inicio = time.perf_counter()
+        try:
+            codigo, pid, _ = requisitar(servidor.host, servidor.porta, caminho, corpo)
+        except OSError:
+            codigo, pid = 0, ""
+        elapsed = time.perf_counter() - inicio
+        with lock:
+            relatorio.requisicoes += 1
+            status[codigo] += 1
+            if codigo == 200:
+                relatorio.latencias.append(elapsed)
+                pids[pid] += 1
+            else:
+                relatorio.falhas += 1
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concorrencia) as executor:
+        list(executor.map(executar, range(total)))
+    relatorio.duracao = time.perf_counter() - inicio
+    return relatorio, status, pids
+
+
+############################################
+# PASSO 7 - Demonstrações práticas
+############################################
+
+
+def demonstrar_endpoints(servidor: ServidorPreFork):
+    status, pid, corpo = requisitar(servidor.host, servidor.porta, "/agents")
+    print(f"GET /agents -> {status} {corpo.decode()} (worker {pid})")
+
+    status, pid, corpo = requisitar(
+        servidor.host, servidor.porta, "/agents/contato/invoke",
+        {"input": "João Silva, joao@email.com, (11) 98765-4321"},
+    )
+    print(f"POST /agents/contato/invoke -> {status} (worker {pid})")
+    print(f"  structured_response: {json.loads(corpo)['structured_response']}")
+
+    conexao = http.client.HTTPConnection(servidor.host, servidor.porta, timeout=30)
+    conexao.request("POST", "/agents/clima/stream", json.dumps({"input": "Qual o clima em Recife?"}))
+    resposta = conexao.getresponse()
+    print(f"POST /agents/clima/stream -> {resposta.status} {resposta.getheader('Content-Type')}")
+    for linha in resposta:
+        linha = linha.decode().rstrip()
+        if linha.startswith("event:"):
+            evento = linha.removeprefix("event: ")
+        elif linha.startswith("data:"):
+            print(f"  [{evento}] {linha.removeprefix('data: ')[:90]}")
+    conexao.close()
+
+
+def main():
+    if not hasattr(os, "fork"):
+        print("Este sample usa os.fork() e roda apenas em Linux/macOS.")
+        return
+
+    # Latência baixa: o custo passa a ser a CPU do próprio agente (LangGraph),
+    # que é o que os workers paralelizam
+    model = ModeloStubLocal(config=StubConfig(latencia_ms=5, jitter_ms=2, tokens_resposta=20, seed=42))
+    inicio = time.perf_counter()
+    agentes = carregar_agentes(model)
+    print(f"Agentes compilados no mestre em {(time.perf_counter() - inicio) * 1000:.0f} ms: {sorted(agentes)}")
+
+    print("\n" + "=" * 70)
+    print("1. ENDPOINTS (invoke JSON, stream SSE)")
+    print("=" * 70)
+    with ServidorPreFork(agentes, workers=2) as servidor:
+        print(f"Servidor em {servidor.url}, workers: {servidor.pids}")
+        demonstrar_endpoints(servidor)
+
+    print("\n" + "=" * 70)
+    print("2. REQ/S E P99 POR NÚMERO DE WORKERS (4 threads, fila 64)")
+    print("=" * 70)
+    # Cliente e servidor dividem a mesma máquina: o ganho de mais workers
+    # depende de haver núcleos livres
+    print(f"CPUs disponíveis: {os.cpu_count()}")
+    print(RelatorioCarga.cabecalho())
+    for workers in (1, 2, 4):
+        with ServidorPreFork(agentes, workers=workers, threads_por_worker=4, tamanho_fila=64) as servidor:
+            requisitar(servidor.host, servidor.porta, "/agents/clima/invoke", {"input": "aquecer"})
+            relatorio, status, pids = testar_carga(servidor, total=400, concorrencia=32)
+        print(relatorio.linha(), f"  distribuição: {sorted(pids.values(), reverse=True)}")
+
+    print("\n" + "=" * 70)
+    print("3. BACKPRESSURE: FILA PEQUENA SOB SOBRECARGA")
+    print("=" * 70)
+    for tamanho_fila in (4, 64):
+        with ServidorPreFork(agentes, workers=1, threads_por_worker=2, tamanho_fila=tamanho_fila) as servidor:
+            relatorio, status, _ = testar_carga(servidor, total=300, concorrencia=64)
+        print(
+            f"fila={tamanho_fila:<3} 200: {status[200]:>4}  503: {status[503]:>4}  "
+            f"p99 das aceitas: {percentil(relatorio.latencias, 99) * 1000:7.1f} ms"
+        )
+
+    ############################################
+    # OBSERVAÇÕES IMPORTANTES
+    ############################################
+
+    print()
+    print("=" * 70)
+    print("OBSERVAÇÕES IMPORTANTES")
+    print("=" * 70)
+    print("""
+1. PRE-FORK:
+   - O mestre importa tudo e compila os agentes uma única vez
+   - os.fork() copia o processo: cada worker já nasce com os grafos prontos
+   - gc.freeze() antes do fork evita que o GC "suje" as páginas compartilhadas
+
+2. POR QUE PROCESSOS E NÃO SÓ THREADS:
+   - O loop do agente (LangGraph, Pydantic, callbacks) gasta CPU em Python
+   - Threads esperam I/O bem, mas disputam o GIL na parte de CPU
+   - Workers escalam essa parte; threads por worker cobrem a espera pelo LLM
+   - Com um único núcleo, mais workers não aumentam req/s (só disputam a CPU)
+
+3. BACKPRESSURE:
+   - Cada worker tem uma fila limitada entre o accept e as threads
+   - Fila cheia = 503 + Retry-After imediato, sem consumir o agente
+   - Fila grande esconde a sobrecarga: tudo é aceito, mas o p99 explode
+
+4. CUIDADOS COM FORK:
+   - Não crie threads nem conexões HTTP abertas no mestre antes do fork
+   - Clientes httpx criados antes do fork só são seguros se ainda sem conexões
+   - Checkpointers em memória NÃO são compartilhados entre workers:
+     use um checkpointer externo (Postgres, Redis) para conversas
+
+5. EM PRODUÇÃO:
+   - gunicorn --preload -w N faz o mesmo pre-fork com um app WSGI/ASGI
+   - O limite da fila é o equivalente a "backlog"/"max_requests" do servidor
+   - Um balanceador na frente pode reencaminhar 503 para outra instância
+
+6. PRÓXIMOS PASSOS:
+   - Para o modelo stub em processo, veja sample033.py (ModeloStubLocal)
+   - Para compilar agentes sob demanda, veja sample037.py
+""")
+
+
+if __name__ == "__main__":
+    if "--servidor" in sys.argv:
+        argumentos = sys.argv[sys.argv.index("--servidor") + 1:]
+        porta = int(argumentos[0]) if argumentos and argumentos[0].isdigit() else 8000
+        workers = int(sys.argv[sys.argv.index("--workers") + 1]) if "--workers" in sys.argv else os.cpu_count() or 2
+        servidor = ServidorPreFork(carregar_agentes(ModeloStubLocal()), workers=workers, porta=porta).iniciar()
+        print(f"Servidor de agentes em {servidor.url} com {workers} workers (Ctrl+C para sair)")
+        signal.signal(signal.SIGTERM, signal.default_int_handler)  # SIGTERM também encerra os workers
+        try:
+            signal.pause()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            servidor.encerrar()
+    else:
+        main()
@@ -0,0 +1,359 @@
+############################################
+#
+# Exemplo de Streaming Unificado de Eventos
+# de um agente: tokens + ferramentas + estado.
+#
+# O sample018.py usa stream_mode="values": cada
+# chunk é o estado inteiro, e o usuário só vê
+# texto quando o turno do modelo termina. Aqui
+# um único fluxo ordenado intercala:
+#   - tokens do LLM assim que chegam
+#   - início e fim de cada ferramenta
+#   - atualizações de estado por nó
+# e medimos o TTFT (tempo até o primeiro token)
+# e os bytes emitidos contra o modo "values".
+#
+# Roda sem API key com o modelo stub em
+# processo do sample033.py.
+#
+############################################
+
+
+############################################
+# PASSO 1 - O evento unificado
+############################################
+
+from dataclasses import dataclass, field
+from typing import Any
+
+# Tipos de evento (strings constantes: comparar é barato)
+TOKEN = "token"
+TOOL_START = "tool_start"
+TOOL_END = "tool_end"
+TOOL_PROGRESS = "tool_progress"  # emitido pelas próprias ferramentas (sample042.py)
+ESTADO = "state"
+CUSTOM = "custom"
+
+
+@dataclass(slots=True)
+class Evento:
+    tipo: str
+    dados: Any  # str para tokens; dict para os demais
+    t: float  # segundos desde o início do stream
+    no: str = ""  # nó do grafo que gerou o evento ("model", "tools"...)
+
+
+############################################
+# PASSO 2 - Middleware que anuncia início e fim das ferramentas
+############################################
+
+import time
+
+from langchain.agents.middleware import AgentMiddleware
+
+
+class EventosDeFerramenta(AgentMiddleware):
+    """Escreve tool_start/tool_end no stream "custom" do LangGraph.
+
+    O stream_writer vem do ToolRuntime da chamada: o evento chega ao
+    consumidor no momento em que a ferramenta começa, não quando o nó
+    "tools" termina.
+    """
+
+    def wrap_tool_call(self, request, handler):
+        escrever = request.runtime.stream_writer
+        chamada = request.tool_call
+        escrever({"evento": TOOL_START, "id": chamada["id"], "nome": chamada["name"], "args": chamada["args"]})
+        inicio = time.perf_counter()
+        resultado = handler(request)
+        escrever({
+            "evento": TOOL_END,
+            "id": chamada["id"],
+            "nome": chamada["name"],
+            "duracao_ms": round((time.perf_counter() - inicio) * 1000, 1),
+            "status": getattr(resultado, "status", "success"),
+        })
+        return resultado
+
+    async def awrap_tool_call(self, request, handler):
+        escrever = request.runtime.stream_writer
+        chamada = request.tool_call
+        escrever({"evento": TOOL_START, "id": chamada["id"], "nome": chamada["name"], "args": chamada["args"]})
+        inicio = time.perf_counter()
+        resultado = await handler(request)
+        escrever({
+            "evento": TOOL_END,
+            "id": chamada["id"],
+            "nome": chamada["name"],
+            "duracao_ms": round((time.perf_counter() - inicio) * 1000, 1),
+            "status": getattr(resultado, "status", "success"),
+        })
+        return resultado
+
+
+############################################
+# PASSO 3 - O stream unificado
+############################################
+
+from langchain_core.messages import AIMessageChunk
+
+
+def _converter(modo: str, chunk, t: float, incluir_estado: bool) -> list[Evento]:
+    if modo == "messages":
+        mensagem, metadados = chunk
+        # Só os deltas de texto do LLM; mensagens completas já vêm em "updates"
+        if type(mensagem) is AIMessageChunk and mensagem.content:
+            conteudo = mensagem.content
+            if not isinstance(conteudo, str):
+                conteudo = "".join(b.get("text", "") for b in conteudo if isinstance(b, dict))
+            if conteudo:
+                return [Evento(TOKEN, conteudo, t, metadados.get("langgraph_node", ""))]
+        return []
+    if modo == "custom":
+        if isinstance(chunk, dict) and chunk.get("evento") in (TOOL_START, TOOL_PROGRESS, TOOL_END):
+            return [Evento(chunk["evento"], chunk, t, "tools")]
+        return [Evento(CUSTOM, chunk, t)]
+    if modo == "updates" and incluir_estado:
+        # Nós que rodam no mesmo passo (ramos paralelos) chegam no mesmo chunk
+        return [Evento(ESTADO, {no: delta}, t, no) for no, delta in chunk.items()]
+    return []
+
+
+def stream_eventos(agent, entrada: dict, config: dict | None = None, incluir_estado: bool = True):
+    """Um único fluxo ordenado de Evento(token | tool_start | tool_progress | tool_end | state | custom).
+
+    Usa os modos "messages", "updates" e "custom" do LangGraph em uma só
+    chamada: a ordem entre eles é a ordem em que aconteceram.
+    O agente precisa do middleware EventosDeFerramenta para os eventos de
+    ferramenta; sem ele, o fim da ferramenta aparece só no "state".
+    """
+    inicio = time.perf_counter()
+    for modo, chunk in agent.stream(entrada, config, stream_mode=["messages", "updates", "custom"]):
+        for evento in _converter(modo, chunk, time.perf_counter() - inicio, incluir_estado):
+            yield evento
+
+
+async def astream_eventos(agent, entrada: dict, config: dict | None = None, incluir_estado: bool = True):
+    """Versão assíncrona de stream_eventos (para servidores ASGI)."""
+    inicio = time.perf_counter()
+    async for modo, chunk in agent.astream(entrada, config, stream_mode=["messages", "updates", "custom"]):
+        for evento in _converter(modo, chunk, time.perf_counter() - inicio, incluir_estado):
+            yield evento
+
+
+############################################
+# PASSO 4 - Métricas: TTFT e bytes no fio
+############################################
+
+import json
+from collections import Counter
+
+from sample039 import para_json
+
+
+def serializar_evento(evento: Evento) -> bytes:
+    """Formato SSE, como um servidor enviaria o evento ao navegador."""
+    dados = evento.dados if evento.tipo == TOKEN else para_json(evento.dados)
+    return f"event: {evento.tipo}\ndata: {json.dumps(dados, ensure_ascii=False)}\n\n".encode()
+
+
+@dataclass
+class MetricasStream:
+    ttft: float | None = None  # tempo até o primeiro texto visível
+    primeiro_evento: float | None = None
+    duracao: float = 0.0
+    eventos: int = 0
+    bytes: int = 0
+    por_tipo: Counter = field(default_factory=Counter)
+
+    def linha(self, nome: str) -> str:
+        ms = lambda valor: f"{valor * 1000:8.0f}" if valor is not None else "       -"
+        return (
+            f"{nome:<10} {ms(self.primeiro_evento)} {ms(self.ttft)} {ms(self.duracao)} "
+            f"{self.eventos:>7} {self.bytes:>9,}"
+        )
+
+    @staticmethod
+    def cabecalho() -> str:
+        return f"{'modo':<10} {'1º ev ms':>8} {'TTFT ms':>8} {'total ms':>8} {'eventos':>7} {'bytes':>9}"
+
+
+def medir_unificado(agent, entrada: dict) -> MetricasStream:
+    metricas = MetricasStream()
+    inicio = time.perf_counter()
+    for evento in stream_eventos(agent, entrada):
+        if metricas.primeiro_evento is None:
+            metricas.primeiro_evento = evento.t
+        if evento.tipo == TOKEN and metricas.ttft is None:
+            metricas.ttft = evento.t
+        metricas.eventos += 1
+        metricas.por_tipo[evento.tipo] += 1
+        metricas.bytes += len(serializar_evento(evento))
+    metricas.duracao = time.perf_counter() - inicio
+    return metricas
+
+
+def medir_values(agent, entrada: dict) -> MetricasStream:
+    """Como o sample018.py: o texto aparece quando chega um estado com resposta."""
+    metricas = MetricasStream()
+    inicio = time.perf_counter()
+    for estado in agent.stream(entrada, stream_mode="values"):
+        agora = time.perf_counter() - inicio
+        if metricas.primeiro_evento is None:
+            metricas.primeiro_evento = agora
+        ultima = estado["messages"][-1]
+        if ultima.type == "ai" and ultima.content and metricas.ttft is None:
+            metricas.ttft = agora
+        metricas.eventos += 1
+        metricas.por_tipo[ESTADO] += 1
+        dados = json.dumps(para_json(estado), ensure_ascii=False)
+        metricas.bytes += len(f"event: values\ndata: {dados}\n\n".encode())
+    metricas.duracao = time.perf_counter() - inicio
+    return metricas
+
+
+############################################
+# PASSO 5 - Demonstrações práticas
+############################################
+
+from langchain.agents import create_agent
+from langchain.tools import tool
+
+from sample033 import ModeloStubLocal, StubConfig
+
+
+@tool
+def gerar_relatorio(topico: str) -> str:
+    """Gerar um relatório detalhado sobre um tema."""
+    time.sleep(0.5)
+    return f"RELATÓRIO: {topico.upper()} - crescimento significativo na área."
+
+
+def criar_agente(model):
+    return create_agent(
+        model=model,
+        tools=[gerar_relatorio],
+        system_prompt="Você gera relatórios. Use a ferramenta gerar_relatorio.",
+        middleware=[EventosDeFerramenta()],
+    )
+
+
+def main():
+    # Modelo "lento" como um LLM real: 300ms até o 1º token, 50 tokens/s
+    model = ModeloStubLocal(config=StubConfig(
+        latencia_ms=300, jitter_ms=0, tokens_por_segundo=50, tokens_resposta=60, seed=42,
+    ))
+    agent = criar_agente(model)
+    entrada = {"messages": [{"role": "user", "content": "Gere um relatório sobre inteligência artificial"}]}
+
+    print("=" * 70)
+    print("1. O FLUXO UNIFICADO (tokens + ferramentas + estado)")
+    print("=" * 70)
+    escrevendo = False
+    for evento in stream_eventos(agent, entrada):
+        if evento.tipo == TOKEN:
+            if not escrevendo:
+                print(f"[{evento.t * 1000:6.0f}ms] texto: ", end="")
+                escrevendo = True
+            print(evento.dados, end="", flush=True)
+            continue
+        if escrevendo:
+            print()
+            escrevendo = False
+        if evento.tipo == TOOL_START:
+            print(f"[{evento.t * 1000:6.0f}ms] ▶ {evento.dados['nome']}({evento.dados['args']})")
+        elif evento.tipo == TOOL_END:
+            print(f"[{evento.t * 1000:6.0f}ms] ■ {evento.dados['nome']} em {evento.dados['duracao_ms']}ms")
+        elif evento.tipo == ESTADO:
+            for no, delta in evento.dados.items():
+                novas = len((delta or {}).get("messages", []))
+                print(f"[{evento.t * 1000:6.0f}ms] estado: nó '{no}' adicionou {novas} mensagem(ns)")
+    if escrevendo:
+        print()
+
+    print("\n" + "=" * 70)
+    print("2. BENCHMARK: UNIFICADO vs VALUES (mesmo agente, mesma pergunta)")
+    print("=" * 70)
+    for tamanho in (0, 20):
+        # Conversa com histórico: "values" reenvia tudo a cada passo
+        historico = [
+            {"role": "user" if i % 2 == 0 else "assistant", "content": f"Mensagem anterior {i} " * 10}
+            for i in range(tamanho)
+        ]
+        conversa = {"messages": historico + entrada["messages"]}
+        values = medir_values(agent, conversa)
+        unificado = medir_unificado(agent, conversa)
+        print(f"\nHistórico com {tamanho} mensagens:")
+        print(MetricasStream.cabecalho())
+        print(values.linha("values"))
+        print(unificado.linha("unificado"))
+    print(f"\nEventos do unificado por tipo: {dict(unificado.por_tipo)}")
+    if values.ttft and unificado.ttft:
+        print(f"TTFT: {values.ttft * 1000:.0f}ms -> {unificado.ttft * 1000:.0f}ms "
+              f"(o texto aparece {values.ttft / unificado.ttft:.1f}x antes)")
+    else:
+        print("TTFT: sem texto visível em um dos modos, comparação indisponível")
+
+    print("\n" + "=" * 70)
+    print("3. CUSTO POR EVENTO (modelo sem latência, 2000 tokens, melhor de 5)")
+    print("=" * 70)
+    rapido = criar_agente(ModeloStubLocal(config=StubConfig(latencia_ms=0, jitter_ms=0, tokens_resposta=2000)))
+    pergunta = {"messages": [{"role": "user", "content": "Escreva um texto longo"}]}
+    tempos_brutos, tempos_unificados = [], []
+    for _ in range(5):  # alternados, para que ruído da máquina afete os dois igualmente
+        inicio = time.perf_counter()
+        brutos = sum(1 for _ in rapido.stream(pergunta, stream_mode=["messages", "updates", "custom"]))
+        tempos_brutos.append(time.perf_counter() - inicio)
+        inicio = time.perf_counter()
+        eventos = sum(1 for _ in stream_eventos(rapido, pergunta))
+        tempos_unificados.append(time.perf_counter() - inicio)
+    tempo_bruto, tempo_unificado = min(tempos_brutos), min(tempos_unificados)
+    print(f"agent.stream (3 modos, bruto): {brutos:>5} chunks em {tempo_bruto * 1000:7.1f}ms")
+    print(f"stream_eventos:                {eventos:>5} eventos em {tempo_unificado * 1000:7.1f}ms")
+    print(f"Overhead da conversão: {(tempo_unificado - tempo_bruto) / eventos * 1e6:+.1f}µs por evento")
+
+    ############################################
+    # OBSERVAÇÕES IMPORTANTES
+    ############################################
+
+    print()
+    print("=" * 70)
+    print("OBSERVAÇÕES IMPORTANTES")
+    print("=" * 70)
+    print("""
+1. POR QUE "values" DEMORA:
+   - Cada chunk é o estado inteiro, emitido quando um nó termina
+   - O texto só aparece depois que o modelo gerou a resposta INTEIRA
+   - E o histórico completo é reenviado a cada passo (mais bytes)
+   - Em conversas curtas o unificado pode emitir MAIS bytes (um evento SSE
+     por token); com histórico, "values" cresce a cada passo
+
+2. O FLUXO UNIFICADO:
+   - stream_mode=["messages", "updates", "custom"] em UMA chamada
+   - "messages" traz os tokens; "updates" traz só o que cada nó mudou
+   - "custom" traz os eventos do middleware EventosDeFerramenta
+   - A ordem do fluxo é a ordem real dos acontecimentos
+
+3. EVENTOS DE FERRAMENTA:
+   - wrap_tool_call escreve no request.runtime.stream_writer (ToolRuntime)
+   - tool_start sai ANTES da ferramenta rodar; tool_end traz a duração
+   - Ferramentas podem usar runtime.stream_writer para seus próprios eventos
+
+4. TTFT (TIME TO FIRST TOKEN):
+   - É a métrica que o usuário sente: quanto tempo até ver texto
+   - No modo "values", TTFT = tempo até a resposta completa
+   - No fluxo unificado, TTFT = latência do modelo até o 1º token
+
+5. OVERHEAD:
+   - Evento usa slots e tipos como strings constantes
+   - Tokens carregam só o texto; nada é serializado se ninguém pedir
+   - Desligue o "state" (incluir_estado=False) se o cliente só quer texto
+
+6. PRÓXIMOS PASSOS:
+   - Para o streaming original por estados, veja sample018.py
+   - Para servir o fluxo via SSE, veja sample039.py
+""")
+
+
+if __name__ == "__main__":
+    main()
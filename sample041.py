@@ -0,0 +1,336 @@
+############################################
+#
+# Exemplo de Streaming de Estado por Deltas
+# (patches) com remontagem no cliente.
+#
+# No sample018.py o modo "values" envia a lista
+# INTEIRA de mensagens a cada passo: em uma
+# execução longa o cliente recebe e decodifica
+# O(n²) bytes. Aqui cada passo vira um patch
+# compacto (mensagens novas, mensagens trocadas
+# ou removidas por id, chaves alteradas) e um
+# Remontador no cliente reconstrói o estado
+# completo.
+#
+# O benchmark mede bytes e CPU por passo em uma
+# execução de 100 passos.
+#
+############################################
+
+
+############################################
+# PASSO 1 - Gerador de patches (lado do servidor)
+############################################
+
+import operator
+
+from sample039 import para_json
+
+
+class GeradorPatches:
+    """Compara cada estado com o anterior e devolve só o que mudou.
+
+    Formato do patch (chaves omitidas quando vazias):
+        {"seq": 3,
+         "append":  [mensagem, ...],        # novas no fim da lista
+         "replace": [mensagem, ...],        # mesmo id, conteúdo novo
+         "remove":  [id, ...],              # RemoveMessage
+         "reset":   [mensagem, ...],        # lista reordenada: envia tudo
+         "set":     {chave: valor, ...},    # outras chaves do estado
+         "unset":   [chave, ...]}
+
+    completo() devolve o estado atual inteiro no mesmo formato, para um
+    cliente que reconectou ou perdeu um patch (Remontador.ressincronizar).
+    """
+
+    def __init__(self):
+        self._anterior: dict = {}
+        self.seq = 0
+
+    def patch(self, estado: dict) -> dict:
+        patch = {"seq": self.seq}
+        for chave, valor in estado.items():
+            if chave == "messages":
+                self._diff_mensagens(self._anterior.get(chave, []), valor, patch)
+                continue
+            if chave in self._anterior:
+                antigo = self._anterior[chave]
+                if antigo is valor or antigo == valor:
+                    continue
+            patch.setdefault("set", {})[chave] = para_json(valor)
+        removidas = self._anterior.keys() - estado.keys()
+        if removidas:
+            patch["unset"] = sorted(removidas)
+        self._anterior = dict(estado)
+        self.seq += 1
+        return patch
+
+    def completo(self) -> dict:
+        """O último estado como um patch com "reset", com o seq do último patch."""
+        patch = {"seq": self.seq - 1, "reset": [para_json(m) for m in self._anterior.get("messages", [])]}
+        outras = {chave: para_json(valor) for chave, valor in self._anterior.items() if chave != "messages"}
+        if outras:
+            patch["set"] = outras
+        return patch
+
+    @staticmethod
+    def _diff_mensagens(antigas: list, novas: list, patch: dict):
+        # Caminho rápido (quase sempre): as antigas são os MESMOS objetos no
+        # início da lista e só houve append. Comparação por identidade em C.
+        if len(novas) >= len(antigas) and all(map(operator.is_, antigas, novas)):
+            if len(novas) > len(antigas):
+                patch["append"] = [para_json(m) for m in novas[len(antigas):]]
+            return
+
+        # Caminho lento: compara por id (mensagens substituídas ou removidas)
+        por_id = {m.id: m for m in antigas}
+        ids_novos = {m.id for m in novas}
+        removidos = [m.id for m in antigas if m.id not in ids_novos]
+        sobreviventes = [m.id for m in antigas if m.id in ids_novos]
+        if [m.id for m in novas[:len(sobreviventes)]] != sobreviventes:
+            patch["reset"] = [para_json(m) for m in novas]
+            return
+        trocadas = [
+            para_json(m) for m in novas[:len(sobreviventes)]
+            if por_id[m.id] is not m and por_id[m.id] != m
+        ]
+        if removidos:
+            patch["remove"] = removidos
+        if trocadas:
+            patch["replace"] = trocadas
+        if len(novas) > len(sobreviventes):
+            patch["append"] = [para_json(m) for m in novas[len(sobreviventes):]]
+
+
+def stream_patches(agent, entrada: dict, config: dict | None = None):
+    """Como agent.stream(stream_mode="values"), mas emitindo patches."""
+    gerador = GeradorPatches()
+    for estado in agent.stream(entrada, config, stream_mode="values"):
+        yield gerador.patch(estado)
+
+
+############################################
+# PASSO 2 - Remontador (lado do cliente)
+############################################
+
+
+class PatchPerdido(Exception):
+    """Um patch chegou fora de ordem: o cliente precisa pedir o estado completo."""
+
+
+class Remontador:
+    """Aplica os patches e mantém o estado completo (mensagens como dicts)."""
+
+    def __init__(self):
+        self.estado: dict = {}
+        self._posicao: dict[str, int] = {}  # id da mensagem -> índice na lista
+        self._proximo = 0
+
+    def aplicar(self, patch: dict) -> dict:
+        if patch["seq"] != self._proximo:
+            raise PatchPerdido(f"esperado seq={self._proximo}, recebido seq={patch['seq']}")
+        self._proximo += 1
+
+        mensagens = self.estado.setdefault("messages", [])
+        if "reset" in patch:
+            mensagens[:] = patch["reset"]
+            self._reindexar()
+        if "remove" in patch:
+            removidos = set(patch["remove"])
+            mensagens[:] = [m for m in mensagens if m.get("id") not in removidos]
+            self._reindexar()
+        for mensagem in patch.get("replace", ()):
+            mensagens[self._posicao[mensagem["id"]]] = mensagem
+        for mensagem in patch.get("append", ()):
+            self._posicao[mensagem.get("id")] = len(mensagens)
+            mensagens.append(mensagem)
+
+        self.estado.update(patch.get("set", {}))
+        for chave in patch.get("unset", ()):
+            self.estado.pop(chave, None)
+        return self.estado
+
+    def ressincronizar(self, completo: dict) -> dict:
+        """Descarta o estado local e recomeça de GeradorPatches.completo()."""
+        self.estado = {}
+        self._posicao = {}
+        self._proximo = completo["seq"]
+        return self.aplicar(completo)
+
+    def _reindexar(self):
+        self._posicao = {m.get("id"): i for i, m in enumerate(self.estado["messages"])}
+
+
+############################################
+# PASSO 3 - Um grafo de 100 passos para o benchmark
+############################################
+
+from typing import Annotated, TypedDict
+
+from langchain_core.messages import AIMessage, AnyMessage
+from langgraph.graph import END, START, StateGraph
+from langgraph.graph.message import add_messages
+
+
+class EstadoLongo(TypedDict):
+    messages: Annotated[list[AnyMessage], add_messages]
+    passo: int
+    status: str
+
+
+def criar_grafo_longo(passos: int = 100, tamanho_mensagem: int = 400):
+    """Simula uma execução longa: cada passo acrescenta uma mensagem."""
+    texto = ("Resultado parcial da análise. " * (tamanho_mensagem // 30 + 1))[:tamanho_mensagem]
+
+    def trabalhar(estado: EstadoLongo) -> dict:
+        passo = estado.get("passo", 0) + 1
+        return {
+            "messages": [AIMessage(f"[{passo}] {texto}")],
+            "passo": passo,
+            "status": "concluído" if passo >= passos else "em andamento",
+        }
+
+    grafo = StateGraph(EstadoLongo)
+    grafo.add_node("trabalhar", trabalhar)
+    grafo.add_edge(START, "trabalhar")
+    grafo.add_conditional_edges("trabalhar", lambda e: END if e["passo"] >= passos else "trabalhar")
+    return grafo.compile()
+
+
+############################################
+# PASSO 4 - Benchmark: bytes e CPU por passo
+############################################
+
+import json
+import time
+
+
+def medir(grafo, entrada: dict, modo: str, passos: int) -> dict:
+    """Serializa no "servidor" e decodifica/remonta no "cliente"."""
+    config = {"recursion_limit": passos + 10}
+    bytes_por_passo, cpu_servidor, cpu_cliente = [], 0.0, 0.0
+    remontador = Remontador()
+    gerador = GeradorPatches()
+    final = None
+
+    for estado in grafo.stream(entrada, config, stream_mode="values"):
+        inicio = time.process_time()
+        dados = json.dumps(gerador.patch(estado) if modo == "patches" else para_json(estado))
+        cpu_servidor += time.process_time() - inicio
+        bytes_por_passo.append(len(dados))
+
+        inicio = time.process_time()
+        recebido = json.loads(dados)
+        final = remontador.aplicar(recebido) if modo == "patches" else recebido
+        cpu_cliente += time.process_time() - inicio
+        esperado = estado
+
+    n = len(bytes_por_passo)
+    return {
+        "modo": modo,
+        "passos": n,
+        "bytes": sum(bytes_por_passo),
+        "bytes_ultimo": bytes_por_passo[-1],
+        "servidor_us": cpu_servidor / n * 1e6,
+        "cliente_us": cpu_cliente / n * 1e6,
+        "confere": final == para_json(esperado),
+    }
+
+
+def main():
+    passos = 100
+    grafo = criar_grafo_longo(passos)
+    entrada = {"messages": [{"role": "user", "content": "Analise o relatório trimestral"}]}
+
+    print("=" * 70)
+    print(f"1. BYTES E CPU POR PASSO ({passos} passos, mensagens de 400 caracteres)")
+    print("=" * 70)
+    print(f"{'modo':<9} {'passos':>6} {'bytes total':>12} {'último passo':>13} {'CPU serv/passo':>15} {'CPU cli/passo':>14}")
+    resultados = {}
+    for modo in ("values", "patches"):
+        r = resultados[modo] = medir(grafo, entrada, modo, passos)
+        print(
+            f"{r['modo']:<9} {r['passos']:>6} {r['bytes']:>12,} {r['bytes_ultimo']:>13,} "
+            f"{r['servidor_us']:>13.0f}µs {r['cliente_us']:>12.0f}µs"
+        )
+    values, patches = resultados["values"], resultados["patches"]
+    print(f"\nBytes: {values['bytes'] / patches['bytes']:.0f}x menos com patches")
+    print(f"Estado remontado igual ao estado final: {patches['confere']}")
+
+    print("\n" + "=" * 70)
+    print("2. CRESCIMENTO: values é O(n²), patches é O(n)")
+    print("=" * 70)
+    print(f"{'passos':>6} {'values':>12} {'patches':>10}")
+    for n in (10, 25, 50, 100, 200):
+        grafo_n = criar_grafo_longo(n)
+        print(f"{n:>6} {medir(grafo_n, entrada, 'values', n)['bytes']:>12,} {medir(grafo_n, entrada, 'patches', n)['bytes']:>10,}")
+
+    print("\n" + "=" * 70)
+    # No grafo, RemoveMessage(id=...) e mensagens com o mesmo id geram estes estados
+    print("3. REMOÇÃO E SUBSTITUIÇÃO POR ID (RemoveMessage / mesmo id)")
+    print("=" * 70)
+    gerador, remontador = GeradorPatches(), Remontador()
+    m1, m2, m3 = (AIMessage(f"mensagem {i}", id=f"m{i}") for i in (1, 2, 3))
+    estados = [
+        {"messages": [m1, m2], "status": "ok"},
+        {"messages": [m1, m2, m3], "status": "ok"},
+        {"messages": [m1, AIMessage("mensagem 2 (editada)", id="m2"), m3], "status": "ok"},
+        {"messages": [m1, m3], "status": "resumido"},
+    ]
+    for estado in estados:
+        patch = gerador.patch(estado)
+        remontador.aplicar(json.loads(json.dumps(patch)))
+        print(f"patch: {json.dumps(patch, ensure_ascii=False)[:100]}")
+    print(f"Remontado: {[m['content'] for m in remontador.estado['messages']]} status={remontador.estado['status']}")
+    # Um patch se perde (reconexão): o próximo chega com um buraco no seq
+    m4 = AIMessage("mensagem 4", id="m4")
+    gerador.patch({"messages": [m1, m3, m4], "status": "resumido"})
+    try:
+        remontador.aplicar(gerador.patch({"messages": [m1, m3, m4], "status": "concluído"}))
+    except PatchPerdido as erro:
+        print(f"Patch fora de ordem detectado: {erro}")
+        remontador.ressincronizar(json.loads(json.dumps(gerador.completo())))
+    remontador.aplicar(gerador.patch({"messages": [m1, m3, m4, AIMessage("mensagem 5", id="m5")], "status": "concluído"}))
+    print(f"Ressincronizado e seguindo: {[m['content'] for m in remontador.estado['messages']]} "
+          f"status={remontador.estado['status']}")
+
+    ############################################
+    # OBSERVAÇÕES IMPORTANTES
+    ############################################
+
+    print()
+    print("=" * 70)
+    print("OBSERVAÇÕES IMPORTANTES")
+    print("=" * 70)
+    print("""
+1. O PROBLEMA DO "values":
+   - Cada passo envia o histórico inteiro: passo k custa O(k) bytes
+   - Em n passos o cliente recebe e decodifica O(n²) bytes
+   - "updates" envia só a saída do nó, mas sem reducers aplicados:
+     o cliente teria que reimplementar add_messages
+
+2. COMO O PATCH É CALCULADO:
+   - Caminho rápido: as mensagens antigas são os MESMOS objetos no início
+     da lista (all(map(operator.is_, ...)) roda em C) e só há append
+   - Caminho lento (RemoveMessage, mesma id): compara por id
+   - Ordem alterada: envia "reset" com a lista inteira (raro)
+
+3. IDS ESTÁVEIS:
+   - add_messages atribui um id a cada mensagem; o patch usa esse id
+   - O cliente indexa id -> posição para aplicar "replace" em O(1)
+
+4. CONSISTÊNCIA:
+   - Cada patch tem "seq"; um buraco levanta PatchPerdido
+   - Na reconexão (ou no PatchPerdido), o servidor envia
+     GeradorPatches.completo() e o cliente chama
+     Remontador.ressincronizar(); os patches seguintes continuam do seq
+     dele. Guarde o GeradorPatches da execução enquanto ela durar
+
+5. PRÓXIMOS PASSOS:
+   - Para o streaming de tokens e ferramentas, veja sample040.py
+   - Para servir patches via SSE, veja sample039.py
+""")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,335 @@
+############################################
+#
+# Exemplo de Progresso em Tempo Real de
+# ferramentas demoradas.
+#
+# No sample018.py, gerar_relatorio bloqueia por
+# 1.5s e o stream fica mudo até ela terminar.
+# Aqui a ferramenta recebe o ToolRuntime (como
+# no sample005.py) e publica progresso e
+# resultados parciais no stream do agente.
+#
+# Para que uma ferramenta "tagarela" não inunde
+# o consumidor, os eventos passam por um
+# limitador: no máximo um evento a cada
+# `intervalo` segundos, juntando (coalescendo)
+# as atualizações do meio.
+#
+# Os eventos chegam como "tool_progress" no
+# fluxo unificado do sample040.py.
+#
+############################################
+
+
+############################################
+# PASSO 1 - O publicador de progresso (limitado e coalescido)
+############################################
+
+import contextvars
+import threading
+import time
+
+from langchain.tools import ToolRuntime
+
+from sample040 import TOOL_PROGRESS
+
+INTERVALO_PADRAO = 0.1  # segundos entre eventos de uma mesma chamada
+
+
+class Progresso:
+    """Publica progresso de UMA chamada de ferramenta no stream "custom".
+
+    - atualizar() pode ser chamado quantas vezes a ferramenta quiser
+    - no máximo um evento sai a cada `intervalo` segundos
+    - entre dois eventos, pct/mensagem ficam com o valor mais recente e
+      os resultados parciais são acumulados (nada se perde)
+    - o que ficou pendente sai no fim do intervalo (timer), mesmo que a
+      ferramenta fique em silêncio depois
+    - fechar() (ou o fim do bloco with) envia o resto e cancela o timer
+
+    O intervalo pode vir do consumidor: config["configurable"]["intervalo_progresso"].
+    Sem runtime (ferramenta chamada fora de um agente) tudo vira no-op.
+    """
+
+    def __init__(self, runtime: ToolRuntime | None, intervalo: float | None = None):
+        self._escrever = getattr(runtime, "stream_writer", None)
+        self._id = getattr(runtime, "tool_call_id", None)
+        if intervalo is None:
+            configuravel = (getattr(runtime, "config", None) or {}).get("configurable", {})
+            intervalo = configuravel.get("intervalo_progresso", INTERVALO_PADRAO)
+        self.intervalo = intervalo
+        # Envios acontecem com o lock: o timer e a ferramenta nunca publicam
+        # fora de ordem, e nada sai depois de fechar()
+        self._lock = threading.Lock()
+        self._timer: threading.Timer | None = None
+        self._fechado = False
+        self._ultimo_envio = float("-inf")
+        self._pct: float | None = None
+        self._mensagem: str | None = None
+        self._parciais: list = []
+        self._pendentes = 0
+        self.recebidas = 0
+        self.enviados = 0
+
+    def atualizar(self, pct: float | None = None, mensagem: str | None = None, parcial=None):
+        with self._lock:
+            self.recebidas += 1
+            self._pendentes += 1
+            if pct is not None:
+                self._pct = pct
+            if mensagem is not None:
+                self._mensagem = mensagem
+            if parcial is not None:
+                self._parciais.append(parcial)
+            agora = time.monotonic()
+            espera = self._ultimo_envio + self.intervalo - agora
+            if espera <= 0:
+                self._enviar(agora)
+            elif self._timer is None and self._escrever is not None and not self._fechado:
+                # O stream_writer do LangGraph lê a config de uma contextvar, e
+                # threads não herdam contextvars: o timer roda numa cópia do
+                # contexto da ferramenta
+                contexto = contextvars.copy_context()
+                self._timer = threading.Timer(espera, contexto.run, (self._ao_fim_do_intervalo,))
+                self._timer.daemon = True
+                self._timer.start()
+
+    def fechar(self):
+        with self._lock:
+            self._fechado = True
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if self._pendentes:
+                self._enviar(time.monotonic())
+
+    def _ao_fim_do_intervalo(self):
+        with self._lock:
+            self._timer = None
+            if self._pendentes and not self._fechado:
+                self._enviar(time.monotonic())
+
+    def _enviar(self, agora: float):
+        """Chamado com o lock: transforma o acumulado em um evento e publica."""
+        if self._escrever is None:
+            self._pendentes = 0
+            self._parciais = []
+            return
+        evento = {
+            "evento": TOOL_PROGRESS,
+            "id": self._id,
+            "pct": self._pct,
+            "mensagem": self._mensagem,
+            "parciais": self._parciais,
+            "coalescidas": self._pendentes,
+        }
+        self._parciais = []
+        self._pendentes = 0
+        self._ultimo_envio = agora
+        self.enviados += 1
+        self._escrever(evento)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
+
+
+############################################
+# PASSO 2 - A ferramenta do sample018.py, agora com progresso
+############################################
+
+from langchain.tools import tool
+
+SECOES = ["Resumo", "Mercado", "Tecnologia", "Riscos", "Conclusão"]
+
+
+@tool
+def gerar_relatorio(topico: str, runtime: ToolRuntime) -> str:
+    """Gerar um relatório detalhado sobre um tema."""
+    linhas_por_secao = 30  # 150 atualizações de 10ms = os mesmos 1.5s do sample018
+    relatorio = [f"RELATÓRIO: {topico.upper()}"]
+    with Progresso(runtime) as progresso:
+        for i, secao in enumerate(SECOES):
+            for j in range(linhas_por_secao):
+                time.sleep(0.01)  # trabalho "real"
+                feito = (i * linhas_por_secao + j + 1) / (len(SECOES) * linhas_por_secao)
+                # Atualização tagarela: a ferramenta não se preocupa com a taxa
+                progresso.atualizar(pct=feito, mensagem=f"Escrevendo {secao}")
+            linha = f"{secao}: análise de {topico} concluída."
+            relatorio.append(linha)
+            progresso.atualizar(parcial=linha)
+    return "\n".join(relatorio)
+
+
+############################################
+# PASSO 3 - Consumidor: renderiza antes de a ferramenta terminar
+############################################
+
+from dataclasses import dataclass, field
+from types import SimpleNamespace
+
+from langchain.agents import create_agent
+
+from sample033 import ModeloStubLocal, StubConfig
+from sample040 import TOOL_END, TOOL_START, TOKEN, EventosDeFerramenta, serializar_evento, stream_eventos
+
+
+def criar_agente(model):
+    return create_agent(
+        model=model,
+        tools=[gerar_relatorio],
+        system_prompt="Você gera relatórios. Use a ferramenta gerar_relatorio.",
+        middleware=[EventosDeFerramenta()],
+    )
+
+
+@dataclass
+class MedicaoProgresso:
+    intervalo: float
+    eventos: int = 0
+    atualizacoes: int = 0  # soma de "coalescidas": o que a ferramenta publicou
+    bytes: int = 0
+    primeiro_parcial: float | None = None
+    fim_da_ferramenta: float | None = None
+    instantes: list[float] = field(default_factory=list)
+
+    @property
+    def maior_silencio(self) -> float:
+        pontos = sorted(self.instantes)
+        return max((b - a for a, b in zip(pontos, pontos[1:])), default=0.0)
+
+
+def medir(agent, entrada: dict, intervalo: float) -> MedicaoProgresso:
+    medicao = MedicaoProgresso(intervalo)
+    config = {"configurable": {"intervalo_progresso": intervalo}}
+    for evento in stream_eventos(agent, entrada, config, incluir_estado=False):
+        if evento.tipo == TOOL_PROGRESS:
+            medicao.eventos += 1
+            medicao.atualizacoes += evento.dados["coalescidas"]
+            medicao.bytes += len(serializar_evento(evento))
+            medicao.instantes.append(evento.t)
+            if evento.dados["parciais"] and medicao.primeiro_parcial is None:
+                medicao.primeiro_parcial = evento.t
+        elif evento.tipo == TOOL_START:
+            medicao.instantes.append(evento.t)
+        elif evento.tipo == TOOL_END:
+            medicao.fim_da_ferramenta = evento.t
+            medicao.instantes.append(evento.t)
+    return medicao
+
+
+def barra(pct: float, largura: int = 20) -> str:
+    cheio = round(pct * largura)
+    return "█" * cheio + "░" * (largura - cheio)
+
+
+def main():
+    model = ModeloStubLocal(config=StubConfig(latencia_ms=50, jitter_ms=0, tokens_resposta=20, seed=42))
+    agent = criar_agente(model)
+    entrada = {"messages": [{"role": "user", "content": "Gere um relatório sobre inteligência artificial"}]}
+
+    print("=" * 70)
+    print("1. PROGRESSO E RESULTADOS PARCIAIS CHEGANDO DURANTE A FERRAMENTA")
+    print("=" * 70)
+    config = {"configurable": {"intervalo_progresso": 0.25}}
+    texto = False
+    for evento in stream_eventos(agent, entrada, config, incluir_estado=False):
+        instante = f"[{evento.t * 1000:5.0f}ms]"
+        if evento.tipo == TOOL_START:
+            print(f"{instante} ▶ {evento.dados['nome']}")
+        elif evento.tipo == TOOL_PROGRESS:
+            dados = evento.dados
+            print(f"{instante}   {barra(dados['pct'] or 0)} {dados['pct'] or 0:4.0%} {dados['mensagem'] or '':<22}"
+                  f" ({dados['coalescidas']} atualizações)")
+            for parcial in dados["parciais"]:
+                print(f"{' ' * len(instante)}   + {parcial}")
+        elif evento.tipo == TOOL_END:
+            print(f"{instante} ■ {evento.dados['nome']} em {evento.dados['duracao_ms']}ms")
+        elif evento.tipo == TOKEN and not texto:
+            print(f"{instante} resposta do modelo começou")
+            texto = True
+
+    print("\n" + "=" * 70)
+    print("2. LIMITADOR: EVENTOS ENTREGUES vs ATUALIZAÇÕES PUBLICADAS")
+    print("=" * 70)
+    print(f"{'intervalo':>9} {'publicadas':>10} {'eventos':>8} {'bytes':>7} {'1º parcial':>11} "
+          f"{'fim tool':>9} {'maior silêncio':>15}")
+    for intervalo in (0.0, 0.05, 0.1, 0.25, 0.5):
+        m = medir(agent, entrada, intervalo)
+        print(
+            f"{intervalo:>8.2f}s {m.atualizacoes:>10} {m.eventos:>8} {m.bytes:>7,} "
+            f"{m.primeiro_parcial * 1000:>9.0f}ms {m.fim_da_ferramenta * 1000:>7.0f}ms "
+            f"{m.maior_silencio * 1000:>13.0f}ms"
+        )
+
+    print("\n" + "=" * 70)
+    print("3. FERRAMENTA QUE SILENCIA: O PENDENTE SAI PELO TIMER")
+    print("=" * 70)
+    inicio = time.monotonic()
+    recebidos = []
+    runtime = SimpleNamespace(stream_writer=lambda e: recebidos.append((time.monotonic() - inicio, e)),
+                              tool_call_id="call_1", config={})
+    progresso = Progresso(runtime, intervalo=0.2)
+    progresso.atualizar(pct=0.1, mensagem="Baixando dados")
+    progresso.atualizar(pct=0.5, parcial="primeira metade pronta")  # dentro do intervalo: fica pendente
+    time.sleep(1.0)  # ferramenta ocupada, sem chamar atualizar()
+    progresso.fechar()
+    for instante, evento in recebidos:
+        print(f"[{instante * 1000:4.0f}ms] pct={evento['pct']:.0%} parciais={evento['parciais']}")
+
+    print("\n" + "=" * 70)
+    print("4. FORA DE UM AGENTE (sem runtime): progresso vira no-op")
+    print("=" * 70)
+    progresso = Progresso(None)
+    for i in range(1000):
+        progresso.atualizar(pct=i / 1000)
+    progresso.fechar()
+    print(f"Atualizações: {progresso.recebidas}, eventos enviados: {progresso.enviados}")
+
+    ############################################
+    # OBSERVAÇÕES IMPORTANTES
+    ############################################
+
+    print()
+    print("=" * 70)
+    print("OBSERVAÇÕES IMPORTANTES")
+    print("=" * 70)
+    print("""
+1. DE ONDE VEM O CANAL:
+   - ToolRuntime.stream_writer escreve no stream "custom" do LangGraph
+   - ToolRuntime.tool_call_id identifica a chamada (várias podem rodar juntas)
+   - O consumidor recebe os eventos com stream_mode=["custom", ...]
+
+2. LIMITAR E COALESCER:
+   - A ferramenta chama atualizar() sem se preocupar com a taxa
+   - Sai no máximo um evento por intervalo; pct e mensagem ficam com o valor
+     mais recente e os parciais são acumulados até o próximo evento
+   - "coalescidas" diz quantas atualizações cada evento representa
+   - O primeiro evento sai na hora; o que chega depois sai no fim do
+     intervalo por um timer, mesmo que a ferramenta fique em silêncio
+   - Um parcial espera no máximo um intervalo para sair (veja "1º parcial"
+     e o exemplo 3); o fechar() cancela o timer e envia o resto
+
+3. QUEM ESCOLHE A TAXA:
+   - O consumidor, via config["configurable"]["intervalo_progresso"]
+   - Um terminal aguenta 10 eventos/s; um painel remoto talvez só 2
+
+4. RENDERIZAR ANTES DO FIM:
+   - Os resultados parciais chegam enquanto a ferramenta ainda trabalha
+   - O usuário lê a primeira seção ~1s antes de a ferramenta terminar
+
+5. CUIDADOS:
+   - Progresso é por chamada: crie um por execução da ferramenta
+   - É thread-safe: ferramentas que usam threads podem compartilhá-lo
+   - Parciais grandes continuam custando bytes; envie resumos, não tudo
+
+6. PRÓXIMOS PASSOS:
+   - Para o fluxo unificado de eventos, veja sample040.py
+   - Para o ToolRuntime com contexto, veja sample005.py
+""")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,383 @@
+############################################
+#
+# Exemplo de Multiplexador de Stream (fan-out)
+# com backpressure por consumidor.
+#
+# Um único model.stream() (sample025.py) ou
+# agent.stream() (sample018.py) precisa chegar a
+# vários destinos ao mesmo tempo: o websocket
+# do usuário, o gravador da transcrição e o
+# moderador de conteúdo. Chamar o modelo três
+# vezes custaria três vezes mais.
+#
+# O Multiplexador lê a fonte UMA vez e entrega
+# a mesma referência de cada chunk (sem cópia)
+# a N consumidores, cada um com um buffer
+# limitado. Quando um buffer enche, a política
+# do consumidor decide:
+#   - BLOQUEAR: o produtor espera (backpressure)
+#   - DESCARTAR: o consumidor lento é removido
+#   - BLOQUEAR com espera_maxima: espera um
+#     pouco e, se não der, descarta
+#
+############################################
+
+
+############################################
+# PASSO 1 - O consumidor (buffer limitado + política)
+############################################
+
+from collections import deque
+import threading
+import time
+
+BLOQUEAR = "bloquear"
+DESCARTAR = "descartar"
+
+
+class ConsumidorDescartado(Exception):
+    """O consumidor ficou para trás e foi removido pela política DESCARTAR."""
+
+
+class Consumidor:
+    """Um destino do stream. Itere sobre ele (em sua própria thread).
+
+    Os chunks no buffer são as MESMAS referências produzidas pela fonte:
+    nenhum consumidor deve modificá-los.
+    """
+
+    def __init__(self, nome: str, capacidade: int, politica: str, espera_maxima: float | None):
+        if politica not in (BLOQUEAR, DESCARTAR):
+            raise ValueError(f"Política desconhecida: {politica}")
+        self.nome = nome
+        self.capacidade = capacidade
+        self.politica = politica
+        self.espera_maxima = espera_maxima
+        self._buffer: deque = deque()
+        self._cond = threading.Condition()
+        self._fim = False
+        self._erro: BaseException | None = None
+        self.cancelado = False
+        self.descartado = False
+        # Métricas
+        self.recebidos = 0
+        self.maior_fila = 0
+        self.tempo_bloqueando = 0.0  # quanto tempo o PRODUTOR esperou por este consumidor
+
+    # --- lado do produtor ---
+
+    def _entregar(self, chunk) -> bool:
+        """Devolve False quando o consumidor saiu (descartado ou cancelado)."""
+        with self._cond:
+            if self.cancelado or self.descartado:
+                return False
+            if len(self._buffer) >= self.capacidade:
+                if self.politica == DESCARTAR:
+                    self.descartado = True
+                    self._cond.notify()
+                    return False
+                inicio = time.perf_counter()
+                livre = self._cond.wait_for(
+                    lambda: len(self._buffer) < self.capacidade or self.cancelado,
+                    timeout=self.espera_maxima,
+                )
+                self.tempo_bloqueando += time.perf_counter() - inicio
+                if self.cancelado:
+                    return False
+                if not livre:
+                    self.descartado = True
+                    self._cond.notify()
+                    return False
+            self._buffer.append(chunk)
+            self.maior_fila = max(self.maior_fila, len(self._buffer))
+            self._cond.notify()
+            return True
+
+    def _encerrar(self, erro: BaseException | None = None):
+        with self._cond:
+            self._fim = True
+            self._erro = erro
+            self._cond.notify()
+
+    # --- lado do consumidor ---
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        with self._cond:
+            self._cond.wait_for(lambda: self._buffer or self._fim or self.descartado or self.cancelado)
+            if self._buffer and not self.cancelado:
+                chunk = self._buffer.popleft()
+                self.recebidos += 1
+                self._cond.notify()  # pode haver um produtor esperando espaço
+                return chunk
+            if self.descartado:
+                raise ConsumidorDescartado(f"{self.nome} ficou {self.capacidade} chunks atrás")
+            if self._erro is not None:
+                raise self._erro
+            raise StopIteration
+
+    def cancelar(self):
+        """O consumidor desiste (ex.: websocket fechado). Não trava o produtor."""
+        with self._cond:
+            self.cancelado = True
+            self._buffer.clear()
+            self._cond.notify_all()
+
+
+############################################
+# PASSO 2 - O multiplexador (lê a fonte uma vez)
+############################################
+
+
+class Multiplexador:
+    """Lê `fonte` em uma thread e distribui cada chunk aos consumidores.
+
+    Inscreva todos os consumidores ANTES de iniciar(): um inscrito tardio
+    perderia o começo do stream. Se todos saírem, a fonte deixa de ser
+    lida (e a geração do modelo é interrompida).
+    """
+
+    def __init__(self, fonte):
+        self._fonte = fonte
+        self._consumidores: list[Consumidor] = []
+        self._thread: threading.Thread | None = None
+        self.chunks = 0
+        self.duracao = 0.0
+        self.erro: BaseException | None = None
+
+    def inscrever(
+        self,
+        nome: str,
+        capacidade: int = 64,
+        politica: str = BLOQUEAR,
+        espera_maxima: float | None = None,
+    ) -> Consumidor:
+        if self._thread is not None:
+            raise RuntimeError("Inscreva os consumidores antes de iniciar()")
+        consumidor = Consumidor(nome, capacidade, politica, espera_maxima)
+        self._consumidores.append(consumidor)
+        return consumidor
+
+    def iniciar(self) -> "Multiplexador":
+        self._thread = threading.Thread(target=self._bombear, name="multiplexador", daemon=True)
+        self._thread.start()
+        return self
+
+    def aguardar(self, timeout: float | None = None):
+        self._thread.join(timeout)
+
+    def _bombear(self):
+        inicio = time.perf_counter()
+        ativos = list(self._consumidores)
+        try:
+            for chunk in self._fonte:
+                self.chunks += 1
+                # A mesma referência vai para todos: nenhuma cópia do payload
+                ativos = [c for c in ativos if c._entregar(chunk)]
+                if not ativos:
+                    break
+        except BaseException as erro:
+            self.erro = erro
+        finally:
+            fechar = getattr(self._fonte, "close", None)
+            if fechar:
+                fechar()  # interrompe o gerador do modelo se todos saíram
+            self.duracao = time.perf_counter() - inicio
+            for consumidor in self._consumidores:
+                consumidor._encerrar(self.erro)
+
+
+############################################
+# PASSO 3 - Três destinos típicos
+############################################
+
+from dataclasses import dataclass, field
+
+
+@dataclass
+class ResultadoDestino:
+    nome: str
+    chunks: int = 0
+    fim: float = 0.0
+    atraso_maximo: float = 0.0  # maior distância entre produção e consumo
+    descartado: bool = False
+    referencias: list = field(default_factory=list)
+
+
+def destino(
+    consumidor: Consumidor,
+    custo_por_chunk: float,
+    inicio: float,
+    guardar: bool = False,
+    soluco: tuple[int, float] | None = None,
+):
+    """Simula um destino que gasta `custo_por_chunk` segundos em cada chunk.
+
+    soluco=(a_cada, segundos): uma pausa longa de vez em quando (rede, GC).
+    """
+    resultado = ResultadoDestino(consumidor.nome)
+    try:
+        for produzido, chunk in consumidor:
+            resultado.chunks += 1
+            if soluco and resultado.chunks % soluco[0] == 0:
+                time.sleep(soluco[1])
+            resultado.atraso_maximo = max(resultado.atraso_maximo, time.perf_counter() - produzido)
+            if guardar:
+                resultado.referencias.append(chunk)
+            if custo_por_chunk:
+                time.sleep(custo_por_chunk)
+    except ConsumidorDescartado:
+        resultado.descartado = True
+    resultado.fim = time.perf_counter() - inicio
+    return resultado
+
+
+############################################
+# PASSO 4 - Benchmark: consumidores rápidos e lentos
+############################################
+
+from concurrent.futures import ThreadPoolExecutor
+
+from sample033 import ModeloStubLocal, StubConfig
+
+
+def fonte_do_modelo(tokens: int, tokens_por_segundo: float):
+    """model.stream() do stub; cada item é (instante de produção, chunk)."""
+    model = ModeloStubLocal(config=StubConfig(
+        latencia_ms=0, jitter_ms=0, tokens_resposta=tokens, tokens_por_segundo=tokens_por_segundo,
+    ))
+    for chunk in model.stream("Escreva um texto longo"):
+        yield time.perf_counter(), chunk
+
+
+def cenario(nome: str, moderador: dict, tokens: int = 1000, tokens_por_segundo: float = 1000):
+    """websocket (rápido), transcrição (lotes) e moderação (lenta, configurável)."""
+    mux = Multiplexador(fonte_do_modelo(tokens, tokens_por_segundo))
+    destinos = [
+        (mux.inscrever("websocket", capacidade=256), 0.0),
+        (mux.inscrever("transcrição", capacidade=256), 0.0003),
+        # 2x mais lenta que o modelo e com uma pausa de 100ms a cada 400 chunks
+        (mux.inscrever("moderação", **moderador), 0.002),
+    ]
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(destinos)) as executor:
+        futuros = [
+            executor.submit(destino, c, custo, inicio, True, (400, 0.1) if c.nome == "moderação" else None)
+            for c, custo in destinos
+        ]
+        mux.iniciar()
+        resultados = [f.result() for f in futuros]
+
+    print(f"\n{nome}")
+    print(f"  produtor: {mux.chunks} chunks em {mux.duracao * 1000:.0f}ms")
+    print(f"  {'destino':<12} {'chunks':>6} {'fim ms':>7} {'atraso máx ms':>14} {'produtor esperou ms':>20} {'status':>10}")
+    for (consumidor, _), r in zip(destinos, resultados):
+        status = "DESCARTADO" if r.descartado else "ok"
+        print(
+            f"  {r.nome:<12} {r.chunks:>6} {r.fim * 1000:>7.0f} {r.atraso_maximo * 1000:>14.0f} "
+            f"{consumidor.tempo_bloqueando * 1000:>20.0f} {status:>10}"
+        )
+    return resultados
+
+
+def main():
+    print("=" * 70)
+    print("1. UM STREAM, TRÊS DESTINOS (modelo a 1000 tokens/s, moderação a 500/s + pausas)")
+    print("=" * 70)
+    resultados = cenario(
+        "A) Moderação com BACKPRESSURE (buffer 64): todos andam no ritmo do mais lento",
+        {"capacidade": 64, "politica": BLOQUEAR},
+    )
+    cenario(
+        "B) Moderação DESCARTÁVEL (buffer 64): o lento sai, os outros seguem no ritmo do modelo",
+        {"capacidade": 64, "politica": DESCARTAR},
+    )
+    cenario(
+        "C) BACKPRESSURE com espera máxima de 50ms: tolera a lentidão, não a pausa de 100ms",
+        {"capacidade": 64, "politica": BLOQUEAR, "espera_maxima": 0.05},
+    )
+    cenario(
+        "D) Buffer grande (1024) absorve a diferença de ritmo sem bloquear",
+        {"capacidade": 1024, "politica": BLOQUEAR},
+    )
+
+    print("\n" + "=" * 70)
+    print("2. SEM CÓPIAS: todos os destinos recebem os mesmos objetos")
+    print("=" * 70)
+    websocket, transcricao, moderacao = resultados
+    mesmos = all(a is b is c for a, b, c in zip(websocket.referencias, transcricao.referencias, moderacao.referencias))
+    print(f"chunk[i] é o mesmo objeto nos 3 destinos: {mesmos} ({len(websocket.referencias)} chunks)")
+
+    print("\n" + "=" * 70)
+    print("3. CUSTO DO FAN-OUT (200.000 chunks prontos, destinos sem trabalho)")
+    print("=" * 70)
+    chunks = [object() for _ in range(200_000)]
+    for n in (1, 3, 8):
+        mux = Multiplexador(iter(chunks))
+        consumidores = [mux.inscrever(f"c{i}", capacidade=1024) for i in range(n)]
+        inicio = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=n) as executor:
+            futuros = [executor.submit(lambda c: sum(1 for _ in c), c) for c in consumidores]
+            mux.iniciar()
+            total = sum(f.result() for f in futuros)
+        elapsed = time.perf_counter() - inicio
+        print(f"{n} consumidor(es): {len(chunks) / elapsed:>10,.0f} chunks/s  "
+              f"({elapsed / total * 1e6:.2f}µs por entrega, {total:,} entregas)")
+
+    print("\n" + "=" * 70)
+    print("4. TODOS OS DESTINOS SAEM: a fonte deixa de ser lida")
+    print("=" * 70)
+    mux = Multiplexador(fonte_do_modelo(tokens=5000, tokens_por_segundo=5000))
+    consumidor = mux.inscrever("websocket")
+    mux.iniciar()
+    for i, _ in enumerate(consumidor):
+        if i == 100:
+            consumidor.cancelar()  # o usuário fechou a aba
+            break
+    mux.aguardar()
+    print(f"Chunks lidos do modelo: {mux.chunks} de ~5000 (geração interrompida)")
+
+    ############################################
+    # OBSERVAÇÕES IMPORTANTES
+    ############################################
+
+    print()
+    print("=" * 70)
+    print("OBSERVAÇÕES IMPORTANTES")
+    print("=" * 70)
+    print("""
+1. POR QUE MULTIPLEXAR:
+   - Um stream do modelo, vários destinos: uma chamada paga, não N
+   - O modelo é lido em uma thread; cada destino consome na sua
+
+2. BUFFERS LIMITADOS:
+   - Cada consumidor tem seu deque com capacidade máxima
+   - Sem limite, um destino travado faria a memória crescer sem fim
+
+3. POLÍTICAS:
+   - BLOQUEAR: o produtor espera; ninguém perde chunks, mas o mais lento
+     dita o ritmo de TODOS (inclusive do websocket do usuário)
+   - DESCARTAR: o lento é removido ao encher o buffer e recebe
+     ConsumidorDescartado depois de consumir o que já estava no buffer
+   - espera_maxima: meio-termo, tolera soluços curtos
+   - Regra prática: destinos essenciais bloqueiam; opcionais descartam
+
+4. SEM CÓPIAS:
+   - Todos recebem a mesma referência; o custo de entrega não depende do
+     tamanho do chunk. Por isso os destinos NÃO devem modificar chunks
+
+5. CANCELAMENTO:
+   - cancelar() libera o produtor na hora
+   - Se todos saírem, a fonte é fechada (generator.close()) e o
+     modelo para de gerar
+
+6. PRÓXIMOS PASSOS:
+   - Para o stream unificado de agentes, veja sample040.py
+   - Para os métodos stream/batch do modelo, veja sample025.py
+""")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,310 @@
+############################################
+#
+# Exemplo de Agregação Incremental de Chunks
+# sem montagem quadrática de strings.
+#
+# O sample025.py (passo 3) junta chunk.content
+# em uma lista e faz "".join no fim: funciona
+# para texto, mas perde tool calls e usage.
+# Somar AIMessageChunks com "+" a cada chunk
+# reconcatena o conteúdo e os argumentos das
+# tool calls (e reinterpreta o JSON parcial) a
+# cada passo: O(n²) para respostas longas.
+#
+# O AgregadorChunks acumula texto, fragmentos
+# de argumentos e usage em O(1) amortizado por
+# chunk e oferece visões parciais a qualquer
+# momento. O benchmark usa streams de 100k
+# chunks.
+#
+############################################
+
+
+############################################
+# PASSO 1 - O agregador
+############################################
+
+import json
+
+from langchain_core.messages import AIMessage
+from langchain_core.utils.json import parse_partial_json
+
+
+class _ToolCallParcial:
+    __slots__ = ("id", "nome", "args")
+
+    def __init__(self):
+        self.id: str | None = None
+        self.nome = ""
+        self.args: list[str] = []  # fragmentos; o join só acontece quando alguém pede
+
+
+class AgregadorChunks:
+    """Acumula AIMessageChunks em O(1) amortizado por chunk.
+
+    Uso:
+        agregador = AgregadorChunks()
+        for chunk in model.stream(...):
+            agregador.adicionar(chunk)      # ou: agregador += chunk
+            print(agregador.novo_texto(), end="")
+        mensagem = agregador.mensagem()      # AIMessage final
+
+    Texto e argumentos ficam em listas de fragmentos. As visões (texto,
+    tool_calls_parciais) custam O(tamanho) quando pedidas, e o texto é
+    guardado em cache até o próximo chunk.
+    """
+
+    def __init__(self):
+        self._partes: list[str] = []
+        self._cache: tuple[int, str] = (0, "")  # (partes cobertas, texto)
+        self._lidas = 0  # partes já devolvidas por novo_texto()
+        self._tools: dict[int | str, _ToolCallParcial] = {}
+        self.usage: dict = {}
+        self.response_metadata: dict = {}
+        self.id: str | None = None
+        self.chunks = 0
+
+    def adicionar(self, chunk) -> "AgregadorChunks":
+        self.chunks += 1
+        conteudo = chunk.content
+        if conteudo:
+            if type(conteudo) is str:
+                self._partes.append(conteudo)
+            else:  # lista de blocos (ex.: Anthropic): acumula só o texto
+                for bloco in conteudo:
+                    texto = bloco if isinstance(bloco, str) else bloco.get("text") if bloco.get("type") == "text" else None
+                    if texto:
+                        self._partes.append(texto)
+
+        for fragmento in getattr(chunk, "tool_call_chunks", ()):
+            indice = fragmento.get("index")
+            if indice is None:
+                indice = fragmento.get("id") or len(self._tools)
+            parcial = self._tools.get(indice)
+            if parcial is None:
+                parcial = self._tools[indice] = _ToolCallParcial()
+            if fragmento.get("id"):
+                parcial.id = fragmento["id"]
+            if fragmento.get("name"):
+                parcial.nome += fragmento["name"]
+            if fragmento.get("args"):
+                parcial.args.append(fragmento["args"])
+
+        usage = getattr(chunk, "usage_metadata", None)
+        if usage:
+            _somar(self.usage, usage)
+        if chunk.response_metadata:
+            self.response_metadata.update(chunk.response_metadata)
+        if self.id is None and chunk.id:
+            self.id = chunk.id
+        return self
+
+    __iadd__ = adicionar
+
+    # --- visões parciais ---
+
+    @property
+    def texto(self) -> str:
+        cobertas, texto = self._cache
+        if cobertas != len(self._partes):
+            texto = texto + "".join(self._partes[cobertas:])
+            self._cache = (len(self._partes), texto)
+        return texto
+
+    def novo_texto(self) -> str:
+        """Só o texto que chegou desde a última chamada: O(novo), não O(total)."""
+        novo = "".join(self._partes[self._lidas:])
+        self._lidas = len(self._partes)
+        return novo
+
+    def tool_calls_parciais(self) -> list[dict]:
+        """Tool calls com os argumentos interpretados até onde já chegaram."""
+        return [
+            {"id": p.id, "name": p.nome, "args": parse_partial_json("".join(p.args)) or {}}
+            for p in self._tools.values()
+        ]
+
+    # --- resultado final ---
+
+    def mensagem(self) -> AIMessage:
+        tool_calls, invalidas = [], []
+        for parcial in self._tools.values():
+            args = "".join(parcial.args)
+            try:
+                tool_calls.append({"id": parcial.id, "name": parcial.nome, "args": json.loads(args or "{}")})
+            except json.JSONDecodeError as erro:
+                invalidas.append({"id": parcial.id, "name": parcial.nome, "args": args, "error": str(erro)})
+        return AIMessage(
+            content=self.texto,
+            tool_calls=tool_calls,
+            invalid_tool_calls=invalidas,
+            usage_metadata=self.usage or None,
+            response_metadata=self.response_metadata,
+            id=self.id,
+        )
+
+
+def _somar(total: dict, parcela: dict):
+    for chave, valor in parcela.items():
+        if isinstance(valor, dict):
+            _somar(total.setdefault(chave, {}), valor)
+        elif isinstance(valor, (int, float)):
+            total[chave] = total.get(chave, 0) + valor
+
+
+############################################
+# PASSO 2 - Streams sintéticos para o benchmark
+############################################
+
+from langchain_core.messages import AIMessageChunk
+
+
+def stream_de_texto(n: int) -> list[AIMessageChunk]:
+    chunks = [AIMessageChunk(content="tok%d " % (i % 100), id="run-1") for i in range(n)]
+    chunks.append(AIMessageChunk(content="", usage_metadata={"input_tokens": 12, "output_tokens": n, "total_tokens": n + 12}))
+    return chunks
+
+
+def stream_de_tool_call(n: int) -> list[AIMessageChunk]:
+    """Uma tool call cujo argumento "texto" chega em n fragmentos."""
+    chunks = [AIMessageChunk(content="", tool_call_chunks=[
+        {"name": "salvar_documento", "args": '{"texto": "', "id": "call_1", "index": 0},
+    ])]
+    chunks += [
+        AIMessageChunk(content="", tool_call_chunks=[{"name": None, "args": "frag ", "id": None, "index": 0}])
+        for _ in range(n)
+    ]
+    chunks.append(AIMessageChunk(content="", tool_call_chunks=[{"name": None, "args": '"}', "id": None, "index": 0}]))
+    return chunks
+
+
+############################################
+# PASSO 3 - Benchmark: "+" a cada chunk vs agregador
+############################################
+
+import time
+
+
+def somar_ingenuo(chunks):
+    """O padrão comum: total = total + chunk a cada iteração."""
+    total = None
+    for chunk in chunks:
+        total = chunk if total is None else total + chunk
+    return total
+
+
+def somar_nario(chunks):
+    """O "+" n-ário do LangChain (chunks[0] + chunks[1:]): linear, mas só no fim."""
+    return chunks[0] + chunks[1:]
+
+
+def agregar(chunks):
+    agregador = AgregadorChunks()
+    for chunk in chunks:
+        agregador += chunk
+    return agregador.mensagem()
+
+
+def cronometrar(funcao, chunks) -> tuple[float, object]:
+    inicio = time.perf_counter()
+    resultado = funcao(chunks)
+    return time.perf_counter() - inicio, resultado
+
+
+def main():
+    print("=" * 70)
+    print("1. STREAM DE TEXTO")
+    print("=" * 70)
+    print(f"{'chunks':>8} {'+ a cada chunk':>15} {'+ n-ário (fim)':>15} {'agregador':>11} {'µs/chunk':>9} {'igual':>6}")
+    for n in (1_000, 10_000, 100_000):
+        chunks = stream_de_texto(n)
+        t_ingenuo, ingenuo = cronometrar(somar_ingenuo, chunks)
+        t_nario, _ = cronometrar(somar_nario, chunks)
+        t_agregador, mensagem = cronometrar(agregar, chunks)
+        igual = mensagem.content == ingenuo.content and mensagem.usage_metadata == ingenuo.usage_metadata
+        print(f"{n:>8,} {t_ingenuo:>14.2f}s {t_nario:>14.2f}s {t_agregador:>10.3f}s "
+              f"{t_agregador / n * 1e6:>9.2f} {str(igual):>6}")
+
+    print("\n" + "=" * 70)
+    print("2. STREAM DE ARGUMENTOS DE TOOL CALL (o caso quadrático)")
+    print("=" * 70)
+    print(f"{'chunks':>8} {'+ a cada chunk':>15} {'agregador':>11} {'µs/chunk':>9} {'igual':>6}")
+    medidos = []
+    for n in (500, 1_000, 2_000):
+        chunks = stream_de_tool_call(n)
+        t_ingenuo, ingenuo = cronometrar(somar_ingenuo, chunks)
+        t_agregador, mensagem = cronometrar(agregar, chunks)
+        medidos.append((n, t_ingenuo))
+        print(f"{n:>8,} {t_ingenuo:>14.2f}s {t_agregador:>10.4f}s {t_agregador / n * 1e6:>9.2f} "
+              f"{str(mensagem.tool_calls == ingenuo.tool_calls):>6}")
+    # O "+" a cada chunk reinterpreta o JSON parcial inteiro: cresce ~n²
+    (n1, t1), (n2, t2) = medidos[0], medidos[-1]
+    estimado = t2 * (100_000 / n2) ** 2
+    chunks = stream_de_tool_call(100_000)
+    t_agregador, mensagem = cronometrar(agregar, chunks)
+    print(f"{100_000:>8,} {'~' + format(estimado / 3600, '.0f') + 'h (est.)':>15} {t_agregador:>10.4f}s "
+          f"{t_agregador / 100_000 * 1e6:>9.2f}")
+    print(f"\n(crescimento medido de {n1} para {n2} chunks: {t2 / t1:.1f}x para {n2 / n1:.0f}x mais chunks)")
+    print(f"Argumento final: {len(mensagem.tool_calls[0]['args']['texto']):,} caracteres")
+
+    print("\n" + "=" * 70)
+    print("3. VISÕES PARCIAIS DURANTE O STREAM")
+    print("=" * 70)
+    agregador = AgregadorChunks()
+    chunks = stream_de_tool_call(30)
+    for i, chunk in enumerate(chunks):
+        agregador += chunk
+        if i in (0, 5, 20):
+            print(f"chunk {i:>2}: {agregador.tool_calls_parciais()}")
+
+    # Renderização incremental: 100k chunks, a tela atualiza a cada 100
+    chunks = stream_de_texto(100_000)
+    agregador = AgregadorChunks()
+    inicio = time.perf_counter()
+    renderizado = 0
+    for i, chunk in enumerate(chunks):
+        agregador += chunk
+        if i % 100 == 0:
+            renderizado += len(agregador.novo_texto())
+    renderizado += len(agregador.novo_texto())
+    print(f"\n100k chunks com novo_texto() a cada 100: {time.perf_counter() - inicio:.3f}s, "
+          f"{renderizado:,} caracteres renderizados (= {len(agregador.texto):,})")
+
+    ############################################
+    # OBSERVAÇÕES IMPORTANTES
+    ############################################
+
+    print()
+    print("=" * 70)
+    print("OBSERVAÇÕES IMPORTANTES")
+    print("=" * 70)
+    print("""
+1. POR QUE "total = total + chunk" É LENTO:
+   - Cada soma cria um novo AIMessageChunk (validação Pydantic)
+   - O texto acumulado é copiado inteiro a cada chunk: O(n²) bytes
+   - Nas tool calls, o JSON parcial é reinterpretado a cada soma: O(n²)
+     com constante alta (horas para 100k fragmentos)
+
+2. O QUE O AGREGADOR FAZ:
+   - Texto e argumentos viram listas de fragmentos (append = O(1))
+   - usage é somado campo a campo; response_metadata fica com o último valor
+   - Nada é concatenado ou interpretado até alguém pedir
+
+3. VISÕES PARCIAIS:
+   - novo_texto(): só o que chegou desde a última chamada (ideal para UI)
+   - texto: o texto completo até agora, em cache até o próximo chunk
+   - tool_calls_parciais(): argumentos interpretados com parse_partial_json
+   - mensagem(): a AIMessage final, com tool_calls e invalid_tool_calls
+
+4. ALTERNATIVAS:
+   - chunks[0] + chunks[1:] (n-ário) é linear, mas só serve no fim
+   - "".join(textos), como no sample025.py, perde tool calls e usage
+
+5. PRÓXIMOS PASSOS:
+   - Para os métodos stream/batch, veja sample025.py
+   - Para JSON estruturado incremental, veja sample045.py
+""")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,509 @@
+############################################
+#
+# Exemplo de Cache de Schemas Compilados para
+# saída estruturada.
+#
+# ToolStrategy(ContactInfo), ProviderStrategy(
+# Person) e with_structured_output(Company)
+# (sample014/015/021) geram de novo o JSON
+# schema (~1ms por modelo) sempre que um agente
+# ou runnable é montado, e o LangChain cria um
+# TypeAdapter novo para validar CADA resposta.
+# Em sistemas multi-tenant, que montam agentes o
+# tempo todo, isso aparece no profile.
+#
+# Aqui um cache global guarda, por classe e
+# versão do schema, o JSON schema, a definição
+# de ferramenta e o TypeAdapter. O benchmark
+# compara montagem de agentes e validação de
+# respostas com o cache frio e quente.
+#
+############################################
+
+
+############################################
+# PASSO 1 - O cache de schemas compilados
+############################################
+
+from collections import OrderedDict
+from dataclasses import dataclass
+from dataclasses import is_dataclass
+import threading
+
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from pydantic import BaseModel, TypeAdapter
+from typing_extensions import is_typeddict
+
+
+def versao_do_schema(modelo) -> object:
+    """Versão declarada pela classe (ex.: __schema_version__ = 2).
+
+    A identidade da classe já separa schemas redefinidos ou criados com
+    create_model; a versão cobre classes alteradas em tempo de execução
+    (model_rebuild, campos adicionados por plugins).
+    """
+    return getattr(modelo, "__schema_version__", None)
+
+
+@dataclass(slots=True)
+class SchemaCompilado:
+    tipo: str  # "pydantic", "dataclass" ou "typeddict", como em _SchemaSpec
+    nome: str
+    descricao: str
+    json_schema: dict
+    adapter: TypeAdapter
+    ferramenta: dict | None = None  # definição OpenAI, gerada no primeiro pedido
+
+
+class CacheSchemas:
+    """Compila cada (classe, versão) uma única vez. Thread-safe.
+
+    Os JSON schemas devolvidos são compartilhados: trate-os como somente
+    leitura. Schemas dinâmicos (um create_model por tenant) não crescem sem
+    limite: acima de `maximo` entradas, a menos usada recentemente sai.
+    """
+
+    def __init__(self, maximo: int = 1024):
+        self.maximo = maximo
+        self._entradas: OrderedDict[tuple, SchemaCompilado] = OrderedDict()
+        self._lock = threading.Lock()
+        self.acertos = 0
+        self.compilacoes = 0
+
+    def compilar(self, modelo) -> SchemaCompilado:
+        chave = (modelo, versao_do_schema(modelo))
+        with self._lock:
+            entrada = self._entradas.get(chave)
+            if entrada is not None:
+                self._entradas.move_to_end(chave)
+                self.acertos += 1
+                return entrada
+
+        # Compila fora do lock: duas threads podem compilar o mesmo schema ao
+        # mesmo tempo, mas o resultado é idêntico e só um fica guardado
+        entrada = _compilar(modelo)
+        with self._lock:
+            entrada = self._entradas.setdefault(chave, entrada)
+            self.compilacoes += 1
+            while len(self._entradas) > self.maximo:
+                self._entradas.popitem(last=False)
+        return entrada
+
+    def json_schema(self, modelo) -> dict:
+        return self.compilar(modelo).json_schema
+
+    def adapter(self, modelo) -> TypeAdapter:
+        return self.compilar(modelo).adapter
+
+    def ferramenta(self, modelo) -> dict:
+        entrada = self.compilar(modelo)
+        if entrada.ferramenta is None:
+            entrada.ferramenta = convert_to_openai_tool(modelo)
+        return entrada.ferramenta
+
+    def invalidar(self, modelo=None):
+        """Descarta um schema (todas as versões) ou, sem argumento, tudo."""
+        with self._lock:
+            for chave in [c for c in self._entradas if modelo is None or c[0] is modelo]:
+                del self._entradas[chave]
+
+    def estatisticas(self) -> dict:
+        with self._lock:
+            return {"schemas": len(self._entradas), "acertos": self.acertos, "compilacoes": self.compilacoes}
+
+
+def _compilar(modelo) -> SchemaCompilado:
+    if isinstance(modelo, type) and issubclass(modelo, BaseModel):
+        tipo, json_schema = "pydantic", modelo.model_json_schema()
+        adapter = TypeAdapter(modelo)
+    elif is_dataclass(modelo) or is_typeddict(modelo):
+        tipo = "dataclass" if is_dataclass(modelo) else "typeddict"
+        adapter = TypeAdapter(modelo)
+        json_schema = adapter.json_schema()
+    else:
+        raise ValueError(f"Schema não suportado: {modelo!r}")
+    return SchemaCompilado(
+        tipo=tipo,
+        nome=modelo.__name__,
+        descricao=modelo.__doc__ or "",
+        json_schema=json_schema,
+        adapter=adapter,
+    )
+
+
+CACHE_GLOBAL = CacheSchemas()
+
+
+############################################
+# PASSO 2 - Ligando o cache às strategies do create_agent
+############################################
+
+# ToolStrategy, ProviderStrategy e AutoStrategy criam um _SchemaSpec (que
+# gera o JSON schema) e validam cada resposta com _parse_with_schema (que
+# cria um TypeAdapter). Os dois são procurados no módulo a cada uso, então
+# basta trocá-los por versões que consultam o cache. Nada muda para quem
+# escreve ToolStrategy(ContactInfo).
+
+from langchain.agents import structured_output
+
+_ORIGINAIS = {
+    "_SchemaSpec": structured_output._SchemaSpec,
+    "_parse_with_schema": structured_output._parse_with_schema,
+}
+
+
+class _SchemaSpecEmCache(structured_output._SchemaSpec):
+    cache: CacheSchemas = CACHE_GLOBAL
+
+    def __init__(self, schema, *, name=None, description=None, strict=None):
+        if isinstance(schema, dict):  # JSON schema cru: nada para compilar
+            super().__init__(schema, name=name, description=description, strict=strict)
+            return
+        compilado = self.cache.compilar(schema)
+        self.schema = schema
+        self.name = name or compilado.nome
+        self.description = description or compilado.descricao
+        self.strict = strict
+        self.schema_kind = compilado.tipo
+        self.json_schema = compilado.json_schema
+
+
+def _validar_em_cache(schema, schema_kind, data):
+    # Mesmo contrato (e mesma mensagem de erro) de _parse_with_schema: o
+    # handle_errors do ToolStrategy continua funcionando igual
+    if schema_kind == "json_schema":
+        return data
+    try:
+        return _SchemaSpecEmCache.cache.adapter(schema).validate_python(data)
+    except Exception as e:
+        schema_name = getattr(schema, "__name__", str(schema))
+        raise ValueError(f"Failed to parse data to {schema_name}: {e}") from e
+
+
+def instalar_cache(cache: CacheSchemas | None = None):
+    """Faz ToolStrategy/ProviderStrategy/AutoStrategy usarem o cache."""
+    _SchemaSpecEmCache.cache = cache or CACHE_GLOBAL
+    structured_output._SchemaSpec = _SchemaSpecEmCache
+    structured_output._parse_with_schema = _validar_em_cache
+
+
+def remover_cache():
+    for nome, original in _ORIGINAIS.items():
+        setattr(structured_output, nome, original)
+
+
+############################################
+# PASSO 3 - with_structured_output com cache
+############################################
+
+# O runnable de with_structured_output é imutável: para o mesmo modelo,
+# schema e opções, o mesmo objeto pode ser reaproveitado por todos os tenants.
+
+import json
+
+
+class _SemChave(Exception):
+    """Argumento que não vira chave de cache (nem hash, nem JSON)."""
+
+
+def _chave_do_valor(valor):
+    try:
+        hash(valor)
+        return valor
+    except TypeError:
+        pass
+    # Schemas em dict e opções como strict={"...": ...} entram serializados
+    try:
+        return ("json", json.dumps(valor, sort_keys=True))
+    except (TypeError, ValueError) as erro:
+        raise _SemChave from erro
+
+
+class CacheRunnables:
+    """Runnables de with_structured_output por (modelo, schema, opções). Thread-safe.
+
+    Limitado a `maximo` entradas (LRU), como o CacheSchemas: modelos e
+    schemas criados por requisição não ficam presos na memória para sempre.
+    """
+
+    def __init__(self, maximo: int = 256):
+        self.maximo = maximo
+        # O modelo fica guardado junto com o runnable para que o id não seja reaproveitado
+        self._entradas: OrderedDict[tuple, tuple[object, object]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.acertos = 0
+        self.construcoes = 0
+        self.sem_cache = 0
+
+    def obter(self, model, schema, kwargs: dict):
+        try:
+            chave = (
+                id(model), _chave_do_valor(schema), versao_do_schema(schema),
+                tuple(sorted((nome, _chave_do_valor(valor)) for nome, valor in kwargs.items())),
+            )
+        except _SemChave:
+            with self._lock:
+                self.sem_cache += 1
+            return model.with_structured_output(schema, **kwargs)
+        with self._lock:
+            guardado = self._entradas.get(chave)
+            if guardado is not None and guardado[0] is model:
+                self._entradas.move_to_end(chave)
+                self.acertos += 1
+                return guardado[1]
+        runnable = model.with_structured_output(schema, **kwargs)
+        with self._lock:
+            guardado = self._entradas.get(chave)
+            if guardado is None or guardado[0] is not model:
+                guardado = self._entradas[chave] = (model, runnable)
+                self.construcoes += 1
+            while len(self._entradas) > self.maximo:
+                self._entradas.popitem(last=False)
+            return guardado[1]
+
+    def estatisticas(self) -> dict:
+        with self._lock:
+            return {
+                "runnables": len(self._entradas),
+                "acertos": self.acertos,
+                "construcoes": self.construcoes,
+                "sem_cache": self.sem_cache,
+            }
+
+
+RUNNABLES_GLOBAL = CacheRunnables()
+
+
+def saida_estruturada(model, schema, **kwargs):
+    """Substituto de model.with_structured_output(schema, **kwargs)."""
+    return RUNNABLES_GLOBAL.obter(model, schema, kwargs)
+
+
+############################################
+# PASSO 4 - Os schemas dos samples 014, 015 e 021
+############################################
+
+from typing import Literal
+
+from pydantic import Field
+
+from sample037 import ContactInfo, EventDetails, ProductReview
+
+
+class Address(BaseModel):
+    """Endereço estruturado."""
+    street: str = Field(description="Nome da rua com número")
+    city: str = Field(description="Nome da cidade")
+    state: str = Field(description="Estado (sigla)")
+    zip_code: str = Field(description="CEP")
+
+
+class Person(BaseModel):
+    """Informações completas de uma pessoa."""
+    full_name: str = Field(description="Nome completo")
+    age: int = Field(description="Idade em anos", ge=0, le=120)
+    occupation: str = Field(description="Profissão ou ocupação")
+    address: Address = Field(description="Endereço completo")
+    interests: list[str] = Field(description="Lista de interesses/hobbies")
+
+
+class SentimentAnalysis(BaseModel):
+    """Análise de sentimento estruturada."""
+    text: str = Field(description="Texto original analisado")
+    sentiment: Literal["positivo", "negativo", "neutro"] = Field(description="Sentimento identificado")
+    confidence: float = Field(description="Nível de confiança (0.0 a 1.0)", ge=0.0, le=1.0)
+    key_phrases: list[str] = Field(description="Frases-chave que justificam o sentimento")
+
+
+class Company(BaseModel):
+    """Informações de uma empresa."""
+    name: str = Field(description="Nome da empresa")
+    founded_year: int = Field(description="Ano de fundação")
+    employees: int = Field(description="Número de funcionários")
+    address: Address = Field(description="Endereço da empresa")
+
+
+############################################
+# PASSO 5 - Benchmark: cache frio vs quente
+############################################
+
+import time
+
+from langchain.agents import create_agent
+from langchain.agents.structured_output import OutputToolBinding, ProviderStrategy, ToolStrategy
+
+from sample033 import ModeloStubLocal, StubConfig, consultar_clima
+
+
+def montar_tenant(model, tenant: int) -> list:
+    """O que um tenant monta a cada requisição: prompts próprios, schemas comuns."""
+    prompt = f"Você atende o tenant {tenant}. Extraia os dados pedidos."
+    return [
+        create_agent(model, [consultar_clima], system_prompt=prompt, response_format=ToolStrategy(ContactInfo)),
+        create_agent(model, [], system_prompt=prompt, response_format=ToolStrategy(ProductReview | EventDetails)),
+        create_agent(model, [], system_prompt=prompt, response_format=ProviderStrategy(Person)),
+        saida_estruturada(model, Company) if structured_output._SchemaSpec is _SchemaSpecEmCache
+        else model.with_structured_output(Company),
+    ]
+
+
+def por_repeticao(funcao, repeticoes: int) -> float:
+    inicio = time.perf_counter()
+    for i in range(repeticoes):
+        funcao(i)
+    return (time.perf_counter() - inicio) / repeticoes
+
+
+def respostas_validas(n: int) -> list[dict]:
+    return [
+        {"full_name": f"Pessoa {i}", "age": 20 + i % 60, "occupation": "engenheira",
+         "address": {"street": f"Rua {i}", "city": "Recife", "state": "PE", "zip_code": "50000-000"},
+         "interests": ["leitura", "corrida"]}
+        for i in range(n)
+    ]
+
+
+def main():
+    model = ModeloStubLocal(config=StubConfig(latencia_ms=0, jitter_ms=0, tokens_resposta=10, seed=42))
+    tenants = 50
+
+    print("=" * 70)
+    print("1. COMPILAR UM SCHEMA vs BUSCAR NO CACHE")
+    print("=" * 70)
+    print(f"{'schema':<18} {'JSON schema':>12} {'TypeAdapter':>12} {'ferramenta':>11} {'do cache':>9}")
+    cache = CacheSchemas()
+    for modelo in (ContactInfo, Person, Company, SentimentAnalysis):
+        json_schema = por_repeticao(lambda _: modelo.model_json_schema(), 50)
+        adapter = por_repeticao(lambda _: TypeAdapter(modelo), 50)
+        ferramenta = por_repeticao(lambda _: convert_to_openai_tool(modelo), 50)
+        cache.ferramenta(modelo)
+        buscar = por_repeticao(lambda _: cache.compilar(modelo), 10_000)
+        print(f"{modelo.__name__:<18} {json_schema * 1e6:>10.0f}µs {adapter * 1e6:>10.0f}µs "
+              f"{ferramenta * 1e6:>9.0f}µs {buscar * 1e6:>7.2f}µs")
+
+    print("\n" + "=" * 70)
+    print(f"2. MONTAGEM DE AGENTES: {tenants} tenants x (3 agentes + 1 with_structured_output)")
+    print("=" * 70)
+    remover_cache()
+    frio = por_repeticao(lambda i: montar_tenant(model, i), tenants)
+    instalar_cache(CACHE_GLOBAL)
+    inicio = time.perf_counter()
+    montar_tenant(model, -1)
+    primeira = time.perf_counter() - inicio
+    quente = por_repeticao(lambda i: montar_tenant(model, i), tenants)
+    print(f"Sem cache (padrão):        {frio * 1000:6.2f}ms por tenant")
+    print(f"Com cache, 1º tenant:      {primeira * 1000:6.2f}ms (compila os schemas)")
+    print(f"Com cache, demais:         {quente * 1000:6.2f}ms por tenant ({frio / quente:.1f}x mais rápido)")
+    print(f"Cache: {CACHE_GLOBAL.estatisticas()}")
+
+    print("\n" + "=" * 70)
+    print("3. VALIDAÇÃO DE CADA RESPOSTA (OutputToolBinding.parse)")
+    print("=" * 70)
+    respostas = respostas_validas(2_000)
+    resultados = {}
+    for nome, instalar in (("sem cache", remover_cache), ("com cache", instalar_cache)):
+        instalar()
+        binding = OutputToolBinding.from_schema_spec(ProviderStrategy(Person).schema_spec)
+        inicio = time.perf_counter()
+        resultados[nome] = [binding.parse(dados) for dados in respostas]
+        elapsed = time.perf_counter() - inicio
+        print(f"{nome:<10} {elapsed / len(respostas) * 1e6:6.1f}µs por resposta")
+    print(f"Mesmos objetos validados: {resultados['sem cache'] == resultados['com cache']}")
+
+    # De ponta a ponta: o agente do tenant valida a tool call do modelo
+    for nome, instalar in (("sem cache", remover_cache), ("com cache", instalar_cache)):
+        instalar()
+        agente = create_agent(model, [], response_format=ToolStrategy(ContactInfo))
+        entrada = {"messages": [{"role": "user", "content": "João, joao@ex.com, (81) 99999-0000"}]}
+        agente.invoke(entrada)
+        inicio = time.perf_counter()
+        for _ in range(100):
+            resposta = agente.invoke(entrada)["structured_response"]
+        print(f"agent.invoke {nome}: {(time.perf_counter() - inicio) * 10:.2f}ms -> {resposta!r}"[:110])
+
+    print("\n" + "=" * 70)
+    print("4. ERROS, VERSÕES E INVALIDAÇÃO")
+    print("=" * 70)
+    instalar_cache()
+    invalido = {"full_name": "Ana", "age": 200}
+    mensagens = []
+    for instalar in (remover_cache, instalar_cache):
+        instalar()
+        try:
+            OutputToolBinding.from_schema_spec(ProviderStrategy(Person).schema_spec).parse(invalido)
+        except ValueError as erro:
+            mensagens.append(str(erro))
+    print(f"Mesma mensagem de erro com e sem cache: {mensagens[0] == mensagens[1]}")
+    print(f"  {mensagens[1].splitlines()[0]}")
+
+    antes = CACHE_GLOBAL.estatisticas()["compilacoes"]
+    Company.__schema_version__ = 2  # ex.: um plugin acrescentou um campo
+    ToolStrategy(Company)
+    ToolStrategy(Company)
+    print(f"Nova versão de Company compilada {CACHE_GLOBAL.estatisticas()['compilacoes'] - antes}x")
+    CACHE_GLOBAL.invalidar(Company)
+    print(f"Depois de invalidar(Company): {CACHE_GLOBAL.estatisticas()}")
+    remover_cache()
+
+    print("\n" + "=" * 70)
+    print("5. saida_estruturada: SCHEMAS EM DICT, OPÇÕES NÃO HASHEÁVEIS E LRU")
+    print("=" * 70)
+    from langchain_openai import ChatOpenAI
+
+    openai = ChatOpenAI(model="gpt-4o-mini", api_key="stub")  # só monta runnables, sem rede
+    runnables = CacheRunnables(maximo=4)
+    schema_dict = {"title": "Cidade", "type": "object", "properties": {"nome": {"type": "string"}}}
+    a = runnables.obter(openai, schema_dict, {"method": "json_schema"})
+    b = runnables.obter(openai, dict(schema_dict), {"method": "json_schema"})
+    print(f"Schema em dict, mesma estrutura reaproveitada: {a is b}")
+    # tools=[...] não vira chave (nem hash, nem JSON): constrói sem cache, sem TypeError
+    runnables.obter(openai, Company, {"method": "function_calling", "tools": [consultar_clima]})
+    for _ in range(20):  # um modelo por requisição: o LRU descarta os antigos
+        runnables.obter(ModeloStubLocal(config=StubConfig(latencia_ms=0)), Company, {})
+    print(f"Estatísticas: {runnables.estatisticas()}")
+
+    ############################################
+    # OBSERVAÇÕES IMPORTANTES
+    ############################################
+
+    print()
+    print("=" * 70)
+    print("OBSERVAÇÕES IMPORTANTES")
+    print("=" * 70)
+    print("""
+1. ONDE ESTÁ O CUSTO:
+   - model_json_schema() e convert_to_openai_tool(): ~1ms por schema, a
+     cada ToolStrategy/ProviderStrategy/with_structured_output
+   - _parse_with_schema cria um TypeAdapter por resposta validada
+   - Nada disso muda entre tenants: só o prompt e as tools mudam
+
+2. A CHAVE DO CACHE:
+   - A própria classe (identidade) + __schema_version__
+   - Classes criadas com create_model são chaves diferentes
+   - Alterou a classe em tempo de execução? Suba __schema_version__ ou
+     chame invalidar(Classe)
+   - LRU com `maximo` entradas: schemas dinâmicos não vazam memória
+   - saida_estruturada usa o mesmo esquema (CacheRunnables): modelo +
+     schema + opções; dicts entram serializados, o resto fica sem cache
+
+3. COMO LIGAR:
+   - instalar_cache() faz ToolStrategy, ProviderStrategy e AutoStrategy
+     usarem o cache; remover_cache() volta ao comportamento padrão
+   - saida_estruturada(model, Schema) substitui model.with_structured_output
+   - A mensagem de erro de validação é a mesma: handle_errors continua igual
+
+4. CUIDADOS:
+   - Os JSON schemas em cache são compartilhados: não os modifique
+   - O cache troca funções internas de langchain.agents.structured_output;
+     confira o comportamento ao atualizar o LangChain
+   - O ganho é de CPU na montagem; com LLM real, a latência da chamada
+     continua dominando cada requisição
+
+5. PRÓXIMOS PASSOS:
+   - Para o cache do grafo compilado inteiro, veja sample037.py
+   - Para ToolStrategy e ProviderStrategy, veja sample014.py e sample015.py
+""")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,565 @@
+############################################
+#
+# Exemplo de Pipeline de Extração em Massa
+# com agentes de saída estruturada.
+#
+# Os agentes agent_contact, agent_review e
+# agent_event do sample014.py processam um texto
+# por invoke. Para milhões de documentos, este
+# pipeline:
+#   - lê JSONL ou CSV em streaming (memória
+#     constante)
+#   - roda o agente com concorrência assíncrona
+#     limitada
+#   - valida cada saída contra o schema
+#   - grava resultados e falhas em arquivos
+#     fragmentados (shards)
+#   - salva checkpoints para retomar de onde
+#     parou
+#
+# No fim, reporta documentos por segundo e custo
+# por documento.
+#
+############################################
+
+
+############################################
+# PASSO 1 - Leitura em streaming (JSONL ou CSV)
+############################################
+
+import csv
+import json
+from dataclasses import dataclass
+from pathlib import Path
+
+
+@dataclass(slots=True)
+class Documento:
+    posicao: int  # ordem no arquivo de entrada (é o que o checkpoint guarda)
+    id: str
+    texto: str
+    erro: str | None = None  # registro malformado: vai direto para as falhas
+
+
+def _registros_jsonl(arquivo):
+    for linha in arquivo:
+        if not linha.strip():
+            continue
+        try:
+            yield json.loads(linha)
+        except json.JSONDecodeError as erro:
+            yield f"JSON inválido ({erro.msg}, coluna {erro.colno}): {linha.strip()[:80]}"
+
+
+def ler_documentos(caminho: Path, campo_id: str = "id", campo_texto: str = "texto"):
+    """Gera um Documento por registro, sem carregar o arquivo na memória.
+
+    .jsonl: um objeto por linha. .csv: cabeçalho na primeira linha.
+    Sem a coluna de id, a posição do registro vira o id. Registros
+    malformados (JSON inválido, sem o campo de texto) saem com `erro`
+    preenchido, em vez de interromper a leitura.
+    """
+    caminho = Path(caminho)
+    with caminho.open(encoding="utf-8", newline="") as arquivo:
+        if caminho.suffix == ".csv":
+            registros = csv.DictReader(arquivo)
+        elif caminho.suffix in (".jsonl", ".ndjson"):
+            registros = _registros_jsonl(arquivo)
+        else:
+            raise ValueError(f"Formato não suportado: {caminho.suffix} (use .jsonl ou .csv)")
+        for posicao, registro in enumerate(registros):
+            if isinstance(registro, str):
+                yield Documento(posicao, str(posicao), "", registro)
+            elif not isinstance(registro, dict):
+                yield Documento(posicao, str(posicao), "", f"Esperado um objeto, veio {type(registro).__name__}")
+            elif not isinstance(registro.get(campo_texto), str):
+                yield Documento(posicao, str(registro.get(campo_id) or posicao), "",
+                                f"Registro sem o campo de texto '{campo_texto}'")
+            else:
+                yield Documento(posicao, str(registro.get(campo_id) or posicao), registro[campo_texto])
+
+
+############################################
+# PASSO 2 - Checkpoint (o que já foi concluído)
+############################################
+
+import os
+
+
+class Checkpoint:
+    """Guarda quais posições da entrada já foram concluídas.
+
+    Com concorrência, os documentos terminam fora de ordem. Guardamos uma
+    "marca" (todas as posições abaixo dela estão concluídas) e o pequeno
+    conjunto de posições concluídas acima da marca. O tamanho desse conjunto
+    é limitado pela concorrência, não pelo tamanho da entrada.
+    """
+
+    def __init__(self, caminho: Path):
+        self.caminho = Path(caminho)
+        self.marca = 0
+        self._adiante: set[int] = set()
+        self.fragmentos: int | None = None
+        if self.caminho.exists():
+            dados = json.loads(self.caminho.read_text())
+            self.marca = dados["marca"]
+            self._adiante = set(dados["adiante"])
+            self.fragmentos = dados["fragmentos"]
+
+    def concluida(self, posicao: int) -> bool:
+        return posicao < self.marca or posicao in self._adiante
+
+    def marcar(self, posicao: int):
+        self._adiante.add(posicao)
+        while self.marca in self._adiante:
+            self._adiante.remove(self.marca)
+            self.marca += 1
+
+    def salvar(self):
+        # Escreve em um temporário e renomeia: um crash nunca deixa o
+        # checkpoint pela metade
+        temporario = self.caminho.with_suffix(".tmp")
+        temporario.write_text(json.dumps({
+            "marca": self.marca,
+            "adiante": sorted(self._adiante),
+            "fragmentos": self.fragmentos,
+        }))
+        os.replace(temporario, self.caminho)
+
+
+############################################
+# PASSO 3 - Saída fragmentada (shards)
+############################################
+
+import zlib
+
+
+class SaidaFragmentada:
+    """resultados-00003.jsonl / falhas-00003.jsonl, escolhidos pelo id.
+
+    O shard é crc32(id) % fragmentos: o mesmo documento cai sempre no mesmo
+    arquivo, também depois de retomar. Os arquivos abrem em modo append.
+    """
+
+    def __init__(self, diretorio: Path, fragmentos: int):
+        self.diretorio = Path(diretorio)
+        self.diretorio.mkdir(parents=True, exist_ok=True)
+        self.fragmentos = fragmentos
+        self._abertos: dict[tuple[str, int], object] = {}
+
+    def escrever(self, tipo: str, id: str, registro: dict):
+        shard = zlib.crc32(id.encode()) % self.fragmentos
+        arquivo = self._abertos.get((tipo, shard))
+        if arquivo is None:
+            caminho = self.diretorio / f"{tipo}-{shard:05d}.jsonl"
+            arquivo = self._abertos[(tipo, shard)] = caminho.open("a", encoding="utf-8")
+        arquivo.write(json.dumps(registro, ensure_ascii=False) + "\n")
+
+    def sincronizar(self):
+        """Garante no disco tudo o que foi escrito (antes de salvar o checkpoint)."""
+        for arquivo in self._abertos.values():
+            arquivo.flush()
+            os.fsync(arquivo.fileno())
+
+    def fechar(self):
+        self.sincronizar()
+        for arquivo in self._abertos.values():
+            arquivo.close()
+        self._abertos.clear()
+
+
+############################################
+# PASSO 4 - O pipeline
+############################################
+
+import asyncio
+import time
+
+from langchain.agents.structured_output import StructuredOutputError
+from pydantic import BaseModel, ValidationError
+
+from sample046 import CACHE_GLOBAL
+
+# Preços do gpt-4o-mini, como no sample028.py (verifique os preços atuais)
+PRECO_INPUT_POR_1M = 0.150
+PRECO_OUTPUT_POR_1M = 0.600
+
+# Erros que não melhoram com uma nova tentativa
+ERROS_PERMANENTES = (StructuredOutputError, ValidationError, KeyError)
+
+
+class RegistroInvalido(ValueError):
+    """Registro da entrada que não pôde ser lido (ver Documento.erro)."""
+
+
+@dataclass
+class RelatorioLote:
+    documentos: int = 0
+    sucessos: int = 0
+    falhas: int = 0
+    pulados: int = 0  # já concluídos em uma execução anterior
+    tentativas_extras: int = 0
+    tokens_entrada: int = 0
+    tokens_saida: int = 0
+    duracao: float = 0.0
+
+    @property
+    def docs_por_segundo(self) -> float:
+        return self.documentos / self.duracao if self.duracao else 0.0
+
+    @property
+    def custo(self) -> float:
+        return (self.tokens_entrada * PRECO_INPUT_POR_1M + self.tokens_saida * PRECO_OUTPUT_POR_1M) / 1_000_000
+
+    @property
+    def custo_por_documento(self) -> float:
+        return self.custo / self.documentos if self.documentos else 0.0
+
+    def linha(self) -> str:
+        return (
+            f"{self.documentos:>6} docs ({self.sucessos} ok, {self.falhas} falhas, {self.pulados} pulados) "
+            f"em {self.duracao:5.1f}s = {self.docs_por_segundo:6.1f} docs/s, "
+            f"${self.custo_por_documento * 1000:.4f} por mil docs"
+        )
+
+
+async def extrair_em_massa(
+    agent,
+    schema: type[BaseModel],
+    entrada: Path,
+    saida: Path,
+    *,
+    instrucao: str = "Extraia as informações do seguinte texto: {texto}",
+    concorrencia: int = 32,
+    fragmentos: int = 8,
+    tentativas: int = 3,
+    espera_inicial: float = 0.2,
+    salvar_a_cada: float = 1.0,
+    campo_id: str = "id",
+    campo_texto: str = "texto",
+) -> RelatorioLote:
+    """Roda `agent` sobre cada documento de `entrada`, gravando em `saida`.
+
+    Se `saida` já tiver um checkpoint, os documentos concluídos são pulados.
+    Cancelar a tarefa (Ctrl+C, timeout) salva o checkpoint antes de sair.
+    """
+    saida = Path(saida)
+    saida.mkdir(parents=True, exist_ok=True)
+    checkpoint = Checkpoint(saida / "checkpoint.json")
+    checkpoint.fragmentos = checkpoint.fragmentos or fragmentos  # fixo entre execuções
+    arquivos = SaidaFragmentada(saida, checkpoint.fragmentos)
+    adapter = CACHE_GLOBAL.adapter(schema)
+    relatorio = RelatorioLote()
+    fila: asyncio.Queue = asyncio.Queue(maxsize=concorrencia * 2)  # leitura não corre à frente
+    ultimo_salvamento = time.monotonic()
+
+    def salvar():
+        nonlocal ultimo_salvamento
+        arquivos.sincronizar()  # primeiro os dados, depois o checkpoint
+        checkpoint.salvar()
+        ultimo_salvamento = time.monotonic()
+
+    async def produzir():
+        for documento in ler_documentos(entrada, campo_id, campo_texto):
+            if checkpoint.concluida(documento.posicao):
+                relatorio.pulados += 1
+                continue
+            await fila.put(documento)
+        for _ in range(concorrencia):
+            await fila.put(None)
+
+    async def invocar(documento: Documento) -> dict:
+        mensagem = {"role": "user", "content": instrucao.format(texto=documento.texto)}
+        for tentativa in range(tentativas):
+            try:
+                return await agent.ainvoke({"messages": [mensagem]})
+            except ERROS_PERMANENTES:
+                raise
+            except Exception:
+                if tentativa + 1 == tentativas:
+                    raise
+                relatorio.tentativas_extras += 1
+                await asyncio.sleep(espera_inicial * 2**tentativa)
+
+    async def trabalhar():
+        while (documento := await fila.get()) is not None:
+            try:
+                if documento.erro is not None:
+                    raise RegistroInvalido(documento.erro)
+                resultado = await invocar(documento)
+                for mensagem in resultado["messages"]:
+                    uso = getattr(mensagem, "usage_metadata", None)
+                    if uso:
+                        relatorio.tokens_entrada += uso["input_tokens"]
+                        relatorio.tokens_saida += uso["output_tokens"]
+                bruto = resultado["structured_response"]
+                if isinstance(bruto, BaseModel):
+                    bruto = bruto.model_dump()
+                objeto = adapter.validate_python(bruto)
+                arquivos.escrever("resultados", documento.id, {
+                    "id": documento.id, "dados": adapter.dump_python(objeto, mode="json"),
+                })
+                relatorio.sucessos += 1
+            except Exception as erro:
+                falha = {
+                    campo_id: documento.id, "posicao": documento.posicao,
+                    "erro": type(erro).__name__, "mensagem": str(erro)[:500],
+                }
+                # Com o texto, o arquivo de falhas serve de entrada para
+                # reprocessar; registros malformados não têm texto a guardar
+                if documento.erro is None:
+                    falha[campo_texto] = documento.texto
+                arquivos.escrever("falhas", documento.id, falha)
+                relatorio.falhas += 1
+            relatorio.documentos += 1
+            checkpoint.marcar(documento.posicao)
+            if time.monotonic() - ultimo_salvamento >= salvar_a_cada:
+                salvar()
+
+    inicio = time.perf_counter()
+    tarefas = [asyncio.create_task(produzir())]
+    tarefas += [asyncio.create_task(trabalhar()) for _ in range(concorrencia)]
+    try:
+        await asyncio.gather(*tarefas)
+    finally:
+        # Se a leitura falhar (formato, csv.Error, decodificação), o gather
+        # propaga o erro sem cancelar o resto: os trabalhadores ficariam
+        # esperando em fila.get() para sempre
+        for tarefa in tarefas:
+            tarefa.cancel()
+        await asyncio.gather(*tarefas, return_exceptions=True)
+        relatorio.duracao = time.perf_counter() - inicio
+        salvar()
+        arquivos.fechar()
+    return relatorio
+
+
+############################################
+# PASSO 5 - Agentes do sample014.py e dados sintéticos
+############################################
+
+import random
+
+from langchain.agents import create_agent
+from langchain.agents.structured_output import ToolStrategy
+from pydantic import Field
+
+from sample033 import ServidorStub, StubConfig, criar_modelo_stub
+from sample037 import ContactInfo, EventDetails, ProductReview
+
+NOMES = ["João Pedro Santos", "Maria Silva", "Ana Souza", "Carlos Lima", "Beatriz Rocha"]
+PRODUTOS = ["Notebook Dell", "Fone JBL", "Monitor LG", "Teclado Logitech"]
+
+
+def gerar_entrada(caminho: Path, quantidade: int, seed: int = 42):
+    """Textos no estilo do sample014.py, em JSONL ou CSV conforme a extensão."""
+    rng = random.Random(seed)
+    registros = []
+    for i in range(quantidade):
+        nome, produto = rng.choice(NOMES), rng.choice(PRODUTOS)
+        if caminho.stem.startswith("contatos"):
+            texto = f"Fale com {nome}, e-mail {nome.split()[0].lower()}@empresa.com, telefone (11) 9{i:04d}-0000"
+        elif caminho.stem.startswith("avaliacoes"):
+            texto = f"Comprei o {produto}. Nota {rng.randint(1, 5)}. Bateria boa, mas esquenta."
+        else:
+            texto = f"Conferência {i} em São Paulo, 15/03/2025, {rng.randint(50, 900)} participantes, temas: IA, dados"
+        registros.append({"id": f"doc-{i:06d}", "texto": texto})
+    with caminho.open("w", encoding="utf-8", newline="") as arquivo:
+        if caminho.suffix == ".csv":
+            escritor = csv.DictWriter(arquivo, fieldnames=["id", "texto"])
+            escritor.writeheader()
+            escritor.writerows(registros)
+        else:
+            arquivo.writelines(json.dumps(r, ensure_ascii=False) + "\n" for r in registros)
+
+
+def criar_agentes(model) -> dict:
+    return {
+        "contact": create_agent(model=model, response_format=ToolStrategy(ContactInfo)),
+        "review": create_agent(model=model, response_format=ToolStrategy(ProductReview)),
+        "event": create_agent(model=model, response_format=ToolStrategy(EventDetails)),
+    }
+
+
+class ContatoEstrito(ContactInfo):
+    """ContactInfo com e-mail validado: o pipeline pode ser mais exigente que o agente."""
+    email: str = Field(description="Endereço de e-mail", pattern=r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+
+
+def ids_gravados(diretorio: Path, tipo: str) -> list[str]:
+    ids = []
+    for caminho in sorted(diretorio.glob(f"{tipo}-*.jsonl")):
+        with caminho.open(encoding="utf-8") as arquivo:
+            ids += [json.loads(linha)["id"] for linha in arquivo]
+    return ids
+
+
+############################################
+# PASSO 6 - Demonstrações
+############################################
+
+import tempfile
+
+
+async def demonstrar(model, config: StubConfig, pasta: Path):
+    agentes = criar_agentes(model)
+
+    print("=" * 70)
+    print("1. CONCORRÊNCIA LIMITADA: agent_contact sobre JSONL")
+    print("=" * 70)
+    contatos = pasta / "contatos.jsonl"
+    gerar_entrada(contatos, 400)
+    for concorrencia in (1, 8, 32, 128):
+        quantidade = 20 if concorrencia == 1 else 400
+        entrada = pasta / f"contatos-{concorrencia}.jsonl"
+        with contatos.open() as origem, entrada.open("w") as destino:
+            destino.writelines(linha for _, linha in zip(range(quantidade), origem))
+        relatorio = await extrair_em_massa(
+            agentes["contact"], ContactInfo, entrada, pasta / f"saida-contatos-{concorrencia}",
+            concorrencia=concorrencia,
+        )
+        print(f"conc={concorrencia:>3}: {relatorio.linha()}")
+
+    print("\n" + "=" * 70)
+    print("2. CSV, FALHAS TRANSITÓRIAS E SHARDS: agent_review")
+    print("=" * 70)
+    avaliacoes = pasta / "avaliacoes.csv"
+    gerar_entrada(avaliacoes, 500)
+    saida = pasta / "saida-avaliacoes"
+    config.taxa_erro = 0.2  # um provedor instável: 20% de HTTP 500
+    relatorio = await extrair_em_massa(
+        agentes["review"], ProductReview, avaliacoes, saida, concorrencia=64, fragmentos=4, tentativas=2,
+    )
+    config.taxa_erro = 0.05
+    print(relatorio.linha())
+    print(f"Novas tentativas após erro HTTP 500: {relatorio.tentativas_extras} "
+          f"(falhas = 2 erros seguidos no mesmo documento)")
+    for caminho in sorted(saida.glob("*.jsonl")):
+        with caminho.open() as arquivo:
+            print(f"  {caminho.name:<22} {sum(1 for _ in arquivo):>4} registros")
+    falhas = sorted(saida.glob("falhas-*.jsonl"))
+    if falhas:
+        print(f"Exemplo de falha: {falhas[0].read_text().splitlines()[0][:110]}")
+        # As falhas guardam o texto: juntas, viram a entrada de uma nova rodada
+        refazer = pasta / "avaliacoes-falhas.jsonl"
+        refazer.write_text("".join(caminho.read_text() for caminho in falhas))
+        relatorio = await extrair_em_massa(
+            agentes["review"], ProductReview, refazer, pasta / "saida-avaliacoes-2", concorrencia=64,
+        )
+        print(f"Reprocessando as falhas: {relatorio.linha()}")
+
+    print("\n" + "=" * 70)
+    print("3. INTERROMPER E RETOMAR: agent_event")
+    print("=" * 70)
+    eventos = pasta / "eventos.jsonl"
+    gerar_entrada(eventos, 600)
+    saida = pasta / "saida-eventos"
+    try:
+        async with asyncio.timeout(2.0):  # simula um Ctrl+C no meio da execução
+            await extrair_em_massa(agentes["event"], EventDetails, eventos, saida, concorrencia=32)
+    except TimeoutError:
+        marca = json.loads((saida / "checkpoint.json").read_text())["marca"]
+        print(f"Interrompido: checkpoint com {marca} documentos concluídos em sequência")
+    relatorio = await extrair_em_massa(agentes["event"], EventDetails, eventos, saida, concorrencia=32)
+    print(f"Retomado: {relatorio.linha()}")
+    gravados = ids_gravados(saida, "resultados") + ids_gravados(saida, "falhas")
+    print(f"Registros gravados: {len(gravados)}, ids únicos: {len(set(gravados))} (entrada: 600)")
+    relatorio = await extrair_em_massa(agentes["event"], EventDetails, eventos, saida, concorrencia=32)
+    print(f"Terceira execução: {relatorio.pulados} pulados, {relatorio.documentos} processados")
+
+    print("\n" + "=" * 70)
+    print("4. VALIDAÇÃO MAIS EXIGENTE QUE O AGENTE")
+    print("=" * 70)
+    entrada = pasta / "contatos-1.jsonl"
+    saida = pasta / "saida-estrita"
+    relatorio = await extrair_em_massa(agentes["contact"], ContatoEstrito, entrada, saida, concorrencia=8)
+    print(relatorio.linha())
+    falha = json.loads(next(saida.glob("falhas-*.jsonl")).read_text().splitlines()[0])
+    print(f"{falha['erro']} em {falha['id']}: " + " ".join(falha["mensagem"].splitlines()[1:3])[:90])
+
+    print("\n" + "=" * 70)
+    print("5. ENTRADA COM REGISTROS MALFORMADOS")
+    print("=" * 70)
+    entrada = pasta / "contatos-sujos.jsonl"
+    linhas = (pasta / "contatos-1.jsonl").read_text().splitlines()
+    linhas[3] = linhas[3][:-5]  # linha truncada
+    linhas[7] = json.dumps({"id": "sem-texto", "corpo": "campo com outro nome"})
+    linhas[11] = "[1, 2, 3]"
+    entrada.write_text("\n".join(linhas) + "\n")
+    saida = pasta / "saida-sujos"
+    relatorio = await extrair_em_massa(agentes["contact"], ContactInfo, entrada, saida, concorrencia=8)
+    print(relatorio.linha())
+    for caminho in sorted(saida.glob("falhas-*.jsonl")):
+        for linha in caminho.read_text().splitlines():
+            falha = json.loads(linha)
+            if falha["erro"] == "RegistroInvalido":
+                print(f"  posição {falha['posicao']:>2}: {falha['mensagem'][:80]}")
+    # Erro na leitura em si (aqui, extensão desconhecida): sobe para quem
+    # chamou e os trabalhadores são cancelados, em vez de esperarem na fila
+    texto_puro = pasta / "contatos.txt"
+    texto_puro.write_text(entrada.read_text())
+    try:
+        await asyncio.wait_for(extrair_em_massa(agentes["contact"], ContactInfo, texto_puro,
+                                                pasta / "saida-txt", concorrencia=8), timeout=5)
+    except ValueError as erro:
+        print(f"Leitura interrompida: {erro}")
+
+
+def main():
+    # Stub HTTP do sample033.py: o ChatOpenAI faz I/O assíncrono de verdade.
+    # 5% das chamadas respondem HTTP 500 (max_retries=0: quem tenta de novo é o pipeline)
+    config = StubConfig(latencia_ms=100, jitter_ms=30, latencia="normal", taxa_erro=0.05, seed=42)
+    with ServidorStub(config) as servidor, tempfile.TemporaryDirectory() as pasta:
+        model = criar_modelo_stub(servidor.base_url, max_retries=0, temperature=0)
+        asyncio.run(demonstrar(model, config, Path(pasta)))
+
+    ############################################
+    # OBSERVAÇÕES IMPORTANTES
+    ############################################
+
+    print()
+    print("=" * 70)
+    print("OBSERVAÇÕES IMPORTANTES")
+    print("=" * 70)
+    print("""
+1. MEMÓRIA CONSTANTE:
+   - A entrada é lida registro a registro (gerador)
+   - A fila entre leitura e agentes tem tamanho 2 x concorrência: a leitura
+     nunca corre à frente; milhões de documentos usam a mesma memória
+   - Os resultados vão direto para o disco; só os contadores ficam na memória
+
+2. CONCORRÊNCIA:
+   - N trabalhadores assíncronos = no máximo N chamadas ao modelo em voo
+   - Suba N até o throughput parar de crescer (CPU da máquina) ou até o
+     rate limit do provedor; depois disso só aumenta a latência
+   - Erros transitórios (HTTP 500, timeout) têm nova tentativa com backoff;
+     erros de validação vão direto para o arquivo de falhas
+   - Registros malformados (JSON inválido, sem o campo de texto) também vão
+     para as falhas: uma linha ruim não derruba o lote inteiro
+   - Um erro na leitura em si (formato, CSV quebrado) interrompe o lote e
+     cancela os trabalhadores
+
+3. SHARDS E CHECKPOINT:
+   - O shard vem de crc32(id): o mesmo documento cai no mesmo arquivo
+   - O número de shards fica no checkpoint e não muda ao retomar
+   - Ordem ao salvar: flush + fsync dos shards, DEPOIS o checkpoint
+   - Cancelamento (Ctrl+C, timeout) salva o checkpoint antes de sair
+   - Em um crash duro (kill -9), até `salvar_a_cada` segundos de documentos
+     são reprocessados: a entrega é "pelo menos uma vez"; deduplique por id
+
+4. CUSTO:
+   - Soma o usage_metadata de todas as mensagens do agente (incluindo as
+     tool calls intermediárias) e aplica o preço por 1M tokens do sample028
+   - Reprocesse as falhas com os arquivos falhas-*.jsonl como nova entrada:
+     eles guardam id e texto (registros malformados falham de novo até
+     a origem ser corrigida)
+
+5. PRÓXIMOS PASSOS:
+   - Para os agentes originais, veja sample014.py
+   - Para o cache de schemas usado na validação, veja sample046.py
+   - Para testes de carga com o stub, veja sample033.py
+""")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,369 @@
+############################################
+#
+# Exemplo de Extração de Vários Schemas em uma
+# Única Chamada ao modelo.
+#
+# O sample014.py roda três agentes (contato,
+# avaliação, evento) e o sample015.py outros três
+# (pessoa, sentimento, código). Quando o mesmo
+# documento precisa de vários schemas, isso são
+# várias idas e voltas pagando os mesmos tokens
+# de entrada.
+#
+# Aqui uma ferramenta composta pede todos os
+# schemas de uma vez. Cada parte é validada
+# separadamente: só as partes inválidas voltam
+# ao modelo, cada uma com o seu próprio schema
+# (fallback por parte).
+#
+############################################
+
+
+############################################
+# PASSO 1 - A ferramenta composta
+############################################
+
+import re
+
+from pydantic import BaseModel
+from pydantic.json_schema import models_json_schema
+
+NOME_FERRAMENTA = "extrair_tudo"
+
+
+def nome_da_parte(schema: type[BaseModel]) -> str:
+    """ContactInfo -> contact_info (a chave da parte nos argumentos)."""
+    return re.sub(r"(?<!^)(?=[A-Z])", "_", schema.__name__).lower()
+
+
+def ferramenta_combinada(partes: dict[str, type[BaseModel]]) -> dict:
+    """Uma tool OpenAI cujos argumentos têm uma propriedade por schema.
+
+    models_json_schema gera um único $defs para todos os schemas, sem
+    colisão de nomes (ex.: dois Address diferentes viram nomes distintos).
+    """
+    referencias, definicoes = models_json_schema(
+        [(schema, "validation") for schema in partes.values()], ref_template="#/$defs/{model}"
+    )
+    propriedades = {nome: referencias[(schema, "validation")] for nome, schema in partes.items()}
+    descricao = "; ".join(f"{nome}: {(schema.__doc__ or schema.__name__).strip()}" for nome, schema in partes.items())
+    return {
+        "type": "function",
+        "function": {
+            "name": NOME_FERRAMENTA,
+            "description": f"Extrai do mesmo texto, de uma só vez: {descricao}",
+            "parameters": {
+                "type": "object",
+                "properties": propriedades,
+                "required": list(partes),
+                "$defs": definicoes["$defs"],
+            },
+        },
+    }
+
+
+############################################
+# PASSO 2 - O extrator: validação por parte e fallback só do que falhou
+############################################
+
+from dataclasses import dataclass, field
+from operator import itemgetter
+
+from langchain_core.messages import HumanMessage, SystemMessage
+from langchain_core.runnables import RunnableLambda, RunnableParallel
+from pydantic import ValidationError
+
+from sample046 import CACHE_GLOBAL
+
+INSTRUCAO = "Extraia as informações pedidas do texto do usuário. Use apenas o que está no texto."
+
+
+@dataclass
+class ResultadoMultiplo:
+    objetos: dict[str, BaseModel] = field(default_factory=dict)
+    erros: dict[str, str] = field(default_factory=dict)  # partes que falharam mesmo após os fallbacks
+    refeitas: list[str] = field(default_factory=list)  # partes que precisaram de fallback
+    chamadas: int = 0
+    tokens_entrada: int = 0
+    tokens_saida: int = 0
+
+    def contabilizar(self, resposta):
+        self.chamadas += 1
+        uso = resposta.usage_metadata or {}
+        self.tokens_entrada += uso.get("input_tokens", 0)
+        self.tokens_saida += uso.get("output_tokens", 0)
+
+
+class ExtratorMultiplo:
+    """Extrai vários schemas do mesmo texto com uma chamada (mais fallbacks).
+
+    Uso:
+        extrator = ExtratorMultiplo(model, [ContactInfo, ProductReview, EventDetails])
+        resultado = extrator.extrair(texto)
+        resultado.objetos["contact_info"]   # ContactInfo validado
+        resultado.erros                      # partes que não puderam ser extraídas
+    """
+
+    def __init__(self, model, schemas, instrucao: str = INSTRUCAO, tentativas: int = 2):
+        self.partes = dict(schemas) if isinstance(schemas, dict) else {nome_da_parte(s): s for s in schemas}
+        self.instrucao = instrucao
+        self.tentativas = tentativas
+        self.ferramenta = ferramenta_combinada(self.partes)
+        self._combinado = model.bind_tools([self.ferramenta], tool_choice=NOME_FERRAMENTA)
+        # Um ramo por parte: recebe {parte: mensagens} e chama o modelo só com o schema dela
+        self._ramos = {
+            nome: RunnableLambda(itemgetter(nome)) | model.bind_tools([schema], tool_choice=schema.__name__)
+            for nome, schema in self.partes.items()
+        }
+
+    def extrair(self, texto: str) -> ResultadoMultiplo:
+        resultado = ResultadoMultiplo()
+        mensagens = [SystemMessage(self.instrucao), HumanMessage(texto)]
+        resposta = self._combinado.invoke(mensagens)
+        resultado.contabilizar(resposta)
+        argumentos = resposta.tool_calls[0]["args"] if resposta.tool_calls else {}
+        pendentes = self._validar({nome: argumentos.get(nome) for nome in self.partes}, resultado)
+        resultado.refeitas = list(pendentes)
+
+        for _ in range(self.tentativas):
+            if not pendentes:
+                break
+            # Fallback em paralelo, cada parte com o próprio schema e o próprio erro
+            entradas = {
+                nome: mensagens + [HumanMessage(
+                    f"Extraia apenas {self.partes[nome].__name__}. A tentativa anterior foi inválida: {erro}"
+                )]
+                for nome, erro in pendentes.items()
+            }
+            respostas = RunnableParallel({nome: self._ramos[nome] for nome in pendentes}).invoke(entradas)
+            candidatos = {}
+            for nome, resposta in respostas.items():
+                resultado.contabilizar(resposta)
+                candidatos[nome] = resposta.tool_calls[0]["args"] if resposta.tool_calls else None
+            pendentes = self._validar(candidatos, resultado)
+
+        resultado.erros = pendentes
+        return resultado
+
+    def _validar(self, candidatos: dict, resultado: ResultadoMultiplo) -> dict[str, str]:
+        pendentes = {}
+        for nome, dados in candidatos.items():
+            try:
+                resultado.objetos[nome] = CACHE_GLOBAL.adapter(self.partes[nome]).validate_python(dados)
+            except ValidationError as erro:
+                # Só o essencial do erro: vai no prompt do fallback
+                pendentes[nome] = "; ".join(
+                    f"{'.'.join(map(str, e['loc'])) or 'objeto'}: {e['msg']}" for e in erro.errors()
+                )
+        return pendentes
+
+
+############################################
+# PASSO 3 - A linha de base: uma chamada por schema
+############################################
+
+
+def extrair_separado(model, schemas, texto: str, paralelo: bool = False) -> ResultadoMultiplo:
+    """O que sample014.py/sample015.py fazem: uma chamada (e o texto inteiro) por schema."""
+    resultado = ResultadoMultiplo()
+    mensagens = [SystemMessage(INSTRUCAO), HumanMessage(texto)]
+    ligados = {nome_da_parte(s): model.bind_tools([s], tool_choice=s.__name__) for s in schemas}
+    if paralelo:
+        respostas = RunnableParallel(ligados).invoke(mensagens)
+    else:
+        respostas = {nome: ligado.invoke(mensagens) for nome, ligado in ligados.items()}
+    for (nome, resposta), schema in zip(respostas.items(), schemas):
+        resultado.contabilizar(resposta)
+        resultado.objetos[nome] = schema.model_validate(resposta.tool_calls[0]["args"])
+    return resultado
+
+
+############################################
+# PASSO 4 - Um stub que erra de propósito
+############################################
+
+from sample033 import ModeloStubLocal, StubConfig
+
+
+class ModeloQueErra(ModeloStubLocal):
+    """Corrompe partes da chamada combinada (as chamadas de fallback saem certas)."""
+
+    corromper: dict[str, dict] = {}
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        resultado = super()._generate(messages, stop, run_manager, **kwargs)
+        for tool_call in resultado.generations[0].message.tool_calls:
+            if tool_call["name"] == NOME_FERRAMENTA:
+                for parte, valores in self.corromper.items():
+                    tool_call["args"][parte].update(valores)
+        return resultado
+
+
+############################################
+# PASSO 5 - Benchmark: chamadas, tokens e latência
+############################################
+
+import json
+import time
+
+from pydantic import Field
+
+from sample033 import tokenizar
+from sample045 import CodeAnalysis
+from sample046 import Person, SentimentAnalysis
+from sample047 import PRECO_INPUT_POR_1M, PRECO_OUTPUT_POR_1M
+
+
+# Os schemas do sample014.py, com todos os campos
+class ContactInfo(BaseModel):
+    """Informações de contato estruturadas."""
+    name: str = Field(description="Nome completo da pessoa")
+    email: str = Field(description="Endereço de e-mail")
+    phone: str = Field(description="Número de telefone")
+
+
+class ProductReview(BaseModel):
+    """Avaliação estruturada de um produto."""
+    product_name: str = Field(description="Nome do produto avaliado")
+    rating: int = Field(description="Nota de 1 a 5 estrelas", ge=1, le=5)
+    pros: list[str] = Field(description="Lista de pontos positivos")
+    cons: list[str] = Field(description="Lista de pontos negativos")
+    recommendation: str = Field(description="Recomendação final (Sim/Não/Talvez)")
+
+
+class EventDetails(BaseModel):
+    """Detalhes estruturados de um evento."""
+    event_name: str = Field(description="Nome do evento")
+    date: str = Field(description="Data do evento (formato: DD/MM/YYYY)")
+    location: str = Field(description="Local do evento")
+    attendees: int = Field(description="Número de participantes esperados")
+    topics: list[str] = Field(description="Lista de tópicos que serão abordados")
+
+
+DOCUMENTO = (
+    "Ata da reunião com fornecedores. Estiveram presentes João Pedro Santos "
+    "(joao.santos@vendas.com.br, (11) 99876-5432) e a equipe de compras. "
+    "O Notebook Dell XPS 15 recebeu nota 4: tela excelente e boa bateria, mas esquenta e é caro. "
+    "Ficou marcada a Conferência Tech Summit 2025 em 15/03/2025 no Centro de Convenções de "
+    "São Paulo, para 500 pessoas, com temas de IA, Cloud e DevOps. "
+) * 12  # um documento de tamanho realista (~ 3.500 caracteres)
+
+CODIGO = "def soma(a, b):\n    return a + b\n\n# Maria Silva, 28 anos, engenheira em São Paulo, adorou o código. " * 20
+
+
+def tokens_das_ferramentas(model_ligado) -> int:
+    # O stub não cobra os schemas das tools, mas os provedores cobram: ~4 caracteres por token
+    ferramentas = model_ligado.kwargs.get("tools", [])
+    return len(json.dumps(ferramentas)) // 4
+
+
+def custo(resultado: ResultadoMultiplo, tokens_schemas: int) -> float:
+    return ((resultado.tokens_entrada + tokens_schemas) * PRECO_INPUT_POR_1M
+            + resultado.tokens_saida * PRECO_OUTPUT_POR_1M) / 1_000_000
+
+
+def comparar(model, schemas, texto: str):
+    extrator = ExtratorMultiplo(model, schemas)
+    schemas_combinado = tokens_das_ferramentas(extrator._combinado)
+    schemas_separado = sum(tokens_das_ferramentas(model.bind_tools([s])) for s in schemas)
+    print(f"{'modo':<22} {'chamadas':>8} {'entrada':>8} {'schemas':>8} {'saída':>6} {'latência':>9} {'US$/10k docs':>13}")
+    linhas = [
+        ("separado (sequencial)", lambda: extrair_separado(model, schemas, texto), schemas_separado),
+        ("separado (paralelo)", lambda: extrair_separado(model, schemas, texto, paralelo=True), schemas_separado),
+        ("combinado", lambda: extrator.extrair(texto), schemas_combinado),
+    ]
+    objetos = []
+    for nome, funcao, tokens_schemas in linhas:
+        inicio = time.perf_counter()
+        resultado = funcao()
+        latencia = time.perf_counter() - inicio
+        objetos.append(resultado.objetos)
+        print(f"{nome:<22} {resultado.chamadas:>8} {resultado.tokens_entrada:>8} {tokens_schemas:>8} "
+              f"{resultado.tokens_saida:>6} {latencia * 1000:>7.0f}ms {custo(resultado, tokens_schemas) * 10_000:>13.2f}")
+    print(f"Mesmos objetos nos três modos: {objetos[0] == objetos[1] == objetos[2]}")
+
+
+def main():
+    # 400ms até o primeiro token e 100 tokens/s: a saída também custa tempo
+    config = StubConfig(latencia_ms=400, jitter_ms=0, tokens_por_segundo=100, seed=42)
+    model = ModeloStubLocal(config=config)
+    print(f"Documento: {len(DOCUMENTO):,} caracteres (~{len(tokenizar(DOCUMENTO)):,} palavras)\n")
+
+    print("=" * 70)
+    print("1. SCHEMAS DO sample014.py: ContactInfo + ProductReview + EventDetails")
+    print("=" * 70)
+    comparar(model, [ContactInfo, ProductReview, EventDetails], DOCUMENTO)
+
+    print("\n" + "=" * 70)
+    print("2. SCHEMAS DO sample015.py: Person + SentimentAnalysis + CodeAnalysis")
+    print("=" * 70)
+    comparar(model, [Person, SentimentAnalysis, CodeAnalysis], CODIGO)
+
+    print("\n" + "=" * 70)
+    print("3. FALHA PARCIAL: SÓ A PARTE INVÁLIDA VOLTA AO MODELO")
+    print("=" * 70)
+    schemas = [ContactInfo, ProductReview, EventDetails]
+    for corromper in ({"product_review": {"rating": 9}},
+                      {"product_review": {"rating": 0}, "event_details": {"attendees": "muitos"}}):
+        model_que_erra = ModeloQueErra(config=config, corromper=corromper)
+        inicio = time.perf_counter()
+        resultado = ExtratorMultiplo(model_que_erra, schemas).extrair(DOCUMENTO)
+        latencia = time.perf_counter() - inicio
+        print(f"Corrompido: {corromper}")
+        print(f"  refeitas: {resultado.refeitas}, chamadas: {resultado.chamadas}, "
+              f"entrada: {resultado.tokens_entrada} tokens, latência: {latencia * 1000:.0f}ms")
+        print(f"  válidas: {sorted(resultado.objetos)}, erros finais: {resultado.erros}")
+        print(f"  product_review.rating = {resultado.objetos['product_review'].rating}")
+
+    print("\n" + "=" * 70)
+    print("4. SEM FALLBACK: AS PARTES VÁLIDAS SÃO APROVEITADAS")
+    print("=" * 70)
+    # Sem fallback (tentativas=0) a parte inválida fica em erros e as outras seguem válidas
+    model_que_erra = ModeloQueErra(config=StubConfig(latencia_ms=0, jitter_ms=0), corromper={"contact_info": {"name": None}})
+    resultado = ExtratorMultiplo(model_que_erra, schemas, tentativas=0).extrair(DOCUMENTO)
+    print(f"tentativas=0 -> válidas: {sorted(resultado.objetos)}")
+    print(f"               erros: {resultado.erros}")
+
+    ############################################
+    # OBSERVAÇÕES IMPORTANTES
+    ############################################
+
+    print()
+    print("=" * 70)
+    print("OBSERVAÇÕES IMPORTANTES")
+    print("=" * 70)
+    print("""
+1. O QUE SE ECONOMIZA:
+   - O documento é enviado UMA vez em vez de uma vez por schema
+   - Os tokens de saída são os mesmos (os mesmos objetos)
+   - A latência cai para a de uma chamada (a saída, maior, ainda custa tempo)
+   - O paralelo reduz a latência, mas não os tokens: o texto vai N vezes
+
+2. COMO A FERRAMENTA É MONTADA:
+   - Uma propriedade por schema, cada uma um $ref para a definição
+   - models_json_schema gera um $defs único e sem colisões
+   - Funciona com qualquer modelo com tool calling, como o ToolStrategy;
+     o mesmo JSON schema serve de response_format (ProviderStrategy)
+
+3. VALIDAÇÃO POR PARTE:
+   - Cada parte é validada com o seu próprio TypeAdapter (cache do sample046)
+   - Uma parte inválida não invalida as outras
+   - O fallback pede só o schema que falhou, com o erro de validação no
+     prompt, e as partes pendentes rodam em paralelo (RunnableParallel)
+   - Depois de `tentativas`, o que sobrar fica em resultado.erros
+   - Cada fallback reenvia o documento: com muitas falhas, a economia some
+
+4. QUANDO NÃO COMBINAR:
+   - Schemas enormes: a saída única fica longa e um erro de JSON perde tudo
+   - Documentos diferentes para cada schema: aí não há entrada repetida
+   - Modelos pequenos erram mais com schemas compostos: meça a taxa de
+     fallback (resultado.refeitas) antes de adotar
+
+5. PRÓXIMOS PASSOS:
+   - Para os agentes individuais, veja sample014.py e sample015.py
+   - Para processar milhões de documentos, veja sample047.py
+""")
+
+
+if __name__ == "__main__":
+    main()
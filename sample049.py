@@ -0,0 +1,650 @@
+############################################
+#
+# Exemplo de Reparo Barato de Saída
+# Estruturada, em vez de gerar tudo de novo.
+#
+# Quando uma resposta do ToolStrategy
+# (sample014.py) ou do ProviderStrategy
+# (sample015.py) falha na validação Pydantic, o
+# padrão é pedir o objeto INTEIRO de novo: a
+# conversa toda volta ao modelo e a saída toda é
+# gerada outra vez.
+#
+# Aqui um estágio de reparo tenta primeiro
+# correções locais e determinísticas (conversão
+# de tipos, aparar espaços, enum aproximado,
+# sintaxe JSON). Só o que sobrar vai ao modelo,
+# em um prompt mínimo com APENAS os campos
+# inválidos. O middleware mede a taxa de reparo
+# e os tokens economizados.
+#
+############################################
+
+
+############################################
+# PASSO 1 - Reparo de sintaxe JSON
+############################################
+
+import json
+import re
+
+from langchain_core.utils.json import parse_partial_json
+
+_CERCA = re.compile(r"^\s*```(?:json)?\s*|\s*```\s*$")
+_STRING_OU_ASPAS_SIMPLES = re.compile(r'"(?:[^"\\]|\\.)*"|\'((?:[^\'\\]|\\.)*)\'')
+_STRING = re.compile(r'("(?:[^"\\]|\\.)*")')
+_VIRGULA_SOBRANDO = re.compile(r",\s*([}\]])")
+_LITERAIS_PYTHON = {"True": "true", "False": "false", "None": "null"}
+
+
+def carregar_json(texto: str) -> tuple[object, list[str]]:
+    """json.loads tolerante. Devolve (valor, correções aplicadas).
+
+    Corrige: cerca de markdown, texto antes/depois do objeto, aspas simples,
+    vírgula sobrando, True/False/None do Python e JSON truncado.
+    """
+    try:
+        return json.loads(texto), []
+    except json.JSONDecodeError:
+        pass
+    correcoes = []
+    limpo = _CERCA.sub("", texto)
+    if limpo != texto:
+        correcoes.append("cerca markdown")
+    inicio = min((i for i in (limpo.find("{"), limpo.find("[")) if i >= 0), default=0)
+    fim = max(limpo.rfind("}"), limpo.rfind("]")) + 1
+    if inicio > 0 or 0 < fim < len(limpo.rstrip()):
+        correcoes.append("texto em volta do JSON")
+        limpo = limpo[inicio:fim] if fim > inicio else limpo[inicio:]
+
+    # 'texto' -> "texto", sem mexer no que já está entre aspas duplas
+    trocado = _STRING_OU_ASPAS_SIMPLES.sub(
+        lambda m: m.group(0) if m.group(1) is None else json.dumps(m.group(1).replace("\\'", "'"), ensure_ascii=False),
+        limpo,
+    )
+    if trocado != limpo:
+        correcoes.append("aspas simples")
+    # Fora das strings: vírgula sobrando e literais do Python
+    partes = _STRING.split(trocado)
+    for i in range(0, len(partes), 2):
+        parte = _VIRGULA_SOBRANDO.sub(r"\1", partes[i])
+        parte = re.sub(r"\b(True|False|None)\b", lambda m: _LITERAIS_PYTHON[m.group(1)], parte)
+        partes[i] = parte
+    reparado = "".join(partes)
+    if reparado != trocado:
+        correcoes.append("vírgula/literal Python")
+    try:
+        return json.loads(reparado), correcoes
+    except json.JSONDecodeError:
+        valor = parse_partial_json(reparado)  # fecha strings, listas e objetos abertos
+        if valor is None:
+            raise
+        return valor, correcoes + ["JSON truncado"]
+
+
+############################################
+# PASSO 2 - Correções locais guiadas pelos erros do Pydantic
+############################################
+
+import difflib
+import unicodedata
+
+NUMEROS_POR_EXTENSO = {
+    "zero": 0, "um": 1, "uma": 1, "dois": 2, "duas": 2, "tres": 3, "quatro": 4, "cinco": 5,
+    "seis": 6, "sete": 7, "oito": 8, "nove": 9, "dez": 10,
+}
+VERDADEIRO = {"sim", "s", "yes", "y", "verdadeiro", "v"}
+FALSO = {"nao", "n", "no", "falso", "f"}
+_NUMERO = re.compile(r"-?\d[\d.,]*")
+_OPCAO_LITERAL = re.compile(r"'((?:[^'\\]|\\.)*)'")
+
+
+class SemCorrecao(Exception):
+    """O erro não tem correção local: vai para o re-prompt."""
+
+
+def normalizar(texto: str) -> str:
+    sem_acento = unicodedata.normalize("NFKD", texto).encode("ascii", "ignore").decode()
+    return " ".join(sem_acento.lower().split())
+
+
+def extrair_numero(valor, inteiro: bool = False) -> float:
+    """ "4 estrelas" -> 4, "1.200 pessoas" -> 1200, "0,85" -> 0.85, "quatro" -> 4.
+
+    Um único separador seguido de 3 dígitos ("1.200") só é milhar em campo
+    inteiro; em campo float ele é decimal ("0.125" -> 0.125). Números que
+    começam com 0 nunca têm separador de milhar.
+    """
+    if isinstance(valor, (int, float)) and not isinstance(valor, bool):
+        return valor
+    texto = normalizar(str(valor))
+    if texto in NUMEROS_POR_EXTENSO:
+        return NUMEROS_POR_EXTENSO[texto]
+    encontrado = _NUMERO.search(texto)
+    if not encontrado:
+        raise SemCorrecao
+    numero = encontrado.group(0).rstrip(".,")
+    if "," in numero and "." in numero:  # 1.234,5 (pt-BR)
+        numero = numero.replace(".", "").replace(",", ".")
+    elif re.fullmatch(r"-?[1-9]\d{0,2}([.,]\d{3})+", numero) and (
+        inteiro or len(re.findall(r"[.,]", numero)) > 1
+    ):  # 1.200 ou 1,200 (campo int), 1.234.567: milhar
+        numero = re.sub(r"[.,]", "", numero)
+    else:
+        numero = numero.replace(",", ".")
+    return float(numero)
+
+
+def corrigir_valor(valor, erro: dict):
+    """Uma correção por tipo de erro do Pydantic. Levanta SemCorrecao se não houver."""
+    tipo = erro["type"]
+    if tipo in ("int_parsing", "int_type", "int_from_float"):
+        numero = extrair_numero(valor, inteiro=True)
+        if numero != int(numero):
+            raise SemCorrecao
+        return int(numero)
+    if tipo in ("float_parsing", "float_type"):
+        numero = extrair_numero(valor)
+        return numero / 100 if isinstance(valor, str) and valor.strip().endswith("%") else numero
+    if tipo in ("bool_parsing", "bool_type"):
+        texto = normalizar(str(valor))
+        if texto in VERDADEIRO or texto in FALSO:
+            return texto in VERDADEIRO
+        raise SemCorrecao
+    if tipo == "list_type":
+        if valor is None:  # "cons": null quase sempre quer dizer "nenhum"
+            return []
+        if isinstance(valor, str):
+            return [item.strip() for item in re.split(r"[,;\n]|\s+e\s+", valor) if item.strip()]
+        return [valor]
+    if tipo == "string_type":
+        if isinstance(valor, (int, float, bool)):
+            return str(valor)
+        if isinstance(valor, list) and all(isinstance(item, str) for item in valor):
+            return ", ".join(valor)
+        raise SemCorrecao
+    if tipo in ("literal_error", "enum"):
+        opcoes = _OPCAO_LITERAL.findall(erro.get("ctx", {}).get("expected", ""))
+        por_forma = {normalizar(opcao): opcao for opcao in opcoes}
+        alvo = normalizar(str(valor))
+        if alvo in por_forma:  # só maiúsculas, acentos ou espaços
+            return por_forma[alvo]
+        parecidas = difflib.get_close_matches(alvo, list(por_forma), n=1, cutoff=0.75)
+        if parecidas:
+            return por_forma[parecidas[0]]
+        raise SemCorrecao
+    if tipo == "string_too_long" and isinstance(valor, str):
+        return valor.strip()[: erro["ctx"]["max_length"]]
+    if tipo == "string_pattern_mismatch" and isinstance(valor, str) and valor != valor.strip():
+        return valor.strip()
+    raise SemCorrecao  # missing, limites (ge/le), padrões... só o modelo sabe
+
+
+def reparar_localmente(adapter, dados) -> tuple[object | None, object, list[dict], list[str]]:
+    """Valida, corrige o que der e valida de novo (até não haver progresso).
+
+    Devolve (objeto ou None, dados corrigidos, erros restantes, correções).
+    """
+    correcoes = []
+    for _ in range(3):
+        try:
+            return adapter.validate_python(dados), dados, [], correcoes
+        except ValidationError as erro:
+            erros = erro.errors(include_url=False)
+        if not isinstance(dados, dict):
+            return None, dados, erros, correcoes
+        progresso = False
+        restantes = []
+        for e in erros:
+            pai, chave = _navegar(dados, e["loc"])
+            if e["type"] == "extra_forbidden" and pai is not None:
+                del pai[chave]
+                correcoes.append(f"extra_forbidden: {_caminho(e)} removido")
+                progresso = True
+                continue
+            if pai is None or e["type"] == "missing":
+                restantes.append(e)
+                continue
+            try:
+                novo = corrigir_valor(e["input"], e)
+            except SemCorrecao:
+                restantes.append(e)
+                continue
+            pai[chave] = novo
+            correcoes.append(f"{e['type']}: {_caminho(e)} {e['input']!r} -> {novo!r}")
+            progresso = True
+        if not progresso:
+            return None, dados, restantes, correcoes
+    return None, dados, erros, correcoes
+
+
+def _navegar(dados, loc: tuple):
+    """Devolve (container, chave) do valor apontado por loc, ou (None, None)."""
+    atual = dados
+    for parte in loc[:-1]:
+        try:
+            atual = atual[parte]
+        except (KeyError, IndexError, TypeError):
+            return None, None
+    if isinstance(atual, dict) or (isinstance(atual, list) and isinstance(loc[-1], int)):
+        return atual, loc[-1]
+    return None, None
+
+
+def _caminho(erro: dict) -> str:
+    return ".".join(map(str, erro["loc"])) or "objeto"
+
+
+############################################
+# PASSO 3 - Re-prompt mínimo: só os campos inválidos
+############################################
+
+from functools import lru_cache
+
+from langchain_core.messages import HumanMessage, SystemMessage
+from pydantic import BaseModel, ValidationError, create_model
+
+from sample046 import CACHE_GLOBAL
+
+INSTRUCAO_REPARO = "Corrija apenas os campos listados, usando o texto original. Responda só com esses campos."
+
+
+@lru_cache(maxsize=256)
+def modelo_de_correcao(schema: type[BaseModel], campos: frozenset[str]) -> type[BaseModel]:
+    """Um schema só com os campos (de topo) que precisam ser refeitos."""
+    return create_model(
+        f"Corrigir{schema.__name__}",
+        __doc__=f"Campos corrigidos de {schema.__name__}.",
+        **{nome: (info.annotation, info) for nome, info in schema.model_fields.items() if nome in campos},
+    )
+
+
+def prompt_de_reparo(schema, dados, erros: list[dict], texto_original: str) -> tuple[type[BaseModel], list]:
+    campos = frozenset(str(e["loc"][0]) for e in erros if e["loc"])
+    parcial = modelo_de_correcao(schema, campos)
+    linhas = "\n".join(
+        f"- {_caminho(e)} = {json.dumps(e.get('input'), ensure_ascii=False, default=str)[:80]}: {e['msg']}"
+        for e in erros
+    )
+    return parcial, [
+        SystemMessage(INSTRUCAO_REPARO),
+        HumanMessage(f"Texto original:\n{texto_original}\n\nCampos inválidos:\n{linhas}"),
+    ]
+
+
+def mesclar(dados: dict, correcao: dict) -> dict:
+    return {**dados, **correcao} if isinstance(dados, dict) else correcao
+
+
+############################################
+# PASSO 4 - O middleware de reparo
+############################################
+
+from collections import Counter
+from dataclasses import dataclass, field
+
+from langchain.agents.middleware import AgentMiddleware, ModelRequest, ModelResponse
+from langchain.agents.structured_output import ProviderStrategy, StructuredOutputValidationError, ToolStrategy
+from langchain_core.messages import AIMessage, ToolMessage
+
+
+@dataclass
+class EstatisticasReparo:
+    falhas: int = 0  # respostas que não validaram
+    locais: int = 0  # reparadas sem chamar o modelo
+    reprompt: int = 0  # reparadas com o re-prompt mínimo
+    sem_reparo: int = 0  # seguiram para o retry padrão (ou para o erro)
+    tokens_reprompt: int = 0
+    tokens_evitados: int = 0  # estimativa: o que um retry completo teria custado
+    correcoes: Counter = field(default_factory=Counter)
+
+    @property
+    def taxa_sucesso(self) -> float:
+        return (self.locais + self.reprompt) / self.falhas if self.falhas else 0.0
+
+
+class ReparoEstruturado(AgentMiddleware):
+    """Repara respostas estruturadas inválidas antes do retry completo.
+
+    ToolStrategy: a resposta inválida vira uma resposta válida (a AIMessage
+    recebe os argumentos corrigidos) e o agente segue sem outra volta.
+    ProviderStrategy: o StructuredOutputValidationError é interceptado e o
+    JSON do texto é reparado. Se nada funcionar, o comportamento padrão
+    continua valendo.
+    """
+
+    def __init__(self, reprompt: bool = True):
+        super().__init__()
+        self.reprompt = reprompt
+        self.estatisticas = EstatisticasReparo()
+
+    # --- a falha, nos dois formatos ---
+
+    @staticmethod
+    def _falha_tool_strategy(request: ModelRequest, resposta: ModelResponse):
+        formato = request.response_format
+        if not isinstance(formato, ToolStrategy) or resposta.structured_response is not None:
+            return None
+        schemas = {spec.name: spec.schema for spec in formato.schema_specs}
+        ai = next((m for m in resposta.result if isinstance(m, AIMessage)), None)
+        erros = {m.tool_call_id for m in resposta.result if isinstance(m, ToolMessage)}
+        for tool_call in getattr(ai, "tool_calls", ()):
+            if tool_call["name"] in schemas and tool_call["id"] in erros:
+                return ai, tool_call, schemas[tool_call["name"]]
+        return None
+
+    def _preparar(self, schema, bruto) -> tuple:
+        self.estatisticas.falhas += 1
+        adapter = CACHE_GLOBAL.adapter(schema)
+        correcoes = []
+        if isinstance(bruto, str):
+            try:
+                bruto, correcoes = carregar_json(bruto)
+            except json.JSONDecodeError:
+                return adapter, None, None, [{"loc": (), "msg": "JSON inválido", "type": "json"}]
+        else:
+            bruto = json.loads(json.dumps(bruto))  # cópia: a AIMessage original fica intacta
+        objeto, dados, erros, mais = reparar_localmente(adapter, bruto)
+        self.estatisticas.correcoes.update(c.split(":")[0] for c in correcoes + mais)
+        return adapter, objeto, dados, erros
+
+    def _concluir(self, objeto, ai: AIMessage, reparo_tokens: int | None):
+        uso = ai.usage_metadata or {}
+        # Um retry completo reenviaria no mínimo o mesmo prompt e geraria o objeto inteiro de novo
+        retry_completo = uso.get("total_tokens", 0)
+        if reparo_tokens is None:
+            self.estatisticas.locais += 1
+            self.estatisticas.tokens_evitados += retry_completo
+        else:
+            self.estatisticas.reprompt += 1
+            self.estatisticas.tokens_reprompt += reparo_tokens
+            self.estatisticas.tokens_evitados += max(retry_completo - reparo_tokens, 0)
+        return objeto
+
+    def _resposta(self, request, ai: AIMessage, tool_call: dict | None, objeto) -> ModelResponse:
+        if tool_call is None:  # ProviderStrategy
+            return ModelResponse(result=[ai], structured_response=objeto)
+        args = objeto.model_dump(mode="json") if isinstance(objeto, BaseModel) else objeto
+        corrigida = ai.model_copy(update={"tool_calls": [
+            {**tc, "args": args} if tc["id"] == tool_call["id"] else tc for tc in ai.tool_calls
+        ]})
+        conteudo = request.response_format.tool_message_content or f"Returning structured response: {objeto}"
+        return ModelResponse(
+            result=[corrigida, ToolMessage(content=conteudo, tool_call_id=tool_call["id"], name=tool_call["name"])],
+            structured_response=objeto,
+        )
+
+    @staticmethod
+    def _texto_original(request: ModelRequest) -> str:
+        humana = next((m for m in reversed(request.messages) if isinstance(m, HumanMessage)), None)
+        return humana.text if humana is not None else ""
+
+    # --- sync ---
+
+    def _reparar(self, request, schema, bruto, ai, tool_call):
+        adapter, objeto, dados, erros = self._preparar(schema, bruto)
+        if objeto is not None:
+            return self._resposta(request, ai, tool_call, self._concluir(objeto, ai, None))
+        if self.reprompt and isinstance(dados, dict) and all(e["loc"] for e in erros):
+            parcial, mensagens = prompt_de_reparo(schema, dados, erros, self._texto_original(request))
+            resposta = request.model.bind_tools([parcial], tool_choice=parcial.__name__).invoke(mensagens)
+            return self._depois_do_reprompt(request, adapter, dados, resposta, ai, tool_call)
+        self.estatisticas.sem_reparo += 1
+        return None
+
+    def _depois_do_reprompt(self, request, adapter, dados, resposta, ai, tool_call):
+        tokens = (resposta.usage_metadata or {}).get("total_tokens", 0)
+        if resposta.tool_calls:
+            objeto, _, _, _ = reparar_localmente(adapter, mesclar(dados, resposta.tool_calls[0]["args"]))
+            if objeto is not None:
+                return self._resposta(request, ai, tool_call, self._concluir(objeto, ai, tokens))
+        self.estatisticas.sem_reparo += 1
+        self.estatisticas.tokens_reprompt += tokens
+        return None
+
+    def wrap_model_call(self, request, handler):
+        try:
+            resposta = handler(request)
+        except StructuredOutputValidationError as erro:
+            if not isinstance(request.response_format, ProviderStrategy):
+                raise
+            reparada = self._reparar(request, request.response_format.schema_spec.schema,
+                                     erro.ai_message.text, erro.ai_message, None)
+            if reparada is None:
+                raise
+            return reparada
+        falha = self._falha_tool_strategy(request, resposta)
+        if falha is None:
+            return resposta
+        ai, tool_call, schema = falha
+        return self._reparar(request, schema, tool_call["args"], ai, tool_call) or resposta
+
+    # --- async (mesma lógica; só o re-prompt muda para ainvoke) ---
+
+    async def _areparar(self, request, schema, bruto, ai, tool_call):
+        adapter, objeto, dados, erros = self._preparar(schema, bruto)
+        if objeto is not None:
+            return self._resposta(request, ai, tool_call, self._concluir(objeto, ai, None))
+        if self.reprompt and isinstance(dados, dict) and all(e["loc"] for e in erros):
+            parcial, mensagens = prompt_de_reparo(schema, dados, erros, self._texto_original(request))
+            resposta = await request.model.bind_tools([parcial], tool_choice=parcial.__name__).ainvoke(mensagens)
+            return self._depois_do_reprompt(request, adapter, dados, resposta, ai, tool_call)
+        self.estatisticas.sem_reparo += 1
+        return None
+
+    async def awrap_model_call(self, request, handler):
+        try:
+            resposta = await handler(request)
+        except StructuredOutputValidationError as erro:
+            if not isinstance(request.response_format, ProviderStrategy):
+                raise
+            reparada = await self._areparar(request, request.response_format.schema_spec.schema,
+                                            erro.ai_message.text, erro.ai_message, None)
+            if reparada is None:
+                raise
+            return reparada
+        falha = self._falha_tool_strategy(request, resposta)
+        if falha is None:
+            return resposta
+        ai, tool_call, schema = falha
+        return await self._areparar(request, schema, tool_call["args"], ai, tool_call) or resposta
+
+
+############################################
+# PASSO 5 - Um stub que erra como os modelos erram
+############################################
+
+from pydantic import PrivateAttr
+
+from sample033 import ModeloStubLocal, StubConfig
+
+
+class ModeloDefeituoso(ModeloStubLocal):
+    """Na primeira tentativa de cada conversa, aplica o próximo defeito da lista.
+
+    Retries (conversa com ToolMessage) e re-prompts de reparo saem certos.
+    Um defeito recebe o objeto válido e devolve um dict (ToolStrategy) ou o
+    texto da resposta (ProviderStrategy).
+    """
+
+    defeitos: list = []
+    _proximo: int = PrivateAttr(default=0)
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        resultado = super()._generate(messages, stop, run_manager, **kwargs)
+        mensagem = resultado.generations[0].message
+        primeira = not any(isinstance(m, ToolMessage) for m in messages)
+        reparo = any(isinstance(m, SystemMessage) and m.content == INSTRUCAO_REPARO for m in messages)
+        if not self.defeitos or not primeira or reparo:
+            return resultado
+        defeito = self.defeitos[self._proximo % len(self.defeitos)]
+        self._proximo += 1
+        if mensagem.tool_calls:
+            mensagem.tool_calls[0]["args"] = defeito(mensagem.tool_calls[0]["args"])
+        elif mensagem.content:
+            mensagem.content = defeito(json.loads(mensagem.content))
+        return resultado
+
+
+def com(**valores):
+    return lambda dados: {**dados, **valores}
+
+
+def sem(campo):
+    return lambda dados: {k: v for k, v in dados.items() if k != campo}
+
+
+# Erros típicos de LLM em ProductReview (sample014)
+DEFEITOS_TOOL = [
+    com(rating="4 estrelas"),  # número com unidade
+    com(pros="tela excelente, boa bateria e leve"),  # lista como texto
+    com(rating="quatro"),  # número por extenso
+    com(rating="4.0/5"),  # nota com escala
+    com(rating=9),  # fora do limite (le=5): só o modelo sabe
+    sem("recommendation"),  # campo faltando: só o modelo sabe
+    com(cons=None),  # lista nula
+    com(recommendation=["Sim"]),  # texto como lista
+]
+
+# Erros típicos no JSON de texto do ProviderStrategy (sample015)
+DEFEITOS_TEXTO = [
+    lambda d: "```json\n" + json.dumps({**d, "sentiment": "Positivo"}, ensure_ascii=False) + "\n```",
+    lambda d: json.dumps({**d, "confidence": "85%"}, ensure_ascii=False)[:-1] + ",}",
+    lambda d: "Aqui está: " + repr({**d, "key_phrases": "adorei"}),  # dict do Python
+    lambda d: json.dumps({**d, "sentiment": "neutral", "confidence": "0,7"}, ensure_ascii=False)[:-25],  # truncado
+]
+
+
+############################################
+# PASSO 6 - Demonstração e benchmark
+############################################
+
+import time
+
+from langchain.agents import create_agent
+
+from sample046 import SentimentAnalysis
+from sample048 import ProductReview
+
+
+def tokens_da_conversa(resultado: dict) -> tuple[int, int]:
+    chamadas = tokens = 0
+    for mensagem in resultado["messages"]:
+        if isinstance(mensagem, AIMessage) and mensagem.usage_metadata:
+            chamadas += 1
+            tokens += mensagem.usage_metadata["total_tokens"]
+    return chamadas, tokens
+
+
+def main():
+    print("=" * 70)
+    print("1. CORREÇÕES LOCAIS (sem chamar o modelo)")
+    print("=" * 70)
+    adapter = CACHE_GLOBAL.adapter(ProductReview)
+    valido = {"product_name": "Notebook Dell", "rating": 4, "pros": ["tela"], "cons": ["preço"], "recommendation": "Sim"}
+    for defeito in DEFEITOS_TOOL:
+        objeto, _, erros, correcoes = reparar_localmente(adapter, defeito(dict(valido)))
+        situacao = "OK " if objeto is not None else "RE-PROMPT"
+        detalhe = "; ".join(correcoes) or "; ".join(f"{_caminho(e)}: {e['msg']}" for e in erros)
+        print(f"[{situacao:<9}] {detalhe}"[:110])
+    print()
+    sentimento = {"text": "Adorei", "sentiment": "positivo", "confidence": 0.9, "key_phrases": ["adorei"]}
+    adapter = CACHE_GLOBAL.adapter(SentimentAnalysis)
+    for defeito in DEFEITOS_TEXTO:
+        texto = defeito(dict(sentimento))
+        dados, sintaxe = carregar_json(texto)
+        objeto, _, erros, correcoes = reparar_localmente(adapter, dados)
+        situacao = "OK " if objeto is not None else "RE-PROMPT"
+        print(f"[{situacao:<9}] {texto[:38]!r:<42} {', '.join(sintaxe + correcoes)}"[:130])
+
+    print("\n" + "=" * 70)
+    print("2. AGENTE ToolStrategy(ProductReview): RETRY COMPLETO vs REPARO")
+    print("=" * 70)
+    config = StubConfig(latencia_ms=150, jitter_ms=0, seed=42)
+    texto = "Avalie: comprei o Notebook Dell XPS. Tela excelente, boa bateria, mas esquenta e é caro. Nota 4. " * 8
+    entrada = {"messages": [{"role": "user", "content": texto}]}
+    execucoes = 40
+    print(f"{'modo':<16} {'chamadas':>8} {'tokens':>8} {'tempo':>7} {'válidos':>8}")
+    for nome, middleware in (("retry completo", []), ("reparo", [ReparoEstruturado()])):
+        model = ModeloDefeituoso(config=config, defeitos=DEFEITOS_TOOL)
+        agente = create_agent(model, [], response_format=ToolStrategy(ProductReview), middleware=middleware)
+        chamadas = tokens = validos = 0
+        inicio = time.perf_counter()
+        for _ in range(execucoes):
+            resultado = agente.invoke(entrada)
+            c, t = tokens_da_conversa(resultado)
+            chamadas, tokens, validos = chamadas + c, tokens + t, validos + isinstance(resultado["structured_response"], ProductReview)
+        if middleware:
+            e = middleware[0].estatisticas
+            chamadas += e.reprompt + e.sem_reparo  # os re-prompts não entram no histórico
+            tokens += e.tokens_reprompt
+        print(f"{nome:<16} {chamadas:>8} {tokens:>8,} {time.perf_counter() - inicio:>6.1f}s {validos:>5}/{execucoes}")
+    e = middleware[0].estatisticas
+    print(f"\nFalhas: {e.falhas} | locais: {e.locais} | re-prompt: {e.reprompt} | sem reparo: {e.sem_reparo} "
+          f"| taxa de sucesso: {e.taxa_sucesso:.0%}")
+    print(f"Tokens do re-prompt mínimo: {e.tokens_reprompt:,} | evitados (estimativa por falha): {e.tokens_evitados:,}")
+    print(f"Correções por tipo: {dict(e.correcoes)}")
+
+    print("\n" + "=" * 70)
+    print("3. AGENTE ProviderStrategy(SentimentAnalysis): JSON QUEBRADO NO TEXTO")
+    print("=" * 70)
+    entrada = {"messages": [{"role": "user", "content": "Analise: adorei o atendimento, muito rápido!"}]}
+    for nome, middleware in (("sem reparo", []), ("reparo", [ReparoEstruturado()])):
+        model = ModeloDefeituoso(config=StubConfig(latencia_ms=0, jitter_ms=0), defeitos=DEFEITOS_TEXTO)
+        agente = create_agent(model, [], response_format=ProviderStrategy(SentimentAnalysis), middleware=middleware)
+        ok = erros = 0
+        for _ in range(len(DEFEITOS_TEXTO)):
+            try:
+                agente.invoke(entrada)
+                ok += 1
+            except StructuredOutputValidationError:
+                erros += 1
+        print(f"{nome:<11} {ok} válidas, {erros} exceções")
+    print(f"Reparo: {middleware[0].estatisticas.locais} locais, {middleware[0].estatisticas.reprompt} re-prompt")
+
+    ############################################
+    # OBSERVAÇÕES IMPORTANTES
+    ############################################
+
+    print()
+    print("=" * 70)
+    print("OBSERVAÇÕES IMPORTANTES")
+    print("=" * 70)
+    print("""
+1. A ORDEM DO REPARO:
+   - Sintaxe JSON (cerca markdown, aspas simples, vírgula sobrando,
+     literais do Python, JSON truncado)
+   - Correções locais guiadas pelo tipo de cada erro do Pydantic:
+     "4 estrelas" -> 4, "1.200" -> 1200 (só em int), "85%" -> 0.85,
+     texto -> lista, "Positivo" -> "positivo" (enum aproximado com difflib)
+   - Re-prompt mínimo: um schema só com os campos inválidos
+   - Se nada der certo, o retry padrão do ToolStrategy continua valendo
+
+2. O QUE NÃO É CORRIGIDO LOCALMENTE:
+   - Valores fora dos limites (rating=9 com le=5): escala diferente? O
+     modelo decide; "grudar" no limite esconderia o problema
+   - Campos faltando: não há de onde tirar o valor
+   - Enum sem opção parecida o suficiente (cutoff=0.75)
+
+3. POR QUE É MAIS BARATO:
+   - Retry completo: a conversa inteira + a resposta errada + o erro
+     voltam ao modelo, e o objeto inteiro é gerado de novo
+   - Re-prompt mínimo: o texto original + 1 linha por campo inválido, e a
+     saída tem só esses campos
+   - Correção local: zero tokens e microssegundos
+
+4. CUIDADOS:
+   - Correções locais mudam dados: o middleware conta cada tipo em
+     estatisticas.correcoes; audite os tipos mais frequentes
+   - "tokens_evitados" é uma estimativa conservadora (o retry real também
+     reenviaria a resposta errada e a mensagem de erro)
+   - Para a validação em si, o TypeAdapter vem do cache do sample046.py
+
+5. PRÓXIMOS PASSOS:
+   - Para o ToolStrategy e o ProviderStrategy, veja sample014.py e sample015.py
+   - Para extrair vários schemas por chamada, veja sample048.py
+""")
+
+
+if __name__ == "__main__":
+    main()
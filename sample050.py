@@ -0,0 +1,908 @@
+############################################
+#
+# Exemplo de Minimização dos Schemas das
+# Ferramentas enviados em cada chamada.
+#
+# Cada chamada com bind_tools([get_weather,
+# calculate, search_web]) (sample020.py,
+# sample032.py) ou de um agente com várias
+# ferramentas reenvia os JSON Schemas e as
+# docstrings COMPLETOS. Em um agente, isso se
+# repete a cada volta do loop.
+#
+# Aqui as ferramentas passam por uma compactação
+# que produz schemas equivalentes e menores
+# (sem títulos, sem descrições redundantes,
+# Optional enxuto, definições repetidas em
+# $defs), com relatório de tokens por
+# ferramenta. Um filtro local de relevância
+# (opcional) envia só as ferramentas que
+# importam para cada pergunta.
+#
+############################################
+
+
+############################################
+# PASSO 1 - Contagem de tokens
+############################################
+
+import json
+
+try:
+    import tiktoken
+
+    _CODIFICADOR = tiktoken.get_encoding("o200k_base")
+    CONTADOR = "tiktoken o200k_base"
+
+    def contar_tokens(texto: str) -> int:
+        return len(_CODIFICADOR.encode(texto))
+except Exception:  # sem tiktoken ou sem acesso para baixar o vocabulário
+    CONTADOR = "estimativa (~4 caracteres por token)"
+
+    def contar_tokens(texto: str) -> int:
+        return max(1, (len(texto) + 3) // 4)
+
+
+def serializar(valor) -> str:
+    """JSON compacto: a forma em que o schema vai para a API."""
+    return json.dumps(valor, ensure_ascii=False, separators=(",", ":"))
+
+
+def tokens_da_ferramenta(ferramenta: dict) -> int:
+    return contar_tokens(serializar(ferramenta))
+
+
+############################################
+# PASSO 2 - Passos de compactação (equivalentes)
+############################################
+
+import re
+import unicodedata
+
+_MAPAS = ("properties", "$defs", "definitions", "patternProperties")
+_LISTAS = ("anyOf", "oneOf", "allOf", "prefixItems")
+_UNICOS = ("items", "additionalProperties", "not")
+_NULO = {"type": "null"}
+PALAVRAS_VAZIAS = {"o", "a", "os", "as", "de", "do", "da", "dos", "das", "e", "ou", "um", "uma",
+                   "the", "of", "an", "or", "and", "to"}
+
+
+def palavras(texto: str) -> set[str]:
+    """Palavras sem acento e em minúsculas ("Título" e "titulo" são iguais)."""
+    sem_acento = unicodedata.normalize("NFKD", str(texto)).encode("ascii", "ignore").decode()
+    return set(re.findall(r"[a-z0-9]+", sem_acento.lower()))
+
+
+def mapear_subschemas(schema, funcao):
+    """Aplica funcao a cada sub-schema, de baixo para cima (devolve cópias)."""
+    if not isinstance(schema, dict):
+        return schema
+    novo = dict(schema)
+    for chave in _MAPAS:
+        if isinstance(novo.get(chave), dict):
+            novo[chave] = {nome: mapear_subschemas(sub, funcao) for nome, sub in novo[chave].items()}
+    for chave in _LISTAS:
+        if isinstance(novo.get(chave), list):
+            novo[chave] = [mapear_subschemas(sub, funcao) for sub in novo[chave]]
+    for chave in _UNICOS:
+        if isinstance(novo.get(chave), dict):
+            novo[chave] = mapear_subschemas(novo[chave], funcao)
+    return funcao(novo)
+
+
+def _tipo_json(valor) -> str:
+    if valor is None:
+        return "null"
+    if isinstance(valor, bool):
+        return "boolean"
+    if isinstance(valor, int):
+        return "integer"
+    if isinstance(valor, float):
+        return "number"
+    if isinstance(valor, str):
+        return "string"
+    return "array" if isinstance(valor, list) else "object"
+
+
+def _aceita(tipos: list[str], valor) -> bool:
+    tipo = _tipo_json(valor)
+    return tipo in tipos or (tipo == "integer" and "number" in tipos)
+
+
+def _descricao_redundante(nome: str, sub: dict) -> bool:
+    """A descrição só repete o nome da propriedade e/ou os valores do enum?"""
+    conhecidas = palavras(nome) | PALAVRAS_VAZIAS
+    for valor in sub.get("enum", ()):
+        conhecidas |= palavras(valor)
+    return palavras(sub["description"]) <= conhecidas
+
+
+def _juntar_optional(no: dict) -> dict:
+    """anyOf [X, null] -> type [X, "null"] (ou enum [..., null])."""
+    opcoes = no.get("anyOf")
+    if not (isinstance(opcoes, list) and len(opcoes) == 2 and _NULO in opcoes):
+        return no
+    outro = opcoes[0] if opcoes[1] == _NULO else opcoes[1]
+    resto = {k: v for k, v in no.items() if k != "anyOf"}
+    if not isinstance(outro.get("type"), str) or set(outro) & set(resto):
+        return no  # $ref, tipos compostos ou chaves em conflito: deixa como está
+    juntado = {**outro, "type": [outro["type"], "null"]}
+    if "enum" in outro:
+        juntado["enum"] = [*outro["enum"], None]
+    return {**resto, **juntado}
+
+
+def compactar_no(no: dict) -> dict:
+    """Regras locais. Nenhuma muda o conjunto de argumentos aceitos."""
+    no.pop("title", None)  # anotação; o nome da ferramenta/propriedade já identifica
+    if "default" in no and no["default"] is None:
+        no.pop("default")  # "opcional" já está em required
+    no = _juntar_optional(no)
+    if "enum" in no and "type" in no:
+        tipos = no["type"] if isinstance(no["type"], list) else [no["type"]]
+        if all(_aceita(tipos, valor) for valor in no["enum"]):
+            no.pop("type")  # o enum já restringe os valores
+    for nome, sub in (no.get("properties") or {}).items():
+        if isinstance(sub, dict) and "description" in sub and _descricao_redundante(nome, sub):
+            sub.pop("description")
+    return no
+
+
+_SECAO = re.compile(
+    r"^\s*(Args|Arguments|Parameters|Parâmetros|Returns|Retorna|Yields|Raises|Examples?|Exemplos?|Notes?)\s*:\s*$",
+    re.IGNORECASE,
+)
+_ARGUMENTO = re.compile(r"^\s*(\w+)\s*(?:\([^)]*\))?\s*:\s*(.*)$")
+
+
+def limpar_descricao(descricao: str) -> tuple[str, dict[str, str]]:
+    """Separa a docstring: (resumo em uma linha, descrições da seção Args).
+
+    Args/Returns/Raises/Examples não vão para o modelo: as descrições dos
+    argumentos passam para as propriedades, o resto é para quem lê o código.
+    """
+    corpo, argumentos, secao, atual = [], {}, None, None
+    for linha in descricao.splitlines():
+        if m := _SECAO.match(linha):
+            secao, atual = m.group(1).lower(), None
+        elif secao is None:
+            corpo.append(linha)
+        elif secao in ("args", "arguments", "parameters", "parâmetros"):
+            if m := _ARGUMENTO.match(linha):
+                atual = m.group(1)
+                argumentos[atual] = m.group(2).strip()
+            elif atual and linha.strip():
+                argumentos[atual] += " " + linha.strip()
+    return " ".join(" ".join(corpo).split()), argumentos
+
+
+############################################
+# PASSO 3 - Definições repetidas em $defs
+############################################
+
+_REFERENCIA = len(serializar({"$ref": "#/$defs/xxxx"}))
+
+
+def _chave(schema) -> str:
+    return json.dumps(schema, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+
+
+def _ocorrencias(schema, nome: str | None, achados: dict) -> None:
+    """Conta objetos e enums grandes (chave canônica -> [qtd, schema, nomes])."""
+    if not isinstance(schema, dict):
+        return
+    if "properties" in schema or len(schema.get("enum", ())) >= 3:
+        definicao = _sem_descricao(schema)
+        item = achados.setdefault(_chave(definicao), [0, definicao, set()])
+        item[0] += 1
+        item[2].add(nome)
+    for filho, sub in (schema.get("properties") or {}).items():
+        _ocorrencias(sub, filho, achados)
+    if isinstance(schema.get("items"), dict):
+        _ocorrencias(schema["items"], nome, achados)
+    for chave in _LISTAS:
+        for sub in schema.get(chave, ()):
+            _ocorrencias(sub, nome, achados)
+
+
+def _sem_descricao(schema: dict) -> dict:
+    return {k: v for k, v in schema.items() if k != "description"}
+
+
+def _substituir(valor, chave: str, referencia: dict):
+    if isinstance(valor, list):
+        return [_substituir(v, chave, referencia) for v in valor]
+    if not isinstance(valor, dict):
+        return valor
+    if _chave(_sem_descricao(valor)) == chave:
+        # a descrição é do USO (o campo), não da definição: fica ao lado do $ref
+        return {**referencia, **({"description": valor["description"]} if "description" in valor else {})}
+    return {k: _substituir(v, chave, referencia) for k, v in valor.items()}
+
+
+def deduplicar(parametros: dict) -> dict:
+    """Move sub-schemas repetidos para $defs quando isso encurta o JSON.
+
+    convert_to_openai_tool expande os $ref do Pydantic: um modelo usado em
+    dois campos aparece duas vezes por extenso. Aqui ele volta a ser um só.
+    """
+    defs = dict(parametros.get("$defs", {}))
+    corpo = {k: v for k, v in parametros.items() if k != "$defs"}
+    while True:
+        achados = {}
+        for nome, sub in (corpo.get("properties") or {}).items():
+            _ocorrencias(sub, nome, achados)
+        economias = [
+            (len(chave) * (qtd - 1) - qtd * _REFERENCIA, chave, schema, nomes)
+            for chave, (qtd, schema, nomes) in achados.items()
+            if qtd >= 2
+        ]
+        economia, chave, schema, nomes = max(economias, default=(0, None, None, None), key=lambda e: e[0])
+        if economia <= 0:
+            break
+        nome = nomes.pop() if len(nomes) == 1 else f"tipo{len(defs) + 1}"
+        while nome in defs:
+            nome += "_"
+        defs[nome] = schema
+        corpo = _substituir(corpo, chave, {"$ref": f"#/$defs/{nome}"})
+    if defs:
+        corpo["$defs"] = defs
+    return corpo
+
+
+############################################
+# PASSO 4 - Enums abreviados (opcional, reversível)
+############################################
+
+def abreviar(valores: list[str]) -> dict[str, str] | None:
+    """Códigos curtos e únicos para valores longos: {código: original}.
+
+    Tenta, nesta ordem: primeira palavra, última palavra, iniciais. Só vale
+    se ficar mais curto; senão devolve None e o enum fica como está.
+    """
+    partes = [re.split(r"[_\-\s]+", valor) for valor in valores]
+    estrategias = (
+        lambda p: p[0],
+        lambda p: p[-1],
+        lambda p: "".join(s[:1] for s in p),
+    )
+    for estrategia in estrategias:
+        codigos = [estrategia(p).lower() for p in partes]
+        if len(set(codigos)) == len(codigos) and all(codigos) and sum(map(len, codigos)) < sum(map(len, valores)):
+            return dict(zip(codigos, valores))
+    return None
+
+
+def _abreviar_enums(schema, caminho: tuple, mapas: dict, minimo: int) -> dict:
+    """Troca enums de strings longas por códigos; guarda o caminho de cada um."""
+    if not isinstance(schema, dict):
+        return schema
+    novo = dict(schema)
+    textos = [v for v in novo.get("enum", ()) if isinstance(v, str)]
+    if textos and sum(map(len, textos)) / len(textos) >= minimo and (mapa := abreviar(textos)):
+        inverso = {original: codigo for codigo, original in mapa.items()}
+        novo["enum"] = [inverso.get(v, v) for v in novo["enum"]]
+        if novo.get("default") in inverso:
+            novo["default"] = inverso[novo["default"]]
+        mapas[caminho] = mapa
+    if isinstance(novo.get("properties"), dict):
+        novo["properties"] = {
+            nome: _abreviar_enums(sub, caminho + (nome,), mapas, minimo) for nome, sub in novo["properties"].items()
+        }
+    if isinstance(novo.get("items"), dict):
+        novo["items"] = _abreviar_enums(novo["items"], caminho + ("[]",), mapas, minimo)
+    for chave in _LISTAS:
+        if isinstance(novo.get(chave), list):
+            novo[chave] = [_abreviar_enums(sub, caminho, mapas, minimo) for sub in novo[chave]]
+    return novo
+
+
+def _decodificar(valor, caminho: tuple, mapa: dict):
+    if not caminho:
+        if isinstance(valor, list):
+            return [mapa.get(v, v) if isinstance(v, str) else v for v in valor]
+        return mapa.get(valor, valor) if isinstance(valor, str) else valor
+    chave, resto = caminho[0], caminho[1:]
+    if chave == "[]" and isinstance(valor, list):
+        return [_decodificar(v, resto, mapa) for v in valor]
+    if isinstance(valor, dict) and chave in valor:
+        return {**valor, chave: _decodificar(valor[chave], resto, mapa)}
+    return valor
+
+
+############################################
+# PASSO 5 - A ferramenta compactada
+############################################
+
+from dataclasses import dataclass, field
+
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+
+@dataclass(slots=True)
+class FerramentaCompacta:
+    nome: str
+    original: dict
+    compacta: dict
+    enums: dict = field(default_factory=dict)  # caminho nos args -> {código: original}
+
+    @property
+    def tokens_originais(self) -> int:
+        return tokens_da_ferramenta(self.original)
+
+    @property
+    def tokens_compactos(self) -> int:
+        return tokens_da_ferramenta(self.compacta)
+
+    def decodificar(self, args: dict) -> dict:
+        """Devolve os valores originais dos enums abreviados."""
+        for caminho, mapa in self.enums.items():
+            args = _decodificar(args, caminho, mapa)
+        return args
+
+
+def compactar_ferramenta(ferramenta, *, abreviar_enums: bool = False, minimo_enum: int = 10) -> FerramentaCompacta:
+    """BaseTool, função ou dict -> FerramentaCompacta.
+
+    Passos padrão (equivalentes): resumo da docstring + Args nas propriedades,
+    sem títulos/descrições redundantes, Optional enxuto, repetições em $defs.
+    abreviar_enums (opt-in) muda os valores do enum: o middleware decodifica
+    os argumentos antes de executar a ferramenta.
+    """
+    original = convert_to_openai_tool(ferramenta)
+    funcao = dict(original["function"])
+    descricao, argumentos = limpar_descricao(funcao.get("description") or "")
+    parametros = json.loads(serializar(funcao.get("parameters") or {"type": "object", "properties": {}}))
+    for nome, texto in argumentos.items():
+        propriedade = parametros.get("properties", {}).get(nome)
+        if isinstance(propriedade, dict) and (
+            "description" not in propriedade or _descricao_redundante(nome, propriedade)
+        ):
+            propriedade["description"] = texto  # "Sala" perde para "sala física ou link da chamada"
+    parametros = mapear_subschemas(parametros, compactar_no)
+    enums = {}
+    if abreviar_enums:
+        parametros = _abreviar_enums(parametros, (), enums, minimo_enum)
+    funcao["parameters"] = deduplicar(parametros)
+    if descricao:
+        funcao["description"] = descricao
+    else:
+        funcao.pop("description", None)
+    return FerramentaCompacta(funcao["name"], original, {"type": "function", "function": funcao}, enums)
+
+
+_ANOTACOES = ("title", "description", "default", "examples")
+# Palavras-chave que só restringem valores de um tipo (as outras valem para todos)
+_POR_TIPO = {
+    "string": {"minLength", "maxLength", "pattern", "format"},
+    "number": {"minimum", "maximum", "exclusiveMinimum", "exclusiveMaximum", "multipleOf"},
+    "array": {"items", "prefixItems", "minItems", "maxItems", "uniqueItems", "contains"},
+    "object": {"properties", "required", "additionalProperties", "patternProperties",
+               "minProperties", "maxProperties"},
+}
+_POR_TIPO["integer"] = _POR_TIPO["number"]
+_DE_ALGUM_TIPO = set().union(*_POR_TIPO.values())
+
+
+def _canonizar_no(no: dict) -> dict:
+    """Reescreve um nó numa forma normal que aceita exatamente os mesmos valores.
+
+    Independe dos passos de compactação (não chama compactar_no): só usa
+    regras do JSON Schema, para que uma compactação que mude a validação
+    apareça como diferença.
+      - anotações saem; "required" e "type" viram listas ordenadas
+      - enum + type = o enum só com os valores que o tipo aceita
+      - {"type": "null"} = {"enum": [null]}
+      - vários tipos = anyOf de um ramo por tipo, cada um só com as
+        palavras-chave daquele tipo
+      - anyOf aninhado é achatado; ramos só com enum viram um enum só
+    """
+    no = {k: v for k, v in no.items() if k not in _ANOTACOES}
+    if isinstance(no.get("required"), list):
+        no["required"] = sorted(no["required"])
+    if "type" in no:
+        tipos = sorted(set(no["type"] if isinstance(no["type"], list) else [no["type"]]))
+        if "number" in tipos and "integer" in tipos:
+            tipos.remove("integer")
+        no["type"] = tipos
+    if "enum" in no and "type" in no:
+        tipos = no.pop("type")
+        no["enum"] = [valor for valor in no["enum"] if _aceita(tipos, valor)]
+    if no.get("type") == ["null"]:
+        no.pop("type")
+        no["enum"] = [None]
+    if len(no.get("type", ())) > 1:
+        tipos = no.pop("type")
+        comuns = {k: v for k, v in no.items() if k not in _DE_ALGUM_TIPO}
+        ramos = []
+        for tipo in tipos:
+            ramo = {**comuns, **{k: v for k, v in no.items() if k in _POR_TIPO.get(tipo, ())}, "type": [tipo]}
+            ramos.append(_canonizar_no(ramo))
+        no = {"anyOf": ramos}
+    elif len(no.get("type", ())) == 1:
+        proprias = _POR_TIPO.get(no["type"][0], set())
+        no = {k: v for k, v in no.items() if k not in _DE_ALGUM_TIPO or k in proprias}
+    if "enum" in no:
+        no["enum"] = sorted({_chave(valor): valor for valor in no["enum"]}.values(), key=_chave)
+    if isinstance(no.get("anyOf"), list):
+        ramos = []
+        for ramo in no["anyOf"]:
+            ramos += ramo["anyOf"] if set(ramo) == {"anyOf"} else [ramo]
+        if len(ramos) > 1 and all(set(ramo) == {"enum"} for ramo in ramos):
+            valores = [valor for ramo in ramos for valor in ramo["enum"]]
+            ramos = [{"enum": sorted({_chave(v): v for v in valores}.values(), key=_chave)}]
+        ramos = sorted({_chave(ramo): ramo for ramo in ramos}.values(), key=_chave)
+        resto = {k: v for k, v in no.items() if k != "anyOf"}
+        no = {**resto, **ramos[0]} if len(ramos) == 1 and not set(resto) & set(ramos[0]) else {**resto, "anyOf": ramos}
+    return no
+
+
+def forma_canonica(parametros: dict) -> str:
+    """Só as palavras-chave de VALIDAÇÃO, com $ref expandidos e em forma normal.
+
+    Duas formas canônicas iguais aceitam exatamente os mesmos argumentos.
+    O schema original e o compactado passam pela mesma normalização
+    (_canonizar_no), que não reaproveita nenhum passo da compactação.
+    """
+    defs = parametros.get("$defs", {})
+
+    def expandir(valor):
+        if isinstance(valor, list):
+            return [expandir(v) for v in valor]
+        if not isinstance(valor, dict):
+            return valor
+        if "$ref" in valor:
+            return expandir(defs[valor["$ref"].split("/")[-1]])
+        return {k: expandir(v) for k, v in valor.items() if k != "$defs"}
+
+    return _chave(mapear_subschemas(expandir(parametros), _canonizar_no))
+
+
+############################################
+# PASSO 6 - Filtro local de relevância
+############################################
+
+import math
+from collections import Counter
+
+from langchain_core.tools import BaseTool
+
+_PALAVRAS_COMUNS = {"que", "qual", "quais", "para", "com", "uma", "como", "por", "nos", "nas", "meu", "minha",
+                    "seu", "sua", "sobre", "esta", "isso", "the", "and", "for", "what", "with", "from"}
+
+
+def termos(texto: str) -> set[str]:
+    """Radicais baratos: palavras >= 3 letras cortadas em 5 ("calcula" ~ "calcular")."""
+    return {p[:5] for p in palavras(texto) if len(p) >= 3 and p not in _PALAVRAS_COMUNS}
+
+
+def nome_da_ferramenta(ferramenta) -> str | None:
+    if isinstance(ferramenta, BaseTool):
+        return ferramenta.name
+    if isinstance(ferramenta, dict):
+        return (ferramenta.get("function") or {}).get("name") or ferramenta.get("name")
+    return getattr(ferramenta, "__name__", None)
+
+
+def texto_da_ferramenta(schema: dict) -> str:
+    """Nome, descrição, nomes/descrições de propriedades e valores de enum."""
+    partes = []
+
+    def visitar(no):
+        if isinstance(no, dict):
+            partes.extend(str(v) for v in no.get("enum", ()) if v is not None)
+            partes.append(no.get("description") or "")
+            for nome, sub in (no.get("properties") or {}).items():
+                partes.append(nome.replace("_", " "))
+                visitar(sub)
+            for valor in no.values():
+                if isinstance(valor, (dict, list)) and valor is not no.get("properties"):
+                    visitar(valor)
+        elif isinstance(no, list):
+            for item in no:
+                visitar(item)
+
+    funcao = schema["function"]
+    partes.append(funcao["name"].replace("_", " "))
+    visitar(funcao)
+    return " ".join(partes)
+
+
+class FiltroRelevancia:
+    """Escolhe as k ferramentas mais relevantes para a pergunta, sem LLM.
+
+    Pontuação: soma do IDF dos termos em comum entre a pergunta e o texto de
+    cada ferramenta (+ dicas, ex.: palavras vistas nos logs). Sem nenhum
+    termo em comum, devolve None: na dúvida, todas as ferramentas vão.
+    """
+
+    def __init__(self, ferramentas, *, k: int = 2, dicas: dict[str, str] | None = None, sempre=()):
+        self.k = k
+        self.sempre = set(sempre)
+        dicas = dicas or {}
+        self._termos = {}
+        for ferramenta in ferramentas:
+            schema = convert_to_openai_tool(ferramenta)
+            nome = schema["function"]["name"]
+            self._termos[nome] = termos(texto_da_ferramenta(schema) + " " + dicas.get(nome, ""))
+        frequencia = Counter(t for conjunto in self._termos.values() for t in conjunto)
+        total = len(self._termos)
+        self._idf = {t: math.log(1 + total / n) for t, n in frequencia.items()}
+
+    def pontuar(self, texto: str) -> dict[str, float]:
+        pergunta = termos(texto)
+        return {nome: sum(self._idf[t] for t in pergunta & conjunto) for nome, conjunto in self._termos.items()}
+
+    def selecionar(self, texto: str, ja_usadas=()) -> set[str] | None:
+        pontos = self.pontuar(texto)
+        melhores = sorted((p, n) for n, p in pontos.items() if p > 0)[::-1][: self.k]
+        if not melhores:
+            return None
+        return {n for _, n in melhores} | self.sempre | set(ja_usadas)
+
+
+############################################
+# PASSO 7 - Middleware: compacta e filtra por chamada
+############################################
+
+from langchain.agents.middleware import AgentMiddleware, ModelRequest, ModelResponse
+from langchain_core.messages import AIMessage, HumanMessage
+
+
+@dataclass
+class EstatisticasFerramentas:
+    chamadas: int = 0
+    ferramentas_originais: int = 0
+    ferramentas_enviadas: int = 0
+    tokens_originais: int = 0  # o que bind_tools teria enviado
+    tokens_enviados: int = 0
+    argumentos_decodificados: int = 0
+
+    @property
+    def economia(self) -> float:
+        return 1 - self.tokens_enviados / self.tokens_originais if self.tokens_originais else 0.0
+
+
+def _pergunta(messages) -> str:
+    ultima = next((m for m in reversed(messages) if isinstance(m, HumanMessage)), None)
+    return ultima.text if ultima is not None else ""
+
+
+def _ja_usadas(messages) -> set[str]:
+    return {tc["name"] for m in messages if isinstance(m, AIMessage) for tc in m.tool_calls}
+
+
+class FerramentasCompactas(AgentMiddleware):
+    """Troca as ferramentas de cada chamada pelas versões compactas.
+
+    As compactas vão como dicts (o factory repassa dicts direto ao
+    bind_tools); a execução continua com as BaseTool originais. Com um
+    FiltroRelevancia, só as ferramentas relevantes para a última pergunta
+    (e as já usadas na conversa) são enviadas.
+    """
+
+    def __init__(self, *, abreviar_enums: bool = False, filtro: FiltroRelevancia | None = None):
+        super().__init__()
+        self.abreviar_enums = abreviar_enums
+        self.filtro = filtro
+        self.estatisticas = EstatisticasFerramentas()
+        self._compactas: dict[str, FerramentaCompacta] = {}
+
+    def compacta(self, ferramenta) -> FerramentaCompacta:
+        nome = nome_da_ferramenta(ferramenta)
+        if nome not in self._compactas:
+            self._compactas[nome] = compactar_ferramenta(ferramenta, abreviar_enums=self.abreviar_enums)
+        return self._compactas[nome]
+
+    def _preparar(self, request: ModelRequest) -> ModelRequest:
+        ferramentas = list(request.tools)
+        escolhidas = self.filtro.selecionar(_pergunta(request.messages), _ja_usadas(request.messages)) if self.filtro else None
+        if escolhidas is not None:
+            if isinstance(request.tool_choice, str) and request.tool_choice not in ("auto", "none", "any", "required"):
+                escolhidas.add(request.tool_choice)  # tool_choice forçado nunca é filtrado
+            ferramentas = [f for f in ferramentas if nome_da_ferramenta(f) in escolhidas]
+        enviadas, tokens_originais, tokens_enviados = [], 0, 0
+        for ferramenta in request.tools:
+            if isinstance(ferramenta, dict) and "function" not in ferramenta:
+                continue  # ferramentas nativas do provedor (web_search etc.) seguem intactas
+            compacta = self.compacta(ferramenta)
+            tokens_originais += compacta.tokens_originais
+            if any(f is ferramenta for f in ferramentas):
+                enviadas.append(compacta.compacta)
+                tokens_enviados += compacta.tokens_compactos
+        enviadas += [f for f in ferramentas if isinstance(f, dict) and "function" not in f]
+        e = self.estatisticas
+        e.chamadas += 1
+        e.ferramentas_originais += len(request.tools)
+        e.ferramentas_enviadas += len(enviadas)
+        e.tokens_originais += tokens_originais
+        e.tokens_enviados += tokens_enviados
+        return request.override(tools=enviadas)
+
+    def wrap_model_call(self, request: ModelRequest, handler) -> ModelResponse:
+        return handler(self._preparar(request))
+
+    async def awrap_model_call(self, request: ModelRequest, handler) -> ModelResponse:
+        return await handler(self._preparar(request))
+
+    def _decodificar(self, request):
+        compacta = self._compactas.get(request.tool_call["name"])
+        if compacta is None or not compacta.enums:
+            return request
+        args = compacta.decodificar(request.tool_call["args"])
+        if args != request.tool_call["args"]:
+            self.estatisticas.argumentos_decodificados += 1
+        return request.override(tool_call={**request.tool_call, "args": args})
+
+    def wrap_tool_call(self, request, handler):
+        return handler(self._decodificar(request))
+
+    async def awrap_tool_call(self, request, handler):
+        return await handler(self._decodificar(request))
+
+
+############################################
+# PASSO 8 - Ferramentas de exemplo
+############################################
+
+from typing import Literal, Optional
+
+from langchain.tools import tool
+from pydantic import BaseModel, Field
+
+
+# As três do sample032.py
+@tool
+def get_weather(city: str) -> str:
+    """Retorna o tempo atual de uma cidade."""
+    return f"Ensolarado, 28°C em {city}"
+
+
+@tool
+def calculate(expression: str) -> str:
+    """Calcula uma expressão matemática."""
+    return f"Resultado: {expression}"
+
+
+@tool
+def search_web(query: str) -> str:
+    """Busca informações na web."""
+    return f"Resultados da busca para '{query}': [simulado]"
+
+
+# Ferramentas "de verdade": modelos aninhados, enums e docstrings longas
+class Participante(BaseModel):
+    nome: str = Field(description="Nome")
+    email: Optional[str] = Field(default=None, description="E-mail")
+    papel: Literal["organizador_principal", "participante_obrigatorio", "participante_opcional"] = Field(
+        default="participante_obrigatorio",
+        description="Papel: organizador_principal, participante_obrigatorio ou participante_opcional",
+    )
+
+
+class ArgsReuniao(BaseModel):
+    titulo: str = Field(description="Título")
+    organizador: Participante
+    convidados: list[Participante] = Field(description="Pessoas convidadas para a reunião")
+    inicio: str = Field(description="Data e hora de início no formato ISO 8601")
+    duracao_minutos: int = Field(default=30, ge=15, le=480, description="Duração em minutos")
+    sala: Optional[str] = Field(default=None, description="Sala")
+    prioridade: Literal["prioridade_baixa", "prioridade_normal", "prioridade_alta"] = Field(
+        default="prioridade_normal", description="Prioridade"
+    )
+
+
+@tool(args_schema=ArgsReuniao)
+def agendar_reuniao(titulo, organizador, convidados, inicio, duracao_minutos=30, sala=None, prioridade="prioridade_normal") -> str:
+    """Agenda uma reunião no calendário corporativo.
+
+    Verifica conflitos de agenda dos participantes antes de criar o evento
+    e envia o convite por e-mail.
+
+    Args:
+        titulo: título exibido no convite
+        organizador: quem organiza a reunião
+        convidados: pessoas convidadas
+        inicio: data e hora de início
+        duracao_minutos: duração da reunião
+        sala: sala física ou link da chamada
+        prioridade: prioridade do evento
+
+    Returns:
+        O identificador do evento criado.
+
+    Raises:
+        ValueError: se houver conflito de agenda.
+    """
+    papeis = [c.papel if isinstance(c, Participante) else c["papel"] for c in convidados]
+    return f"Reunião '{titulo}' agendada ({prioridade}; papéis: {', '.join(papeis)})"
+
+
+@tool
+def buscar_pedidos(
+    cliente_id: int,
+    status: Optional[Literal["aguardando_pagamento", "em_separacao", "enviado_transportadora",
+                             "entregue_cliente", "cancelado_pelo_cliente"]] = None,
+    data_inicial: Optional[str] = None,
+    data_final: Optional[str] = None,
+    limite: int = 20,
+) -> str:
+    """Busca os pedidos de um cliente na loja virtual.
+
+    Args:
+        cliente_id: identificador numérico do cliente
+        status: filtra pelo status do pedido
+        data_inicial: data inicial (AAAA-MM-DD)
+        data_final: data final (AAAA-MM-DD)
+        limite: número máximo de pedidos devolvidos
+
+    Returns:
+        Lista de pedidos em texto.
+    """
+    return f"Pedidos do cliente {cliente_id} com status={status}: [simulado]"
+
+
+FERRAMENTAS = [get_weather, calculate, search_web, agendar_reuniao, buscar_pedidos]
+
+DICAS = {
+    "calculate": "quanto soma mais menos vezes dividido conta",
+    "search_web": "pesquise procure busque notícias internet",
+    "agendar_reuniao": "marque marcar agende reunião encontro",
+}
+
+PERGUNTAS = [
+    ("Qual é o tempo em São Paulo?", "get_weather"),
+    ("Quanto é 15 * 8?", "calculate"),
+    ("Pesquise notícias sobre LangChain", "search_web"),
+    ("Marque uma reunião com a Ana amanhã às 10h", "agendar_reuniao"),
+    ("Quais pedidos do cliente 42 estão aguardando pagamento?", "buscar_pedidos"),
+    ("Oi, tudo bem?", None),
+]
+
+
+############################################
+# PASSO 9 - Executando
+############################################
+
+import textwrap
+import time
+
+from langchain.agents import create_agent
+
+from sample033 import ModeloStubLocal, StubConfig, exemplo_do_schema
+from sample047 import PRECO_INPUT_POR_1M
+
+
+def main():
+    print("=" * 70)
+    print(f"1. TOKENS POR FERRAMENTA ({CONTADOR})")
+    print("=" * 70)
+    print(f"{'ferramenta':<18} {'original':>9} {'compacta':>9} {'economia':>9} {'+ enums':>8} {'equivalente':>12}")
+    totais = [0, 0, 0]
+    for ferramenta in FERRAMENTAS:
+        compacta = compactar_ferramenta(ferramenta)
+        abreviada = compactar_ferramenta(ferramenta, abreviar_enums=True)
+        equivalente = forma_canonica(compacta.original["function"]["parameters"]) == forma_canonica(
+            compacta.compacta["function"]["parameters"]
+        )
+        # Um exemplo gerado do schema ENVIADO precisa ser aceito pela ferramenta original
+        exemplo = abreviada.decodificar(exemplo_do_schema(abreviada.compacta["function"]["parameters"]))
+        ferramenta.args_schema.model_validate(exemplo)
+        original, menor, menor_ainda = compacta.tokens_originais, compacta.tokens_compactos, abreviada.tokens_compactos
+        totais = [totais[0] + original, totais[1] + menor, totais[2] + menor_ainda]
+        print(f"{compacta.nome:<18} {original:>9} {menor:>9} {1 - menor / original:>9.0%} {menor_ainda:>8} {'sim' if equivalente else 'NÃO':>12}")
+    print(f"{'TOTAL':<18} {totais[0]:>9} {totais[1]:>9} {1 - totais[1] / totais[0]:>9.0%} {totais[2]:>8}")
+
+    # A coluna precisa pegar um passo defeituoso: aqui, Optional[X] vira X (some o null)
+    def perde_nulo(no: dict) -> dict:
+        opcoes = no.get("anyOf")
+        if isinstance(opcoes, list) and len(opcoes) == 2 and _NULO in opcoes:
+            outro = opcoes[0] if opcoes[1] == _NULO else opcoes[1]
+            return {**{k: v for k, v in no.items() if k != "anyOf"}, **outro}
+        return no
+
+    parametros = convert_to_openai_tool(agendar_reuniao)["function"]["parameters"]
+    defeituoso = mapear_subschemas(parametros, perde_nulo)
+    print(f"Compactação com defeito (Optional[X] -> X) equivalente? "
+          f"{'sim' if forma_canonica(parametros) == forma_canonica(defeituoso) else 'NÃO'}")
+
+    exemplo = compactar_ferramenta(agendar_reuniao, abreviar_enums=True).compacta
+    print(f"\nagendar_reuniao compactada, com enums abreviados ({len(serializar(exemplo))} caracteres):")
+    print(textwrap.fill(serializar(exemplo["function"]), 100, break_on_hyphens=False))
+
+    print("\n" + "=" * 70)
+    print("2. FILTRO LOCAL DE RELEVÂNCIA (k=2)")
+    print("=" * 70)
+    filtro = FiltroRelevancia(FERRAMENTAS, k=2, dicas=DICAS)
+    acertos = enviadas = 0
+    for pergunta, esperada in PERGUNTAS:
+        escolhidas = filtro.selecionar(pergunta)
+        lista = sorted(escolhidas) if escolhidas is not None else ["(todas)"]
+        acertou = escolhidas is None or esperada in escolhidas
+        acertos += acertou
+        enviadas += len(escolhidas) if escolhidas is not None else len(FERRAMENTAS)
+        print(f"[{'OK' if acertou else 'ERRO':<4}] {pergunta[:44]:<45} -> {', '.join(lista)}")
+    repeticoes = 2_000
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        for pergunta, _ in PERGUNTAS:
+            filtro.selecionar(pergunta)
+    custo = (time.perf_counter() - inicio) / (repeticoes * len(PERGUNTAS)) * 1e6
+    print(f"\nAcertos: {acertos}/{len(PERGUNTAS)} | ferramentas por chamada: "
+          f"{enviadas / len(PERGUNTAS):.1f} de {len(FERRAMENTAS)} | custo: {custo:.0f}µs por pergunta")
+
+    print("\n" + "=" * 70)
+    print("3. AGENTE: TOKENS DE FERRAMENTAS ENVIADOS POR CHAMADA AO MODELO")
+    print("=" * 70)
+    config = StubConfig(latencia_ms=0, jitter_ms=0, seed=42)
+    modos = (
+        ("compacta", FerramentasCompactas()),
+        ("compacta + enums", FerramentasCompactas(abreviar_enums=True)),
+        ("compacta + filtro", FerramentasCompactas(abreviar_enums=True, filtro=filtro)),
+    )
+    print(f"{'modo':<18} {'chamadas':>8} {'ferr./cham.':>11} {'tokens orig.':>12} {'enviados':>9} {'economia':>9}")
+    for nome, middleware in modos:
+        agente = create_agent(ModeloStubLocal(config=config), FERRAMENTAS, middleware=[middleware])
+        for _ in range(5):
+            for pergunta, _ in PERGUNTAS:
+                agente.invoke({"messages": [{"role": "user", "content": pergunta}]})
+        e = middleware.estatisticas
+        print(f"{nome:<18} {e.chamadas:>8} {e.ferramentas_enviadas / e.chamadas:>11.1f} "
+              f"{e.tokens_originais / e.chamadas:>12.0f} {e.tokens_enviados / e.chamadas:>9.0f} {e.economia:>9.0%}")
+    print(f"\nArgumentos com enums decodificados antes da execução: {middleware.estatisticas.argumentos_decodificados}")
+    resultado = agente.invoke({"messages": [{"role": "user", "content": PERGUNTAS[4][0]}]})
+    print(f"O que a ferramenta recebeu: {[m.content for m in resultado['messages'] if m.type == 'tool'][0]}")
+
+    economia_por_chamada = (e.tokens_originais - e.tokens_enviados) / e.chamadas
+    print(f"\nA cada 1 milhão de chamadas: {economia_por_chamada:.0f}M tokens de input "
+          f"a menos (~US$ {economia_por_chamada * PRECO_INPUT_POR_1M:,.0f} no gpt-4o-mini)")
+
+    print("\n" + "=" * 70)
+    print("OBSERVAÇÕES IMPORTANTES")
+    print("=" * 70)
+    print("""
+1. O QUE A COMPACTAÇÃO PADRÃO FAZ (SEM MUDAR O QUE É ACEITO):
+   - Remove "title" e default null (anotações, não validação)
+   - Docstring: fica o resumo; Args vira descrição das propriedades, e
+     Returns/Raises/Examples saem (servem a quem lê o código)
+   - Remove descrições que só repetem o nome ("Nome" em nome) ou os
+     valores do enum
+   - anyOf [X, null] -> "type": [X, "null"]; "type" some quando o enum já
+     restringe os valores
+   - Modelos repetidos (Participante em organizador e convidados) vão
+     para $defs uma vez só
+   - A coluna "equivalente" compara só as palavras-chave de validação
+     (forma_canonica), com $ref expandidos, numa forma normal própria:
+     não reaproveita os passos de compactação, então um passo que mude
+     a validação aparece como "NÃO"
+
+2. ENUMS ABREVIADOS (OPT-IN):
+   - "aguardando_pagamento" vira "aguardando": o modelo responde o código
+     e o wrap_tool_call devolve o valor original antes da execução
+   - No histórico, a AIMessage guarda o código (o modelo continua
+     consistente consigo mesmo)
+   - Só vale para enums de strings longas; códigos ambíguos nunca são
+     usados (abreviar devolve None)
+
+3. FILTRO DE RELEVÂNCIA:
+   - IDF sobre nome, descrição, propriedades e enums de cada ferramenta,
+     mais "dicas" (sinônimos vistos nos logs): microssegundos por pergunta
+   - Sem termo em comum, TODAS as ferramentas vão (erro barato)
+   - Ferramentas já usadas na conversa e o tool_choice forçado nunca são
+     filtrados; meça o recall com as suas perguntas reais antes de ligar
+
+4. CUIDADOS:
+   - Descrições ruins custam mais que tokens: revise o schema compacto
+     de cada ferramenta (seção 1) antes de colocar em produção
+   - Filtrar ferramentas muda o prefixo do prompt e pode reduzir o
+     acerto do cache de prompt do provedor; compare os dois efeitos
+   - Os tokens das ferramentas contam em TODA volta do loop do agente
+
+5. PRÓXIMOS PASSOS:
+   - Para tool_choice e bind_tools, veja sample020.py e sample032.py
+   - Para o cache dos schemas compilados, veja sample046.py
+""")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,624 @@
+############################################
+#
+# Exemplo de Pré-Roteamento Local: pedidos
+# determinísticos sem chamar o LLM.
+#
+# O smart_tool_choice do sample032.py olha
+# palavras-chave e DEPOIS chama o modelo com
+# tool_choice forçado: a ida e volta à API
+# continua lá (duas, contando a resposta final).
+#
+# Aqui, antes do modelo, um pré-roteador combina
+# padrões compilados (que também extraem os
+# argumentos) com um classificador local leve.
+# Pedidos com alta confiança vão direto para a
+# ferramenta e a resposta é formatada por um
+# template; o resto segue para o modelo. O
+# relatório mostra a fração do tráfego servida
+# sem nenhuma chamada de API.
+#
+############################################
+
+
+############################################
+# PASSO 1 - As ferramentas (como no sample032.py)
+############################################
+
+import ast
+import operator
+
+from langchain.tools import tool
+
+CLIMA = {
+    "São Paulo": "Ensolarado, 28°C",
+    "Rio de Janeiro": "Nublado, 32°C",
+    "Curitiba": "Chuvoso, 18°C",
+}
+
+_OPERADORES = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.Mod: operator.mod,
+    ast.Pow: operator.pow,
+    ast.USub: operator.neg,
+    ast.UAdd: operator.pos,
+}
+
+
+def avaliar_expressao(expressao: str) -> float:
+    """Aritmética com ast (o eval do sample032.py executaria qualquer código)."""
+
+    def avaliar(no):
+        if isinstance(no, ast.Constant) and isinstance(no.value, (int, float)):
+            return no.value
+        if isinstance(no, ast.BinOp) and type(no.op) in _OPERADORES:
+            esquerda, direita = avaliar(no.left), avaliar(no.right)
+            if isinstance(no.op, ast.Pow) and abs(direita) > 100:
+                raise ValueError("expoente grande demais")
+            return _OPERADORES[type(no.op)](esquerda, direita)
+        if isinstance(no, ast.UnaryOp) and type(no.op) in _OPERADORES:
+            return _OPERADORES[type(no.op)](avaliar(no.operand))
+        raise ValueError(f"expressão não suportada: {expressao!r}")
+
+    return avaliar(ast.parse(expressao, mode="eval").body)
+
+
+@tool
+def get_weather(city: str) -> str:
+    """Retorna o tempo atual de uma cidade."""
+    return CLIMA.get(city, f"Dados não disponíveis para {city}")
+
+
+@tool
+def calculate(expression: str) -> str:
+    """Calcula uma expressão matemática."""
+    try:
+        resultado = avaliar_expressao(expression)
+    except (ValueError, SyntaxError, ZeroDivisionError) as e:
+        return f"Erro: {e}"
+    return f"{resultado:g}" if isinstance(resultado, float) else str(resultado)
+
+
+@tool
+def search_web(query: str) -> str:
+    """Busca informações na web."""
+    return f"Resultados da busca para '{query}': [simulado]"
+
+
+FERRAMENTAS = [get_weather, calculate, search_web]
+
+
+############################################
+# PASSO 2 - Padrões compilados que extraem os argumentos
+############################################
+
+import re
+import unicodedata
+from dataclasses import dataclass, field
+from typing import Callable
+
+_NUMERO = r"\d+(?:[.,]\d+)?"
+_CIDADE = r"(?P<cidade>[A-ZÀ-Ú][\wà-ú]+(?:\s+(?:de|do|da|dos|das)?\s*[A-ZÀ-Ú][\wà-ú]+)*)"
+
+
+def _normalizar(texto: str) -> str:
+    """Minúsculas e sem acento, para comparar palavras e nomes de cidade."""
+    return unicodedata.normalize("NFKD", texto).encode("ascii", "ignore").decode().lower()
+
+
+@dataclass(frozen=True, slots=True)
+class Regra:
+    nome: str
+    ferramenta: str
+    padrao: re.Pattern
+    argumentos: Callable[[re.Match], dict | None]  # None = não deu para extrair
+    resposta: str  # template com os argumentos + {resultado}
+    # Palavras que podem sobrar fora dos grupos do padrão (normalizadas)
+    preenchimento: frozenset[str] = frozenset()
+
+    def sobra(self, texto: str, m: re.Match) -> list[str]:
+        """O que o padrão não explica: tokens fora dos grupos que não são preenchimento.
+
+        Vazio = o pedido inteiro foi entendido. Qualquer palavra, número ou
+        operador a mais ("O JOGO FICOU 2 x 1", "10% de 50 MAIS 3") manda o
+        pedido para o modelo.
+        """
+        resto = list(texto)
+        for grupo, valor in m.groupdict().items():
+            if valor is not None:
+                inicio, fim = m.span(grupo)
+                resto[inicio:fim] = " " * (fim - inicio)
+        tokens = re.findall(r"\w+|[^\w\s?!.,;:]", _normalizar("".join(resto)))
+        return [t for t in tokens if t not in self.preenchimento]
+
+
+# Cidades para as quais a ferramenta tem dados, pelo nome normalizado
+_CIDADES = {_normalizar(cidade): cidade for cidade in CLIMA}
+
+
+def _cidade(m: re.Match) -> dict | None:
+    cidade = _CIDADES.get(_normalizar(m["cidade"]))
+    return {"city": cidade} if cidade else None
+
+
+def _expressao(m: re.Match) -> dict | None:
+    texto = m["expr"].replace("×", "*").replace("÷", "/").replace("^", "**")
+    texto = re.sub(r"(?<=\d)\s*x\s*(?=\d)", "*", texto)
+    texto = re.sub(r"(?<=\d),(?=\d)", ".", texto)
+    try:
+        avaliar_expressao(texto)  # só despacha o que a ferramenta vai conseguir calcular
+    except (ValueError, SyntaxError, ZeroDivisionError):
+        return None
+    return {"expression": texto}
+
+
+def _porcentagem(m: re.Match) -> dict:
+    return {"expression": f"{m['pct'].replace(',', '.')} / 100 * {m['base'].replace(',', '.')}"}
+
+
+_PERGUNTA = frozenset("qual quanto o a e me diga por favor pra mim agora hoje".split())
+_PREENCHIMENTO_CLIMA = _PERGUNTA | frozenset(
+    "tempo clima temperatura previsao como esta faz fazendo atual do da de em no na para".split()
+)
+_PREENCHIMENTO_CONTA = _PERGUNTA | frozenset("da fica calcule calcula calcular resultado de".split())
+
+REGRAS = [
+    Regra(
+        "clima",
+        "get_weather",
+        re.compile(rf"\b(?:tempo|clima|temperatura|previs[aã]o)\b[^?]*?\b(?:em|no|na|de|do|da|para)\s+{_CIDADE}"),
+        _cidade,
+        "Em {city}: {resultado}.",
+        _PREENCHIMENTO_CLIMA,
+    ),
+    Regra(
+        "porcentagem",
+        "calculate",
+        re.compile(rf"(?P<pct>{_NUMERO})\s*%\s*(?:de|of)\s*(?P<base>{_NUMERO})"),
+        _porcentagem,
+        "{expression} = {resultado}",
+        _PREENCHIMENTO_CONTA | {"%", "of"},
+    ),
+    Regra(
+        "aritmetica",
+        "calculate",
+        re.compile(rf"(?P<expr>\(?-?{_NUMERO}\)?(?:\s*(?:[-+*/×÷^]|x(?=\s*\d))\s*\(?-?{_NUMERO}\)?)+)"),
+        _expressao,
+        "{expression} = {resultado}",
+        _PREENCHIMENTO_CONTA,
+    ),
+]
+
+
+############################################
+# PASSO 3 - Classificador local (Naive Bayes em Python puro)
+############################################
+
+import math
+from collections import Counter, defaultdict
+
+_TOKEN = re.compile(r"\d+(?:[.,]\d+)?|[A-Za-z]+|[-+*/^%=]")
+
+
+def caracteristicas(texto: str) -> list[str]:
+    """Palavras sem acento + bigramas, com <num>, <op> e <nome> (nome próprio).
+
+    "tempo em <nome>" vale para qualquer cidade, mesmo as que não estão no treino.
+    """
+    sem_acento = unicodedata.normalize("NFKD", texto.replace("×", "*").replace("÷", "/"))
+    tokens = []
+    for posicao, token in enumerate(_TOKEN.findall(sem_acento.encode("ascii", "ignore").decode())):
+        if token[0].isdigit():
+            tokens.append("<num>")
+        elif not token.isalpha():
+            tokens.append("<op>")
+        elif posicao > 0 and token[0].isupper():
+            tokens.append("<nome>")
+        else:
+            tokens.append(token.lower())
+    return tokens + [f"{a}_{b}" for a, b in zip(tokens, tokens[1:])]
+
+
+class ClassificadorLocal:
+    """Naive Bayes multinomial: treina em milissegundos, prevê em microssegundos."""
+
+    def __init__(self, suavizacao: float = 1.0):
+        self.suavizacao = suavizacao
+        self._contagens: dict[str, Counter] = defaultdict(Counter)
+        self._documentos: Counter = Counter()
+
+    def treinar(self, exemplos: list[tuple[str, str]]) -> "ClassificadorLocal":
+        for texto, classe in exemplos:
+            self._contagens[classe].update(caracteristicas(texto))
+            self._documentos[classe] += 1
+        self._vocabulario = len({c for contagem in self._contagens.values() for c in contagem})
+        self._totais = {classe: sum(contagem.values()) for classe, contagem in self._contagens.items()}
+        return self
+
+    def probabilidades(self, texto: str) -> dict[str, float]:
+        atributos = caracteristicas(texto)
+        total_documentos = sum(self._documentos.values())
+        log = {}
+        for classe, contagem in self._contagens.items():
+            denominador = self._totais[classe] + self.suavizacao * self._vocabulario
+            log[classe] = math.log(self._documentos[classe] / total_documentos) + sum(
+                math.log((contagem[a] + self.suavizacao) / denominador) for a in atributos
+            )
+        maior = max(log.values())
+        exp = {classe: math.exp(valor - maior) for classe, valor in log.items()}
+        soma = sum(exp.values())
+        return {classe: valor / soma for classe, valor in exp.items()}
+
+    def prever(self, texto: str) -> tuple[str, float]:
+        probabilidades = self.probabilidades(texto)
+        classe = max(probabilidades, key=probabilidades.get)
+        return classe, probabilidades[classe]
+
+
+# Em produção: perguntas reais dos logs, rotuladas pela ferramenta que o modelo chamou
+EXEMPLOS_TREINO = [
+    ("Qual o tempo em São Paulo?", "get_weather"),
+    ("Como está o tempo no Rio de Janeiro hoje?", "get_weather"),
+    ("Previsão do tempo para Curitiba", "get_weather"),
+    ("Vai chover em Curitiba?", "get_weather"),
+    ("Está fazendo frio em Porto Alegre?", "get_weather"),
+    ("Qual a temperatura agora em Recife?", "get_weather"),
+    ("clima em Salvador", "get_weather"),
+    ("Como está o clima hoje em Belo Horizonte?", "get_weather"),
+    ("Faz sol em Fortaleza hoje?", "get_weather"),
+    ("Quantos graus está fazendo em Manaus?", "get_weather"),
+    ("tempo agora no Rio", "get_weather"),
+    ("Qual a previsão para amanhã em Brasília?", "get_weather"),
+    ("Quanto é 25 * 4?", "calculate"),
+    ("Quanto é 2 + 2?", "calculate"),
+    ("Calcule 150 / 3", "calculate"),
+    ("15% de 200", "calculate"),
+    ("Quanto dá 12 x 12?", "calculate"),
+    ("Resultado de 1024 - 512", "calculate"),
+    ("3,5 * 2", "calculate"),
+    ("Qual o resultado de (10 + 5) * 3?", "calculate"),
+    ("Me diga quanto é 7 vezes 8", "calculate"),
+    ("Calcula 2 ^ 10 pra mim", "calculate"),
+    ("Quanto é 100 dividido por 4?", "calculate"),
+    ("Qual é a capital do Brasil?", "outro"),
+    ("Quanto tempo leva de São Paulo ao Rio de carro?", "outro"),
+    ("Qual a temperatura ideal do forno para assar pão?", "outro"),
+    ("Me conte uma piada", "outro"),
+    ("Resuma as notícias de hoje sobre tecnologia", "outro"),
+    ("Quanto custa uma passagem para Curitiba?", "outro"),
+    ("Quem ganhou a Copa de 2002?", "outro"),
+    ("Escreva um email de boas-vindas para o time", "outro"),
+    ("Qual o tempo de entrega do pedido 123?", "outro"),
+    ("Traduza 'bom dia' para o inglês", "outro"),
+    ("O que é LangChain?", "outro"),
+    ("Em quanto tempo eu aprendo Python?", "outro"),
+    ("Quantos habitantes tem São Paulo?", "outro"),
+    ("Explique o que é uma previsão de vendas", "outro"),
+    ("Compare Python e Java em 3 pontos", "outro"),
+    ("Liste 5 livros sobre clima organizacional", "outro"),
+    ("Como funciona o 5G?", "outro"),
+    ("Qual a melhor época para visitar o Rio de Janeiro?", "outro"),
+]
+
+
+############################################
+# PASSO 4 - O pré-roteador
+############################################
+
+@dataclass(frozen=True, slots=True)
+class Decisao:
+    regra: Regra
+    args: dict
+    confianca: float
+
+
+class PreRoteador:
+    """Padrão + classificador precisam concordar, com confiança >= limiar.
+
+    O padrão garante os argumentos e precisa explicar o pedido inteiro (só
+    sobra preenchimento); o classificador pega os falsos positivos que
+    restam ("Quanto TEMPO leva DE São Paulo..." não é clima).
+    """
+
+    def __init__(self, regras: list[Regra], classificador: ClassificadorLocal, limiar: float = 0.9):
+        self.regras = regras
+        self.classificador = classificador
+        self.limiar = limiar
+
+    def rotear(self, texto: str) -> tuple[Decisao | None, str]:
+        """(decisão, motivo). Sem decisão, o pedido segue para o modelo."""
+        classe, confianca = self.classificador.prever(texto)
+        motivo = "nenhum padrão"
+        for regra in self.regras:
+            m = regra.padrao.search(texto)
+            if m is None:
+                continue
+            if regra.sobra(texto, m):
+                motivo = "texto fora do padrão"
+                continue
+            if regra.ferramenta != classe:
+                motivo = "classificador discorda"
+                continue
+            if confianca < self.limiar:
+                motivo = "confiança baixa"
+                continue
+            args = regra.argumentos(m)
+            if args is None:
+                motivo = "argumentos inválidos"
+                continue
+            return Decisao(regra, args, confianca), "local"
+        return None, motivo
+
+
+############################################
+# PASSO 5 - Middleware: resolve sem chamar o modelo
+############################################
+
+import uuid
+
+from langchain.agents.middleware import AgentMiddleware, ModelRequest, ModelResponse
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+ROTULO = "pre-roteador"
+
+
+@dataclass
+class EstatisticasPreRoteamento:
+    pedidos: int = 0
+    locais: int = 0  # resolvidos sem nenhuma chamada de API
+    chamadas_api: int = 0
+    motivos: Counter = field(default_factory=Counter)
+
+    @property
+    def fracao_local(self) -> float:
+        return self.locais / self.pedidos if self.pedidos else 0.0
+
+
+def _nome_da_ferramenta(ferramenta) -> str | None:
+    """Nome de uma BaseTool ou de uma ferramenta em dict (formato OpenAI ou simples)."""
+    if isinstance(ferramenta, dict):
+        return ferramenta.get("function", {}).get("name") or ferramenta.get("name")
+    return getattr(ferramenta, "name", None)
+
+
+class PreRoteamento(AgentMiddleware):
+    """Na 1ª chamada, devolve o tool call sem API; na 2ª, a resposta do template.
+
+    A ferramenta roda no ToolNode normal do agente (com os outros
+    middlewares, retries etc.); só as duas idas ao modelo são evitadas.
+    """
+
+    def __init__(self, roteador: PreRoteador):
+        super().__init__()
+        self.roteador = roteador
+        self.estatisticas = EstatisticasPreRoteamento()
+
+    def _local(self, request: ModelRequest) -> ModelResponse | None:
+        ultima = request.messages[-1] if request.messages else None
+        if isinstance(ultima, HumanMessage):
+            return self._despachar(request, ultima.text)
+        if isinstance(ultima, ToolMessage):
+            return self._responder(request, ultima)
+        return None
+
+    def _despachar(self, request: ModelRequest, texto: str) -> ModelResponse | None:
+        self.estatisticas.pedidos += 1
+        if request.response_format is not None:
+            self.estatisticas.motivos["saída estruturada"] += 1
+            return None
+        decisao, motivo = self.roteador.rotear(texto)
+        disponiveis = {_nome_da_ferramenta(t) for t in request.tools}
+        if decisao is not None and decisao.regra.ferramenta not in disponiveis:
+            decisao, motivo = None, "ferramenta indisponível"
+        self.estatisticas.motivos[motivo] += 1
+        if decisao is None:
+            return None
+        chamada = {"name": decisao.regra.ferramenta, "args": decisao.args, "id": f"call_{uuid.uuid4().hex[:24]}"}
+        return ModelResponse(result=[AIMessage(
+            content="",
+            tool_calls=[chamada],
+            response_metadata={"model_name": ROTULO, "regra": decisao.regra.nome, "confianca": decisao.confianca},
+        )])
+
+    def _responder(self, request: ModelRequest, resultado: ToolMessage) -> ModelResponse | None:
+        anterior = next((m for m in reversed(request.messages) if isinstance(m, AIMessage)), None)
+        if anterior is None or anterior.response_metadata.get("model_name") != ROTULO:
+            return None
+        if resultado.status == "error" or str(resultado.content).startswith("Erro"):
+            self.estatisticas.motivos["erro na ferramenta"] += 1
+            return None  # o modelo explica o erro ao usuário
+        regra = next(r for r in self.roteador.regras if r.nome == anterior.response_metadata["regra"])
+        texto = regra.resposta.format(**anterior.tool_calls[0]["args"], resultado=resultado.content)
+        self.estatisticas.locais += 1
+        return ModelResponse(result=[AIMessage(content=texto, response_metadata={"model_name": ROTULO})])
+
+    def wrap_model_call(self, request: ModelRequest, handler) -> ModelResponse:
+        resposta = self._local(request)
+        if resposta is not None:
+            return resposta
+        self.estatisticas.chamadas_api += 1
+        return handler(request)
+
+    async def awrap_model_call(self, request: ModelRequest, handler) -> ModelResponse:
+        resposta = self._local(request)
+        if resposta is not None:
+            return resposta
+        self.estatisticas.chamadas_api += 1
+        return await handler(request)
+
+
+############################################
+# PASSO 6 - Tráfego de teste
+############################################
+
+import random
+import time
+
+from langchain.agents import create_agent
+
+from sample033 import ModeloStubLocal, StubConfig
+
+# (pergunta, o que DEVE acontecer: nome da ferramenta ou None = modelo)
+TRAFEGO = [
+    ("Qual é o tempo em São Paulo?", "get_weather"),
+    ("Como está o clima no Rio de Janeiro?", "get_weather"),
+    ("previsão do tempo para Curitiba", "get_weather"),
+    ("Qual a temperatura em Curitiba agora?", "get_weather"),
+    ("Como está o tempo hoje?", None),  # sem cidade: o modelo pergunta qual
+    ("Quanto é 25 * 4?", "calculate"),
+    ("Quanto é 2+2?", "calculate"),
+    ("calcule 1500 / 12", "calculate"),
+    ("Quanto dá 3 x 7?", "calculate"),
+    ("20% de 350", "calculate"),
+    ("Qual o resultado de 2 ^ 16?", "calculate"),
+    ("Quanto é 10 / 0?", None),  # a ferramenta falharia: o modelo explica
+    ("Quanto tempo leva de Curitiba para São Paulo de ônibus?", None),
+    ("Qual a temperatura ideal do forno para pizza?", None),
+    ("Qual o tempo de entrega do pedido 4521?", None),
+    ("Qual é a capital do Brasil?", None),
+    ("Resuma a reunião de ontem em 3 tópicos", None),
+    ("Pesquise notícias sobre LangChain", None),
+    ("Quantos habitantes tem o Rio de Janeiro?", None),
+    ("Qual a melhor época para ir a Curitiba?", None),
+]
+PESOS = [5, 4, 3, 3, 2, 6, 4, 2, 2, 2, 1, 1, 2, 1, 2, 3, 3, 3, 2, 2]
+
+# Avaliação: frases fora do treino, incluindo negativos feitos para enganar
+# os padrões (palavra-chave certa, pedido errado)
+AVALIACAO = [
+    ("Como está o tempo em Curitiba?", "get_weather"),
+    ("qual a temperatura no Rio de Janeiro hoje", "get_weather"),
+    ("Previsão do tempo em São Paulo", "get_weather"),
+    ("clima agora em Curitiba?", "get_weather"),
+    ("Quanto é 18 * 3?", "calculate"),
+    ("calcule 81 / 9", "calculate"),
+    ("Quanto dá 7 x 6?", "calculate"),
+    ("12,5% de 80", "calculate"),
+    ("Qual o resultado de (3 + 4) * 2?", "calculate"),
+    ("Qual o tempo de espera no Hospital Santa Casa?", None),
+    ("Qual o tempo de volta do Senna em Interlagos?", None),
+    ("Como está o tempo em Gotham City?", None),  # cidade sem dados
+    ("Qual a previsão de vendas para São Paulo?", None),
+    ("Qual a temperatura de fusão do Ferro?", None),
+    ("Quanto tempo leva de Curitiba a São Paulo?", None),
+    ("O jogo ficou 2 x 1?", None),
+    ("O placar foi 3 - 0 para o Brasil?", None),
+    ("Quanto é 10% de 50 mais 3?", None),  # só parte da conta casaria
+    ("Quanto é 2 + 3 e depois vezes 4?", None),
+    ("Quanto é 15% de desconto em 200 reais?", None),
+    ("Me explique por que 1 + 1 = 2", None),
+]
+
+
+def main():
+    classificador = ClassificadorLocal().treinar(EXEMPLOS_TREINO)
+    roteador = PreRoteador(REGRAS, classificador, limiar=0.9)
+
+    print("=" * 70)
+    print("1. DECISÕES DO PRÉ-ROTEADOR (frases fora do treino)")
+    print("=" * 70)
+    treino = {_normalizar(texto) for texto, _ in EXEMPLOS_TREINO}
+    repetidas = sum(_normalizar(pergunta) in treino for pergunta, _ in AVALIACAO)
+    erros, locais, esperados_locais = 0, 0, 0
+    print(f"{'pergunta':<45} {'classe':<8} {'prob':>4}    destino")
+    for pergunta, esperado in AVALIACAO:
+        decisao, motivo = roteador.rotear(pergunta)
+        destino = decisao.regra.ferramenta if decisao else None
+        # Erro grave = despachar localmente o que devia ir ao modelo (ou para a ferramenta errada)
+        erros += destino is not None and destino != esperado
+        locais += destino is not None and destino == esperado
+        esperados_locais += esperado is not None
+        classe, confianca = classificador.prever(pergunta)
+        alvo = f"{destino}({', '.join(map(str, decisao.args.values()))})" if decisao else f"modelo: {motivo}"
+        print(f"{pergunta[:44]:<45} {classe[:8]:<8} {confianca:>4.2f} -> {alvo}"[:110])
+    negativos = len(AVALIACAO) - esperados_locais
+    print(f"\nFrases também presentes no treino: {repetidas}")
+    print(f"Despachos locais errados: {erros} de {negativos} negativos")
+    print(f"Pedidos determinísticos resolvidos localmente: {locais}/{esperados_locais}")
+    inicio = time.perf_counter()
+    repeticoes = 500
+    for _ in range(repeticoes):
+        for pergunta, _ in TRAFEGO:
+            roteador.rotear(pergunta)
+    custo = (time.perf_counter() - inicio) / (repeticoes * len(TRAFEGO)) * 1e6
+    print(f"Custo do roteamento: {custo:.0f}µs por pedido")
+
+    print("\n" + "=" * 70)
+    print("2. AGENTE COM E SEM PRÉ-ROTEAMENTO (modelo com 80ms por chamada)")
+    print("=" * 70)
+    rng = random.Random(7)
+    pedidos = rng.choices(TRAFEGO, weights=PESOS, k=120)
+    config = StubConfig(latencia_ms=80, jitter_ms=0, seed=42)
+    print(f"{'modo':<18} {'pedidos':>7} {'chamadas API':>12} {'locais':>7} {'tempo':>7} {'p/ pedido':>9}")
+    for nome, middleware in (("só o modelo", None), ("pré-roteamento", PreRoteamento(roteador))):
+        modelo = ModeloStubLocal(config=config)
+        agente = create_agent(modelo, FERRAMENTAS, middleware=[middleware] if middleware else [])
+        chamadas = 0
+        inicio = time.perf_counter()
+        for pergunta, _ in pedidos:
+            resultado = agente.invoke({"messages": [{"role": "user", "content": pergunta}]})
+            chamadas += sum(
+                1 for m in resultado["messages"]
+                if isinstance(m, AIMessage) and m.response_metadata.get("model_name") != ROTULO
+            )
+        tempo = time.perf_counter() - inicio
+        locais = middleware.estatisticas.locais if middleware else 0
+        print(f"{nome:<18} {len(pedidos):>7} {chamadas:>12} {locais:>7} {tempo:>6.1f}s {tempo / len(pedidos) * 1000:>7.0f}ms")
+
+    e = middleware.estatisticas
+    print(f"\nTráfego servido sem chamada de API: {e.fracao_local:.0%} ({e.locais}/{e.pedidos})")
+    print("Motivos para ir ao modelo:")
+    for motivo, quantidade in e.motivos.most_common():
+        if motivo != "local":
+            print(f"  {motivo:<24} {quantidade}")
+    exemplo = agente.invoke({"messages": [{"role": "user", "content": "Quanto é 25 * 4?"}]})
+    print(f"\nExemplo: 'Quanto é 25 * 4?' -> {exemplo['messages'][-1].content!r} "
+          f"({len(exemplo['messages'])} mensagens no histórico)")
+
+    print("\n" + "=" * 70)
+    print("OBSERVAÇÕES IMPORTANTES")
+    print("=" * 70)
+    print("""
+1. COMO A DECISÃO É TOMADA:
+   - O padrão compilado precisa casar E explicar o pedido inteiro: fora
+     dos argumentos só pode sobrar preenchimento ("qual", "quanto é"...);
+     uma palavra ou número a mais manda o pedido para o modelo
+   - Os argumentos precisam ser válidos: a cidade tem de estar na lista
+     conhecida e a expressão é avaliada com ast antes de despachar
+   - O classificador (Naive Bayes) precisa concordar com a ferramenta
+     do padrão, com probabilidade >= limiar (0.9)
+   - Qualquer dúvida: o pedido segue para o modelo, como antes
+
+2. O QUE FICA NO HISTÓRICO:
+   - A mesma sequência de uma chamada real: AIMessage com tool call,
+     ToolMessage e a resposta final (marcadas com model_name
+     "pre-roteador")
+   - A ferramenta roda no ToolNode do agente: os outros middlewares
+     de ferramenta continuam valendo
+   - Erro na ferramenta: a resposta final volta a ser do modelo
+
+3. O ERRO QUE IMPORTA:
+   - Mandar para o modelo algo que podia ser local custa uma chamada
+   - Responder localmente algo que NÃO era para a ferramenta é uma
+     resposta errada: acompanhe "despachos locais errados" e suba o
+     limiar antes de ampliar os padrões
+   - Meça em frases que NÃO estão no treino e inclua negativos que usam
+     as mesmas palavras-chave ("tempo de espera", "o jogo ficou 2 x 1")
+
+4. CUIDADOS:
+   - Treine o classificador com perguntas reais dos logs (rotuladas pela
+     ferramenta que o modelo chamou) e reavalie quando o tráfego mudar
+   - Templates são fixos: para respostas com tom/idioma do usuário,
+     despache a ferramenta localmente e deixe só a resposta ao modelo
+   - Com saída estruturada (response_format), o pré-roteador não atua
+
+5. PRÓXIMOS PASSOS:
+   - Para tool_choice e o smart_tool_choice, veja sample032.py
+   - Para reduzir o custo das chamadas que sobram, veja sample050.py
+""")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,355 @@
+############################################
+#
+# Exemplo de Cache de Modelos com Ferramentas
+# Ligadas (bind_tools).
+#
+# O loop do sample032.py chama
+# model.bind_tools(tools, tool_choice=choice)
+# para CADA entrada do usuário: todas as
+# ferramentas são convertidas de novo para JSON
+# Schema (convert_to_openai_tool), mesmo sendo
+# sempre as mesmas.
+#
+# Aqui um cache guarda (1) o schema convertido
+# de cada ferramenta e (2) o runnable já ligado,
+# com chave = identidade do modelo + conjunto de
+# ferramentas + tool_choice. É thread-safe e
+# o microbenchmark mede o custo por pedido com
+# catálogos de 50 ferramentas.
+#
+############################################
+
+
+############################################
+# PASSO 1 - O cache
+############################################
+
+from collections import OrderedDict
+from dataclasses import dataclass
+import json
+import threading
+
+from langchain_core.runnables import Runnable
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+
+def chave_do_tool_choice(tool_choice) -> object:
+    """tool_choice pode ser dict ({"type": "function", ...}): vira texto estável."""
+    if isinstance(tool_choice, dict):
+        return json.dumps(tool_choice, sort_keys=True)
+    return tool_choice
+
+
+@dataclass(slots=True)
+class Ligado:
+    runnable: Runnable
+    # Referências fortes: enquanto a entrada existe, os id() da chave não
+    # podem ser reaproveitados por outros objetos
+    modelo: object
+    ferramentas: tuple
+
+
+class CacheFerramentasLigadas:
+    """bind_tools uma vez por (modelo, ferramentas, tool_choice). Thread-safe.
+
+    As ferramentas são identificadas por identidade (id), na ordem em que
+    foram passadas: a ordem muda o payload (e o cache de prompt do
+    provedor). Trate ferramentas e modelos como imutáveis; se mudar um
+    deles em tempo de execução, chame invalidar().
+    """
+
+    def __init__(self, maximo: int = 256, maximo_schemas: int = 1024):
+        self.maximo = maximo
+        self.maximo_schemas = maximo_schemas
+        # LRU como _ligados: ferramentas criadas por requisição não ficam presas
+        self._schemas: OrderedDict[int, tuple[object, dict]] = OrderedDict()
+        self._ligados: OrderedDict[tuple, Ligado] = OrderedDict()
+        self._lock = threading.Lock()
+        self.acertos = 0
+        self.ligacoes = 0
+        self.conversoes = 0
+
+    def schema(self, ferramenta) -> dict:
+        """Definição OpenAI da ferramenta, convertida uma única vez."""
+        with self._lock:
+            entrada = self._schemas.get(id(ferramenta))
+            if entrada is not None and entrada[0] is ferramenta:
+                self._schemas.move_to_end(id(ferramenta))
+                return entrada[1]
+        schema = convert_to_openai_tool(ferramenta)
+        with self._lock:
+            self.conversoes += 1
+            # Mesmo padrão do sample046.py: duas threads podem converter ao
+            # mesmo tempo, mas só uma versão fica (e é a que todos recebem)
+            entrada = self._schemas.get(id(ferramenta))
+            if entrada is None or entrada[0] is not ferramenta:
+                entrada = self._schemas[id(ferramenta)] = (ferramenta, schema)
+            while len(self._schemas) > self.maximo_schemas:
+                self._schemas.popitem(last=False)
+        return entrada[1]
+
+    def ligar(self, model, ferramentas, *, tool_choice=None, **kwargs) -> Runnable:
+        """Equivalente a model.bind_tools(ferramentas, tool_choice=..., **kwargs)."""
+        ferramentas = tuple(ferramentas)
+        chave = (
+            id(model),
+            tuple(id(f) for f in ferramentas),
+            chave_do_tool_choice(tool_choice),
+            json.dumps(kwargs, sort_keys=True, default=repr),
+        )
+        with self._lock:
+            entrada = self._ligados.get(chave)
+            if entrada is not None:
+                self._ligados.move_to_end(chave)
+                self.acertos += 1
+                return entrada.runnable
+
+        # Os dicts passam direto pelo bind_tools: o custo da conversão fica no cache
+        schemas = [self.schema(f) for f in ferramentas]
+        runnable = model.bind_tools(schemas, tool_choice=tool_choice, **kwargs)
+        with self._lock:
+            entrada = self._ligados.setdefault(chave, Ligado(runnable, model, ferramentas))
+            self.ligacoes += 1
+            while len(self._ligados) > self.maximo:
+                self._ligados.popitem(last=False)
+        return entrada.runnable
+
+    def invalidar(self, objeto=None):
+        """Descarta o que envolve um modelo ou ferramenta (ou, sem argumento, tudo)."""
+        with self._lock:
+            if objeto is None:
+                self._schemas.clear()
+                self._ligados.clear()
+                return
+            self._schemas.pop(id(objeto), None)
+            for chave in [c for c, e in self._ligados.items() if e.modelo is objeto or any(f is objeto for f in e.ferramentas)]:
+                del self._ligados[chave]
+
+    def estatisticas(self) -> dict:
+        with self._lock:
+            return {
+                "ligados": len(self._ligados),
+                "schemas": len(self._schemas),
+                "acertos": self.acertos,
+                "ligacoes": self.ligacoes,
+                "conversoes": self.conversoes,
+            }
+
+
+CACHE_LIGADOS = CacheFerramentasLigadas()
+
+
+############################################
+# PASSO 2 - O mesmo ganho dentro de create_agent
+############################################
+
+from langchain.agents.middleware import AgentMiddleware, ModelRequest, ModelResponse
+
+
+class FerramentasPreConvertidas(AgentMiddleware):
+    """create_agent chama bind_tools a CADA chamada ao modelo.
+
+    Este middleware entrega as ferramentas já convertidas (dicts, que o
+    factory repassa direto); a execução continua com as BaseTool originais.
+    """
+
+    def __init__(self, cache: CacheFerramentasLigadas = CACHE_LIGADOS):
+        super().__init__()
+        self.cache = cache
+
+    def _converter(self, request: ModelRequest) -> ModelRequest:
+        return request.override(tools=[t if isinstance(t, dict) else self.cache.schema(t) for t in request.tools])
+
+    def wrap_model_call(self, request: ModelRequest, handler) -> ModelResponse:
+        return handler(self._converter(request))
+
+    async def awrap_model_call(self, request: ModelRequest, handler) -> ModelResponse:
+        return await handler(self._converter(request))
+
+
+############################################
+# PASSO 3 - Catálogo de 50 ferramentas
+############################################
+
+from typing import Literal, Optional
+
+from langchain_core.tools import StructuredTool
+from pydantic import Field, create_model
+
+from sample050 import calculate, get_weather, search_web
+
+_DOMINIOS = ["pedido", "cliente", "produto", "fatura", "chamado", "entrega", "estoque", "contrato", "reembolso", "cupom"]
+_ACOES = ["buscar", "criar", "atualizar", "cancelar", "listar"]
+
+
+def criar_catalogo(quantidade: int = 50) -> list[StructuredTool]:
+    """Ferramentas típicas de um agente de atendimento: ids, enums, datas, filtros."""
+    ferramentas = []
+    for i in range(quantidade):
+        dominio, acao = _DOMINIOS[i % len(_DOMINIOS)], _ACOES[i // len(_DOMINIOS) % len(_ACOES)]
+        args = create_model(
+            f"Args_{acao}_{dominio}",
+            **{
+                f"{dominio}_id": (int, Field(description=f"Identificador do {dominio}")),
+                "status": (Optional[Literal["aberto", "em_andamento", "concluido", "cancelado"]], Field(None, description="Filtro de status")),
+                "data_inicial": (Optional[str], Field(None, description="Data inicial (AAAA-MM-DD)")),
+                "data_final": (Optional[str], Field(None, description="Data final (AAAA-MM-DD)")),
+                "limite": (int, Field(20, ge=1, le=100, description="Máximo de itens devolvidos")),
+                "observacao": (Optional[str], Field(None, description="Texto livre para o registro")),
+            },
+        )
+        ferramentas.append(StructuredTool.from_function(
+            func=lambda **kwargs: json.dumps(kwargs, default=str),
+            name=f"{acao}_{dominio}",
+            description=f"{acao.capitalize()} {dominio}s no sistema de atendimento, com filtros opcionais.",
+            args_schema=args,
+        ))
+    return ferramentas
+
+
+def smart_tool_choice(user_input: str):
+    """A mesma lógica do sample032.py."""
+    if "tempo" in user_input.lower() or "weather" in user_input.lower():
+        return {"type": "function", "function": {"name": "get_weather"}}
+    elif any(op in user_input for op in ["+", "-", "*", "/", "="]):
+        return {"type": "function", "function": {"name": "calculate"}}
+    else:
+        return "auto"
+
+
+############################################
+# PASSO 4 - Executando
+############################################
+
+from concurrent.futures import ThreadPoolExecutor
+import time
+
+from langchain.agents import create_agent
+from langchain_openai import ChatOpenAI
+
+from sample033 import ModeloStubLocal, StubConfig, percentil
+
+
+def medir(funcao, repeticoes: int) -> tuple[float, float]:
+    """(média, p99) em microssegundos."""
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append((time.perf_counter() - inicio) * 1e6)
+    return sum(tempos) / len(tempos), percentil(tempos, 99)
+
+
+def main():
+    # bind_tools não faz chamada de rede: a chave é só para instanciar o cliente
+    model = ChatOpenAI(model="gpt-4o-mini", temperature=0, api_key="sk-teste")
+    tools = [get_weather, calculate, search_web]
+    catalogo = criar_catalogo(50)
+    entradas = ["Como está o tempo hoje?", "Quanto é 25 * 4?", "Qual é a capital do Brasil?"]
+
+    print("=" * 70)
+    print("1. O RESULTADO É O MESMO")
+    print("=" * 70)
+    for entrada in entradas:
+        choice = smart_tool_choice(entrada)
+        direto = model.bind_tools(tools, tool_choice=choice)
+        cacheado = CACHE_LIGADOS.ligar(model, tools, tool_choice=choice)
+        iguais = direto.kwargs == cacheado.kwargs
+        rotulo = choice["function"]["name"] if isinstance(choice, dict) else choice
+        print(f"{entrada:<30} tool_choice={rotulo:<12} payload igual ao bind_tools direto: {iguais}")
+    print(f"Mesma entrada de novo devolve o MESMO objeto: "
+          f"{CACHE_LIGADOS.ligar(model, tools, tool_choice='auto') is CACHE_LIGADOS.ligar(model, tools, tool_choice='auto')}")
+
+    print("\n" + "=" * 70)
+    print("2. CUSTO POR PEDIDO (bind_tools a cada entrada, como no sample032.py)")
+    print("=" * 70)
+    escolhas = ["auto", "any", {"type": "function", "function": {"name": "calculate"}}]
+    print(f"{'catálogo':<12} {'modo':<26} {'média':>10} {'p99':>10} {'ganho':>7}")
+    for nome, ferramentas, repeticoes in (("3 tools", tools, 600), ("50 tools", catalogo, 150)):
+        cache = CacheFerramentasLigadas()
+        contador = iter(range(10**9))
+        modos = (
+            ("bind_tools direto", lambda: model.bind_tools(ferramentas, tool_choice=escolhas[next(contador) % 3])),
+            ("schemas em cache", lambda: model.bind_tools([cache.schema(f) for f in ferramentas], tool_choice=escolhas[next(contador) % 3])),
+            ("runnable em cache", lambda: cache.ligar(model, ferramentas, tool_choice=escolhas[next(contador) % 3])),
+        )
+        base = None
+        for modo, funcao in modos:
+            media, p99 = medir(funcao, repeticoes)
+            base = base or media
+            print(f"{nome:<12} {modo:<26} {media:>8.1f}µs {p99:>8.1f}µs {base / media:>6.0f}x")
+
+    print("\n" + "=" * 70)
+    print("3. CONCORRÊNCIA: 8 THREADS, 12 COMBINAÇÕES DE (ferramentas, tool_choice)")
+    print("=" * 70)
+    cache = CacheFerramentasLigadas()
+    conjuntos = [catalogo, catalogo[:10], tools, tools[:1]]
+    combinacoes = [(c, e) for c in conjuntos for e in escolhas]
+
+    def trabalhador(indice: int):
+        ferramentas, escolha = combinacoes[indice % len(combinacoes)]
+        return indice % len(combinacoes), cache.ligar(model, ferramentas, tool_choice=escolha)
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        resultados = list(executor.map(trabalhador, range(4_000)))
+    tempo = time.perf_counter() - inicio
+    por_combinacao = {}
+    for indice, runnable in resultados:
+        por_combinacao.setdefault(indice, set()).add(id(runnable))
+    unicos = all(len(ids) == 1 for ids in por_combinacao.values())
+    print(f"4000 pedidos em {tempo * 1000:.0f}ms | um único runnable por combinação: {unicos}")
+    print(f"Estatísticas: {cache.estatisticas()}")
+    if cache.estatisticas()["ligacoes"] > len(combinacoes):
+        print(f"(ligacoes > {len(combinacoes)}: threads ligaram a mesma combinação ao mesmo tempo; só uma versão ficou)")
+
+    print("\n" + "=" * 70)
+    print("4. DENTRO DE create_agent (bind_tools a cada chamada ao modelo)")
+    print("=" * 70)
+    config = StubConfig(latencia_ms=0, jitter_ms=0, seed=42)
+    pergunta = {"messages": [{"role": "user", "content": "Qual o status do pedido 42?"}]}
+    for modo, middleware in (("sem cache", []), ("FerramentasPreConvertidas", [FerramentasPreConvertidas()])):
+        agente = create_agent(ModeloStubLocal(config=config), catalogo, middleware=middleware)
+        agente.invoke(pergunta)  # aquecimento
+        media, p99 = medir(lambda: agente.invoke(pergunta), 40)
+        print(f"{modo:<28} {media / 1000:>7.2f}ms por invoke (p99 {p99 / 1000:.2f}ms)")
+
+    print("\n" + "=" * 70)
+    print("OBSERVAÇÕES IMPORTANTES")
+    print("=" * 70)
+    print("""
+1. ONDE ESTÁ O CUSTO:
+   - convert_to_openai_tool gera o JSON Schema de cada ferramenta a partir
+     do Pydantic: é quase todo o custo do bind_tools
+   - Dicts já convertidos passam direto: só o cache dos schemas já elimina
+     a maior parte; o runnable em cache elimina o resto
+
+2. A CHAVE DO CACHE:
+   - Identidade do modelo (model temperature=0 e temperature=1 são
+     objetos diferentes), ids das ferramentas NA ORDEM, tool_choice e
+     kwargs do bind_tools
+   - A entrada guarda referências fortes ao modelo e às ferramentas: os
+     ids da chave não são reaproveitados enquanto ela existir
+   - LRU com `maximo` ligações e `maximo_schemas` ferramentas convertidas,
+     como o CacheSchemas do sample046.py
+
+3. CONCORRÊNCIA:
+   - O lock só protege o dicionário; a conversão roda fora dele
+   - Duas threads podem ligar a mesma combinação ao mesmo tempo, mas só
+     uma versão fica guardada e TODAS recebem essa versão
+   - Runnables ligados são imutáveis: compartilhar entre threads é seguro
+
+4. CUIDADOS:
+   - Mudou a descrição de uma ferramenta em tempo de execução? Chame
+     CACHE_LIGADOS.invalidar(ferramenta)
+   - Ferramentas criadas a cada pedido (closures, StructuredTool novo)
+     nunca acertam o cache: crie-as uma vez e reutilize
+
+5. PRÓXIMOS PASSOS:
+   - Para o loop original com tool_choice, veja sample032.py
+   - Para enviar schemas menores, veja sample050.py
+""")
+
+
+if __name__ == "__main__":
+    main()
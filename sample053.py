@@ -0,0 +1,482 @@
+############################################
+#
+# Exemplo de Executor Concorrente para o Loop
+# Manual de Ferramentas (bind_tools).
+#
+# O loop manual do sample020.py escolhe a
+# ferramenta com uma cadeia de
+# `if tool_name == ...` e executa os
+# tool_calls um de cada vez: três chamadas de
+# 1 segundo custam 3 segundos por volta.
+#
+# Aqui um executor reutilizável resolve as
+# ferramentas por um índice de nomes, executa os
+# tool_calls de cada volta AO MESMO TEMPO (com
+# timeout por ferramenta), devolve as
+# ToolMessages na ordem original, aceita
+# ferramentas síncronas e assíncronas e para
+# o loop depois de um número máximo de voltas.
+#
+############################################
+
+
+############################################
+# PASSO 1 - Resultado, erros e a tabela de despacho
+############################################
+
+from dataclasses import dataclass
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, ToolMessage
+from langchain_core.tools import BaseTool
+
+
+class LimiteDeIteracoes(RuntimeError):
+    """O modelo continuou pedindo ferramentas depois de max_iteracoes voltas."""
+
+    def __init__(self, max_iteracoes: int, mensagens: list[BaseMessage]):
+        super().__init__(f"O loop passou de {max_iteracoes} voltas sem uma resposta final")
+        self.mensagens = mensagens  # o histórico até aqui, para depuração
+
+
+@dataclass
+class ResultadoLoop:
+    mensagens: list[BaseMessage]
+    iteracoes: int = 0  # chamadas ao modelo
+    chamadas: int = 0  # tool_calls executados
+    erros: int = 0  # ToolMessages com status="error" (inclui timeouts)
+    tempo_ferramentas: float = 0.0  # segundos, somando as voltas
+
+    @property
+    def resposta(self) -> str:
+        return self.mensagens[-1].text
+
+
+def indice_de_ferramentas(ferramentas: list[BaseTool]) -> dict[str, BaseTool]:
+    """A tabela de despacho: nome -> ferramenta (no lugar da cadeia de if)."""
+    indice = {}
+    for ferramenta in ferramentas:
+        if ferramenta.name in indice:
+            raise ValueError(f"Duas ferramentas com o nome {ferramenta.name!r}")
+        indice[ferramenta.name] = ferramenta
+    return indice
+
+
+def mensagem_de_erro(tool_call: dict, texto: str) -> ToolMessage:
+    """Erros viram ToolMessage: o modelo lê o problema e decide o que fazer."""
+    return ToolMessage(content=f"Erro: {texto}", tool_call_id=tool_call["id"], name=tool_call["name"], status="error")
+
+
+def _so_assincrona(ferramenta: BaseTool) -> bool:
+    return getattr(ferramenta, "func", None) is None and getattr(ferramenta, "coroutine", None) is not None
+
+
+def _so_sincrona(ferramenta: BaseTool) -> bool:
+    return getattr(ferramenta, "func", None) is not None and getattr(ferramenta, "coroutine", None) is None
+
+
+############################################
+# PASSO 2 - O executor
+############################################
+
+import asyncio
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FuturoExpirado
+import threading
+import time
+
+from sample052 import CACHE_LIGADOS
+
+
+class _Chamada:
+    """Uma tool_call síncrona no pool: o futuro e quando ela saiu da fila."""
+
+    def __init__(self, tool_call: dict, loop: asyncio.AbstractEventLoop | None = None):
+        self.tool_call = tool_call
+        self.inicio: float | None = None
+        self.comecou = threading.Event()
+        self._loop = loop
+        self.acomecou = asyncio.Event() if loop else None
+        self.futuro: Future | None = None
+
+    def marcar_inicio(self):
+        """Roda na thread do pool, antes da ferramenta."""
+        self.inicio = time.monotonic()
+        self.comecou.set()
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self.acomecou.set)
+
+
+class ExecutorFerramentas:
+    """Loop bind_tools -> tool_calls -> ToolMessages, com execução concorrente.
+
+    - invoke(): tool_calls de uma volta rodam em um pool de threads
+    - ainvoke(): tool_calls rodam com asyncio.gather (ferramentas síncronas
+      vão para o MESMO pool de threads, não para o executor padrão do loop)
+
+    Timeout é por ferramenta (timeouts={"nome": segundos}, senão
+    timeout_padrao) e conta a partir do INÍCIO da execução: o tempo na fila
+    atrás de max_concorrencia chamadas não conta. A espera na fila tem o
+    próprio limite (timeout_fila, padrão timeout_padrao). Os dois viram uma
+    ToolMessage de erro.
+
+    A thread de uma ferramenta SÍNCRONA que estourou não pode ser
+    interrompida: continua rodando e ocupando uma thread do pool até
+    terminar (veja `orfas`). Ferramentas assíncronas são canceladas.
+    """
+
+    def __init__(
+        self,
+        model,
+        ferramentas: list[BaseTool],
+        *,
+        tool_choice=None,
+        max_iteracoes: int = 8,
+        timeout_padrao: float = 30.0,
+        timeouts: dict[str, float] | None = None,
+        max_concorrencia: int = 8,
+        timeout_fila: float | None = None,
+    ):
+        self.indice = indice_de_ferramentas(ferramentas)
+        self.model = CACHE_LIGADOS.ligar(model, ferramentas, tool_choice=tool_choice)
+        self.max_iteracoes = max_iteracoes
+        self.timeout_padrao = timeout_padrao
+        self.timeouts = timeouts or {}
+        self.max_concorrencia = max_concorrencia
+        self.timeout_fila = timeout_padrao if timeout_fila is None else timeout_fila
+        self._pool = ThreadPoolExecutor(max_workers=max_concorrencia, thread_name_prefix="ferramenta")
+        self._lock = threading.Lock()
+        self.orfas = 0  # threads de chamadas que estouraram o timeout e ainda rodam
+
+    def timeout(self, nome: str) -> float:
+        return self.timeouts.get(nome, self.timeout_padrao)
+
+    def fechar(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
+
+    # --- uma chamada ---
+
+    def _submeter(self, tool_call: dict, loop: asyncio.AbstractEventLoop | None = None) -> _Chamada:
+        chamada = _Chamada(tool_call, loop)
+
+        def tarefa():
+            chamada.marcar_inicio()
+            return self._executar(tool_call)
+
+        chamada.futuro = self._pool.submit(tarefa)
+        return chamada
+
+    def _abandonar(self, futuro: Future):
+        """A chamada estourou, mas a thread segue rodando: conta até ela terminar."""
+        with self._lock:
+            self.orfas += 1
+
+        def terminou(_):
+            with self._lock:
+                self.orfas -= 1
+
+        futuro.add_done_callback(terminou)
+
+    def _erro_de_fila(self, tool_call: dict) -> ToolMessage:
+        return mensagem_de_erro(tool_call, f"{tool_call['name']} não começou em {self.timeout_fila}s "
+                                           f"(todas as {self.max_concorrencia} threads ocupadas)")
+
+    def _erro_de_timeout(self, tool_call: dict) -> ToolMessage:
+        return mensagem_de_erro(tool_call, f"{tool_call['name']} excedeu {self.timeout(tool_call['name'])}s")
+
+    def _executar(self, tool_call: dict) -> ToolMessage:
+        ferramenta = self.indice.get(tool_call["name"])
+        if ferramenta is None:
+            return mensagem_de_erro(tool_call, f"ferramenta desconhecida; disponíveis: {', '.join(self.indice)}")
+        try:
+            if _so_assincrona(ferramenta):
+                return asyncio.run(ferramenta.ainvoke(tool_call))  # ferramenta async no caminho síncrono
+            return ferramenta.invoke(tool_call)
+        except Exception as e:  # argumentos inválidos, falha da API externa...
+            return mensagem_de_erro(tool_call, f"{type(e).__name__}: {e}")
+
+    async def _aexecutar(self, tool_call: dict, limite: asyncio.Semaphore) -> ToolMessage:
+        ferramenta = self.indice.get(tool_call["name"])
+        if ferramenta is None:
+            return mensagem_de_erro(tool_call, f"ferramenta desconhecida; disponíveis: {', '.join(self.indice)}")
+        async with limite:
+            chamada = None
+            if _so_sincrona(ferramenta):
+                # No pool podem estar threads órfãs: o timeout só começa
+                # quando a chamada sai da fila
+                chamada = self._submeter(tool_call, asyncio.get_running_loop())
+                try:
+                    await asyncio.wait_for(chamada.acomecou.wait(), self.timeout_fila)
+                except asyncio.TimeoutError:
+                    if chamada.futuro.cancel():
+                        return self._erro_de_fila(tool_call)
+                    await chamada.acomecou.wait()  # começou entre o timeout e o cancel
+                execucao = asyncio.wrap_future(chamada.futuro)
+            else:
+                execucao = ferramenta.ainvoke(tool_call)
+            try:
+                return await asyncio.wait_for(execucao, self.timeout(tool_call["name"]))
+            except asyncio.TimeoutError:
+                if chamada is not None:
+                    self._abandonar(chamada.futuro)
+                return self._erro_de_timeout(tool_call)
+            except Exception as e:
+                return mensagem_de_erro(tool_call, f"{type(e).__name__}: {e}")
+
+    # --- todas as chamadas de uma volta, na ordem original ---
+
+    def executar_chamadas(self, tool_calls: list[dict]) -> list[ToolMessage]:
+        chamadas = [self._submeter(tool_call) for tool_call in tool_calls]
+        limite_fila = time.monotonic() + self.timeout_fila
+        return [self._aguardar(chamada, limite_fila) for chamada in chamadas]
+
+    def _aguardar(self, chamada: _Chamada, limite_fila: float) -> ToolMessage:
+        tool_call = chamada.tool_call
+        if not chamada.comecou.wait(max(limite_fila - time.monotonic(), 0)):
+            if chamada.futuro.cancel():  # ainda na fila: nem começa
+                return self._erro_de_fila(tool_call)
+            chamada.comecou.wait()  # começou entre o wait e o cancel
+        # O timeout conta do início da execução, não da entrada na fila
+        restante = chamada.inicio + self.timeout(tool_call["name"]) - time.monotonic()
+        try:
+            return chamada.futuro.result(timeout=max(restante, 0))
+        except FuturoExpirado:
+            self._abandonar(chamada.futuro)
+            return self._erro_de_timeout(tool_call)
+
+    async def aexecutar_chamadas(self, tool_calls: list[dict]) -> list[ToolMessage]:
+        limite = asyncio.Semaphore(self.max_concorrencia)
+        return list(await asyncio.gather(*(self._aexecutar(tc, limite) for tc in tool_calls)))
+
+    # --- o loop ---
+
+    @staticmethod
+    def _mensagens(entrada) -> list[BaseMessage]:
+        return [HumanMessage(content=entrada)] if isinstance(entrada, str) else list(entrada)
+
+    def _registrar(self, resultado: ResultadoLoop, respostas: list[ToolMessage], inicio: float):
+        resultado.mensagens.extend(respostas)
+        resultado.chamadas += len(respostas)
+        resultado.erros += sum(m.status == "error" for m in respostas)
+        resultado.tempo_ferramentas += time.perf_counter() - inicio
+
+    def invoke(self, entrada) -> ResultadoLoop:
+        resultado = ResultadoLoop(self._mensagens(entrada))
+        while True:
+            resposta: AIMessage = self.model.invoke(resultado.mensagens)
+            resultado.mensagens.append(resposta)
+            resultado.iteracoes += 1
+            if not resposta.tool_calls:
+                return resultado
+            if resultado.iteracoes >= self.max_iteracoes:
+                raise LimiteDeIteracoes(self.max_iteracoes, resultado.mensagens)
+            inicio = time.perf_counter()
+            self._registrar(resultado, self.executar_chamadas(resposta.tool_calls), inicio)
+
+    async def ainvoke(self, entrada) -> ResultadoLoop:
+        resultado = ResultadoLoop(self._mensagens(entrada))
+        while True:
+            resposta: AIMessage = await self.model.ainvoke(resultado.mensagens)
+            resultado.mensagens.append(resposta)
+            resultado.iteracoes += 1
+            if not resposta.tool_calls:
+                return resultado
+            if resultado.iteracoes >= self.max_iteracoes:
+                raise LimiteDeIteracoes(self.max_iteracoes, resultado.mensagens)
+            inicio = time.perf_counter()
+            self._registrar(resultado, await self.aexecutar_chamadas(resposta.tool_calls), inicio)
+
+
+############################################
+# PASSO 3 - Ferramentas lentas, síncronas e assíncronas
+############################################
+
+from langchain.tools import tool
+
+from sample051 import CLIMA
+
+
+@tool
+def get_weather(city: str) -> str:
+    """Retorna o tempo atual de uma cidade."""
+    time.sleep(0.4)  # API de clima
+    return CLIMA.get(city, f"Dados não disponíveis para {city}")
+
+
+@tool
+async def buscar_cotacao(moeda: str) -> str:
+    """Busca a cotação atual de uma moeda."""
+    await asyncio.sleep(0.5)  # cliente HTTP assíncrono
+    return f"1 {moeda} = R$ 5,43"
+
+
+@tool
+def consultar_estoque(produto_id: int) -> str:
+    """Consulta o estoque de um produto no ERP."""
+    time.sleep(0.3)
+    return f"Produto {produto_id}: 17 unidades"
+
+
+@tool
+def gerar_relatorio(periodo: str) -> str:
+    """Gera o relatório de vendas de um período (pode demorar minutos)."""
+    time.sleep(2.5)
+    return f"Relatório de {periodo}: [...]"
+
+
+FERRAMENTAS = [get_weather, buscar_cotacao, consultar_estoque, gerar_relatorio]
+
+
+def loop_sequencial(model_ligado, pergunta: str) -> list[BaseMessage]:
+    """O loop do sample020.py: cadeia de if, uma chamada de cada vez."""
+    messages = [HumanMessage(content=pergunta)]
+    while True:
+        response = model_ligado.invoke(messages)
+        messages.append(response)
+        if not response.tool_calls:
+            return messages
+        for tool_call in response.tool_calls:
+            tool_name = tool_call["name"]
+            if tool_name == "get_weather":
+                tool_result = get_weather.invoke(tool_call["args"])
+            elif tool_name == "buscar_cotacao":
+                tool_result = asyncio.run(buscar_cotacao.ainvoke(tool_call["args"]))
+            elif tool_name == "consultar_estoque":
+                tool_result = consultar_estoque.invoke(tool_call["args"])
+            elif tool_name == "gerar_relatorio":
+                tool_result = gerar_relatorio.invoke(tool_call["args"])
+            else:
+                tool_result = "Tool desconhecida"
+            messages.append(ToolMessage(content=tool_result, tool_call_id=tool_call["id"]))
+
+
+############################################
+# PASSO 4 - Executando
+############################################
+
+from sample033 import ModeloStubLocal, StubConfig
+
+
+def main():
+    model = ModeloStubLocal(config=StubConfig(latencia_ms=100, jitter_ms=0, seed=42))
+    pergunta = "Como está o tempo em Curitiba, qual a cotação do dólar e o estoque do produto 42?"
+
+    print("=" * 70)
+    print("1. UMA VOLTA COM 3 tool_calls: SEQUENCIAL vs CONCORRENTE")
+    print("=" * 70)
+    inicio = time.perf_counter()
+    mensagens = loop_sequencial(model.bind_tools(FERRAMENTAS), pergunta)
+    sequencial = time.perf_counter() - inicio
+    chamadas = [m for m in mensagens if isinstance(m, ToolMessage)]
+    print(f"{'cadeia de if (sample020)':<28} {sequencial:>5.2f}s  ({len(chamadas)} ferramentas, uma por vez)")
+
+    with ExecutorFerramentas(model, FERRAMENTAS) as executor:
+        inicio = time.perf_counter()
+        resultado = executor.invoke(pergunta)
+        print(f"{'ExecutorFerramentas.invoke':<28} {time.perf_counter() - inicio:>5.2f}s  "
+              f"(ferramentas: {resultado.tempo_ferramentas:.2f}s)")
+        inicio = time.perf_counter()
+        resultado = asyncio.run(executor.ainvoke(pergunta))
+        print(f"{'ExecutorFerramentas.ainvoke':<28} {time.perf_counter() - inicio:>5.2f}s  "
+              f"(ferramentas: {resultado.tempo_ferramentas:.2f}s)")
+    print("\nToolMessages, na ordem dos tool_calls:")
+    pedidos = [tc["name"] for m in resultado.mensagens if isinstance(m, AIMessage) for tc in m.tool_calls]
+    for nome, mensagem in zip(pedidos, (m for m in resultado.mensagens if isinstance(m, ToolMessage))):
+        print(f"  {nome:<18} -> {mensagem.content}")
+
+    print("\n" + "=" * 70)
+    print("2. TIMEOUT POR FERRAMENTA (gerar_relatorio: 1s)")
+    print("=" * 70)
+    pergunta_lenta = "Gere o relatório de vendas de março e diga o tempo em Curitiba"
+    with ExecutorFerramentas(model, FERRAMENTAS, timeouts={"gerar_relatorio": 1.0}) as executor:
+        for nome, chamar in (("invoke", executor.invoke), ("ainvoke", lambda p: asyncio.run(executor.ainvoke(p)))):
+            inicio = time.perf_counter()
+            resultado = chamar(pergunta_lenta)
+            tempo = time.perf_counter() - inicio
+            respostas = [m for m in resultado.mensagens if isinstance(m, ToolMessage)]
+            print(f"{nome:<8} {tempo:.2f}s | " + " | ".join(f"{m.name}: {m.content[:40]}" for m in respostas))
+            print(f"         threads órfãs ainda rodando: {executor.orfas}")
+
+    # 4 chamadas de 0.3s com 2 threads: as duas últimas esperam 0.3s na fila
+    # e ainda cabem no timeout de 0.5s, que só conta depois que começam
+    estoque = [{"name": "consultar_estoque", "args": {"produto_id": i}, "id": f"call_{i}", "type": "tool_call"}
+               for i in range(4)]
+    with ExecutorFerramentas(model, FERRAMENTAS, timeouts={"consultar_estoque": 0.5}, max_concorrencia=2) as executor:
+        inicio = time.perf_counter()
+        mensagens = executor.executar_chamadas(estoque)
+        ok = sum(m.status == "success" for m in mensagens)
+        print(f"fila     {time.perf_counter() - inicio:.2f}s | 4 x consultar_estoque (0.3s), 2 threads, "
+              f"timeout 0.5s: {ok}/4 ok")
+
+    print("\n" + "=" * 70)
+    print("3. FERRAMENTA DESCONHECIDA E ARGUMENTOS INVÁLIDOS")
+    print("=" * 70)
+    with ExecutorFerramentas(model, FERRAMENTAS) as executor:
+        chamadas = [
+            {"name": "apagar_tudo", "args": {}, "id": "call_1", "type": "tool_call"},
+            {"name": "consultar_estoque", "args": {"produto_id": "quarenta e dois"}, "id": "call_2", "type": "tool_call"},
+            {"name": "consultar_estoque", "args": {"produto_id": 42}, "id": "call_3", "type": "tool_call"},
+        ]
+        for mensagem in executor.executar_chamadas(chamadas):
+            print(f"  {mensagem.tool_call_id} [{mensagem.status:<7}] {mensagem.content.splitlines()[0][:80]}")
+
+    print("\n" + "=" * 70)
+    print("4. LIMITE DE VOLTAS (tool_choice='required' nunca deixa o modelo parar)")
+    print("=" * 70)
+    with ExecutorFerramentas(model, FERRAMENTAS, tool_choice="required", max_iteracoes=3) as executor:
+        try:
+            executor.invoke("Qual a cotação do euro?")
+        except LimiteDeIteracoes as e:
+            print(f"LimiteDeIteracoes: {e}")
+            print(f"Histórico preservado: {len(e.mensagens)} mensagens")
+
+    print("\n" + "=" * 70)
+    print("OBSERVAÇÕES IMPORTANTES")
+    print("=" * 70)
+    print("""
+1. O QUE MUDA EM RELAÇÃO AO sample020.py:
+   - Índice de nomes (dict) no lugar da cadeia de if: nome desconhecido
+     vira uma ToolMessage de erro com a lista das ferramentas disponíveis
+   - Os tool_calls de uma volta rodam juntos: a volta custa a ferramenta
+     MAIS LENTA, não a SOMA de todas
+   - As ToolMessages entram na ordem dos tool_calls, não na ordem em que
+     terminaram
+
+2. SÍNCRONAS E ASSÍNCRONAS:
+   - invoke(): pool de threads; ferramentas só async rodam com asyncio.run
+     dentro da thread
+   - ainvoke(): asyncio.gather; ferramentas síncronas vão para o pool do
+     executor (o asyncio.run não fica esperando uma que estourou o timeout)
+   - max_concorrencia limita quantas ferramentas rodam ao mesmo tempo
+
+3. TIMEOUTS E ERROS:
+   - Timeout por ferramenta (timeouts={"nome": s}, senão timeout_padrao),
+     contado a partir do início da execução: esperar na fila atrás de
+     max_concorrencia chamadas não consome o timeout
+   - A espera na fila tem limite próprio (timeout_fila)
+   - Estourou, falhou ou recebeu argumento inválido: ToolMessage com
+     status="error" e o modelo decide (tentar de novo, explicar ao usuário)
+   - Threads não podem ser interrompidas: uma ferramenta síncrona que
+     estoura CONTINUA RODANDO e ocupa uma thread do pool até terminar
+     (executor.orfas conta quantas); várias travadas esgotam o pool e as
+     chamadas seguintes estouram timeout_fila. Prefira timeouts no próprio
+     cliente HTTP da ferramenta
+
+4. CUIDADOS:
+   - Só paralelize ferramentas independentes: duas escritas no mesmo
+     registro na mesma volta correm uma contra a outra
+   - max_iteracoes protege contra loops (tool_choice="required", modelo
+     repetindo a mesma chamada); o histórico vem na exceção
+
+5. PRÓXIMOS PASSOS:
+   - Para o loop manual original, veja sample020.py
+   - Para o bind_tools em cache usado aqui, veja sample052.py
+""")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,503 @@
+############################################
+#
+# Exemplo de Envio de Mídia Grande em Base64
+# por Streaming (mmap + blocos).
+#
+# load_image_as_base64, load_audio_as_base64 e
+# load_video_as_base64 (sample022.py,
+# sample023.py) leem o arquivo inteiro, criam
+# uma segunda cópia em base64 (4/3 do tamanho),
+# uma terceira dentro da data URL e o cliente
+# HTTP ainda serializa o JSON inteiro: para um
+# vídeo de 1 GB, vários GB de pico de memória.
+#
+# Aqui o corpo da requisição é gerado sob
+# demanda: o arquivo é lido por uma visão
+# mapeada em memória (mmap) e codificado em
+# blocos direto no corpo HTTP, com
+# Content-Length calculado antes. O benchmark
+# mostra o pico de RSS constante, seja qual for
+# o tamanho do arquivo.
+#
+############################################
+
+
+############################################
+# PASSO 1 - Base64 em blocos sobre um mmap
+############################################
+
+import base64
+import mmap
+import os
+from typing import Iterator
+
+# Múltiplo de 3 (cada bloco vira base64 sem "=" no meio) e do tamanho de página
+BLOCO = 3 * 1024 * 1024
+_MADVISE = hasattr(mmap.mmap, "madvise")
+
+
+def tamanho_base64(tamanho: int) -> int:
+    return 4 * ((tamanho + 2) // 3)
+
+
+def base64_em_blocos(caminho: str, bloco: int = BLOCO) -> Iterator[bytes]:
+    """Gera o base64 do arquivo em pedaços de ~4 MB, sem ler o arquivo inteiro.
+
+    As páginas já codificadas são devolvidas ao sistema (MADV_DONTNEED):
+    continuam no cache de disco do SO, mas não contam no RSS do processo.
+    """
+    if bloco % 3:
+        raise ValueError("bloco precisa ser múltiplo de 3")
+    with open(caminho, "rb") as arquivo:
+        tamanho = os.fstat(arquivo.fileno()).st_size
+        if tamanho == 0:
+            return  # mmap não aceita arquivo vazio
+        with mmap.mmap(arquivo.fileno(), 0, access=mmap.ACCESS_READ) as mapa:
+            if _MADVISE:
+                mapa.madvise(mmap.MADV_SEQUENTIAL)
+            visao = memoryview(mapa)
+            liberado = 0  # madvise exige início alinhado à página
+            try:
+                for inicio in range(0, tamanho, bloco):
+                    yield base64.b64encode(visao[inicio:inicio + bloco])
+                    if _MADVISE:
+                        # Só páginas inteiras já lidas: a página parcial do fim
+                        # do bloco ainda vai ser lida pelo próximo
+                        fim = min(inicio + bloco, tamanho)
+                        if fim < tamanho:
+                            fim -= fim % mmap.PAGESIZE
+                        if fim > liberado:
+                            mapa.madvise(mmap.MADV_DONTNEED, liberado, fim - liberado)
+                            liberado = fim
+            finally:
+                visao.release()  # o mmap só fecha sem visões abertas
+
+
+############################################
+# PASSO 2 - O corpo JSON gerado sob demanda
+############################################
+
+from dataclasses import dataclass
+import json
+import mimetypes
+import uuid
+
+
+@dataclass(frozen=True, slots=True)
+class ArquivoMidia:
+    """Marca, dentro do payload, onde entra o base64 de um arquivo.
+
+    data_url=True gera "data:<mime>;base64,..." (image_url, file_data);
+    False gera só o base64 (input_audio.data).
+    """
+
+    caminho: str
+    mime: str | None = None
+    data_url: bool = True
+
+    @property
+    def prefixo(self) -> bytes:
+        if not self.data_url:
+            return b""
+        mime = self.mime or mimetypes.guess_type(self.caminho)[0] or "application/octet-stream"
+        return f"data:{mime};base64,".encode()
+
+    def __len__(self) -> int:
+        return len(self.prefixo) + tamanho_base64(os.path.getsize(self.caminho))
+
+    def __iter__(self) -> Iterator[bytes]:
+        yield self.prefixo
+        yield from base64_em_blocos(self.caminho)
+
+
+class CorpoStreaming:
+    """Corpo de /chat/completions com as mídias codificadas só na hora do envio.
+
+    Pode ser iterado mais de uma vez (retries do cliente HTTP refazem a
+    leitura) e sabe o próprio tamanho, então vai com Content-Length, sem
+    chunked encoding. Também se comporta como arquivo (read/seek/tell):
+    o SDK da OpenAI só repete uma requisição se conseguir voltar o corpo
+    ao início.
+    """
+
+    def __init__(self, payload: dict):
+        marcas = {}
+
+        def marcar(objeto):
+            if not isinstance(objeto, ArquivoMidia):
+                raise TypeError(f"Objeto não serializável: {objeto!r}")
+            marca = f"@@midia-{uuid.uuid4().hex}@@"
+            marcas[marca] = objeto
+            return marca
+
+        texto = json.dumps(payload, ensure_ascii=False, default=marcar).encode()
+        self.partes: list[bytes | ArquivoMidia] = []
+        for marca, midia in marcas.items():
+            antes, texto = texto.split(marca.encode(), 1)
+            self.partes += [antes, midia]
+        self.partes.append(texto)
+        self.seek(0)
+
+    def __len__(self) -> int:
+        return sum(len(parte) for parte in self.partes)
+
+    def __iter__(self) -> Iterator[bytes]:
+        for parte in self.partes:
+            if isinstance(parte, ArquivoMidia):
+                yield from parte
+            else:
+                yield parte
+
+    def read(self, tamanho: int = -1) -> bytes:
+        """Leitura sequencial; pode devolver menos que `tamanho` (fim de um bloco)."""
+        if tamanho < 0:
+            restante = self._bloco[self._deslocamento:] + b"".join(self._blocos)
+            self._posicao += len(restante)
+            self._bloco, self._deslocamento = b"", 0
+            return restante
+        while self._deslocamento >= len(self._bloco):
+            self._bloco, self._deslocamento = next(self._blocos, None), 0
+            if self._bloco is None:
+                self._bloco = b""
+                return b""
+        dados = self._bloco[self._deslocamento:self._deslocamento + tamanho]
+        self._deslocamento += len(dados)
+        self._posicao += len(dados)
+        return dados
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._posicao
+
+    def seek(self, posicao: int, origem: int = 0) -> int:
+        if (posicao, origem) != (0, 0):
+            raise OSError("CorpoStreaming só volta ao início")
+        self._blocos, self._bloco, self._deslocamento, self._posicao = iter(self), b"", 0, 0
+        return 0
+
+
+############################################
+# PASSO 3 - Enviando (mesmo endpoint do ChatOpenAI)
+############################################
+
+import httpx
+from langchain_core.callbacks import CallbackManager
+from langchain_core.messages import AIMessage, HumanMessage, convert_to_messages
+from langchain_core.outputs import ChatGeneration, LLMResult
+from langchain_core.runnables import RunnableConfig, ensure_config
+from langchain_openai import ChatOpenAI
+from openai.types.chat import ChatCompletion
+
+
+def _para_rastreio(valor):
+    """O conteúdo com cada ArquivoMidia trocado por uma descrição curta.
+
+    É o que os callbacks (tracing, contagem de tokens) recebem: o base64
+    inteiro nunca é montado, nem para eles.
+    """
+    if isinstance(valor, ArquivoMidia):
+        return f"<{os.path.basename(valor.caminho)}: {len(valor):,} bytes em base64>"
+    if isinstance(valor, dict):
+        return {chave: _para_rastreio(item) for chave, item in valor.items()}
+    if isinstance(valor, list):
+        return [_para_rastreio(item) for item in valor]
+    return valor
+
+
+def invocar_com_midia(
+    model: ChatOpenAI,
+    conteudo: list[dict],
+    *,
+    timeout: httpx.Timeout | None = None,
+    config: RunnableConfig | None = None,
+) -> AIMessage:
+    """Uma mensagem do usuário com mídias grandes, sem montar o payload na memória.
+
+    conteudo usa o formato da API (como no sample022.py), com ArquivoMidia
+    no lugar da data URL:
+        [{"type": "text", "text": "Descreva"},
+         {"type": "image_url", "image_url": {"url": ArquivoMidia("foto.jpg")}}]
+
+    O envio passa pelo cliente OpenAI do próprio modelo: mesmo pool HTTP
+    (http_client), base_url, cabeçalhos padrão, autenticação e max_retries.
+    O corpo parte dos parâmetros do modelo (temperature, max_tokens, top_p,
+    stop, model_kwargs...), e os callbacks do modelo e de `config` recebem
+    a chamada, com as mídias resumidas. Fica de fora o que depende do
+    pipeline do invoke: cache, rate_limiter e streaming.
+    """
+    payload = {
+        **model._default_params,
+        "stream": False,  # a resposta é lida inteira
+        "messages": [{"role": "user", "content": conteudo}],
+    }
+    corpo = CorpoStreaming(payload)
+    opcoes = {"headers": {
+        "Content-Type": "application/json",
+        "Content-Length": str(len(corpo)),  # com Content-Length o httpx não usa chunked
+    }}
+    if timeout is not None:
+        opcoes["timeout"] = timeout
+
+    config = ensure_config(config)
+    gerenciador = CallbackManager.configure(
+        config.get("callbacks"), model.callbacks, model.verbose,
+        config.get("tags"), model.tags, config.get("metadata"), model.metadata,
+    )
+    parametros = {chave: valor for chave, valor in payload.items() if chave != "messages"}
+    (execucao,) = gerenciador.on_chat_model_start(
+        model._serialized,
+        [[HumanMessage(content=_para_rastreio(conteudo))]],
+        invocation_params=parametros,
+        name=config.get("run_name"),
+        run_id=config.get("run_id"),
+        batch_size=1,
+    )
+    try:
+        resposta = model.root_client.post("/chat/completions", cast_to=ChatCompletion, content=corpo, options=opcoes)
+    except BaseException as erro:
+        execucao.on_llm_error(erro)
+        raise
+    mensagem = convert_to_messages([resposta.choices[0].message.model_dump(exclude_none=True)])[0]
+    if resposta.usage is not None:
+        mensagem.usage_metadata = {
+            "input_tokens": resposta.usage.prompt_tokens,
+            "output_tokens": resposta.usage.completion_tokens,
+            "total_tokens": resposta.usage.total_tokens,
+        }
+    mensagem.response_metadata = {"model_name": resposta.model, "finish_reason": resposta.choices[0].finish_reason}
+    execucao.on_llm_end(LLMResult(generations=[[ChatGeneration(message=mensagem)]]))
+    return mensagem
+
+
+############################################
+# PASSO 4 - Medindo o pico de memória (Linux)
+############################################
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import threading
+import time
+
+
+def _status(campo: str) -> int:
+    with open("/proc/self/status") as status:
+        for linha in status:
+            if linha.startswith(campo):
+                return int(linha.split()[1]) * 1024
+    raise KeyError(campo)
+
+
+def _zerar_pico() -> bool:
+    try:
+        with open("/proc/self/clear_refs", "w") as clear_refs:
+            clear_refs.write("5")  # zera o VmHWM (pico de RSS) do processo
+        return True
+    except OSError:
+        return False  # fora do Linux, ou /proc montado só para leitura (containers)
+
+
+def _pico_amostrado(funcao, intervalo: float = 0.005) -> int:
+    """Sem VmHWM zerável: amostra o VmRSS em uma thread enquanto funcao roda."""
+    pico, fim = _status("VmRSS:"), threading.Event()
+
+    def amostrar():
+        nonlocal pico
+        while not fim.wait(intervalo):
+            pico = max(pico, _status("VmRSS:"))
+
+    amostrador = threading.Thread(target=amostrar, daemon=True)
+    amostrador.start()
+    try:
+        funcao()
+    finally:
+        fim.set()
+        amostrador.join()
+    return max(pico, _status("VmRSS:"))
+
+
+def medir_pico(funcao) -> tuple[int, float]:
+    """(bytes de RSS acima do que já estava em uso, segundos)."""
+    zerado = _zerar_pico()
+    antes = _status("VmRSS:")
+    inicio = time.perf_counter()
+    if zerado:
+        funcao()
+        pico = _status("VmHWM:")
+    else:
+        pico = _pico_amostrado(funcao)
+    return pico - antes, time.perf_counter() - inicio
+
+
+class _Descarte(BaseHTTPRequestHandler):
+    """Servidor 'API' que lê o corpo em blocos de 1 MB e descarta."""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        restante = int(self.headers["Content-Length"])
+        while restante:
+            restante -= len(self.rfile.read(min(restante, 1 << 20)))
+        dados = json.dumps({"choices": [{"message": {"role": "assistant", "content": "ok"}}]}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(dados)))
+        self.end_headers()
+        self.wfile.write(dados)
+
+
+def load_video_as_base64(video_path: str) -> str:
+    """Como no sample023.py."""
+    with open(video_path, "rb") as video_file:
+        return base64.b64encode(video_file.read()).decode("utf-8")
+
+
+def enviar_tradicional(cliente: httpx.Client, url: str, caminho: str):
+    """O caminho do sample023.py: base64 -> data URL -> JSON inteiro -> POST."""
+    video_base64 = load_video_as_base64(caminho)
+    conteudo = [
+        {"type": "text", "text": "Descreva este vídeo"},
+        {"type": "file", "file": {"file_data": f"data:video/mp4;base64,{video_base64}"}},
+    ]
+    corpo = json.dumps({"model": "gpt-4o-mini", "messages": [{"role": "user", "content": conteudo}]}).encode()
+    cliente.post(url, content=corpo, headers={"Content-Type": "application/json"}).raise_for_status()
+
+
+def enviar_streaming(cliente: httpx.Client, url: str, caminho: str):
+    conteudo = [
+        {"type": "text", "text": "Descreva este vídeo"},
+        {"type": "file", "file": {"file_data": ArquivoMidia(caminho, "video/mp4")}},
+    ]
+    corpo = CorpoStreaming({"model": "gpt-4o-mini", "messages": [{"role": "user", "content": conteudo}]})
+    cliente.post(url, content=corpo, headers={"Content-Type": "application/json", "Content-Length": str(len(corpo))}).raise_for_status()
+
+
+def criar_arquivo(caminho: str, megabytes: int):
+    bloco = os.urandom(1 << 20)
+    with open(caminho, "wb") as arquivo:
+        for _ in range(megabytes):
+            arquivo.write(bloco)
+
+
+############################################
+# PASSO 5 - Executando
+############################################
+
+import shutil
+import tempfile
+
+from sample033 import ServidorStub, StubConfig, criar_modelo_stub
+
+
+def demonstrar(pasta: str):
+    print("=" * 70)
+    print("1. O CORPO GERADO É IDÊNTICO AO JSON MONTADO EM MEMÓRIA")
+    print("=" * 70)
+    caminho = os.path.join(pasta, "foto.jpg")
+    criar_arquivo(caminho, 5)
+    with open(caminho, "rb") as arquivo:
+        esperado = base64.b64encode(arquivo.read()).decode()
+    payload = {"model": "gpt-4o-mini", "messages": [{"role": "user", "content": [
+        {"type": "text", "text": "Descreva a imagem"},
+        {"type": "image_url", "image_url": {"url": ArquivoMidia(caminho)}},
+    ]}]}
+    corpo = CorpoStreaming(payload)
+    gerado = b"".join(corpo)
+    payload["messages"][0]["content"][1]["image_url"]["url"] = f"data:image/jpeg;base64,{esperado}"
+    print(f"Content-Length calculado: {len(corpo):,} bytes | gerado: {len(gerado):,} bytes")
+    print(f"Igual ao json.dumps do payload completo: {gerado == json.dumps(payload, ensure_ascii=False).encode()}")
+
+    # Metade das respostas é HTTP 500: quem tenta de novo é o cliente OpenAI do modelo
+    with ServidorStub(StubConfig(latencia_ms=0, jitter_ms=0, taxa_erro=0.5, seed=3)) as servidor:
+        model = criar_modelo_stub(servidor.base_url, max_retries=5)
+        resposta = invocar_com_midia(model, payload["messages"][0]["content"][:1] + [
+            {"type": "image_url", "image_url": {"url": ArquivoMidia(caminho)}},
+        ])
+        estatisticas = servidor.estatisticas()
+    print(f"Resposta (via cliente do ChatOpenAI): {resposta.content[:60]}...")
+    print(f"Tentativas: {estatisticas['requisicoes']} ({estatisticas['respostas_500']} HTTP 500 refeitos "
+          f"pelo max_retries do modelo, com o corpo gerado de novo)")
+
+    print("\n" + "=" * 70)
+    print("2. PICO DE MEMÓRIA (RSS) POR TAMANHO DE ARQUIVO")
+    print("=" * 70)
+    print(f"Medição: {'VmHWM zerado via /proc/self/clear_refs' if _zerar_pico() else 'VmRSS amostrado a cada 5ms'}")
+    servidor = ThreadingHTTPServer(("127.0.0.1", 0), _Descarte)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{servidor.server_address[1]}/v1/chat/completions"
+    try:
+        with httpx.Client(timeout=httpx.Timeout(60.0, write=None)) as cliente:
+            print(f"{'arquivo':>8} {'modo':<12} {'pico RSS':>10} {'x arquivo':>10} {'tempo':>7}")
+            for megabytes in (16, 64, 256, 1024):
+                caminho = os.path.join(pasta, f"video_{megabytes}.mp4")
+                criar_arquivo(caminho, megabytes)
+                modos = [("streaming", enviar_streaming)]
+                if megabytes <= 256:  # acima disso o caminho tradicional passa de ~2 GB de pico
+                    modos.insert(0, ("tradicional", enviar_tradicional))
+                for modo, enviar in modos:
+                    pico, tempo = medir_pico(lambda: enviar(cliente, url, caminho))
+                    print(f"{megabytes:>6}MB {modo:<12} {pico / 2**20:>8.0f}MB "
+                          f"{pico / (megabytes << 20):>9.2f}x {tempo:>6.2f}s")
+                os.remove(caminho)
+    finally:
+        servidor.shutdown()
+        servidor.server_close()
+
+
+def main():
+    pasta = tempfile.mkdtemp(prefix="midia_")
+    try:
+        demonstrar(pasta)
+    finally:
+        # Até 1 GB de arquivos de teste: removidos mesmo se algo falhar no meio
+        shutil.rmtree(pasta, ignore_errors=True)
+
+    print("\n" + "=" * 70)
+    print("OBSERVAÇÕES IMPORTANTES")
+    print("=" * 70)
+    print("""
+1. DE ONDE VEM O PICO NO CAMINHO TRADICIONAL:
+   - file.read(): 1x o arquivo
+   - b64encode + decode: +1.33x (bytes) +1.33x (str)
+   - f"data:...;base64,{...}": +1.33x
+   - json.dumps + encode do corpo inteiro: +1.33x (ou mais)
+   - Algumas cópias são liberadas no caminho, mas o pico fica em ~5x
+
+2. O QUE O STREAMING FAZ:
+   - mmap: o SO traz as páginas do arquivo sob demanda; MADV_DONTNEED
+     devolve as já codificadas (o RSS não cresce com o arquivo)
+   - base64 em blocos de 3 MB (múltiplo de 3: sem padding no meio)
+   - O JSON em volta é serializado uma vez, com uma marca no lugar de
+     cada mídia; Content-Length = partes fixas + 4 * ceil(n / 3)
+
+3. COMPATIBILIDADE:
+   - O corpo é byte a byte o mesmo JSON que o cliente montaria (seção 1)
+   - invocar_com_midia envia pelo root_client do próprio ChatOpenAI:
+     mesmo http_client (pool), base_url, chave, default_headers e
+     max_retries; devolve uma AIMessage e a conversa segue normal
+   - O corpo parte dos parâmetros do modelo (max_tokens, top_p, stop,
+     model_kwargs...) e os callbacks veem a chamada, com as mídias
+     resumidas; cache, rate_limiter e streaming do invoke ficam de fora
+   - O corpo pode ser iterado de novo: cada retry gera o corpo outra vez
+
+4. CUIDADOS:
+   - O limite de payload do PROVEDOR continua valendo (ex.: 20 MB por
+     imagem); para vídeos longos, use a API de arquivos do provedor
+   - Não altere o arquivo durante o envio (o mmap lê o conteúdo atual;
+     o Content-Length foi calculado antes)
+   - Medição de RSS via /proc: só no Linux; sem permissão para zerar o
+     VmHWM (containers), o pico é amostrado e pode perder picos curtos
+   - No Windows o mmap funciona, mas sem madvise
+   - Qualquer bloco múltiplo de 3 funciona; o madvise só libera páginas
+     inteiras (o início precisa estar alinhado à página)
+
+5. PRÓXIMOS PASSOS:
+   - Para imagens, veja sample022.py; para áudio, vídeo e PDF, sample023.py
+""")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,395 @@
+############################################
+#
+# Exemplo de Cache Endereçado por Conteúdo
+# para Mídia Codificada (imagens, áudio, PDF).
+#
+# No sample022.py e no sample023.py a mesma
+# imagem, áudio ou PDF é lido e codificado em
+# base64 de novo a cada envio, inclusive em
+# várias perguntas seguidas sobre o MESMO
+# arquivo.
+#
+# Aqui um cache endereçado pelo hash do
+# conteúdo (com tamanho + mtime para não
+# recalcular o hash de um arquivo que não
+# mudou) guarda o base64 em disco e mantém os
+# mais usados em uma LRU limitada por bytes na
+# memória. Mídias idênticas repetidas dentro da
+# mesma mensagem (o exemplo de múltiplas
+# imagens) são enviadas uma vez só.
+#
+############################################
+
+
+############################################
+# PASSO 1 - O cache
+############################################
+
+import base64
+from collections import OrderedDict
+from dataclasses import dataclass
+import hashlib
+import mimetypes
+import os
+from pathlib import Path
+import threading
+
+
+@dataclass
+class EstatisticasMidia:
+    acertos_memoria: int = 0
+    acertos_disco: int = 0
+    codificacoes: int = 0
+    hashes: int = 0  # leituras do arquivo (cada uma calcula o hash dos bytes lidos)
+    removidos_memoria: int = 0
+
+    @property
+    def pedidos(self) -> int:
+        return self.acertos_memoria + self.acertos_disco + self.codificacoes
+
+
+class CacheMidia:
+    """base64 de arquivos, endereçado pelo SHA-256 do conteúdo. Thread-safe.
+
+    - caminho -> (tamanho, mtime, hash): arquivo que não mudou não é relido;
+      uma entrada por caminho, LRU com no máximo `maximo_caminhos`
+    - hash -> base64 em disco (pasta/ab/abcdef....b64), sobrevive ao processo
+    - hash -> base64 na memória, LRU com no máximo `maximo_bytes`
+
+    Dois arquivos com o mesmo conteúdo (cópias, nomes diferentes) ocupam uma
+    única entrada.
+    """
+
+    def __init__(self, pasta: str | Path, maximo_bytes: int = 256 * 1024 * 1024, maximo_caminhos: int = 4096):
+        self.pasta = Path(pasta)
+        self.pasta.mkdir(parents=True, exist_ok=True)
+        self.maximo_bytes = maximo_bytes
+        self.maximo_caminhos = maximo_caminhos
+        self._hashes: OrderedDict[str, tuple[tuple, str]] = OrderedDict()
+        self._memoria: OrderedDict[str, str] = OrderedDict()
+        self._bytes_memoria = 0
+        self._lock = threading.Lock()
+        self.estatisticas = EstatisticasMidia()
+
+    # --- endereço ---
+
+    @staticmethod
+    def _chave(caminho: Path) -> tuple:
+        info = caminho.stat()
+        return (str(caminho), info.st_size, info.st_mtime_ns)
+
+    def _hash_lembrado(self, chave: tuple) -> str | None:
+        with self._lock:
+            entrada = self._hashes.get(chave[0])
+            if entrada is None or entrada[0] != chave[1:]:
+                return None  # nunca visto, ou alterado desde então
+            self._hashes.move_to_end(chave[0])
+            return entrada[1]
+
+    def _lembrar_hash(self, chave: tuple, digest: str):
+        with self._lock:
+            # Uma entrada por caminho: a versão alterada substitui a antiga
+            self._hashes[chave[0]] = (chave[1:], digest)
+            self._hashes.move_to_end(chave[0])
+            while len(self._hashes) > self.maximo_caminhos:
+                self._hashes.popitem(last=False)
+            self.estatisticas.hashes += 1
+
+    def hash(self, caminho: str | Path) -> str:
+        caminho = Path(caminho).resolve()
+        chave = self._chave(caminho)
+        digest = self._hash_lembrado(chave)
+        if digest is None:
+            with open(caminho, "rb") as arquivo:
+                digest = hashlib.file_digest(arquivo, "sha256").hexdigest()
+            self._lembrar_hash(chave, digest)
+        return digest
+
+    def _ler(self, caminho: Path, chave: tuple) -> tuple[str, bytes]:
+        """Uma leitura só: o hash e o base64 saem dos MESMOS bytes."""
+        dados = caminho.read_bytes()
+        digest = hashlib.sha256(dados).hexdigest()
+        self._lembrar_hash(chave, digest)
+        return digest, dados
+
+    def _arquivo(self, digest: str) -> Path:
+        return self.pasta / digest[:2] / f"{digest}.b64"
+
+    # --- memória (LRU por bytes) ---
+
+    def _guardar_na_memoria(self, digest: str, codificado: str):
+        if len(codificado) > self.maximo_bytes:
+            return  # maior que a memória inteira: fica só no disco
+        with self._lock:
+            if digest in self._memoria:
+                return
+            self._memoria[digest] = codificado
+            self._bytes_memoria += len(codificado)
+            while self._bytes_memoria > self.maximo_bytes:
+                _, removido = self._memoria.popitem(last=False)
+                self._bytes_memoria -= len(removido)
+                self.estatisticas.removidos_memoria += 1
+
+    # --- API ---
+
+    def base64(self, caminho: str | Path) -> str:
+        caminho = Path(caminho).resolve()
+        chave = self._chave(caminho)
+        digest = self._hash_lembrado(chave)
+        dados = None
+        if digest is None:
+            # Arquivo novo: lê uma vez, calcula o hash e, se for preciso
+            # codificar, reaproveita os mesmos bytes
+            digest, dados = self._ler(caminho, chave)
+        with self._lock:
+            codificado = self._memoria.get(digest)
+            if codificado is not None:
+                self._memoria.move_to_end(digest)
+                self.estatisticas.acertos_memoria += 1
+                return codificado
+
+        arquivo = self._arquivo(digest)
+        if arquivo.exists():
+            codificado = arquivo.read_text("ascii")
+            with self._lock:
+                self.estatisticas.acertos_disco += 1
+        else:
+            if dados is None:
+                # Hash em cache, base64 não (despejado): lê de novo e usa o
+                # hash desses bytes, para o endereço nunca divergir do conteúdo
+                digest, dados = self._ler(caminho, chave)
+                arquivo = self._arquivo(digest)
+            codificado = base64.b64encode(dados).decode("ascii")
+            arquivo.parent.mkdir(exist_ok=True)
+            # Escrita atômica (como o Checkpoint do sample047.py): um processo
+            # lendo ao mesmo tempo nunca vê um arquivo pela metade
+            temporario = arquivo.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            temporario.write_text(codificado, "ascii")
+            os.replace(temporario, arquivo)
+            with self._lock:
+                self.estatisticas.codificacoes += 1
+        self._guardar_na_memoria(digest, codificado)
+        return codificado
+
+    def data_url(self, caminho: str | Path, mime: str | None = None) -> str:
+        mime = mime or mimetypes.guess_type(str(caminho))[0] or "application/octet-stream"
+        return f"data:{mime};base64,{self.base64(caminho)}"
+
+    def bloco(self, caminho: str | Path, mime: str | None = None) -> dict:
+        """Bloco de conteúdo no formato da API, pelo tipo do arquivo."""
+        mime = mime or mimetypes.guess_type(str(caminho))[0] or "application/octet-stream"
+        if mime.startswith("image/"):
+            return {"type": "image_url", "image_url": {"url": self.data_url(caminho, mime)}}
+        if mime in ("audio/mpeg", "audio/wav", "audio/x-wav"):
+            formato = "mp3" if mime == "audio/mpeg" else "wav"
+            return {"type": "input_audio", "input_audio": {"data": self.base64(caminho), "format": formato}}
+        return {"type": "file", "file": {"filename": Path(caminho).name, "file_data": self.data_url(caminho, mime)}}
+
+    def uso(self) -> dict:
+        with self._lock:
+            return {"memoria_bytes": self._bytes_memoria, "memoria_itens": len(self._memoria),
+                    "caminhos": len(self._hashes)}
+
+
+############################################
+# PASSO 2 - Mídia repetida dentro de uma mensagem
+############################################
+
+from langchain_core.messages import HumanMessage
+
+
+def _midia_do_bloco(bloco) -> str | None:
+    """O conteúdo (URL, data URL ou base64) de um bloco de mídia, se for um."""
+    if not isinstance(bloco, dict):
+        return None
+    match bloco.get("type"):
+        case "image_url":
+            url = bloco["image_url"]
+            return url["url"] if isinstance(url, dict) else url
+        case "input_audio":
+            return bloco["input_audio"]["data"]
+        case "file":
+            return bloco["file"].get("file_data") or bloco["file"].get("file_id")
+        case "image" | "audio" | "file" | "media":  # formato padrão do LangChain
+            return bloco.get("url") or bloco.get("data") or bloco.get("base64")
+    return None
+
+
+def deduplicar_conteudo(conteudo: list) -> tuple[list, int]:
+    """Troca repetições de uma mídia por uma referência em texto.
+
+    A comparação é pelo hash do conteúdo do bloco (mesma URL, mesma data
+    URL): a 2ª cópia de uma imagem de 3 MB vira ~10 tokens de texto.
+    Devolve (novo conteúdo, quantos blocos foram removidos).
+    """
+    vistos, novo, removidos, posicao = {}, [], 0, 0
+    for bloco in conteudo:
+        midia = _midia_do_bloco(bloco)
+        if midia is None:
+            novo.append(bloco)
+            continue
+        posicao += 1
+        chave = hashlib.sha256(midia.encode()).digest()
+        if chave in vistos:
+            novo.append({"type": "text", "text": f"[mídia {posicao}: idêntica à mídia {vistos[chave]}]"})
+            removidos += 1
+        else:
+            vistos[chave] = posicao
+            novo.append(bloco)
+    return novo, removidos
+
+
+def mensagem_com_midias(texto: str, caminhos: list[str | Path], cache: CacheMidia) -> HumanMessage:
+    """HumanMessage com texto + mídias do cache, sem repetir conteúdo idêntico."""
+    conteudo, _ = deduplicar_conteudo([{"type": "text", "text": texto}] + [cache.bloco(c) for c in caminhos])
+    return HumanMessage(content=conteudo)
+
+
+############################################
+# PASSO 3 - Executando
+############################################
+
+import json
+import shutil
+import tempfile
+import time
+
+from sample033 import ModeloStubLocal, StubConfig
+
+
+def load_image_as_base64(image_path: str) -> str:
+    """Como no sample022.py: lê e codifica a cada chamada."""
+    with open(image_path, "rb") as image_file:
+        return base64.b64encode(image_file.read()).decode("utf-8")
+
+
+def criar_arquivo(caminho: Path, megabytes: float, semente: int) -> Path:
+    bloco = hashlib.sha256(str(semente).encode()).digest() * 32768  # 1 MB, diferente por semente
+    caminho.write_bytes((bloco * int(megabytes + 1))[: int(megabytes * 2**20)])
+    return caminho
+
+
+def main():
+    with tempfile.TemporaryDirectory(prefix="cache_midia_") as nome:
+        pasta = Path(nome)
+        arquivos = pasta / "arquivos"
+        arquivos.mkdir()
+        relatorio = criar_arquivo(arquivos / "relatorio.pdf", 8, 1)
+        fotos = [criar_arquivo(arquivos / f"foto{i}.jpg", 3, i) for i in range(1, 4)]
+        copia = arquivos / "foto1_copia.jpg"
+        shutil.copy(fotos[0], copia)  # mesmo conteúdo, outro nome
+        model = ModeloStubLocal(config=StubConfig(latencia_ms=0, jitter_ms=0))
+        perguntas = [f"Pergunta {i} sobre o relatório" for i in range(10)]
+
+        print("=" * 70)
+        print("1. 10 PERGUNTAS SOBRE O MESMO PDF (8 MB)")
+        print("=" * 70)
+        inicio = time.perf_counter()
+        for pergunta in perguntas:
+            url = f"data:application/pdf;base64,{load_image_as_base64(relatorio)}"
+            mensagem = HumanMessage(content=[{"type": "text", "text": pergunta}, {"type": "file", "file": {"filename": "relatorio.pdf", "file_data": url}}])
+        sem_cache = (time.perf_counter() - inicio) / len(perguntas)
+
+        cache = CacheMidia(pasta / "cache")
+        tempos = []
+        for pergunta in perguntas:
+            inicio = time.perf_counter()
+            mensagem = HumanMessage(content=[{"type": "text", "text": pergunta}, cache.bloco(relatorio)])
+            tempos.append(time.perf_counter() - inicio)
+        model.invoke([mensagem])  # a mensagem montada pelo cache é uma mensagem normal
+        print(f"Sem cache (ler + codificar sempre): {sem_cache * 1000:>7.2f}ms por pergunta")
+        print(f"Com cache, 1ª pergunta:             {tempos[0] * 1000:>7.2f}ms "
+              f"({cache.estatisticas.hashes} leitura: hash e codificação dos mesmos bytes + disco)")
+        print(f"Com cache, demais (memória):        {sum(tempos[1:]) / len(tempos[1:]) * 1000:>7.3f}ms por pergunta")
+        print(f"Estatísticas: {cache.estatisticas}")
+
+        print("\n" + "=" * 70)
+        print("2. OUTRO PROCESSO (cache novo, mesma pasta) E ARQUIVO ALTERADO")
+        print("=" * 70)
+        novo = CacheMidia(pasta / "cache")
+        inicio = time.perf_counter()
+        novo.base64(relatorio)
+        print(f"Processo novo: {(time.perf_counter() - inicio) * 1000:.2f}ms (só o hash; o base64 vem do disco) "
+              f"-> disco={novo.estatisticas.acertos_disco}, codificações={novo.estatisticas.codificacoes}")
+        inicio = time.perf_counter()
+        novo.base64(relatorio)
+        print(f"Mesmo arquivo de novo: {(time.perf_counter() - inicio) * 1000:.3f}ms (tamanho+mtime iguais: nem hash)")
+        with open(relatorio, "r+b") as arquivo:
+            arquivo.write(b"%PDF-1.7 revisado")
+        antigo = novo.estatisticas.codificacoes
+        novo.base64(relatorio)
+        print(f"Arquivo alterado: codificado de novo = {novo.estatisticas.codificacoes > antigo} "
+              f"| caminhos lembrados: {novo.uso()['caminhos']} (a versão nova substitui a antiga)")
+
+        print("\n" + "=" * 70)
+        print("3. MÚLTIPLAS IMAGENS NA MESMA MENSAGEM (uma delas repetida)")
+        print("=" * 70)
+        caminhos = [fotos[0], fotos[1], copia, fotos[2], fotos[0]]
+        texto = "Compare estas imagens. Quais são as diferenças?"
+        sem_dedup = [{"type": "text", "text": texto}] + [cache.bloco(c) for c in caminhos]
+        mensagem = mensagem_com_midias(texto, caminhos, cache)
+        for nome, conteudo in (("sem deduplicação", sem_dedup), ("deduplicado", mensagem.content)):
+            imagens = sum(1 for b in conteudo if b["type"] == "image_url")
+            print(f"{nome:<18} imagens enviadas: {imagens} | payload: {len(json.dumps(conteudo)) / 2**20:>5.1f} MB")
+        for bloco in mensagem.content:
+            if bloco["type"] == "text":
+                print(f"  texto: {bloco['text']}")
+        print(f"Entradas no cache para as 5 referências: {len({cache.hash(c) for c in caminhos})}")
+
+        print("\n" + "=" * 70)
+        print("4. LRU NA MEMÓRIA LIMITADA POR BYTES (máximo 10 MB)")
+        print("=" * 70)
+        pequeno = CacheMidia(pasta / "cache", maximo_bytes=10 * 2**20)
+        sequencia = [fotos[0], fotos[1], fotos[0], fotos[1], fotos[2], fotos[0], relatorio]
+        for caminho in sequencia:
+            pequeno.base64(caminho)
+        print("Sequência: foto1 foto2 foto1 foto2 foto3 foto1 relatorio (4 MB de base64 cada foto, 11 MB o PDF)")
+        e = pequeno.estatisticas
+        print(f"memória={e.acertos_memoria} disco={e.acertos_disco} codificações={e.codificacoes} "
+              f"removidos da memória={e.removidos_memoria} | uso: {pequeno.uso()}")
+
+    print("\n" + "=" * 70)
+    print("OBSERVAÇÕES IMPORTANTES")
+    print("=" * 70)
+    print("""
+1. A CHAVE:
+   - O endereço é o SHA-256 do CONTEÚDO: cópias com outro nome
+     compartilham a entrada e um arquivo alterado ganha outra
+   - caminho -> (tamanho, mtime, hash) evita reler um arquivo que não
+     mudou; num processo novo, o hash é recalculado uma vez (ler é muito
+     mais barato que codificar e gravar)
+   - Uma entrada por caminho (a versão alterada substitui a antiga) e
+     LRU com maximo_caminhos: um serviço longo não acumula entradas
+   - Arquivo sem hash conhecido é lido UMA vez: hash e base64 saem dos
+     mesmos bytes, então um arquivo alterado durante a leitura nunca
+     fica com o endereço de uma versão e o conteúdo de outra
+
+2. AS DUAS CAMADAS:
+   - Disco: o base64 pronto, gravado de forma atômica; vale entre
+     processos e reinícios
+   - Memória: LRU limitada por BYTES (não por itens): um vídeo não
+     expulsa cem imagens sem necessidade
+
+3. DEDUPLICAÇÃO NA MENSAGEM:
+   - A mesma mídia repetida vira uma referência em texto ("idêntica à
+     mídia 1"): o modelo sabe que era a mesma, e os tokens de imagem não
+     são cobrados duas vezes
+   - Funciona também com URLs (o exemplo de múltiplas imagens do
+     sample022.py) e com o formato padrão de blocos do LangChain
+
+4. CUIDADOS:
+   - O cache guarda conteúdo sensível em disco: use uma pasta com
+     permissões restritas e uma política de limpeza
+   - Para arquivos muito grandes, não traga o base64 para a memória:
+     veja o envio por streaming do sample054.py
+   - mtime com resolução baixa (alguns sistemas de arquivos): alterações
+     no mesmo segundo e com o mesmo tamanho passam despercebidas
+
+5. PRÓXIMOS PASSOS:
+   - Para imagens, veja sample022.py; para áudio e PDF, sample023.py
+   - Para reduzir o tamanho das imagens antes de codificar, sample056.py
+""")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,537 @@
+############################################
+#
+# Exemplo de Pré-processamento de Imagens
+# antes de Enviar para Vision Models.
+#
+# O sample022.py envia a imagem como está: uma
+# foto de celular de 12 MP (vários MB) sobe
+# inteira, em base64, para o provedor reduzir
+# para ~1 MP do lado de lá. Paga-se o upload, a
+# latência e, dependendo do formato, tokens de
+# imagem que não ajudam a resposta. E o EXIF
+# (GPS, modelo do aparelho) vai junto.
+#
+# Aqui cada imagem passa por uma etapa de
+# preparação antes de virar bloco image_url:
+# redução para o que o provedor realmente
+# enxerga (ou um máximo configurável),
+# recodificação (JPEG/WEBP e qualidade),
+# remoção do EXIF e, opcionalmente, ajuste ou
+# divisão nos tiles que o provedor cobra.
+# Mensagens com várias imagens são preparadas em
+# um pool de threads, e um relatório mostra os
+# bytes e os tokens estimados economizados.
+#
+# Requer Pillow: uv pip install pillow
+#
+############################################
+
+
+############################################
+# PASSO 1 - Quanto cada provedor cobra por imagem
+############################################
+
+import math
+
+# Regras publicadas pelos provedores para imagens:
+# - OpenAI (gpt-4o e similares, detail="high"): reduz para caber em
+#   2048x2048, depois para o lado menor ter 768px, e cobra 85 tokens +
+#   170 por tile de 512x512. detail="low": 85 tokens, imagem em 512x512.
+# - Anthropic: reduz para lado maior de 1568px e ~1,15 MP; cobra
+#   largura * altura / 750 tokens.
+PROVEDORES = {
+    "openai": {"limite": 2048, "lado_menor": 768, "tile": 512, "base": 85, "por_tile": 170},
+    "anthropic": {"lado_maior": 1568, "max_pixels": 1_150_000, "pixels_por_token": 750},
+}
+
+
+def _reduzir(largura: int, altura: int, escala: float) -> tuple[int, int]:
+    if escala >= 1:
+        return largura, altura
+    return max(1, round(largura * escala)), max(1, round(altura * escala))
+
+
+def dimensoes_efetivas(largura: int, altura: int, provedor: str = "openai",
+                       detail: str = "high") -> tuple[int, int]:
+    """O tamanho que o provedor realmente analisa (pixels além disso são descartados lá)."""
+    regras = PROVEDORES[provedor]
+    if provedor == "openai":
+        if detail == "low":
+            return _reduzir(largura, altura, 512 / max(largura, altura))
+        largura, altura = _reduzir(largura, altura, regras["limite"] / max(largura, altura))
+        return _reduzir(largura, altura, regras["lado_menor"] / min(largura, altura))
+    escala = min(regras["lado_maior"] / max(largura, altura),
+                 math.sqrt(regras["max_pixels"] / (largura * altura)))
+    return _reduzir(largura, altura, escala)
+
+
+def estimar_tokens(largura: int, altura: int, provedor: str = "openai", detail: str = "high") -> int:
+    regras = PROVEDORES[provedor]
+    if provedor == "openai" and detail == "low":
+        return regras["base"]
+    largura, altura = dimensoes_efetivas(largura, altura, provedor, detail)
+    if provedor == "openai":
+        tiles = math.ceil(largura / regras["tile"]) * math.ceil(altura / regras["tile"])
+        return regras["base"] + regras["por_tile"] * tiles
+    return math.ceil(largura * altura / regras["pixels_por_token"])
+
+
+def alinhar_aos_tiles(largura: int, altura: int, tolerancia: float = 0.2,
+                      tile: int = 512) -> tuple[int, int]:
+    """Reduz um pouco a imagem se isso eliminar tiles quase vazios.
+
+    Ex.: 1229x768 ocupa 3x2 tiles (o 3º com só 205px); em 1024x640 cabe em
+    2x2, ~30% menos tokens, reduzindo 17% de cada lado. Só aceita
+    reduções até `tolerancia`.
+    """
+    melhor, tiles_melhor = (largura, altura), math.ceil(largura / tile) * math.ceil(altura / tile)
+    for lado in (largura, altura):
+        multiplo = (lado // tile) * tile
+        if multiplo == 0 or multiplo == lado:
+            continue
+        escala = multiplo / lado
+        if escala < 1 - tolerancia:
+            continue
+        candidato = (min(largura, math.floor(largura * escala)), min(altura, math.floor(altura * escala)))
+        tiles = math.ceil(candidato[0] / tile) * math.ceil(candidato[1] / tile)
+        if tiles < tiles_melhor:
+            melhor, tiles_melhor = candidato, tiles
+    return melhor
+
+
+############################################
+# PASSO 2 - Preparando uma imagem
+############################################
+
+import base64
+from dataclasses import dataclass, field
+from io import BytesIO
+from pathlib import Path
+import time
+
+MIMES = {"JPEG": "image/jpeg", "WEBP": "image/webp", "PNG": "image/png"}
+ORIENTACAO_EXIF = 0x0112
+
+
+def _pillow():
+    """Importa o Pillow só quando uma imagem é preparada."""
+    try:
+        from PIL import Image, ImageOps
+    except ImportError as erro:
+        raise ImportError(
+            "O pré-processamento de imagens requer o pacote pillow: uv pip install pillow"
+        ) from erro
+    return Image, ImageOps
+
+
+@dataclass(frozen=True)
+class ConfigImagem:
+    provedor: str = "openai"
+    detail: str = "high"
+    max_dimensao: int | None = None   # None: o tamanho que o provedor enxerga
+    formato: str = "JPEG"             # JPEG, WEBP ou PNG
+    qualidade: int = 85
+    remover_exif: bool = True
+    alinhar_tiles: bool = False       # OpenAI: reduz até `tolerancia` para eliminar tiles
+    tolerancia: float = 0.2
+    dividir_tiles: bool = False       # OpenAI: uma imagem detail="low" por tile de 512px
+
+    def __post_init__(self):
+        # Erros de configuração aparecem aqui, e não como KeyError no meio do preparo
+        object.__setattr__(self, "formato", self.formato.upper())
+        if self.formato not in MIMES:
+            raise ValueError(f"formato deve ser um de {sorted(MIMES)}, não {self.formato!r}")
+        if self.provedor not in PROVEDORES:
+            raise ValueError(f"provedor deve ser um de {sorted(PROVEDORES)}, não {self.provedor!r}")
+        if self.detail not in ("low", "high"):
+            raise ValueError(f"detail deve ser 'low' ou 'high', não {self.detail!r}")
+        if not 1 <= self.qualidade <= 100:
+            raise ValueError(f"qualidade deve estar entre 1 e 100, não {self.qualidade}")
+        if self.max_dimensao is not None and self.max_dimensao < 1:
+            raise ValueError(f"max_dimensao deve ser positivo, não {self.max_dimensao}")
+        if not 0 <= self.tolerancia < 1:
+            raise ValueError(f"tolerancia deve estar em [0, 1), não {self.tolerancia}")
+
+
+@dataclass
+class ParteImagem:
+    dados: bytes
+    largura: int
+    altura: int
+    detail: str
+    tokens: int
+    rotulo: str | None = None
+
+
+@dataclass
+class ImagemPreparada:
+    nome: str
+    mime: str
+    partes: list[ParteImagem]
+    bytes_original: int
+    dimensoes_original: tuple[int, int]
+    tokens_original: int
+    exif_removido: bool = False
+    mantida: bool = False  # a recodificação não ajudou: enviada como veio
+    tempo: float = field(default=0.0, repr=False)
+
+    @property
+    def bytes_final(self) -> int:
+        return sum(len(p.dados) for p in self.partes)
+
+    @property
+    def tokens_final(self) -> int:
+        return sum(p.tokens for p in self.partes)
+
+    def blocos(self) -> list[dict]:
+        """Blocos image_url (e rótulos dos tiles) prontos para o content."""
+        blocos = []
+        for parte in self.partes:
+            if parte.rotulo:
+                blocos.append({"type": "text", "text": parte.rotulo})
+            url = f"data:{self.mime};base64,{base64.b64encode(parte.dados).decode('ascii')}"
+            blocos.append({"type": "image_url", "image_url": {"url": url, "detail": parte.detail}})
+        return blocos
+
+
+def _codificar(imagem, config: ConfigImagem, exif=None) -> bytes:
+    opcoes = {"optimize": True}
+    if config.formato in ("JPEG", "WEBP"):
+        opcoes["quality"] = config.qualidade
+    if config.formato == "JPEG":
+        opcoes["progressive"] = True
+    if exif is not None:
+        opcoes["exif"] = exif
+    saida = BytesIO()
+    imagem.save(saida, format=config.formato, **opcoes)
+    return saida.getvalue()
+
+
+def preparar_imagem(origem: str | Path | bytes, config: ConfigImagem = ConfigImagem()) -> ImagemPreparada:
+    """Reduz, recodifica e limpa uma imagem (caminho ou bytes)."""
+    Image, ImageOps = _pillow()
+    inicio = time.perf_counter()
+    dados = origem if isinstance(origem, bytes) else Path(origem).read_bytes()
+    nome = "imagem" if isinstance(origem, bytes) else Path(origem).name
+
+    with Image.open(BytesIO(dados)) as imagem:
+        formato_original = imagem.format
+        exif = imagem.getexif()
+        largura, altura = imagem.size
+        if exif.get(ORIENTACAO_EXIF, 1) in (5, 6, 7, 8):  # foto "deitada" no arquivo
+            largura, altura = altura, largura
+        tokens_original = estimar_tokens(largura, altura, config.provedor, config.detail)
+
+        alvo = dimensoes_efetivas(largura, altura, config.provedor, config.detail)
+        if config.max_dimensao:
+            alvo = _reduzir(*alvo, config.max_dimensao / max(alvo))
+        if config.alinhar_tiles and config.provedor == "openai" and config.detail == "high":
+            alvo = alinhar_aos_tiles(*alvo, config.tolerancia)
+
+        # JPEG: o decodificador já reduz por 1/2, 1/4 ou 1/8 (nunca abaixo do
+        # alvo), em vez de descomprimir os 12 MP para depois jogar fora
+        imagem.draft(imagem.mode, (max(alvo), max(alvo)))
+        imagem = ImageOps.exif_transpose(imagem)  # aplica a rotação antes de perder o EXIF
+
+        if config.formato == "JPEG" and (imagem.mode in ("RGBA", "LA") or "transparency" in imagem.info):
+            fundo = Image.new("RGB", imagem.size, "white")
+            fundo.paste(imagem.convert("RGBA"), mask=imagem.convert("RGBA").getchannel("A"))
+            imagem = fundo
+        elif imagem.mode not in ("RGB", "RGBA", "L"):
+            imagem = imagem.convert("RGBA" if "transparency" in imagem.info else "RGB")
+        if imagem.size != alvo:
+            imagem = imagem.resize(alvo, Image.Resampling.LANCZOS, reducing_gap=3.0)
+
+        exif_mantido = None
+        if not config.remover_exif and exif:
+            exif[ORIENTACAO_EXIF] = 1  # os pixels já estão na orientação certa
+            exif_mantido = exif
+
+        if config.dividir_tiles and config.provedor == "openai":
+            tile, partes = PROVEDORES["openai"]["tile"], []
+            for topo in range(0, imagem.height, tile):
+                for esquerda in range(0, imagem.width, tile):
+                    recorte = imagem.crop((esquerda, topo, min(esquerda + tile, imagem.width),
+                                           min(topo + tile, imagem.height)))
+                    rotulo = f"[{nome}: parte linha {topo // tile + 1}, coluna {esquerda // tile + 1}]"
+                    partes.append(ParteImagem(_codificar(recorte, config, exif_mantido), *recorte.size, "low",
+                                              PROVEDORES["openai"]["base"], rotulo))
+        else:
+            partes = [ParteImagem(_codificar(imagem, config, exif_mantido), *imagem.size, config.detail,
+                                  estimar_tokens(*imagem.size, config.provedor, config.detail))]
+        mime = MIMES[config.formato]
+        # Capturas de tela e diagramas (poucas cores) costumam ficar menores em PNG
+        if formato_original == "PNG" and config.formato != "PNG" and len(partes) == 1:
+            png = _codificar(imagem, ConfigImagem(formato="PNG"), exif_mantido)
+            if len(png) < len(partes[0].dados):
+                partes[0].dados, mime = png, MIMES["PNG"]
+
+    preparada = ImagemPreparada(nome, mime, partes, len(dados), (largura, altura),
+                                tokens_original, exif_removido=config.remover_exif and bool(exif))
+    # Imagem pequena e já sem EXIF: recodificar só pode piorar
+    if (len(partes) == 1 and partes[0].largura * partes[0].altura == largura * altura
+            and len(partes[0].dados) >= len(dados) and not preparada.exif_removido
+            and formato_original in MIMES):
+        preparada.mime = MIMES[formato_original]
+        preparada.partes = [ParteImagem(dados, largura, altura, config.detail, tokens_original)]
+        preparada.mantida = True
+    preparada.tempo = time.perf_counter() - inicio
+    return preparada
+
+
+############################################
+# PASSO 3 - Várias imagens em paralelo
+############################################
+
+from concurrent.futures import ThreadPoolExecutor
+import os
+
+from langchain_core.messages import HumanMessage
+
+
+class PreparadorImagens:
+    """Prepara as imagens de uma mensagem em um pool de threads.
+
+    Decodificar, redimensionar e codificar no Pillow liberam o GIL: com
+    vários núcleos, as imagens de uma mensagem são preparadas ao mesmo tempo.
+    Com um núcleo só, as threads só disputariam a CPU: roda em sequência.
+    """
+
+    def __init__(self, config: ConfigImagem = ConfigImagem(), max_workers: int = 4):
+        self.config = config
+        self.max_workers = max_workers
+
+    def workers(self, quantidade: int) -> int:
+        """Threads usadas para `quantidade` imagens (1 = em sequência)."""
+        return max(1, min(self.max_workers, quantidade, os.cpu_count() or 1))
+
+    def preparar(self, origens: list) -> list[ImagemPreparada]:
+        workers = self.workers(len(origens))
+        if workers == 1:
+            return [preparar_imagem(origem, self.config) for origem in origens]
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(lambda origem: preparar_imagem(origem, self.config), origens))
+
+    def mensagem(self, texto: str, origens: list) -> tuple[HumanMessage, list[ImagemPreparada]]:
+        preparadas = self.preparar(origens)
+        conteudo = [{"type": "text", "text": texto}]
+        for preparada in preparadas:
+            conteudo.extend(preparada.blocos())
+        return HumanMessage(content=conteudo), preparadas
+
+
+def relatorio(preparadas: list[ImagemPreparada]) -> str:
+    linhas = [f"{'imagem':<20} {'original':>18} {'KB':>7} {'->':^2} {'final':>14} {'KB':>6} "
+              f"{'tokens':>13} {'EXIF':>5}"]
+    for p in preparadas:
+        final = f"{p.partes[0].largura}x{p.partes[0].altura}" + (f" x{len(p.partes)}" if len(p.partes) > 1 else "")
+        linhas.append(
+            f"{p.nome:<20} {'%dx%d' % p.dimensoes_original:>18} {p.bytes_original / 1024:>7.0f} -> "
+            f"{final:>14} {p.bytes_final / 1024:>6.0f} {p.tokens_original:>6}->{p.tokens_final:<6} "
+            f"{'fora' if p.exif_removido else '-':>5}"
+        )
+    antes = sum(p.bytes_original for p in preparadas)
+    depois = sum(p.bytes_final for p in preparadas)
+    tokens_antes = sum(p.tokens_original for p in preparadas)
+    tokens_depois = sum(p.tokens_final for p in preparadas)
+    linhas.append(
+        f"TOTAL: {antes / 2**20:.1f} MB -> {depois / 2**20:.2f} MB ({1 - depois / antes:.0%} menos bytes; "
+        f"base64 enviado: {4 * depois / 3 / 2**20:.2f} MB) | tokens {tokens_antes} -> {tokens_depois} "
+        f"({1 - tokens_depois / tokens_antes:.0%} menos)"
+    )
+    return "\n".join(linhas)
+
+
+############################################
+# PASSO 4 - Executando
+############################################
+
+import tempfile
+
+from sample033 import ModeloStubLocal, StubConfig
+
+
+def criar_imagens(pasta: Path) -> list[Path]:
+    """Imagens sintéticas com o tamanho e o formato de casos reais."""
+    from PIL import Image, ImageDraw, ImageFilter
+
+    def foto(largura, altura, semente):
+        # Textura suave + ruído fino: comprime como uma foto, não como ruído puro
+        canais = [Image.effect_noise((largura // 16, altura // 16), 60 + semente * 10)
+                  .resize((largura, altura), Image.Resampling.BICUBIC) for _ in range(3)]
+        imagem = Image.merge("RGB", canais)
+        ruido = Image.effect_noise((largura, altura), 12).convert("RGB")
+        return Image.blend(imagem, ruido, 0.15).filter(ImageFilter.SMOOTH)
+
+    caminhos = []
+
+    # Foto de celular: 12 MP, JPEG qualidade 95, gravada "deitada" com
+    # orientação 6 no EXIF, modelo do aparelho e GPS
+    celular = foto(4032, 3024, 1)
+    exif = Image.Exif()
+    exif[ORIENTACAO_EXIF] = 6
+    exif[0x010F], exif[0x0110] = "Fabricante", "Celular X"
+    exif.get_ifd(0x8825).update({1: "S", 2: (23.0, 33.0, 1.0), 3: "W", 4: (46.0, 38.0, 2.0)})
+    caminhos.append(pasta / "foto_celular.jpg")
+    celular.save(caminhos[-1], quality=95, exif=exif)
+
+    # Panorâmica 6000x2000
+    caminhos.append(pasta / "panoramica.jpg")
+    foto(6000, 2000, 2).save(caminhos[-1], quality=92)
+
+    # Captura de tela 2560x1600 com transparência (PNG)
+    tela = Image.new("RGBA", (2560, 1600), (245, 245, 245, 255))
+    desenho = ImageDraw.Draw(tela)
+    for y in range(80, 1560, 36):
+        desenho.rectangle((120, y, 120 + (y * 37) % 2200, y + 14), fill=(40, 40, 40, 255))
+    desenho.rectangle((2200, 0, 2560, 1600), fill=(30, 90, 200, 128))
+    caminhos.append(pasta / "captura_tela.png")
+    tela.save(caminhos[-1])
+
+    # Documento escaneado 2550x3300 (A4 a 300 dpi), PNG em tons de cinza
+    documento = Image.new("L", (2550, 3300), 250)
+    desenho = ImageDraw.Draw(documento)
+    for y in range(200, 3100, 60):
+        for x in range(200, 2300, 140):
+            desenho.rectangle((x, y, x + 60 + (x * y) % 60, y + 22), fill=30)
+    documento = Image.blend(documento, Image.effect_noise(documento.size, 20), 0.08)
+    caminhos.append(pasta / "documento.png")
+    documento.save(caminhos[-1])
+
+    # Miniatura já pequena: nada a ganhar
+    caminhos.append(pasta / "miniatura.jpg")
+    foto(400, 300, 3).save(caminhos[-1], quality=75)
+    return caminhos
+
+
+def main():
+    try:
+        _pillow()
+    except ImportError as erro:
+        print("=" * 70)
+        print("PILLOW NÃO INSTALADO")
+        print("=" * 70)
+        print(f"{erro}\n\nSem o Pillow, só a estimativa de tokens (que não precisa dele):")
+        for largura, altura in ((4032, 3024), (6000, 2000), (2560, 1600), (2550, 3300), (1024, 768)):
+            print(f"  {largura}x{altura}: OpenAI {estimar_tokens(largura, altura):>5} tokens "
+                  f"| Anthropic {estimar_tokens(largura, altura, 'anthropic'):>5} tokens")
+        return
+
+    from PIL import Image
+
+    with tempfile.TemporaryDirectory(prefix="imagens_") as nome:
+        pasta = Path(nome)
+        caminhos = criar_imagens(pasta)
+
+        print("=" * 70)
+        print("1. PREPARAÇÃO PADRÃO (OpenAI, JPEG 85, sem EXIF)")
+        print("=" * 70)
+        preparadas = PreparadorImagens().preparar(caminhos)
+        print(relatorio(preparadas))
+        celular = preparadas[0]
+        with Image.open(BytesIO(celular.partes[0].dados)) as imagem:
+            print(f"\nFoto do celular: {celular.partes[0].largura}x{celular.partes[0].altura} (em pé, rotação "
+                  f"aplicada) | EXIF no arquivo final: {dict(imagem.getexif()) or 'nenhum'}")
+        print(f"Miniatura enviada como veio (recodificar não ajudaria): {preparadas[-1].mantida}")
+
+        print("\n" + "=" * 70)
+        print("2. CONFIGURAÇÕES ALTERNATIVAS (mesmas 5 imagens)")
+        print("=" * 70)
+        configuracoes = {
+            "como está (sample022)": None,
+            "padrão": ConfigImagem(),
+            "WEBP qualidade 80": ConfigImagem(formato="WEBP", qualidade=80),
+            "máximo 1024px": ConfigImagem(max_dimensao=1024),
+            "alinhar aos tiles": ConfigImagem(alinhar_tiles=True),
+            "tiles em detail=low": ConfigImagem(dividir_tiles=True),
+            "Anthropic, como está": "anthropic",
+            "Anthropic, padrão": ConfigImagem(provedor="anthropic"),
+            "Anthropic, 1024px": ConfigImagem(provedor="anthropic", max_dimensao=1024),
+        }
+        originais = sum(c.stat().st_size for c in caminhos)
+        print(f"{'configuração':<24} {'MB enviados':>11} {'tokens':>7}")
+        for nome, config in configuracoes.items():
+            if config is None or config == "anthropic":
+                provedor = config or "openai"
+                tokens = sum(estimar_tokens(*p.dimensoes_original, provedor) for p in preparadas)
+                print(f"{nome:<24} {4 * originais / 3 / 2**20:>11.2f} {tokens:>7}")
+                continue
+            resultado = PreparadorImagens(config).preparar(caminhos)
+            print(f"{nome:<24} {4 * sum(p.bytes_final for p in resultado) / 3 / 2**20:>11.2f} "
+                  f"{sum(p.tokens_final for p in resultado):>7}")
+        exemplo = preparar_imagem(caminhos[2], ConfigImagem(alinhar_tiles=True))
+        print(f"\nAlinhamento na captura de tela: {preparadas[2].partes[0].largura}x{preparadas[2].partes[0].altura} "
+              f"({preparadas[2].tokens_final} tokens) -> {exemplo.partes[0].largura}x{exemplo.partes[0].altura} "
+              f"({exemplo.tokens_final} tokens)")
+
+        print("\n" + "=" * 70)
+        print(f"3. POOL DE THREADS PARA MENSAGENS COM VÁRIAS IMAGENS ({os.cpu_count()} CPU)")
+        print("=" * 70)
+        fotos = caminhos[:2] * 3
+        for workers in (1, 4):
+            preparador = PreparadorImagens(max_workers=workers)
+            inicio = time.perf_counter()
+            preparador.preparar(fotos)
+            print(f"max_workers={workers}: {time.perf_counter() - inicio:.2f}s para {len(fotos)} imagens "
+                  f"({preparador.workers(len(fotos))} thread(s) de fato)")
+
+        print("\n" + "=" * 70)
+        print("4. MENSAGEM PRONTA PARA O MODELO")
+        print("=" * 70)
+        mensagem, preparadas = PreparadorImagens().mensagem(
+            "Compare estas imagens. Quais são as diferenças?", caminhos[:2]
+        )
+        model = ModeloStubLocal(config=StubConfig(latencia_ms=0, jitter_ms=0))
+        resposta = model.invoke([mensagem])
+        for bloco in mensagem.content:
+            if bloco["type"] == "image_url":
+                print(f"image_url: {bloco['image_url']['url'][:40]}... "
+                      f"({len(bloco['image_url']['url']) / 1024:.0f} KB, detail={bloco['image_url']['detail']})")
+        print(f"Resposta do modelo (stub): {str(resposta.content)[:60]}")
+
+    print("\n" + "=" * 70)
+    print("OBSERVAÇÕES IMPORTANTES")
+    print("=" * 70)
+    print("""
+1. O QUE O PROVEDOR ENXERGA:
+   - O provedor reduz a imagem do lado dele (OpenAI: lado menor 768px;
+     Anthropic: ~1,15 MP). Enviar 12 MP só custa upload e latência
+   - Reduzir até esse tamanho não muda o que o modelo vê; abaixo disso
+     (max_dimensao) economiza tokens, mas detalhes pequenos (texto
+     miúdo) podem se perder
+
+2. FORMATO E EXIF:
+   - Foto: JPEG ou WEBP com qualidade 80-85. Captura de tela e
+     documento: PNG também funciona, mas costuma ser maior
+   - A rotação do EXIF é aplicada nos pixels antes de removê-lo, e
+     GPS/modelo do aparelho não saem da máquina
+   - Se recodificar não diminui o arquivo (miniaturas), a imagem é
+     enviada como veio
+
+3. TILES (OPENAI):
+   - alinhar_tiles: reduz um pouco (até 20%) quando isso elimina um
+     tile quase vazio
+   - dividir_tiles: cada tile de 512px vai como imagem detail="low"
+     (85 tokens, resolução total). Mais barato, mas o modelo vê partes
+     separadas: bom para ler documentos, ruim para entender a cena
+   - As contas usam as regras publicadas (gpt-4o); outros modelos usam
+     outros multiplicadores. Confira o usage_metadata da resposta
+
+4. PARALELISMO:
+   - O Pillow libera o GIL ao decodificar, redimensionar e codificar:
+     com vários núcleos, o pool prepara as imagens ao mesmo tempo
+   - Com 1 núcleo as threads só disputariam a CPU (e custam um pouco):
+     o preparador detecta isso (os.cpu_count()) e roda em sequência
+   - JPEGs grandes são decodificados já reduzidos (draft), que costuma
+     ser o maior ganho de tempo
+
+5. PRÓXIMOS PASSOS:
+   - Para não preparar a mesma imagem de novo, guarde o resultado no
+     cache do sample055.py
+   - Para mídia que não dá para reduzir (vídeo, PDF grande), veja o
+     envio por streaming do sample054.py
+""")
+
+
+if __name__ == "__main__":
+    main()